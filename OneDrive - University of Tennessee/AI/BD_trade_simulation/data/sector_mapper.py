@@ -4,6 +4,26 @@ Maps HS92 product codes to economic sectors for the structural transformation mo
 import pandas as pd
 import os
 
+# HS chapters of each model sector, in order of precedence
+SECTOR_CHAPTERS = {
+    'rmg': [61, 62],  # Apparel chapters
+    'leather': [41, 42, 43, 64],  # Leather, leather articles, footwear
+    'jute': [53],  # Jute and jute products
+    'frozen_food': [3, 16],  # Fish and fish preparations
+    'pharma': [30],  # Pharmaceutical products
+    'it_services': [85],  # Electrical machinery (limited trade data representation)
+    'light_engineering': [73, 76, 84, 87],  # Metal products, machinery
+    'agro_processing': [7, 8, 9, 10, 11, 12, 15, 17, 18, 19, 20, 21, 22, 23, 24],
+    'home_textiles': [63],  # Other made-up textile articles
+    'shipbuilding': [89],  # Ships, boats
+}
+
+# HS headings assigned to a sector regardless of their chapter
+SECTOR_HEADINGS = {
+    'jute': [5303, 5307, 5310],  # Jute fibres, yarn and fabrics
+    'it_services': [8471, 8473],  # Computers and parts
+}
+
 
 class SectorMapper:
     """Maps HS product codes to economic sectors and processes trade data."""
@@ -55,66 +75,19 @@ class SectorMapper:
         This uses HS92 classification to map products to the sectors used in the
         structural transformation model.
         """
-        # RMG (Ready-Made Garments)
-        rmg_chapters = [61, 62]  # Apparel chapters
-        
-        # Leather
-        leather_codes = [41, 42, 43, 64]  # Leather, leather articles, footwear
-        
-        # Jute
-        jute_codes = [53, 5303, 5307, 5310]  # Jute and jute products
-        
-        # Frozen food
-        frozen_food_codes = [3, 16]  # Fish and fish preparations
-        
-        # Pharma
-        pharma_codes = [30]  # Pharmaceutical products
-        
-        # IT services (limited trade data representation)
-        it_codes = [8471, 8473, 85]  # Computers and parts, electrical machinery
-        
-        # Light engineering
-        engineering_codes = [73, 76, 84, 87]  # Metal products, machinery
-        
-        # Agro processing
-        agro_codes = [7, 8, 9, 10, 11, 12, 15, 17, 18, 19, 20, 21, 22, 23, 24]
-        
-        # Home textiles
-        home_textile_codes = [63]  # Other made-up textile articles
-        
-        # Shipbuilding
-        shipbuilding_codes = [89]  # Ships, boats
-        
-        # For each HS code, assign a sector
+        # For each HS code, assign the first sector listing its chapter or heading
         for hs_code in self.hs_codes:
             # Convert to string for safer comparison
             hs_str = str(hs_code)
             chapter = int(hs_str[:2]) if len(hs_str) >= 2 else 0
             
-            # Assign sector based on HS code/chapter
-            if chapter in rmg_chapters:
-                self.hs_to_sector[hs_code] = 'rmg'
-            elif chapter in leather_codes:
-                self.hs_to_sector[hs_code] = 'leather'
-            elif chapter in jute_codes or hs_str.startswith('5303') or hs_str.startswith('5307') or hs_str.startswith('5310'):
-                self.hs_to_sector[hs_code] = 'jute'
-            elif chapter in frozen_food_codes:
-                self.hs_to_sector[hs_code] = 'frozen_food'
-            elif chapter in pharma_codes:
-                self.hs_to_sector[hs_code] = 'pharma'
-            elif chapter in it_codes or hs_str.startswith('8471') or hs_str.startswith('8473'):
-                self.hs_to_sector[hs_code] = 'it_services'
-            elif chapter in engineering_codes:
-                self.hs_to_sector[hs_code] = 'light_engineering'
-            elif chapter in agro_codes:
-                self.hs_to_sector[hs_code] = 'agro_processing'
-            elif chapter in home_textile_codes:
-                self.hs_to_sector[hs_code] = 'home_textiles'
-            elif chapter in shipbuilding_codes:
-                self.hs_to_sector[hs_code] = 'shipbuilding'
-            else:
-                # Other sectors not explicitly modeled
-                self.hs_to_sector[hs_code] = 'other'
+            # Other sectors not explicitly modeled
+            self.hs_to_sector[hs_code] = 'other'
+            for sector, chapters in SECTOR_CHAPTERS.items():
+                headings = SECTOR_HEADINGS.get(sector, [])
+                if chapter in chapters or any(hs_str.startswith(str(heading)) for heading in headings):
+                    self.hs_to_sector[hs_code] = sector
+                    break
         
         print(f"Mapped {len(self.hs_to_sector)} product codes to sectors")
     
@@ -22,11 +22,12 @@ import matplotlib.pyplot as plt
 from datetime import datetime
 
 # Import the simulation engine
-from simulation.simulation_engine import TradeSimulationEngine, run_simulation_from_config
+from simulation.simulation_engine import TradeSimulationEngine, run_simulation_from_config, run_scenarios_parallel, run_scenario_ensemble
+from simulation.stress_testing import run_stress_tests
 
 # Import visualization tools
 from visualization.dashboard import create_dashboard
-from visualization.plot_utils import plot_simulation_results
+from visualization.plot_utils import plot_simulation_results, plot_scenario_comparison, create_dataframe_from_results
 
 
 def load_config(config_path):
@@ -85,12 +86,24 @@ def parse_arguments():
     parser.add_argument('--scenarios', type=str, nargs='+',
                         default=['baseline', 'optimistic', 'pessimistic'],
                         help='List of scenarios to compare')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes for scenario comparison (default: one per scenario)')
+    parser.add_argument('--replicas', type=int, default=1,
+                        help='Replicas per scenario; above 1 runs a common-random-numbers ensemble')
+    parser.add_argument('--antithetic', action='store_true',
+                        help='Pair antithetic replicas in the ensemble')
+    parser.add_argument('--metric', type=str, default='export.total_exports',
+                        help='Metric path compared across scenarios in the ensemble')
     
     # Additional options
+    parser.add_argument('--stress-test', action='store_true',
+                        help='Estimate rare-event probabilities (reserve crisis, trade wars, regional breakdown) by importance sampling')
     parser.add_argument('--verbose', action='store_true',
                         help='Print detailed progress during simulation')
     parser.add_argument('--seed', type=int, default=42,
                         help='Random seed for reproducibility')
+    parser.add_argument('--outputs', type=str, nargs='+', default=None,
+                        help='Metric paths to keep in results (e.g. export.total_exports investment.gdp); default keeps full detail')
     
     return parser.parse_args()
 
@@ -149,37 +162,24 @@ def run_scenario_comparison(config, args):
     """
     print(f"\nRunning comparison of scenarios: {', '.join(args.scenarios)}")
     
-    results_by_scenario = {}
+    # Update config with command line options
+    config['random_seed'] = args.seed
     
-    # Run each scenario
-    for scenario in args.scenarios:
-        print(f"\n{'-'*50}")
-        print(f"Starting scenario: {scenario}")
-        print(f"{'-'*50}")
-        
-        # Update config for this scenario
-        scenario_config = config.copy()
-        if 'scenarios' in config and scenario in config['scenarios']:
-            # Override config with scenario-specific settings
-            for key, value in config['scenarios'][scenario].items():
-                # Handle nested dictionaries
-                if isinstance(value, dict) and key in scenario_config:
-                    scenario_config[key].update(value)
-                else:
-                    scenario_config[key] = value
-        
-        # Run simulation with this scenario
-        simulation = TradeSimulationEngine(
-            config=scenario_config,
-            start_year=args.start_year,
-            end_year=args.end_year,
-            scenario=scenario
-        )
-        
-        results = simulation.run_simulation(verbose=args.verbose)
-        results_by_scenario[scenario] = results
+    if args.replicas > 1:
+        return run_ensemble_comparison(config, args)
+    
+    # Run each scenario once, in parallel worker processes
+    results_by_scenario = run_scenarios_parallel(
+        config,
+        args.scenarios,
+        start_year=args.start_year,
+        end_year=args.end_year,
+        max_workers=args.workers,
+        verbose=args.verbose
+    )
     
     # Save comparative results
+    os.makedirs(args.output_dir, exist_ok=True)
     comparison_file = os.path.join(args.output_dir, f"scenario_comparison_{args.start_year}_{args.end_year}.json")
     with open(comparison_file, 'w') as f:
         json.dump({
@@ -194,34 +194,116 @@ def run_scenario_comparison(config, args):
     
     print(f"\nComparison results saved to {comparison_file}")
     
-    # Generate comparison plots
+    # Generate comparison plots directly from the stored results
     if args.plot:
-        # Initialize first simulation object for plotting
-        first_scenario = args.scenarios[0]
-        simulation = TradeSimulationEngine(
-            config=config,
-            start_year=args.start_year,
-            end_year=args.end_year,
-            scenario=first_scenario
-        )
-        
-        # Create list of other simulations
-        other_simulations = []
-        for scenario in args.scenarios[1:]:
-            other_sim = TradeSimulationEngine(
-                config=config,
-                start_year=args.start_year,
-                end_year=args.end_year,
-                scenario=scenario
-            )
-            other_sim.results = results_by_scenario[scenario]
-            other_simulations.append(other_sim)
-        
-        # Run comparison plot
+        scenarios_data = {
+            scenario: create_dataframe_from_results(results)
+            for scenario, results in results_by_scenario.items()
+        }
         comparison_plot_file = os.path.join(args.output_dir, f"scenario_comparison_plots.pdf")
-        simulation.results = results_by_scenario[first_scenario]
-        simulation.run_scenario_comparison(other_simulations, save_path=comparison_plot_file)
-        print(f"Comparison plots saved to {comparison_plot_file}")
+        plot_scenario_comparison(scenarios_data, save_path=comparison_plot_file)
+    
+    return results_by_scenario
+
+
+def run_ensemble_comparison(config, args):
+    """
+    Run a common-random-numbers ensemble and report scenario differences.
+    
+    Args:
+        config (dict): Configuration dictionary
+        args (argparse.Namespace): Command line arguments
+    
+    Returns:
+        dict: Ensemble values and summary
+    """
+    print(f"Running {args.replicas} replicas per scenario with common random numbers"
+          f"{' and antithetic pairs' if args.antithetic else ''}")
+    
+    ensemble = run_scenario_ensemble(
+        config,
+        args.scenarios,
+        replicas=args.replicas,
+        start_year=args.start_year,
+        end_year=args.end_year,
+        metric=args.metric,
+        antithetic=args.antithetic,
+        max_workers=args.workers
+    )
+    
+    print(f"\n{args.metric} in {args.end_year}, difference from {args.scenarios[0]}:")
+    for scenario, stats in ensemble['summary'].items():
+        print(f"  {scenario}: {stats['mean_delta']:.2f} "
+              f"(95% CI {stats['ci_95'][0]:.2f} to {stats['ci_95'][1]:.2f}, "
+              f"variance reduction x{stats['variance_reduction_factor']:.1f})")
+        if 'agreement_z' in stats:
+            print(f"    plain CRN estimate {stats['crn_mean_delta']:.2f} (SE {stats['crn_standard_error']:.2f}), "
+                  f"antithetic agreement z = {stats['agreement_z']:.2f}"
+                  f"{'' if stats['antithetic_consistent'] else ' - INCONSISTENT'}")
+    
+    # Save ensemble results
+    os.makedirs(args.output_dir, exist_ok=True)
+    ensemble_file = os.path.join(args.output_dir, f"scenario_ensemble_{args.start_year}_{args.end_year}.json")
+    with open(ensemble_file, 'w') as f:
+        json.dump({
+            'metadata': {
+                'scenarios': args.scenarios,
+                'start_year': args.start_year,
+                'end_year': args.end_year,
+                'replicas': args.replicas,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            },
+            **ensemble
+        }, f, indent=2)
+    
+    print(f"\nEnsemble results saved to {ensemble_file}")
+    
+    return ensemble
+
+
+def run_stress_test(config, args):
+    """
+    Estimate tail-event probabilities by importance sampling.
+    
+    Args:
+        config (dict): Configuration dictionary
+        args (argparse.Namespace): Command line arguments
+    
+    Returns:
+        dict: Importance sampling summaries by test
+    """
+    print(f"\nRunning rare-event stress tests from {args.start_year} to {args.end_year}...")
+    
+    stress_results = run_stress_tests(config, start_year=args.start_year, end_year=args.end_year, seed=args.seed)
+    
+    for test, summary in stress_results.items():
+        if not summary['reliable']:
+            reliability = f"unreliable, ESS {summary['effective_sample_size']:.1f}"
+        elif summary['method'] == 'monte_carlo':
+            reliability = "plain Monte Carlo"
+        else:
+            reliability = (f"ESS {summary['effective_sample_size']:.0f}, equivalent to "
+                           f"{summary['equivalent_monte_carlo_runs']:.0f} plain Monte Carlo runs")
+        print(f"  {test} ({summary['event']}): {summary['probability']:.3g} "
+              f"(SE {summary['standard_error']:.2g}, {summary['events_sampled']} events sampled, {reliability})")
+    
+    # Save stress test results
+    os.makedirs(args.output_dir, exist_ok=True)
+    stress_file = os.path.join(args.output_dir, f"stress_test_results_{args.start_year}_{args.end_year}.json")
+    with open(stress_file, 'w') as f:
+        json.dump({
+            'metadata': {
+                'start_year': args.start_year,
+                'end_year': args.end_year,
+                'seed': args.seed,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            },
+            **stress_results
+        }, f, indent=2)
+    
+    print(f"\nStress test results saved to {stress_file}")
+    
+    return stress_results
 
 
 def main():
@@ -231,12 +313,16 @@ def main():
     
     # Load configuration
     config = load_config(args.config)
+    if args.outputs:
+        config['output_spec'] = args.outputs
     
     print(f"Bangladesh Trade Dynamics Simulation (2025-2050)")
     print(f"Configuration loaded from: {args.config}")
     
     # Run simulation based on requested mode
-    if args.compare:
+    if args.stress_test:
+        run_stress_test(config, args)
+    elif args.compare:
         run_scenario_comparison(config, args)
     else:
         results = run_single_scenario(config, args)
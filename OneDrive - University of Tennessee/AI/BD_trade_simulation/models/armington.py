@@ -0,0 +1,320 @@
+"""
+Armington partial-equilibrium tariff model for Bangladesh trade simulation.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, List, Tuple, Any, Optional
+
+from data.sector_mapper import SECTOR_CHAPTERS, SECTOR_HEADINGS
+
+# Sector of each HS chapter, and of HS headings assigned to a different sector than their chapter
+CHAPTER_SECTORS = {chapter: sector for sector, chapters in SECTOR_CHAPTERS.items() for chapter in chapters}
+HEADING_SECTORS = {heading: sector for sector, headings in SECTOR_HEADINGS.items() for heading in headings}
+
+# Armington substitution elasticities between Bangladeshi and other suppliers
+SECTOR_ELASTICITIES = {
+    'rmg': 4.5,
+    'home_textiles': 4.0,
+    'leather': 4.0,
+    'jute': 3.0,
+    'frozen_food': 3.5,
+    'pharma': 2.5,
+    'it_services': 3.0,
+    'light_engineering': 3.0,
+    'agro_processing': 3.0,
+    'shipbuilding': 2.0,
+}
+DEFAULT_ELASTICITY = 3.0
+
+# Destination markets by ISO3 code
+MARKET_GROUPS = {
+    'eu': ['AUT', 'BEL', 'BGR', 'HRV', 'CYP', 'CZE', 'DNK', 'EST', 'FIN', 'FRA', 'DEU', 'GRC', 'HUN', 'IRL',
+           'ITA', 'LVA', 'LTU', 'LUX', 'MLT', 'NLD', 'POL', 'PRT', 'ROU', 'SVK', 'SVN', 'ESP', 'SWE'],
+    'uk': ['GBR'],
+    'us': ['USA'],
+    'canada': ['CAN'],
+    'japan': ['JPN'],
+    'australia': ['AUS'],
+}
+
+
+def market_groups_from_country_codes(country_codes: pd.DataFrame,
+                                     groups: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[int]]:
+    """
+    Resolve destination market groups to numeric country codes
+
+    Args:
+        country_codes: Country code table with 'country_code' and 'country_iso3' columns
+        groups: ISO3 codes by market (MARKET_GROUPS if None)
+
+    Returns:
+        Numeric country codes by market
+    """
+    groups = groups or MARKET_GROUPS
+    return {
+        market: country_codes.loc[country_codes['country_iso3'].isin(iso3), 'country_code'].astype(int).tolist()
+        for market, iso3 in groups.items()
+    }
+
+
+def hs6_sectors(products: np.ndarray) -> np.ndarray:
+    """
+    Model sector of each HS6 product code
+
+    Args:
+        products: Integer HS6 codes
+
+    Returns:
+        Sector name per product ('other' if not mapped)
+    """
+    products = np.asarray(products, dtype=np.int64)
+    chapter_table = np.array(['other'] * 100, dtype=object)
+    for chapter, sector in CHAPTER_SECTORS.items():
+        chapter_table[chapter] = sector
+
+    sectors = chapter_table[products // 10000]
+    headings = products // 100
+    for heading, sector in HEADING_SECTORS.items():
+        sectors[headings == heading] = sector
+    return sectors
+
+
+class ArmingtonTariffEngine:
+    """
+    Line-level partial-equilibrium tariff simulator
+
+    Holds Bangladesh's exports as a sparse HS6 x destination matrix. A tariff
+    change on a line in a market changes the tariff factor by
+    ratio = (1 + t1) / (1 + t0), and with Armington (CES) demand the exporter's
+    FOB value changes by ratio^-sigma / (s * ratio^(1 - sigma) + 1 - s), where
+    s is Bangladesh's share of the market's imports of the line (0 for a small
+    supplier). All flows are computed as one vector operation over the nonzero
+    entries and aggregated to model sectors and destination markets.
+    """
+
+    def __init__(self,
+                 products: np.ndarray,
+                 destinations: np.ndarray,
+                 values: np.ndarray,
+                 market_groups: Dict[str, List[int]],
+                 import_shares: Optional[np.ndarray] = None,
+                 elasticities: Optional[Dict[str, float]] = None,
+                 sector_map: Optional[Dict[int, str]] = None):
+        """
+        Initialize tariff engine
+
+        Args:
+            products: HS6 code of each export flow
+            destinations: Destination country code of each export flow
+            values: Export value of each flow
+            market_groups: Destination country codes by market (e.g. 'eu', 'uk', 'canada')
+            import_shares: Optional Bangladesh share of the destination's imports of each flow's line
+            elasticities: Armington elasticities by sector, overriding SECTOR_ELASTICITIES
+            sector_map: Optional sector by HS6 code, overriding the chapter mapping
+        """
+        products = np.asarray(products, dtype=np.int64)
+        destinations = np.asarray(destinations, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        shares = np.zeros(len(values)) if import_shares is None else np.asarray(import_shares, dtype=float)
+
+        self.products, product_index = np.unique(products, return_inverse=True)
+        self.destinations, destination_index = np.unique(destinations, return_inverse=True)
+
+        # Export matrix (lines x destinations); duplicate flows are summed
+        self.exports = sparse.csr_matrix((values, (product_index, destination_index)),
+                                         shape=(len(self.products), len(self.destinations)))
+        flows = self.exports.tocoo()
+        self.flow_products = flows.row
+        self.flow_destinations = flows.col
+        self.flow_values = flows.data
+
+        # Import shares aligned with the canonical flows (value-weighted if flows were merged)
+        share_matrix = sparse.csr_matrix((shares * values, (product_index, destination_index)),
+                                         shape=self.exports.shape)
+        weighted_shares = np.asarray(share_matrix[self.flow_products, self.flow_destinations]).ravel()
+        self.flow_import_shares = np.divide(weighted_shares, self.flow_values,
+                                            out=np.zeros_like(self.flow_values), where=self.flow_values > 0)
+
+        # Sectors of lines
+        line_sectors = hs6_sectors(self.products)
+        if sector_map:
+            line_sectors = np.array([sector_map.get(int(code), sector)
+                                     for code, sector in zip(self.products, line_sectors)], dtype=object)
+        self.sectors, self.line_sector_index = np.unique(line_sectors.astype(str), return_inverse=True)
+        self.sectors = self.sectors.tolist()
+        self.flow_sectors = self.line_sector_index[self.flow_products]
+
+        # Armington elasticity of each flow
+        sector_elasticities = {**SECTOR_ELASTICITIES, **(elasticities or {})}
+        elasticity_by_sector = np.array([sector_elasticities.get(s, DEFAULT_ELASTICITY) for s in self.sectors])
+        self.flow_elasticities = elasticity_by_sector[self.flow_sectors]
+
+        # Market of each destination; destinations outside the groups fall in 'other'
+        self.markets = list(market_groups.keys()) + ['other']
+        destination_market = np.full(len(self.destinations), len(self.markets) - 1, dtype=int)
+        for m, codes in enumerate(market_groups.values()):
+            destination_market[np.isin(self.destinations, codes)] = m
+        self.flow_markets = destination_market[self.flow_destinations]
+
+    @classmethod
+    def from_trade_data(cls,
+                        trade_data: pd.DataFrame,
+                        market_groups: Dict[str, List[int]],
+                        exporter: int = 50,
+                        year: Optional[int] = None,
+                        **kwargs) -> 'ArmingtonTariffEngine':
+        """
+        Build the engine from BACI-format trade data
+
+        If the data holds other exporters' flows into the same markets, Bangladesh's
+        import share of each line and market is computed from them.
+
+        Args:
+            trade_data: Trade flows with columns 't', 'i', 'j', 'k', 'v'
+            market_groups: Destination country codes by market
+            exporter: Country code of Bangladesh
+            year: Year to use (latest year in the data if None)
+            **kwargs: Further arguments for the engine (elasticities, sector_map)
+
+        Returns:
+            ArmingtonTariffEngine instance
+        """
+        if year is None:
+            year = int(trade_data['t'].max())
+        flows = trade_data[trade_data['t'] == year]
+        exports = flows[flows['i'] == exporter]
+
+        import_shares = None
+        if (flows['i'] != exporter).any():
+            market_imports = flows.groupby(['j', 'k'])['v'].sum()
+            totals = market_imports.reindex(pd.MultiIndex.from_arrays([exports['j'], exports['k']])).to_numpy()
+            import_shares = np.divide(exports['v'].to_numpy(), totals,
+                                      out=np.zeros(len(exports)), where=totals > 0)
+
+        return cls(exports['k'].to_numpy(), exports['j'].to_numpy(), exports['v'].to_numpy(),
+                   market_groups, import_shares=import_shares, **kwargs)
+
+    def line_rates(self, rates_by_market: Dict[str, Any]) -> np.ndarray:
+        """
+        Tariff rate of every export flow
+
+        Args:
+            rates_by_market: Rate by market, either a scalar or a dict keyed by HS
+                prefixes ('61', '6109', '610910', or integers) with an optional
+                'default'; the most specific prefix applies. Markets not given have rate 0.
+
+        Returns:
+            Rate per flow, aligned with the nonzero entries of the export matrix
+        """
+        rates = np.zeros(len(self.flow_values))
+
+        for market, spec in rates_by_market.items():
+            if market not in self.markets:
+                continue
+            in_market = self.flow_markets == self.markets.index(market)
+            if not isinstance(spec, dict):
+                rates[in_market] = spec
+                continue
+
+            codes = self.products[self.flow_products[in_market]]
+            market_rates = np.full(len(codes), float(spec.get('default', 0.0)))
+
+            # Chapters, then headings, then subheadings override coarser rates; keys are
+            # zero-padded, so integer keys that lost a leading zero ('0303' as 303) keep their level
+            levels = {2: {}, 4: {}, 6: {}}
+            for key, rate in spec.items():
+                if key == 'default':
+                    continue
+                digits = next((d for d in levels if len(str(key)) <= d), None)
+                if digits is None:
+                    raise ValueError(f"HS prefix {key!r} of market {market} has more than 6 digits")
+                levels[digits][int(str(key).zfill(digits))] = rate
+            for digits, keyed in levels.items():
+                if not keyed:
+                    continue
+                keys = np.array(sorted(keyed), dtype=np.int64)
+                key_rates = np.array([keyed[key] for key in keys], dtype=float)
+                prefixes = codes // 10 ** (6 - digits)
+                position = np.minimum(np.searchsorted(keys, prefixes), len(keys) - 1)
+                matched = keys[position] == prefixes
+                market_rates[matched] = key_rates[position[matched]]
+
+            rates[in_market] = market_rates
+
+        return rates
+
+    def _aggregate(self, weights: np.ndarray) -> np.ndarray:
+        """Sum flow weights into a sector x market array"""
+        cells = self.flow_sectors * len(self.markets) + self.flow_markets
+        totals = np.bincount(cells, weights=weights, minlength=len(self.sectors) * len(self.markets))
+        return totals.reshape(len(self.sectors), len(self.markets))
+
+    def simulate(self, rates_before: Any, rates_after: Any, top_lines: int = 10) -> Dict[str, Any]:
+        """
+        Simulate a tariff scenario
+
+        Args:
+            rates_before: Current rates (dict for line_rates, or per-flow array)
+            rates_after: Scenario rates (dict for line_rates, or per-flow array)
+            top_lines: Number of largest line-level losses to report
+
+        Returns:
+            Dict with total, sector and market export changes, trade-weighted tariff
+            rates and changes by sector and market, and the largest line-level losses
+        """
+        before = self.line_rates(rates_before) if isinstance(rates_before, dict) else np.asarray(rates_before, dtype=float)
+        after = self.line_rates(rates_after) if isinstance(rates_after, dict) else np.asarray(rates_after, dtype=float)
+
+        # Armington response of each flow to its tariff factor change
+        ratio = (1 + after) / (1 + before)
+        sigma = self.flow_elasticities
+        shares = self.flow_import_shares
+        growth = ratio ** -sigma / (shares * ratio ** (1 - sigma) + (1 - shares))
+        scenario_values = self.flow_values * growth
+
+        baseline = self._aggregate(self.flow_values)
+        scenario = self._aggregate(scenario_values)
+        weighted_after = self._aggregate(self.flow_values * after)
+        weighted_change = self._aggregate(self.flow_values * (after - before))
+
+        def summarize(base, new):
+            return {
+                'baseline': float(base),
+                'scenario': float(new),
+                'change': float(new - base),
+                'change_pct': float((new - base) / base * 100) if base > 0 else 0.0,
+            }
+
+        def weighted(totals, base):
+            return np.divide(totals, base, out=np.zeros_like(totals), where=base > 0)
+
+        by_sector = {sector: summarize(baseline[s].sum(), scenario[s].sum()) for s, sector in enumerate(self.sectors)}
+        by_market = {market: summarize(baseline[:, m].sum(), scenario[:, m].sum()) for m, market in enumerate(self.markets)}
+
+        tariff_rates = weighted(weighted_after, baseline)
+        tariff_changes = weighted(weighted_change, baseline)
+        changed = after != before
+
+        # Largest line-level losses
+        losses = scenario_values - self.flow_values
+        worst = np.argsort(losses)[:top_lines]
+        largest_losses = [{
+            'hs6': f"{int(self.products[self.flow_products[f]]):06d}",
+            'destination': int(self.destinations[self.flow_destinations[f]]),
+            'sector': self.sectors[self.flow_sectors[f]],
+            'change': float(losses[f]),
+        } for f in worst if losses[f] < 0]
+
+        return {
+            **summarize(baseline.sum(), scenario.sum()),
+            'lines_affected': int(changed.sum()),
+            'value_affected': float(self.flow_values[changed].sum()),
+            'by_sector': by_sector,
+            'by_market': by_market,
+            'tariff_rates': {sector: dict(zip(self.markets, tariff_rates[s].tolist()))
+                             for s, sector in enumerate(self.sectors)},
+            'tariff_changes': {sector: dict(zip(self.markets, tariff_changes[s].tolist()))
+                               for s, sector in enumerate(self.sectors)},
+            'largest_line_losses': largest_losses,
+        }
@@ -0,0 +1,256 @@
+"""
+Economic complexity and product space model for Bangladesh trade simulation.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, List, Tuple, Any, Optional
+
+from models.rca import RCAEngine
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    """Zero mean, unit standard deviation"""
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else values - values.mean()
+
+
+class ComplexityEngine:
+    """
+    Economic complexity indices and product space from the binary RCA matrix
+
+    With M the country x product matrix of RCA >= 1, diversity k_c and ubiquity
+    k_p, ECI is the second eigenvector of M_cc = D_c^-1 M D_p^-1 M^T. It is
+    taken from the symmetric matrix D_c^-1/2 M D_p^-1 M^T D_c^-1/2 (countries x
+    countries, small), and PCI follows from the same eigenvector as
+    D_p^-1 M^T K, so the large product x product eigenproblem is never solved.
+    Proximity is phi_pp' = (M^T M)_pp' / max(k_p, k_p'), a sparse matrix
+    product. Indices and proximity are cached per year, and a country's
+    density over the product space (its diversification opportunities) is one
+    sparse vector-matrix product.
+    """
+
+    def __init__(self, rca_engine: RCAEngine, threshold: float = 1.0):
+        """
+        Initialize complexity engine
+
+        Args:
+            rca_engine: RCA engine built from trade data
+            threshold: RCA level counted as a revealed advantage
+        """
+        self.rca_engine = rca_engine
+        self.threshold = threshold
+        self._specialization = {}
+        self._indices = {}
+        self._proximity = {}
+        self._proximity_totals = {}
+
+    def specialization(self, year: Optional[int] = None) -> sparse.csr_matrix:
+        """Binary country x product matrix M of a year (cached)"""
+        year = self.rca_engine.resolve_year(year)
+        if year not in self._specialization:
+            self._specialization[year] = self.rca_engine.specialization_matrix(year, self.threshold)
+        return self._specialization[year]
+
+    def complexity(self, year: Optional[int] = None) -> Dict[str, pd.Series]:
+        """
+        ECI and PCI by the eigenvector method
+
+        Args:
+            year: Year (latest if None)
+
+        Returns:
+            Dict with 'eci' (by country code), 'pci' (by HS6 code), 'diversity' and
+            'ubiquity'; countries and products without any revealed advantage get NaN
+        """
+        year = self.rca_engine.resolve_year(year)
+        if year in self._indices:
+            return self._indices[year]
+
+        specialization = self.specialization(year)
+        diversity = np.asarray(specialization.sum(axis=1)).ravel()
+        ubiquity = np.asarray(specialization.sum(axis=0)).ravel()
+        countries = np.flatnonzero(diversity > 0)
+        products = np.flatnonzero(ubiquity > 0)
+        M = specialization[countries][:, products]
+        k_c, k_p = diversity[countries], ubiquity[products]
+
+        # Symmetric form of M_cc; its top eigenvector is sqrt(k_c) with eigenvalue 1
+        scaled = sparse.diags(1 / np.sqrt(k_c)) @ M
+        symmetric = (scaled @ sparse.diags(1 / k_p) @ scaled.T).toarray()
+        _, eigenvectors = np.linalg.eigh(symmetric)
+        country_vector = eigenvectors[:, -2] / np.sqrt(k_c)
+
+        # ECI rises with diversity
+        if np.corrcoef(country_vector, k_c)[0, 1] < 0:
+            country_vector = -country_vector
+        product_vector = (M.T @ country_vector) / k_p
+
+        eci = np.full(len(diversity), np.nan)
+        pci = np.full(len(ubiquity), np.nan)
+        eci[countries] = _standardize(country_vector)
+        pci[products] = _standardize(product_vector)
+
+        indices = {
+            'eci': pd.Series(eci, index=self.rca_engine.countries, name='eci'),
+            'pci': pd.Series(pci, index=self.rca_engine.products, name='pci'),
+            'diversity': pd.Series(diversity, index=self.rca_engine.countries, name='diversity'),
+            'ubiquity': pd.Series(ubiquity, index=self.rca_engine.products, name='ubiquity'),
+        }
+        self._indices[year] = indices
+        return indices
+
+    def reflections(self, year: Optional[int] = None, iterations: int = 18) -> Dict[str, pd.Series]:
+        """
+        ECI and PCI by the method of reflections
+
+        Converges to the eigenvector solution as iterations grow. Signs are set so
+        that ECI rises with diversity and PCI with the average ECI of exporters.
+
+        Args:
+            year: Year (latest if None)
+            iterations: Number of reflections
+
+        Returns:
+            Dict with standardized 'eci' and 'pci' (NaN where undefined)
+        """
+        specialization = self.specialization(year)
+        diversity = np.asarray(specialization.sum(axis=1)).ravel()
+        ubiquity = np.asarray(specialization.sum(axis=0)).ravel()
+        countries = np.flatnonzero(diversity > 0)
+        products = np.flatnonzero(ubiquity > 0)
+        M = specialization[countries][:, products]
+
+        k_c, k_p = diversity[countries].astype(float), ubiquity[products].astype(float)
+        for _ in range(iterations):
+            k_c, k_p = (M @ k_p) / diversity[countries], (M.T @ k_c) / ubiquity[products]
+
+        if np.corrcoef(k_c, diversity[countries])[0, 1] < 0:
+            k_c = -k_c
+        if np.corrcoef(k_p, (M.T @ k_c) / ubiquity[products])[0, 1] < 0:
+            k_p = -k_p
+
+        eci = np.full(len(diversity), np.nan)
+        pci = np.full(len(ubiquity), np.nan)
+        eci[countries] = _standardize(k_c)
+        pci[products] = _standardize(k_p)
+        return {
+            'eci': pd.Series(eci, index=self.rca_engine.countries, name='eci'),
+            'pci': pd.Series(pci, index=self.rca_engine.products, name='pci'),
+        }
+
+    def proximity(self, year: Optional[int] = None) -> sparse.csr_matrix:
+        """
+        Product space proximity matrix of a year (cached)
+
+        Args:
+            year: Year (latest if None)
+
+        Returns:
+            Symmetric product x product CSR matrix of proximities (zero diagonal)
+        """
+        year = self.rca_engine.resolve_year(year)
+        if year not in self._proximity:
+            specialization = self.specialization(year)
+            ubiquity = np.asarray(specialization.sum(axis=0)).ravel()
+            co_occurrence = (specialization.T @ specialization).tocsr()
+            co_occurrence.setdiag(0)
+            co_occurrence.eliminate_zeros()
+
+            rows = np.repeat(np.arange(co_occurrence.shape[0]), np.diff(co_occurrence.indptr))
+            co_occurrence.data = co_occurrence.data / np.maximum(ubiquity[rows], ubiquity[co_occurrence.indices])
+            self._proximity[year] = co_occurrence
+            self._proximity_totals[year] = np.asarray(co_occurrence.sum(axis=0)).ravel()
+        return self._proximity[year]
+
+    def density(self, country: int = 50, year: Optional[int] = None) -> pd.Series:
+        """
+        Density of a country's capabilities around every product
+
+        Args:
+            country: Country code (Bangladesh by default)
+            year: Year (latest if None)
+
+        Returns:
+            Series of density (0-1) by HS6 code
+        """
+        year = self.rca_engine.resolve_year(year)
+        proximity = self.proximity(year)
+        totals = self._proximity_totals[year]
+        row = self.specialization(year)[self.rca_engine.country_row(country)]
+        near = np.asarray((row @ proximity).todense()).ravel()
+        density = np.divide(near, totals, out=np.zeros_like(near), where=totals > 0)
+        return pd.Series(density, index=self.rca_engine.products, name='density')
+
+    def diversification_opportunities(self,
+                                      country: int = 50,
+                                      year: Optional[int] = None,
+                                      n: int = 20,
+                                      min_pci: Optional[float] = None) -> pd.DataFrame:
+        """
+        Products without a revealed advantage that are nearest to a country's capabilities
+
+        Args:
+            country: Country code (Bangladesh by default)
+            year: Year (latest if None)
+            n: Number of products
+            min_pci: Only consider products at least this complex
+
+        Returns:
+            DataFrame with HS6 code, density, PCI and current RCA, densest first
+        """
+        density = self.density(country, year).to_numpy()
+        pci = self.complexity(year)['pci'].to_numpy()
+        rca = self.rca_engine.country_rca(country, year).to_numpy()
+
+        candidates = rca < self.threshold
+        if min_pci is not None:
+            candidates &= pci >= min_pci
+        candidates = np.flatnonzero(candidates)
+
+        if len(candidates) > n:
+            candidates = candidates[np.argpartition(-density[candidates], n - 1)[:n]]
+        candidates = candidates[np.argsort(-density[candidates], kind='stable')]
+        return pd.DataFrame({
+            'product': self.rca_engine.products[candidates],
+            'density': density[candidates],
+            'pci': pci[candidates],
+            'rca': rca[candidates],
+        })
+
+    def nearest_products(self, product: int, year: Optional[int] = None, n: int = 10) -> pd.Series:
+        """
+        Products closest to a product in the product space
+
+        Args:
+            product: HS6 code
+            year: Year (latest if None)
+            n: Number of neighbours
+
+        Returns:
+            Series of proximity by HS6 code, closest first
+        """
+        row = self.proximity(year)[self.rca_engine.product_column(product)]
+        neighbours, values = row.indices, row.data
+        if len(values) > n:
+            top = np.argpartition(-values, n - 1)[:n]
+            neighbours, values = neighbours[top], values[top]
+        order = np.argsort(-values, kind='stable')
+        return pd.Series(values[order], index=self.rca_engine.products[neighbours[order]], name='proximity')
+
+    def capability_percentiles(self, country: int = 50, years: Optional[List[int]] = None) -> pd.Series:
+        """
+        Percentile rank (0-1) of a country's ECI among all ranked countries, by year
+
+        Args:
+            country: Country code (Bangladesh by default)
+            years: Years (all years in the data if None)
+
+        Returns:
+            Series of ECI percentile by year (NaN if the country is not ranked)
+        """
+        percentiles = {}
+        for year in (years or self.rca_engine.years):
+            eci = self.complexity(year)['eci'].dropna()
+            percentiles[year] = float((eci < eci[country]).mean()) if country in eci.index else np.nan
+        return pd.Series(percentiles, name='eci_percentile')
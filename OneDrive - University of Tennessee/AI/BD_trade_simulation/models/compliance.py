@@ -4,6 +4,7 @@ Compliance model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
 
 
 class ComplianceModel:
@@ -32,8 +33,29 @@ class ComplianceModel:
         self.product = ProductStandardsModel(self.product_standards)
         
         # Historical data
-        self.historical_compliance = {}
+        self.historical_compliance = ModelHistory()
     
+    @property
+    def include_details(self) -> bool:
+        """Whether sub-models report per-standard, per-area and per-sector detail"""
+        return self.labor.include_details
+    
+    @include_details.setter
+    def include_details(self, value: bool):
+        self.labor.include_details = value
+        self.environmental.include_details = value
+        self.product.include_details = value
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """Random generator shared by the sub-models"""
+        return self.labor.rng
+
+    @rng.setter
+    def rng(self, value: np.random.Generator):
+        self.labor.rng = value
+        self.environmental.rng = value
+
     def simulate_compliance_environment(self, 
                                       year_index: int,
                                       simulation_year: int,
@@ -113,7 +135,7 @@ class ComplianceModel:
         }
         
         # Store historical data
-        self.historical_compliance[year_index] = results
+        self.historical_compliance.record(year_index, results)
         
         return results
 
@@ -154,8 +176,14 @@ class LaborStandardsModel:
         self.living_wage = 150  # USD per month
         self.living_wage_growth = 0.04  # Annual growth
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
+        # Whether to report per-item detail in results
+        self.include_details = True
+        
         # Historical data
-        self.historical_standards = {}
+        self.historical_standards = ModelHistory()
     
     def simulate_standards(self,
                          year_index: int,
@@ -190,7 +218,7 @@ class LaborStandardsModel:
             base_improvement = 0.02 * regulatory_pressure + 0.03 * buyer_requirements
             
             # Random variation
-            variation = np.random.normal(0, 0.01)
+            variation = self.rng.normal(0, 0.01)
             
             # Apply improvement with diminishing returns
             improvement = base_improvement * (1 - level * 0.5) + variation
@@ -227,7 +255,7 @@ class LaborStandardsModel:
         unrest_probability = self.unrest_risk * (1 - regulatory_pressure * 0.3)
         
         # Determine if unrest occurs
-        unrest_occurs = np.random.random() < unrest_probability
+        unrest_occurs = self.rng.random() < unrest_probability
         
         # Compile results
         results = {
@@ -237,7 +265,6 @@ class LaborStandardsModel:
             'minimum_wage_growth': effective_wage_growth,
             'living_wage': self.living_wage,
             'living_wage_gap': living_wage_gap,
-            'standards_compliance': self.standards.copy(),
             'average_compliance': avg_compliance,
             'compliance_cost': total_compliance_cost,
             'market_premium': market_premium,
@@ -245,8 +272,11 @@ class LaborStandardsModel:
             'unrest_occurs': unrest_occurs,
         }
         
+        if self.include_details:
+            results['standards_compliance'] = self.standards.copy()
+        
         # Store historical data
-        self.historical_standards[year_index] = results
+        self.historical_standards.record(year_index, results)
         
         return results
 
@@ -285,8 +315,14 @@ class EnvironmentalComplianceModel:
         # Carbon intensity
         self.carbon_intensity = 0.8  # Relative to global average (1.0)
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
+        # Whether to report per-item detail in results
+        self.include_details = True
+        
         # Historical data
-        self.historical_compliance = {}
+        self.historical_compliance = ModelHistory()
     
     def simulate_compliance(self,
                           year_index: int,
@@ -338,7 +374,7 @@ class EnvironmentalComplianceModel:
                 base_improvement += carbon_tax_rate * 0.5
             
             # Random variation
-            variation = np.random.normal(0, 0.01)
+            variation = self.rng.normal(0, 0.01)
             
             # Apply improvement with diminishing returns
             improvement = base_improvement * (1 - level * 0.5) + variation
@@ -387,15 +423,17 @@ class EnvironmentalComplianceModel:
             'carbon_tax_implemented': carbon_tax_implemented,
             'carbon_tax_rate': carbon_tax_rate,
             'green_certification_adoption': self.green_certification['current_adoption'],
-            'compliance_areas': self.compliance_areas.copy(),
             'average_compliance': avg_compliance,
             'carbon_intensity': self.carbon_intensity,
             'compliance_cost': total_compliance_cost,
             'market_premium': market_premium,
         }
         
+        if self.include_details:
+            results['compliance_areas'] = self.compliance_areas.copy()
+        
         # Store historical data
-        self.historical_compliance[year_index] = results
+        self.historical_compliance.record(year_index, results)
         
         return results
 
@@ -461,8 +499,11 @@ class ProductStandardsModel:
             'other': 0.3,
         }
         
+        # Whether to report per-item detail in results
+        self.include_details = True
+        
         # Historical data
-        self.historical_standards = {}
+        self.historical_standards = ModelHistory()
     
     def simulate_standards(self,
                          year_index: int,
@@ -491,6 +532,8 @@ class ProductStandardsModel:
         
         # Update sector standards
         sector_results = {}
+        total_requirements = 0
+        total_compliance = 0
         
         for sector, standards in self.sector_standards.items():
             # Update requirements complexity
@@ -515,12 +558,16 @@ class ProductStandardsModel:
             standards['current_requirements'] = new_requirements
             standards['current_compliance'] = new_compliance
             
+            total_requirements += new_requirements
+            total_compliance += new_compliance
+            
             # Store in results
-            sector_results[sector] = {
-                'requirements': new_requirements,
-                'compliance': new_compliance,
-                'gap': new_gap,
-            }
+            if self.include_details:
+                sector_results[sector] = {
+                    'requirements': new_requirements,
+                    'compliance': new_compliance,
+                    'gap': new_gap,
+                }
         
         # Update certification adoption
         certification_results = {}
@@ -536,11 +583,12 @@ class ProductStandardsModel:
             new_adoption = min(0.9, adoption + adjusted_increase * (1 - adoption * 0.7))
             self.certifications[cert] = new_adoption
             
-            certification_results[cert] = new_adoption
+            if self.include_details:
+                certification_results[cert] = new_adoption
         
         # Calculate average standards compliance
-        avg_requirements = sum(s['requirements'] for s in sector_results.values()) / len(sector_results)
-        avg_compliance = sum(s['compliance'] for s in sector_results.values()) / len(sector_results)
+        avg_requirements = total_requirements / len(self.sector_standards)
+        avg_compliance = total_compliance / len(self.sector_standards)
         avg_gap = avg_requirements - avg_compliance
         
         # Calculate compliance costs
@@ -572,8 +620,6 @@ class ProductStandardsModel:
             'simulation_year': simulation_year,
             'testing_capacity': self.testing_capacity,
             'compliance_capability': self.compliance_capability,
-            'sector_standards': sector_results,
-            'certifications': certification_results,
             'average_requirements': avg_requirements,
             'average_compliance': avg_compliance,
             'average_gap': avg_gap,
@@ -581,7 +627,11 @@ class ProductStandardsModel:
             'market_premium': market_premium,
         }
         
+        if self.include_details:
+            results['sector_standards'] = sector_results
+            results['certifications'] = certification_results
+        
         # Store historical data
-        self.historical_standards[year_index] = results
+        self.historical_standards.record(year_index, results)
         
         return results
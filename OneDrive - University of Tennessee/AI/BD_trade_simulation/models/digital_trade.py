@@ -1,5 +1,5 @@
-import random
 import numpy as np
+from models.history import ModelHistory
 
 class DigitalTradeModel:
     """
@@ -20,13 +20,17 @@ class DigitalTradeModel:
         self.digital_infrastructure_index = config.get('initial_digital_infrastructure_index', 0.35)  # 0-1 scale
         self.digital_trade_barriers = config.get('initial_digital_trade_barriers', 0.6)  # 0-1 scale (1 = highest barriers)
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Track metrics over time
-        self.yearly_metrics = {
-            'ecommerce_adoption_rate': [self.ecommerce_adoption_rate],
-            'digital_services_exports': [self.digital_services_export_value],
-            'digital_infrastructure_index': [self.digital_infrastructure_index],
-            'digital_trade_barriers': [self.digital_trade_barriers]
-        }
+        self.yearly_metrics = ModelHistory()
+        self.yearly_metrics.append({
+            'ecommerce_adoption_rate': self.ecommerce_adoption_rate,
+            'digital_services_exports': self.digital_services_export_value,
+            'digital_infrastructure_index': self.digital_infrastructure_index,
+            'digital_trade_barriers': self.digital_trade_barriers,
+        })
     
     def simulate_step(self, year, global_conditions=None):
         """
@@ -54,8 +58,7 @@ class DigitalTradeModel:
         }
         
         # Store metrics for this year
-        for key, value in current_metrics.items():
-            self.yearly_metrics[key].append(value)
+        self.yearly_metrics.append(current_metrics)
             
         return current_metrics
     
@@ -79,7 +82,7 @@ class DigitalTradeModel:
             global_effect = global_conditions['global_ecommerce_growth'] * 0.02
         
         # Random variance component
-        random_effect = random.uniform(-0.01, 0.02)
+        random_effect = self.rng.uniform(-0.01, 0.02)
         
         # Calculate total growth and update adoption rate
         total_growth = base_growth + infrastructure_effect + global_effect + random_effect
@@ -115,7 +118,7 @@ class DigitalTradeModel:
         barrier_effect = -0.05 * self.digital_trade_barriers
         
         # Random variance
-        random_effect = random.uniform(-0.02, 0.04)
+        random_effect = self.rng.uniform(-0.02, 0.04)
         
         # Calculate total growth rate
         total_growth_rate = base_growth_rate + global_demand_effect + skills_effect + barrier_effect + random_effect
@@ -142,7 +145,7 @@ class DigitalTradeModel:
         private_investment = self.config.get('private_digital_investment', 0.02)
         
         # Random variance
-        random_effect = random.uniform(-0.01, 0.02)
+        random_effect = self.rng.uniform(-0.01, 0.02)
         
         # Calculate total improvement
         total_improvement = base_improvement + govt_investment + private_investment + random_effect
@@ -176,7 +179,7 @@ class DigitalTradeModel:
         regional_effect = self.config.get('regional_digital_harmonization', 0.01)
         
         # Random variance (including policy reversals)
-        random_effect = random.uniform(-0.03, 0.02)
+        random_effect = self.rng.uniform(-0.03, 0.02)
         
         # Calculate total reduction in barriers
         total_reduction = base_improvement + global_effect + regional_effect + random_effect
@@ -193,4 +196,4 @@ class DigitalTradeModel:
         Returns:
             dict: Time series of all tracked metrics
         """
-        return self.yearly_metrics
+        return self.yearly_metrics.to_dict()
@@ -0,0 +1,191 @@
+"""
+Export diversification model for Bangladesh trade simulation.
+"""
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any, Optional, Iterable, Union
+
+from models.reconciliation import merge_sorted, HS6_BASE, COUNTRY_BASE
+from models.unit_values import trade_chunks
+
+# Levels as (HS digits or None, whether partners are distinguished)
+DIVERSIFICATION_LEVELS = {
+    'hs2': (2, False),
+    'hs4': (4, False),
+    'hs6': (6, False),
+    'partner': (None, True),
+    'hs2_partner': (2, True),
+    'hs4_partner': (4, True),
+    'hs6_partner': (6, True),
+}
+
+
+class DiversificationAnalysis:
+    """
+    Export concentration of a country by product, market and product-market level
+
+    One pass over the trade data sums the country's exports on sorted integer
+    (year, HS6, partner) keys and collects the HS6 codes and importers present
+    in the data. Every level in DIVERSIFICATION_LEVELS is then an integer
+    coarsening of the same keys, and all years are computed with bincount.
+
+    For export shares s over the n_a active cells of a level, among n potential
+    cells (codes at that level in the data times importers):
+        - HHI = sum s^2, and the normalized HHI (HHI - 1/n_a) / (1 - 1/n_a)
+        - Theil T = sum s ln(s n) = T_within + T_between, where the within
+          (intensive) part sum s ln(s n_a) is the inequality among active cells
+          and the between (extensive) part ln(n / n_a) reflects inactive cells.
+    The table is cached by source when cache_dir is set.
+    """
+
+    def __init__(self, exporter: int = 50, cache_dir: Optional[str] = None):
+        """
+        Initialize diversification analysis
+
+        Args:
+            exporter: Country code of Bangladesh
+            cache_dir: Optional directory for the cached diversification table
+        """
+        self.exporter = exporter
+        self.cache_dir = cache_dir
+
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0)
+        self.products = np.zeros(0, dtype=np.int64)
+        self.partners = np.zeros(0, dtype=np.int64)
+        self._table = None
+
+    def cache_key(self, source: Union[pd.DataFrame, str]) -> str:
+        """Hash of a DataFrame's flows, or of a file's path, size and modification time"""
+        if isinstance(source, pd.DataFrame):
+            digest = hashlib.sha1(pd.util.hash_pandas_object(
+                source[['t', 'i', 'j', 'k', 'v']], index=False).to_numpy().tobytes())
+        else:
+            stat = os.stat(source)
+            digest = hashlib.sha1(f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        digest.update(str(self.exporter).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of trade flows
+
+        Args:
+            chunk: Trade flows with columns 't', 'i', 'j', 'k', 'v'
+        """
+        products = chunk['k'].to_numpy(dtype=np.int64)
+        importers = chunk['j'].to_numpy(dtype=np.int64)
+        self.products = np.union1d(self.products, products)
+        self.partners = np.union1d(self.partners, importers[importers != self.exporter])
+
+        own = chunk['i'].to_numpy(dtype=np.int64) == self.exporter
+        keys = ((chunk['t'].to_numpy(dtype=np.int64)[own] * HS6_BASE + products[own]) * COUNTRY_BASE
+                + importers[own])
+        self.keys, self.values = merge_sorted(self.keys, self.values, keys, chunk['v'].to_numpy(dtype=float)[own])
+        self._table = None
+
+    def fit(self,
+            source: Union[pd.DataFrame, str, Iterable[pd.DataFrame]],
+            chunksize: int = 1_000_000) -> pd.DataFrame:
+        """
+        Diversification table of trade data (read from the cache if available)
+
+        Args:
+            source: Trade flows as a DataFrame, a CSV path or an iterable of chunks
+                (iterables are not cached)
+            chunksize: Rows per chunk when reading a CSV path
+
+        Returns:
+            Diversification table (see table)
+        """
+        cache_file = None
+        if self.cache_dir and isinstance(source, (pd.DataFrame, str)):
+            cache_file = os.path.join(self.cache_dir, f"diversification_{self.cache_key(source)}.csv")
+            if os.path.exists(cache_file):
+                self._table = pd.read_csv(cache_file, index_col=['year', 'level'])
+                return self._table
+
+        for chunk in trade_chunks(source, ['t', 'i', 'j', 'k', 'v'], chunksize):
+            self.update(chunk)
+        table = self.table()
+
+        if cache_file is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            table.to_csv(cache_file)
+        return table
+
+    def table(self) -> pd.DataFrame:
+        """
+        Concentration indices of every year and level
+
+        Returns:
+            DataFrame indexed by (year, level) with exports, active and potential cells,
+            hhi, normalized_hhi, theil, theil_within and theil_between
+        """
+        if self._table is not None:
+            return self._table
+
+        pairs, partners = np.divmod(self.keys, COUNTRY_BASE)
+        years, products = np.divmod(pairs, HS6_BASE)
+        year_list, year_index = np.unique(years, return_inverse=True)
+        n_years = len(year_list)
+
+        frames = []
+        for level, (digits, by_partner) in DIVERSIFICATION_LEVELS.items():
+            if digits is None:
+                cells, potential = partners, len(self.partners)
+            else:
+                codes = products // 10 ** (6 - digits)
+                potential = len(np.unique(self.products // 10 ** (6 - digits)))
+                cells = codes * COUNTRY_BASE + partners if by_partner else codes
+                potential *= len(self.partners) if by_partner else 1
+
+            # Exports of each (year, cell), then shares and indices by year
+            cell_keys, inverse = np.unique(year_index * (HS6_BASE * COUNTRY_BASE) + cells, return_inverse=True)
+            cell_values = np.bincount(inverse, weights=self.values, minlength=len(cell_keys))
+            cell_years = cell_keys // (HS6_BASE * COUNTRY_BASE)
+            exports = np.bincount(cell_years, weights=cell_values, minlength=n_years)
+            active = np.bincount(cell_years, weights=cell_values > 0, minlength=n_years)
+
+            shares = cell_values / exports[cell_years]
+            terms = np.where(shares > 0, shares * np.log(np.where(shares > 0, shares, 1)), 0.0)
+            hhi = np.bincount(cell_years, weights=shares ** 2, minlength=n_years)
+            entropy = np.bincount(cell_years, weights=terms, minlength=n_years)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                normalized = np.where(active > 1, (hhi - 1 / active) / (1 - 1 / active), 1.0)
+                theil_within = entropy + np.log(active)
+                theil_between = np.log(potential / active)
+
+            frames.append(pd.DataFrame({
+                'year': year_list,
+                'level': level,
+                'exports': exports,
+                'active': active.astype(int),
+                'potential': potential,
+                'hhi': hhi,
+                'normalized_hhi': normalized,
+                'theil': theil_within + theil_between,
+                'theil_within': theil_within,
+                'theil_between': theil_between,
+            }))
+
+        columns = ['exports', 'active', 'potential', 'hhi', 'normalized_hhi', 'theil', 'theil_within', 'theil_between']
+        self._table = pd.concat(frames).set_index(['year', 'level'])[columns].sort_index()
+        return self._table
+
+    def path(self, level: str = 'hs6_partner', measure: str = 'hhi') -> pd.Series:
+        """
+        One measure of one level over the years
+
+        Args:
+            level: Level in DIVERSIFICATION_LEVELS
+            measure: Column of the table
+
+        Returns:
+            Series indexed by year
+        """
+        if level not in DIVERSIFICATION_LEVELS:
+            raise ValueError(f"Unknown diversification level: {level}")
+        return self.table().xs(level, level='level')[measure].rename(measure)
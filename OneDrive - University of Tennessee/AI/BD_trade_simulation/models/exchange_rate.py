@@ -4,6 +4,7 @@ Exchange rate model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
 
 
 class ExchangeRateModel:
@@ -41,9 +42,13 @@ class ExchangeRateModel:
         self.trade_balance = 0
         self.current_account_balance = 0
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_rates = {0: self.initial_rate}
-        self.historical_impacts = {}
+        self.historical_rates = ModelHistory(('exchange_rate',))
+        self.historical_rates.record(0, {'exchange_rate': self.initial_rate})
+        self.historical_impacts = ModelHistory()
     
     def simulate_exchange_rate(self, 
                               year_index: int,
@@ -117,7 +122,7 @@ class ExchangeRateModel:
         )
         
         # Add random market volatility
-        market_volatility = np.random.normal(0, self.volatility)
+        market_volatility = self.rng.normal(0, self.volatility)
         total_pressure = base_pressure + market_volatility
         
         # Calculate potential depreciation rate
@@ -153,7 +158,7 @@ class ExchangeRateModel:
         remittance_impact = self.remittance_sensitivity * actual_depreciation
         
         # Store historical data
-        self.historical_rates[year_index] = self.current_rate
+        self.historical_rates.record(year_index, {'exchange_rate': self.current_rate})
         
         # Compile results
         results = {
@@ -176,7 +181,7 @@ class ExchangeRateModel:
             'exchange_rate_pressure': base_pressure,
         }
         
-        self.historical_impacts[year_index] = results
+        self.historical_impacts.record(year_index, results)
         
         return results
 
@@ -275,8 +280,11 @@ class ExternalBalanceFactors:
         # Capital outflow propensity
         self.capital_outflow_propensity = 0.15  # Outflow as percentage of GDP
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_flows = {}
+        self.historical_flows = ModelHistory()
     
     def simulate_flows(self, 
                      year_index: int,
@@ -314,7 +322,7 @@ class ExternalBalanceFactors:
             political_effect = (political_stability - 0.5) * 0.02
             
             # Random variation
-            random_variation = np.random.normal(0, data['volatility'])
+            random_variation = self.rng.normal(0, data['volatility'])
             
             # Calculate effective growth
             effective_growth = corridor_growth + exchange_effect + political_effect + random_variation
@@ -355,7 +363,7 @@ class ExternalBalanceFactors:
             political_effect = (political_stability - 0.5) * 0.05
             
             # Random variation
-            random_variation = np.random.normal(0, data['volatility'])
+            random_variation = self.rng.normal(0, data['volatility'])
             
             # Calculate effective growth
             effective_growth = source_growth + climate_effect + political_effect + random_variation
@@ -393,7 +401,7 @@ class ExternalBalanceFactors:
             political_effect = (political_stability - 0.5) * 0.03
             
             # Random variation
-            random_variation = np.random.normal(0, data['volatility'])
+            random_variation = self.rng.normal(0, data['volatility'])
             
             # Calculate effective growth
             effective_growth = source_growth + political_effect + random_variation
@@ -458,7 +466,7 @@ class ExternalBalanceFactors:
         }
         
         # Store historical data
-        self.historical_flows[year_index] = results
+        self.historical_flows.record(year_index, results)
         
         return results
 
@@ -508,7 +516,7 @@ class TradeFinanceMechanisms:
         }
         
         # Historical data
-        self.historical_metrics = {}
+        self.historical_metrics = ModelHistory()
     
     def simulate_trade_finance(self, 
                               year_index: int,
@@ -670,6 +678,301 @@ class TradeFinanceMechanisms:
         }
         
         # Store historical data
-        self.historical_metrics[year_index] = results
+        self.historical_metrics.record(year_index, results)
         
         return results
+
+
+class ExchangeRatePathEngine:
+    """
+    Vectorized simulation of many exchange-rate and reserve paths
+    
+    Advances the exchange rate model and the external balance flows for all
+    paths at once. Corridor and source parameters are vectors, per-path state is
+    held in (paths, corridors) arrays, and intervention, reserve adequacy and
+    depreciation are masked array operations. Flows are coupled to the rate each
+    year: last year's depreciation drives remittances and capital outflows, and
+    (optionally) export and import levels through the trade elasticities.
+    
+    Corridor shares are updated simultaneously and renormalized once per year,
+    rather than renormalized after each corridor as in ExternalBalanceFactors.
+    """
+    
+    def __init__(self, exchange_rate_model: ExchangeRateModel,
+                 balance_factors: Optional[ExternalBalanceFactors] = None):
+        """
+        Initialize path engine from the current state of the scalar models
+        
+        Args:
+            exchange_rate_model: Exchange rate model providing parameters and starting state
+            balance_factors: External balance factors providing corridor and source
+                parameters (defaults if None)
+        """
+        if balance_factors is None:
+            balance_factors = ExternalBalanceFactors()
+        
+        self.model = exchange_rate_model
+        
+        # Corridor and source parameters as vectors
+        self.remittance = self._source_vectors(balance_factors.remittance_corridors)
+        self.fdi = self._source_vectors(balance_factors.fdi_sources)
+        self.aid_loans = self._source_vectors(balance_factors.aid_loans_sources)
+        self.capital_outflow_propensity = balance_factors.capital_outflow_propensity
+        
+        # Direction in which flow shocks are tilted for importance sampling: each
+        # corridor's initial contribution to flows per standard deviation (unit length)
+        contributions = [base_share * params['share'] * params['volatility'] for base_share, params in (
+            (0.08, self.remittance), (0.02, self.fdi), (0.015, self.aid_loans))]
+        norm = np.sqrt(sum((contribution ** 2).sum() for contribution in contributions))
+        for params, contribution in zip((self.remittance, self.fdi, self.aid_loans), contributions):
+            params['tilt_direction'] = contribution / norm
+    
+    @staticmethod
+    def _source_vectors(sources: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        """Convert a dict of corridors or sources into parameter vectors"""
+        return {
+            'names': list(sources.keys()),
+            'share': np.array([data['share'] for data in sources.values()]),
+            'growth': np.array([data['growth'] for data in sources.values()]),
+            'volatility': np.array([data['volatility'] for data in sources.values()]),
+        }
+    
+    @staticmethod
+    def _path_array(value: Any, n_paths: int, horizon: int) -> np.ndarray:
+        """Broadcast a scalar, per-year (horizon,) or per-path (paths, horizon) input"""
+        return np.broadcast_to(np.asarray(value, dtype=float), (n_paths, horizon))
+    
+    def _corridor_flows(self, params: Dict[str, Any], shares: np.ndarray, base_share_of_gdp: float,
+                        gdp: np.ndarray, common_effect: np.ndarray, rng: np.random.Generator,
+                        share_bounds: Optional[Tuple[float, float]] = None,
+                        share_adjustment: float = 0.0,
+                        exchange_effect: Optional[np.ndarray] = None,
+                        tilt: float = 0.0,
+                        log_weight: Optional[np.ndarray] = None,
+                        shock_sum: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        One year of flows for every path and corridor
+        
+        Args:
+            params: Parameter vectors of the corridors or sources
+            shares: Current shares, shape (paths, corridors); updated in place
+            base_share_of_gdp: Base flow as share of GDP
+            gdp: GDP per path
+            common_effect: Growth effect shared by all corridors, per path
+            rng: Random generator
+            share_bounds: (min, max) share bounds, or None if shares are fixed
+            share_adjustment: Sensitivity of shares to effective growth
+            exchange_effect: Per-path exchange rate change scaling the share-weighted effect
+            tilt: Mean shift of the standardized growth shocks along the flow tilt
+                direction (importance sampling)
+            log_weight: Per-path log likelihood ratio, updated in place when tilted
+            shock_sum: Per-path projection of the standardized shocks on the tilt
+                direction, updated in place if given
+            
+        Returns:
+            Total flow per path
+        """
+        shocks = rng.normal(size=shares.shape)
+        direction = params['tilt_direction']
+        if tilt:
+            shocks += tilt * direction
+            log_weight += -tilt * shocks @ direction + 0.5 * tilt ** 2 * (direction ** 2).sum()
+        if shock_sum is not None:
+            shock_sum += shocks @ direction
+        growth = params['growth'] + common_effect[:, np.newaxis] + shocks * params['volatility']
+        if exchange_effect is not None:
+            growth += shares * exchange_effect[:, np.newaxis] * 0.3
+        
+        if share_bounds is not None:
+            np.clip(shares * (1 + share_adjustment * growth), share_bounds[0], share_bounds[1], out=shares)
+            shares /= shares.sum(axis=1, keepdims=True)
+        
+        return base_share_of_gdp * gdp * (shares * (1 + growth)).sum(axis=1)
+    
+    def simulate(self,
+                 n_paths: int,
+                 horizon: int,
+                 gdp: Any,
+                 exports: Any,
+                 imports: Any,
+                 political_stability: Any = 0.5,
+                 investment_climate: Any = 0.5,
+                 central_bank_policy: Optional[Dict[str, Any]] = None,
+                 global_conditions: Optional[Dict[str, Any]] = None,
+                 trade_feedback: bool = True,
+                 shock_tilt: Optional[Dict[str, float]] = None,
+                 seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Simulate exchange-rate and reserve paths
+        
+        Inputs may be scalars, per-year arrays of shape (horizon,) or per-path
+        arrays of shape (n_paths, horizon).
+        
+        Args:
+            n_paths: Number of paths
+            horizon: Number of years
+            gdp: GDP in million USD
+            exports: Export value in million USD (before exchange rate feedback)
+            imports: Import value in million USD (before exchange rate feedback)
+            political_stability: Political stability index (0-1)
+            investment_climate: Investment climate index (0-1)
+            central_bank_policy: Dict with 'intervention_stance'
+            global_conditions: Dict with 'dollar_index', 'global_risk_appetite',
+                'regional_currency_trends' and 'oil_price_change'
+            trade_feedback: Whether depreciation feeds back into export and import levels
+            shock_tilt: Optional mean shifts (in standard deviations) of the 'market'
+                volatility shocks and of the 'flows' corridor shocks along their tilt
+                direction (each corridor's contribution to flows), for importance
+                sampling; each a scalar or a per-year (horizon,) array
+            seed: Random seed
+            
+        Returns:
+            Dict of (n_paths, horizon) arrays: exchange_rate, depreciation_rate,
+            foreign_reserves, reserve_months, overall_balance, intervention_cost,
+            remittances, fdi, aid_loans, intervened; plus 'log_weight' (n_paths,),
+            the log likelihood ratio of each path under the untilted shocks, and
+            'shock_sums' (n_paths, horizon), the standardized 'market' shock and
+            the projection of all corridor shocks of the year on the (unit) 'flows'
+            tilt direction, each standard normal without tilt
+        """
+        rng = np.random.default_rng(seed)
+        central_bank_policy = central_bank_policy or {}
+        global_conditions = global_conditions or {}
+        model = self.model
+        shock_tilt = shock_tilt or {}
+        market_tilt = np.broadcast_to(np.asarray(shock_tilt.get('market', 0.0), dtype=float), (horizon,))
+        flow_tilt = np.broadcast_to(np.asarray(shock_tilt.get('flows', 0.0), dtype=float), (horizon,))
+        log_weight = np.zeros(n_paths)
+        shock_sums = {'market': np.zeros((n_paths, horizon)), 'flows': np.zeros((n_paths, horizon))}
+        
+        gdp = self._path_array(gdp, n_paths, horizon)
+        exports = self._path_array(exports, n_paths, horizon)
+        imports = self._path_array(imports, n_paths, horizon)
+        stability = self._path_array(political_stability, n_paths, horizon)
+        climate = self._path_array(investment_climate, n_paths, horizon)
+        stance = self._path_array(central_bank_policy.get('intervention_stance', 0.5), n_paths, horizon)
+        
+        # Exogenous exchange rate pressure from global conditions
+        global_pressure = (
+            0.2 * self._path_array(global_conditions.get('dollar_index', 1.0), n_paths, horizon) +
+            -0.1 * self._path_array(global_conditions.get('global_risk_appetite', 0.5), n_paths, horizon) +
+            0.15 * self._path_array(global_conditions.get('regional_currency_trends', 0), n_paths, horizon) +
+            0.25 * self._path_array(global_conditions.get('oil_price_change', 0), n_paths, horizon)
+        )
+        
+        # Per-path state
+        rate = np.full(n_paths, model.current_rate, dtype=float)
+        reserves = np.full(n_paths, model.foreign_reserves, dtype=float)
+        remittance_shares = np.tile(self.remittance['share'], (n_paths, 1))
+        fdi_shares = np.tile(self.fdi['share'], (n_paths, 1))
+        outflow_propensity = np.full(n_paths, self.capital_outflow_propensity)
+        previous_depreciation = np.zeros(n_paths)
+        trade_level = np.ones((2, n_paths))  # Export and import level multipliers
+        
+        outputs = {name: np.empty((n_paths, horizon)) for name in (
+            'exchange_rate', 'depreciation_rate', 'foreign_reserves', 'reserve_months',
+            'overall_balance', 'intervention_cost', 'remittances', 'fdi', 'aid_loans')}
+        outputs['intervened'] = np.empty((n_paths, horizon), dtype=bool)
+        
+        for t in range(horizon):
+            stability_t = stability[:, t] - 0.5
+            
+            # External flows, coupled to last year's depreciation
+            remittances = self._corridor_flows(
+                self.remittance, remittance_shares, 0.08, gdp[:, t], stability_t * 0.02, rng,
+                share_bounds=(0.05, 0.6), share_adjustment=0.1, exchange_effect=previous_depreciation,
+                tilt=flow_tilt[t], log_weight=log_weight,
+                shock_sum=shock_sums['flows'][:, t])
+            fdi = self._corridor_flows(
+                self.fdi, fdi_shares, 0.02, gdp[:, t], (climate[:, t] - 0.5) * 0.1 + stability_t * 0.05, rng,
+                share_bounds=(0.05, 0.4), share_adjustment=0.05, tilt=flow_tilt[t], log_weight=log_weight,
+                shock_sum=shock_sums['flows'][:, t])
+            aid_loans = self._corridor_flows(
+                self.aid_loans, np.broadcast_to(self.aid_loans['share'], (n_paths, len(self.aid_loans['share']))),
+                0.015, gdp[:, t], stability_t * 0.03, rng, tilt=flow_tilt[t], log_weight=log_weight,
+                shock_sum=shock_sums['flows'][:, t])
+            
+            profit_repatriation = 0.6 * fdi
+            outflow_adjustment = np.where(previous_depreciation > 0.05, previous_depreciation * 0.5, 0.0)
+            effective_propensity = outflow_propensity + outflow_adjustment - stability_t * 0.05
+            other_outflows = gdp[:, t] * effective_propensity
+            outflow_propensity = 0.8 * outflow_propensity + 0.2 * effective_propensity
+            
+            # Balance of payments and reserves
+            exports_t = exports[:, t] * trade_level[0]
+            imports_t = imports[:, t] * trade_level[1]
+            overall_balance = (exports_t - imports_t + remittances - profit_repatriation +
+                               fdi + aid_loans - other_outflows)
+            reserves = reserves + overall_balance
+            
+            monthly_imports = imports_t / 12
+            with np.errstate(divide='ignore', invalid='ignore'):
+                reserve_months = np.where(monthly_imports > 0, reserves / monthly_imports, 12.0)
+                balance_ratio = np.where(imports_t > 0, overall_balance / imports_t, 0.0)
+            reserve_pressure = np.where(reserve_months < 6, np.clip((3 - reserve_months) / 3, 0, 1), 0.0)
+            
+            # Depreciation pressure and central bank intervention
+            base_pressure = -0.3 * balance_ratio + global_pressure[:, t] + 0.2 * reserve_pressure
+            market_shocks = rng.normal(size=n_paths)
+            if market_tilt[t]:
+                market_shocks += market_tilt[t]
+                log_weight += -market_tilt[t] * market_shocks + 0.5 * market_tilt[t] ** 2
+            shock_sums['market'][:, t] = market_shocks
+            potential = model.annual_depreciation + (base_pressure + market_shocks * model.volatility) * 0.1
+            
+            intervened = (np.abs(potential) > model.intervention_threshold) & (stance[:, t] > 0.3)
+            effectiveness = np.minimum(model.intervention_strength * stance[:, t], 0.8)
+            depreciation = np.where(intervened, potential * (1 - effectiveness), potential)
+            intervention_cost = np.where(intervened, np.abs(potential - depreciation) * imports_t * 0.5, 0.0)
+            reserves = reserves - intervention_cost
+            
+            rate = rate * (1 + depreciation)
+            if trade_feedback:
+                trade_level[0] *= 1 + model.export_elasticity * depreciation
+                trade_level[1] *= 1 - model.import_elasticity * depreciation
+            previous_depreciation = depreciation
+            
+            outputs['exchange_rate'][:, t] = rate
+            outputs['depreciation_rate'][:, t] = depreciation
+            outputs['foreign_reserves'][:, t] = reserves
+            outputs['reserve_months'][:, t] = reserve_months
+            outputs['overall_balance'][:, t] = overall_balance
+            outputs['intervention_cost'][:, t] = intervention_cost
+            outputs['remittances'][:, t] = remittances
+            outputs['fdi'][:, t] = fdi
+            outputs['aid_loans'][:, t] = aid_loans
+            outputs['intervened'][:, t] = intervened
+        
+        outputs['log_weight'] = log_weight
+        outputs['shock_sums'] = shock_sums
+        return outputs
+
+
+def reserve_crisis_probability(paths: Dict[str, np.ndarray], threshold_months: float = 3.0) -> Dict[str, Any]:
+    """
+    Estimate reserve-crisis probabilities from simulated paths
+    
+    A path is in crisis in a year when reserves cover fewer than the threshold
+    months of imports.
+    
+    Args:
+        paths: Output of ExchangeRatePathEngine.simulate
+        threshold_months: Reserve adequacy threshold in months of imports
+        
+    Returns:
+        Dict with per-year and cumulative crisis probabilities, the overall
+        probability over the horizon and its standard error
+    """
+    in_crisis = paths['reserve_months'] < threshold_months
+    ever_in_crisis = np.logical_or.accumulate(in_crisis, axis=1)
+    n_paths = in_crisis.shape[0]
+    
+    probability = float(ever_in_crisis[:, -1].mean()) if in_crisis.size else 0.0
+    
+    return {
+        'threshold_months': threshold_months,
+        'annual_probability': in_crisis.mean(axis=0),
+        'cumulative_probability': ever_in_crisis.mean(axis=0),
+        'probability': probability,
+        'standard_error': float(np.sqrt(probability * (1 - probability) / n_paths)) if n_paths else float('nan'),
+    }
@@ -0,0 +1,264 @@
+"""
+Exogenous world path library for Bangladesh trade simulation.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+from typing import Dict, List, Tuple, Any, Optional
+
+
+class ExogenousPaths:
+    """
+    Precomputed exogenous world paths for one random seed
+
+    Holds the random shocks the global market model would otherwise draw each
+    year (partner GDP growth, US consumer confidence, competitor growth by sector
+    and sector demand variation) as arrays over the simulation horizon. Scenario
+    multipliers are applied to whole paths at once, so every scenario replays the
+    same world with only the multipliers changed.
+    """
+
+    def __init__(self,
+                 markets: List[str],
+                 base_gdp_growth: np.ndarray,
+                 gdp_shocks: np.ndarray,
+                 confidence_shocks: np.ndarray,
+                 competitor_pairs: List[Tuple[str, str]],
+                 base_competitor_growth: np.ndarray,
+                 competitor_shocks: np.ndarray,
+                 sectors: List[str],
+                 sector_demand_shocks: np.ndarray,
+                 seed: Optional[int] = None):
+        """
+        Initialize exogenous paths
+
+        Args:
+            markets: Market names (columns of the GDP arrays)
+            base_gdp_growth: Base GDP growth per market, shape (markets,)
+            gdp_shocks: GDP growth shocks, shape (years, markets)
+            confidence_shocks: US consumer confidence shocks, shape (years,)
+            competitor_pairs: (competitor, sector) pairs (columns of the competitor arrays)
+            base_competitor_growth: Base growth per pair, shape (pairs,)
+            competitor_shocks: Competitor growth shocks, shape (years, pairs)
+            sectors: Sector names (columns of the sector demand array)
+            sector_demand_shocks: Sector demand shocks, shape (years, sectors)
+            seed: Seed the paths were generated from
+        """
+        self.markets = list(markets)
+        self.base_gdp_growth = base_gdp_growth
+        self.gdp_shocks = gdp_shocks
+        self.confidence_shocks = confidence_shocks
+        self.competitor_pairs = [tuple(pair) for pair in competitor_pairs]
+        self.base_competitor_growth = base_competitor_growth
+        self.competitor_shocks = competitor_shocks
+        self.sectors = list(sectors)
+        self.sector_demand_shocks = sector_demand_shocks
+        self.seed = seed
+
+        # Scenario-transformed paths, keyed by (gdp_multiplier, competitor_multiplier)
+        self._scenario_paths = {}
+
+    @property
+    def horizon(self) -> int:
+        """Number of years covered"""
+        return self.confidence_shocks.shape[0]
+
+    @classmethod
+    def generate(cls, global_market_config: Dict[str, Any], horizon: int, seed: int) -> 'ExogenousPaths':
+        """
+        Draw exogenous paths for a seed
+
+        Args:
+            global_market_config: Global market configuration (gdp_growth, competitor_growth, market_demand_growth)
+            horizon: Number of years to generate
+            seed: Random seed
+
+        Returns:
+            ExogenousPaths instance
+        """
+        gdp_growth = global_market_config.get('gdp_growth', {})
+        competitor_growth = global_market_config.get('competitor_growth', {})
+        market_demand_growth = global_market_config.get('market_demand_growth', {})
+
+        markets = list(gdp_growth.keys())
+        competitor_pairs = [(competitor, sector)
+                            for competitor, sectors in competitor_growth.items()
+                            for sector in sectors]
+        sectors = list(market_demand_growth.keys())
+
+        # Same shock scales as the live draws in the global market model
+        rng = np.random.default_rng(seed)
+        return cls(
+            markets=markets,
+            base_gdp_growth=np.array([gdp_growth[m] for m in markets], dtype=float),
+            gdp_shocks=rng.normal(0, 0.005, size=(horizon, len(markets))),
+            confidence_shocks=rng.normal(0, 0.01, size=horizon),
+            competitor_pairs=competitor_pairs,
+            base_competitor_growth=np.array([competitor_growth[c][s] for c, s in competitor_pairs], dtype=float),
+            competitor_shocks=rng.normal(0, 0.01, size=(horizon, len(competitor_pairs))),
+            sectors=sectors,
+            sector_demand_shocks=rng.normal(0, 0.01, size=(horizon, len(sectors))),
+            seed=seed,
+        )
+
+    def scenario_paths(self, gdp_multiplier: float = 1.0, competitor_multiplier: float = 1.0) -> Dict[str, np.ndarray]:
+        """
+        Apply scenario multipliers to the full paths
+
+        Args:
+            gdp_multiplier: Multiplier for market GDP growth
+            competitor_multiplier: Multiplier for competitor growth
+
+        Returns:
+            Dict with 'gdp_growth' (years, markets) and 'competitor_growth' (years, pairs) arrays
+        """
+        key = (gdp_multiplier, competitor_multiplier)
+        if key not in self._scenario_paths:
+            self._scenario_paths[key] = {
+                'gdp_growth': self.base_gdp_growth[np.newaxis, :] * gdp_multiplier + self.gdp_shocks,
+                'competitor_growth': self.base_competitor_growth[np.newaxis, :] * competitor_multiplier + self.competitor_shocks,
+            }
+        return self._scenario_paths[key]
+
+    def year_inputs(self, year_index: int, gdp_multiplier: float = 1.0,
+                    competitor_multiplier: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Exogenous inputs for one simulated year
+
+        Args:
+            year_index: Year index from simulation start
+            gdp_multiplier: Multiplier for market GDP growth
+            competitor_multiplier: Multiplier for competitor growth
+
+        Returns:
+            Dict of per-year inputs for the global market sub-models, or None beyond the horizon
+        """
+        if not 0 <= year_index < self.horizon:
+            return None
+
+        paths = self.scenario_paths(gdp_multiplier, competitor_multiplier)
+        gdp_row = paths['gdp_growth'][year_index]
+        competitor_row = paths['competitor_growth'][year_index]
+
+        competitor_growth = {}
+        for (competitor, sector), rate in zip(self.competitor_pairs, competitor_row):
+            competitor_growth.setdefault(competitor, {})[sector] = float(rate)
+
+        return {
+            'gdp_growth': dict(zip(self.markets, gdp_row.tolist())),
+            'consumer_confidence': float(self.confidence_shocks[year_index]),
+            'competitor_growth': competitor_growth,
+            'sector_demand_variation': dict(zip(self.sectors, self.sector_demand_shocks[year_index].tolist())),
+        }
+
+    def save(self, path: str):
+        """
+        Persist paths to a .npz file
+
+        Args:
+            path: Output file path
+        """
+        np.savez(
+            path,
+            markets=np.array(self.markets, dtype=str),
+            base_gdp_growth=self.base_gdp_growth,
+            gdp_shocks=self.gdp_shocks,
+            confidence_shocks=self.confidence_shocks,
+            competitor_pairs=np.array(self.competitor_pairs, dtype=str).reshape(-1, 2),
+            base_competitor_growth=self.base_competitor_growth,
+            competitor_shocks=self.competitor_shocks,
+            sectors=np.array(self.sectors, dtype=str),
+            sector_demand_shocks=self.sector_demand_shocks,
+            seed=np.array(-1 if self.seed is None else self.seed),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ExogenousPaths':
+        """
+        Load paths saved with save()
+
+        Args:
+            path: Path to the .npz file
+
+        Returns:
+            ExogenousPaths instance
+        """
+        with np.load(path) as data:
+            seed = int(data['seed'])
+            return cls(
+                markets=data['markets'].tolist(),
+                base_gdp_growth=data['base_gdp_growth'],
+                gdp_shocks=data['gdp_shocks'],
+                confidence_shocks=data['confidence_shocks'],
+                competitor_pairs=[tuple(pair) for pair in data['competitor_pairs'].tolist()],
+                base_competitor_growth=data['base_competitor_growth'],
+                competitor_shocks=data['competitor_shocks'],
+                sectors=data['sectors'].tolist(),
+                sector_demand_shocks=data['sector_demand_shocks'],
+                seed=None if seed < 0 else seed,
+            )
+
+
+class ExogenousPathLibrary:
+    """
+    Library of exogenous paths per seed, shared across engine runs
+
+    Paths are generated once per seed and configuration, kept in memory so runs
+    in the same process replay them by reference, and optionally persisted to a
+    cache directory so worker processes and later sweeps load instead of regenerate.
+    """
+
+    def __init__(self, global_market_config: Dict[str, Any], horizon: int, cache_dir: Optional[str] = None):
+        """
+        Initialize path library
+
+        Args:
+            global_market_config: Global market configuration the paths are generated from
+            horizon: Number of simulated years
+            cache_dir: Optional directory for persisted paths
+        """
+        self.global_market_config = global_market_config
+        self.horizon = horizon
+        self.cache_dir = cache_dir
+        self.paths = {}
+
+        # Paths depend only on the world-model inputs and the horizon
+        key_source = json.dumps({
+            'gdp_growth': global_market_config.get('gdp_growth', {}),
+            'competitor_growth': global_market_config.get('competitor_growth', {}),
+            'market_demand_growth': global_market_config.get('market_demand_growth', {}),
+            'horizon': horizon,
+        }, sort_keys=True)
+        self.config_key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()[:12]
+
+    def path_file(self, seed: int) -> Optional[str]:
+        """Cache file for a seed, or None without a cache directory"""
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"exogenous_{self.config_key}_{seed}.npz")
+
+    def get(self, seed: int) -> ExogenousPaths:
+        """
+        Get paths for a seed, loading or generating them as needed
+
+        Args:
+            seed: Random seed
+
+        Returns:
+            ExogenousPaths instance (the same object for repeated calls)
+        """
+        if seed in self.paths:
+            return self.paths[seed]
+
+        path_file = self.path_file(seed)
+        if path_file is not None and os.path.exists(path_file):
+            paths = ExogenousPaths.load(path_file)
+        else:
+            paths = ExogenousPaths.generate(self.global_market_config, self.horizon, seed)
+            if path_file is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                paths.save(path_file)
+
+        self.paths[seed] = paths
+        return paths
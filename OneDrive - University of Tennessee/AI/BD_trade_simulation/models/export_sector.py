@@ -4,6 +4,23 @@ Export sector model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
+from models.rmg_factories import FactoryPopulation
+
+# Response of exports to each driver; 'tariff' scales the tariff change, the
+# competitiveness channels scale their effect on competitiveness, 'competitor'
+# scales competitor growth above the sector's own and 'order_diversion' the trade
+# war order diversion opportunity of the sector (off unless configured)
+DEFAULT_ELASTICITIES = {
+    'tariff': -1.0,
+    'exchange_rate': 0.2,
+    'logistics': 0.3,
+    'trade_policy': 0.2,
+    'digital': 0.1,
+    'compliance': -0.2,
+    'competitor': -0.2,
+    'order_diversion': 0.0,
+}
 
 
 class ExportSectorModel:
@@ -22,7 +39,8 @@ class ExportSectorModel:
                  value_chain_position: str,
                  competitiveness_factors: Dict[str, float],
                  tariff_exposure: float,
-                 subsectors: Optional[List[str]] = None):
+                 subsectors: Optional[List[str]] = None,
+                 elasticities: Optional[Dict[str, float]] = None):
         """
         Initialize an export sector model
         
@@ -35,6 +53,8 @@ class ExportSectorModel:
             competitiveness_factors: Dict of factors affecting competitiveness with values (0-1)
             tariff_exposure: Vulnerability to tariff changes (0-1)
             subsectors: List of subsectors within this export sector
+            elasticities: Export responses overriding DEFAULT_ELASTICITIES (e.g. from
+                gravity estimates)
         """
         self.sector_name = sector_name
         self.current_volume = current_volume
@@ -44,11 +64,18 @@ class ExportSectorModel:
         self.competitiveness_factors = competitiveness_factors
         self.tariff_exposure = tariff_exposure
         self.subsectors = subsectors or []
+        self.elasticities = {**DEFAULT_ELASTICITIES, **(elasticities or {})}
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
         
         # Initialize historical data storage
-        self.historical_volumes = {0: current_volume}  # year 0 = start_year
-        self.historical_market_shares = {0: global_market_share}
-        self.historical_competitiveness = {0: self._calculate_overall_competitiveness()}
+        self.history = ModelHistory(('volume', 'market_share', 'competitiveness'))
+        self.history.record(0, {  # year 0 = start_year
+            'volume': current_volume,
+            'market_share': global_market_share,
+            'competitiveness': self._calculate_overall_competitiveness(),
+        })
         
         # Initialize subsector models if applicable
         self.subsector_models = {}
@@ -77,7 +104,8 @@ class ExportSectorModel:
                      trade_policy_impact: float,
                      compliance_impact: float,
                      digital_adoption: float,
-                     competitor_growth: Dict[str, float]) -> Dict[str, Any]:
+                     competitor_growth: Dict[str, float],
+                     order_diversion_opportunity: float = 0.0) -> Dict[str, Any]:
         """
         Simulate this export sector for one year
         
@@ -91,32 +119,36 @@ class ExportSectorModel:
             compliance_impact: Net impact of compliance requirements (-1 to 1 scale)
             digital_adoption: Level of digital technology adoption (0-1)
             competitor_growth: Growth rates of competitor countries
+            order_diversion_opportunity: Orders diverted to the sector by trade wars
+                between other countries (share of sector demand)
             
         Returns:
             Dict with simulation results for this year
         """
         # Get previous year's volume
-        prev_volume = self.historical_volumes.get(year_index - 1, self.current_volume)
-        prev_competitiveness = self.historical_competitiveness.get(year_index - 1, 
-                                                                  self._calculate_overall_competitiveness())
-        prev_market_share = self.historical_market_shares.get(year_index - 1, self.global_market_share)
+        prev_volume = self.history.get('volume', year_index - 1, self.current_volume)
+        prev_competitiveness = self.history.get('competitiveness', year_index - 1,
+                                                self._calculate_overall_competitiveness())
+        prev_market_share = self.history.get('market_share', year_index - 1, self.global_market_share)
         
         # Calculate base growth adjusted for global demand
         adjusted_growth = self.base_growth_rate * (1 + 0.5 * (global_demand_growth - 0.03))
         
         # Calculate tariff impact
+        elasticities = self.elasticities
         if tariff_changes:
-            weighted_tariff_impact = -sum(tariff_changes.values()) / len(tariff_changes) * self.tariff_exposure
+            weighted_tariff_impact = (elasticities['tariff'] * (sum(tariff_changes.values()) / len(tariff_changes))
+                                      * self.tariff_exposure)
         else:
             weighted_tariff_impact = 0.0
         
         # Calculate competitiveness evolution
         competitiveness_change = (
-            0.2 * exchange_rate_impact +
-            0.3 * (logistics_performance - 0.6) +  # Assuming 0.6 is the baseline logistics performance
-            0.2 * trade_policy_impact +
-            0.1 * digital_adoption +
-            -0.2 * compliance_impact  # Compliance has cost implications initially
+            elasticities['exchange_rate'] * exchange_rate_impact +
+            elasticities['logistics'] * (logistics_performance - 0.6) +  # Assuming 0.6 is the baseline logistics performance
+            elasticities['trade_policy'] * trade_policy_impact +
+            elasticities['digital'] * digital_adoption +
+            elasticities['compliance'] * compliance_impact  # Compliance has cost implications initially
         )
         
         # Apply competitiveness change with constraints
@@ -125,18 +157,22 @@ class ExportSectorModel:
         # Calculate competitor impact
         competitor_impact = 0
         for competitor, growth in competitor_growth.items():
-            competitor_impact -= (growth - self.base_growth_rate) * 0.2
+            competitor_impact += (growth - self.base_growth_rate) * elasticities['competitor']
+        
+        # Orders diverted from countries in trade wars
+        order_diversion_impact = elasticities['order_diversion'] * order_diversion_opportunity
         
         # Calculate total growth rate
         effective_growth_rate = (
             adjusted_growth +
             weighted_tariff_impact +
             (new_competitiveness - prev_competitiveness) * 2 +  # Competitiveness has strong impact
-            competitor_impact
+            competitor_impact +
+            order_diversion_impact
         )
         
         # Apply some random variation (economic shocks, etc.)
-        random_variation = np.random.normal(0, 0.02)  # 2% standard deviation
+        random_variation = self.rng.normal(0, 0.02)  # 2% standard deviation
         effective_growth_rate += random_variation
         
         # Calculate new volume
@@ -148,9 +184,11 @@ class ExportSectorModel:
         new_market_share = max(0, min(1, prev_market_share * (1 + market_share_change)))
         
         # Store historical data
-        self.historical_volumes[year_index] = new_volume
-        self.historical_market_shares[year_index] = new_market_share
-        self.historical_competitiveness[year_index] = new_competitiveness
+        self.history.record(year_index, {
+            'volume': new_volume,
+            'market_share': new_market_share,
+            'competitiveness': new_competitiveness,
+        })
         
         # Return results
         return {
@@ -167,6 +205,7 @@ class ExportSectorModel:
             'trade_policy_impact': trade_policy_impact,
             'compliance_impact': compliance_impact,
             'competitor_impact': competitor_impact,
+            'order_diversion_impact': order_diversion_impact,
             'random_variation': random_variation
         }
     
@@ -211,7 +250,8 @@ class RMGSectorModel(ExportSectorModel):
             value_chain_position=config['value_chain_position'],
             competitiveness_factors=config['competitiveness_factors'],
             tariff_exposure=config['tariff_exposure'],
-            subsectors=config['subsectors']
+            subsectors=config['subsectors'],
+            elasticities=config.get('elasticities')
         )
         
         # RMG-specific attributes
@@ -224,6 +264,12 @@ class RMGSectorModel(ExportSectorModel):
         }
         self.backward_linkage_development = 0.4  # Moderate backward linkage development
         self.foreign_ownership = 0.3  # 30% foreign ownership
+        
+        # Optional firm-level factory population driving sector volume and competitiveness,
+        # created in the first simulated year so it draws from the stream the engine assigns
+        self.factory_population = None
+        self.population_config = config.get('factory_population', {})
+        self.population_volume = config['current_volume']
     
     def simulate_year(self, year_index, **kwargs):
         """
@@ -249,6 +295,37 @@ class RMGSectorModel(ExportSectorModel):
         results['backward_linkage_development'] = self.backward_linkage_development
         results['buyer_concentration'] = max(0.5, self.buyer_concentration - 0.01)  # Gradual diversification
         
+        # Aggregate the factory population: the sector-level growth becomes buyer demand,
+        # and factories decide how much of it is supplied
+        if self.population_config.get('enabled', False):
+            if self.factory_population is None:
+                self.factory_population = FactoryPopulation(
+                    self.population_config,
+                    total_volume=self.population_volume,
+                    seed=self.rng
+                )
+            # Follow the model's generator, which the engine replaces each year under CRN
+            self.factory_population.rng = self.rng
+            population_results = self.factory_population.step(
+                demand_growth=results['growth_rate'],
+                compliance_pressure=kwargs.get('compliance_impact', 0)
+            )
+            results['export_volume'] = float(population_results['export_volume'][0])
+            results['competitiveness'] = float(population_results['competitiveness'][0])
+            results['factory_population'] = {
+                'active_factories': int(population_results['active_factories'][0]),
+                'entries': int(population_results['entries'][0]),
+                'exits': int(population_results['exits'][0]),
+                'delisted': int(population_results['delisted'][0]),
+                'compliant_share': float(population_results['compliant_share'][0]),
+                'average_compliance': float(population_results['average_compliance'][0]),
+                'capacity_utilization': float(population_results['capacity_utilization'][0]),
+            }
+            self.history.record(year_index, {
+                'volume': results['export_volume'],
+                'competitiveness': results['competitiveness'],
+            })
+        
         return results
 
 
@@ -299,7 +376,7 @@ class EmergingSectorModel(ExportSectorModel):
         self.niche_market_penetration = min(0.8, self.niche_market_penetration + market_penetration_growth)
         
         # Simulate patent development
-        new_patents = np.random.poisson(1 + self.knowledge_spillover_coefficient * 2)
+        new_patents = self.rng.poisson(1 + self.knowledge_spillover_coefficient * 2)
         self.patent_count += new_patents
         
         # Simulate reputation growth
@@ -358,10 +435,10 @@ class TraditionalSectorModel(ExportSectorModel):
         results = super().simulate_year(year_index, **kwargs)
         
         # Simulate commodity price fluctuations
-        price_fluctuation = np.random.normal(0, 0.1) * self.commodity_price_sensitivity
+        price_fluctuation = self.rng.normal(0, 0.1) * self.commodity_price_sensitivity
         
         # Simulate seasonal volatility 
-        seasonal_effect = np.random.uniform(-self.seasonal_volatility, self.seasonal_volatility)
+        seasonal_effect = self.rng.uniform(-self.seasonal_volatility, self.seasonal_volatility)
         
         # Simulate processing technology improvement
         tech_improvement = 0.02 * kwargs.get('technology_investment', 0.5)
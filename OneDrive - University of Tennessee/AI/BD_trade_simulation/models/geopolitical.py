@@ -4,7 +4,40 @@ Geopolitical model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
 
+# Potential bilateral trade wars: country A, country B, intensity if it occurs and
+# start probability multiplier
+POTENTIAL_TRADE_WARS = (
+    ('us', 'china', 0.7, 1.5),
+    ('us', 'eu', 0.5, 1.0),
+    ('china', 'india', 0.6, 1.0),
+    ('china', 'vietnam', 0.4, 1.0),
+)
+
+# Initial potential to capture orders diverted by trade wars, by sector
+ORDER_DIVERSION_POTENTIAL = {
+    'rmg': 0.6,
+    'footwear': 0.5,
+    'light_manufacturing': 0.4,
+    'electronics': 0.3,
+    'other': 0.2,
+}
+
+# Weight of each neighbor's relationship score in the regional stability score
+# (the rest is the Rohingya crisis term)
+STABILITY_WEIGHTS = {
+    'india': 0.3,
+    'china': 0.2,
+    'myanmar': 0.2,
+}
+
+# Order diversion sector of each export sector
+EXPORT_SECTOR_DIVERSION = {
+    'rmg': 'rmg',
+    'leather': 'footwear',
+    'jute': 'light_manufacturing',
+}
 
 class GeopoliticalModel:
     """
@@ -37,7 +70,18 @@ class GeopoliticalModel:
         self.trade_wars = TradeWarImpactsModel(self.trade_war_probability)
         
         # Historical data
-        self.historical_environment = {}
+        self.historical_environment = ModelHistory()
+    
+    @property
+    def rng(self) -> np.random.Generator:
+        """Random generator shared by the sub-models"""
+        return self.regional.rng
+    
+    @rng.setter
+    def rng(self, value: np.random.Generator):
+        self.regional.rng = value
+        self.global_powers.rng = value
+        self.trade_wars.rng = value
     
     def simulate_geopolitical_environment(self, 
                                        year_index: int,
@@ -112,11 +156,38 @@ class GeopoliticalModel:
         }
         
         # Store historical data
-        self.historical_environment[year_index] = results
+        self.historical_environment.record(year_index, results)
         
         return results
 
 
+def advance_relations(political: Any, economic: Any, security: Any,
+                      variation: Any, base_change: float) -> Tuple[Any, Any, Any]:
+    """
+    Political, economic and security levels of a bilateral relationship after one year
+    
+    Args:
+        political: Political level (0-1), scalar or array
+        economic: Economic level (0-1), scalar or array
+        security: Security level (0-1), scalar or array
+        variation: Random variation of the year
+        base_change: Change driven by the cooperation level
+        
+    Returns:
+        Updated (political, economic, security) levels
+    """
+    # Economic relations are more stable than political and security relations
+    political = np.clip(political + (base_change + variation), 0.1, 0.9)
+    economic = np.clip(economic + (base_change * 0.7 + variation * 0.5), 0.2, 0.95)
+    security = np.clip(security + (base_change * 0.5 + variation), 0.1, 0.9)
+    return political, economic, security
+
+
+def relationship_score_of(political: Any, economic: Any, security: Any) -> Any:
+    """Overall relationship score of political, economic and security levels"""
+    return political * 0.4 + economic * 0.4 + security * 0.2
+
+
 class RegionalIntegrationModel:
     """
     Model regional integration dynamics
@@ -162,8 +233,16 @@ class RegionalIntegrationModel:
             'economic_impact': 0.3,  # Impact on regional economic cooperation
         }
         
+        # Importance sampling in simulate_relation_paths: unit direction over countries
+        # along which bilateral relation shocks are mean-shifted
+        self.relations_shock_direction = {country: 1 / np.sqrt(len(self.bilateral_relations))
+                                          for country in self.bilateral_relations}
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_integration = {}
+        self.historical_integration = ModelHistory()
     
     def simulate_integration(self, 
                            year_index: int,
@@ -198,41 +277,27 @@ class RegionalIntegrationModel:
         saarc_revival_prob = self.saarc.get('revival_probability', 0.3)
         
         # Adjust based on India-Pakistan relations (simplified)
-        india_pakistan_relations = 0.3 + 0.1 * np.random.random()  # Random between 0.3-0.4
+        india_pakistan_relations = 0.3 + 0.1 * self.rng.random()  # Random between 0.3-0.4
         saarc_revival_prob = 0.7 * saarc_revival_prob + 0.3 * india_pakistan_relations
         
         self.saarc['revival_probability'] = saarc_revival_prob
         
         # Simulate actual SAARC revival
-        saarc_revival = np.random.random() < saarc_revival_prob and cooperation_level > 0.6
+        saarc_revival = self.rng.random() < saarc_revival_prob and cooperation_level > 0.6
         
         # Update bilateral relations
         bilateral_results = {}
         for country, relations in self.bilateral_relations.items():
             # Random variation based on volatility
-            variation = np.random.normal(0, relations['volatility'])
+            variation = self.rng.normal(0, relations['volatility'])
             
             # Base change depends on cooperation level
             base_change = (cooperation_level - 0.5) * 0.05
             
-            # Update political relations
-            political_change = base_change + variation
-            relations['political_level'] = max(0.1, min(0.9, relations['political_level'] + political_change))
-            
-            # Update economic relations (more stable than political)
-            economic_change = base_change * 0.7 + variation * 0.5
-            relations['economic_level'] = max(0.2, min(0.95, relations['economic_level'] + economic_change))
-            
-            # Update security relations
-            security_change = base_change * 0.5 + variation
-            relations['security_level'] = max(0.1, min(0.9, relations['security_level'] + security_change))
-            
-            # Overall relationship score
-            relationship_score = (
-                relations['political_level'] * 0.4 +
-                relations['economic_level'] * 0.4 +
-                relations['security_level'] * 0.2
-            )
+            levels = advance_relations(relations['political_level'], relations['economic_level'],
+                                       relations['security_level'], variation, base_change)
+            relations['political_level'], relations['economic_level'], relations['security_level'] = levels
+            relationship_score = relationship_score_of(*levels)
             
             bilateral_results[country] = {
                 'political_level': relations['political_level'],
@@ -254,12 +319,9 @@ class RegionalIntegrationModel:
         )
         
         # Stability score (higher is more stable)
-        stability_score = (
-            (1 - self.rohingya_crisis['severity']) * 0.3 +
-            bilateral_results['india']['relationship_score'] * 0.3 +
-            bilateral_results['china']['relationship_score'] * 0.2 +
-            bilateral_results['myanmar']['relationship_score'] * 0.2
-        )
+        stability_score = (1 - self.rohingya_crisis['severity']) * 0.3
+        for country, weight in STABILITY_WEIGHTS.items():
+            stability_score = stability_score + bilateral_results[country]['relationship_score'] * weight
         
         # Calculate market access impact
         india_market_access = bilateral_results['india']['economic_level'] * 0.6 + self.bbin['implementation_level'] * 0.4
@@ -284,9 +346,85 @@ class RegionalIntegrationModel:
         }
         
         # Store historical data
-        self.historical_integration[year_index] = results
+        self.historical_integration.record(year_index, results)
         
         return results
+    
+    def simulate_relation_paths(self,
+                                n_paths: int,
+                                horizon: int,
+                                cooperation_level: float,
+                                shock_tilt: Any = 0.0,
+                                stop_level: Optional[float] = None,
+                                rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        """
+        Bilateral relations and regional stability of many independent paths
+        
+        Starts from the model's current state, which is left unchanged. The relation
+        shocks of all paths are one (paths, years, countries) array and the yearly
+        updates are array operations. For importance sampling, the standardized shocks
+        are mean-shifted by shock_tilt along relations_shock_direction until a path's
+        stability score first falls below stop_level; the decision to tilt a year
+        depends on earlier years only, so the likelihood ratio over the tilted years
+        is exact.
+        
+        Args:
+            n_paths: Number of paths
+            horizon: Number of years
+            cooperation_level: Level of regional cooperation (0-1)
+            shock_tilt: Mean shift of the standardized shocks (negative toward
+                deterioration), scalar or per year
+            stop_level: Stability score below which a path is no longer tilted
+                (tilted throughout if None)
+            rng: Random generator (the model's generator if None)
+            
+        Returns:
+            Dict with 'stability_score' (paths, years), 'relationship_score'
+            (paths, years, countries) in bilateral_relations order, 'shock_sums'
+            (paths, years), the projection of the standardized shocks on the
+            direction, and per path the 'log_weight' and the number of 'tilted_years'
+        """
+        rng = self.rng if rng is None else rng
+        countries = list(self.bilateral_relations)
+        volatility = np.array([self.bilateral_relations[country]['volatility'] for country in countries])
+        direction = np.array([self.relations_shock_direction.get(country, 0.0) for country in countries])
+        weights = np.array([STABILITY_WEIGHTS.get(country, 0.0) for country in countries])
+        tilts = np.broadcast_to(np.asarray(shock_tilt, dtype=float), (horizon,))
+        base_change = (cooperation_level - 0.5) * 0.05
+        
+        # Crisis severity follows a fixed path
+        severity = self.rohingya_crisis['severity'] + self.rohingya_crisis['annual_change'] * np.arange(1, horizon + 1)
+        crisis_term = (1 - np.maximum(0.1, severity)) * 0.3
+        
+        levels = [np.tile([self.bilateral_relations[country][level] for country in countries], (n_paths, 1))
+                  for level in ('political_level', 'economic_level', 'security_level')]
+        shocks = rng.standard_normal((n_paths, horizon, len(countries)))
+        tilted = np.ones(n_paths, dtype=bool)
+        
+        outputs = {
+            'stability_score': np.empty((n_paths, horizon)),
+            'relationship_score': np.empty((n_paths, horizon, len(countries))),
+            'shock_sums': np.empty((n_paths, horizon)),
+            'log_weight': np.zeros(n_paths),
+            'tilted_years': np.zeros(n_paths, dtype=int),
+        }
+        for t in range(horizon):
+            standardized = shocks[:, t]
+            if tilts[t]:
+                standardized = standardized + np.where(tilted, tilts[t], 0.0)[:, np.newaxis] * direction
+                outputs['log_weight'] += np.where(
+                    tilted, -tilts[t] * standardized @ direction + 0.5 * tilts[t] ** 2 * direction @ direction, 0.0)
+            outputs['shock_sums'][:, t] = standardized @ direction
+            outputs['tilted_years'] += tilted
+            
+            levels = advance_relations(*levels, standardized * volatility, base_change)
+            relationship_score = relationship_score_of(*levels)
+            outputs['relationship_score'][:, t] = relationship_score
+            outputs['stability_score'][:, t] = crisis_term[t] + relationship_score @ weights
+            if stop_level is not None:
+                tilted &= outputs['stability_score'][:, t] >= stop_level
+        
+        return outputs
 
 
 class GlobalPowerShiftsModel:
@@ -336,8 +474,11 @@ class GlobalPowerShiftsModel:
             'strategic_importance': 0.6,  # Bangladesh's importance in the strategy
         }
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_shifts = {}
+        self.historical_shifts = ModelHistory()
     
     def simulate_power_shifts(self, 
                             year_index: int,
@@ -381,21 +522,21 @@ class GlobalPowerShiftsModel:
         # Simplification: tension increases need to choose sides, influences alignment shifts
         
         # Update US alignment
-        us_shift = np.random.normal(0, 0.05) + (tension_level - 0.5) * 0.03
+        us_shift = self.rng.normal(0, 0.05) + (tension_level - 0.5) * 0.03
         self.alignment['us'] = max(0.2, min(0.8, self.alignment['us'] + us_shift))
         
         # Update China alignment (somewhat inversely related to US alignment)
-        china_shift = np.random.normal(0, 0.05) - us_shift * 0.7
+        china_shift = self.rng.normal(0, 0.05) - us_shift * 0.7
         self.alignment['china'] = max(0.3, min(0.9, self.alignment['china'] + china_shift))
         
         # Update India alignment (somewhat correlated with US, complex with China)
-        india_shift = np.random.normal(0, 0.03) + us_shift * 0.3 - china_shift * 0.3
+        india_shift = self.rng.normal(0, 0.03) + us_shift * 0.3 - china_shift * 0.3
         self.alignment['india'] = max(0.3, min(0.8, self.alignment['india'] + india_shift))
         
         # Update other alignments
         for power in ['eu', 'russia', 'japan']:
             # Random shift with less volatility
-            power_shift = np.random.normal(0, 0.02)
+            power_shift = self.rng.normal(0, 0.02)
             self.alignment[power] = max(0.2, min(0.8, self.alignment[power] + power_shift))
         
         alignment_results = self.alignment.copy()
@@ -473,7 +614,7 @@ class GlobalPowerShiftsModel:
         }
         
         # Store historical data
-        self.historical_shifts[year_index] = results
+        self.historical_shifts.record(year_index, results)
         
         return results
 
@@ -481,179 +622,263 @@ class GlobalPowerShiftsModel:
 class TradeWarImpactsModel:
     """
     Model trade war impacts on Bangladesh
+    
+    The conflict process is held in fixed arrays of shape (paths, pairs): whether
+    each potential bilateral trade war is active, its intensity and its remaining
+    duration. Onset, intensity drift and expiry are array operations, so one model
+    advances any number of independent paths per call (simulate_paths); the
+    engine uses a single path through simulate_trade_wars.
     """
     
-    def __init__(self, config):
+    def __init__(self, config, n_paths: int = 1):
         """
         Initialize trade war impacts model
         
         Args:
             config: Configuration dictionary for trade war parameters
+            n_paths: Number of independent paths simulated together
         """
         self.initial_probability = config.get('initial', 0.3)
         self.annual_change = config.get('annual_change', -0.01)
-        
-        # Current trade war status
-        self.current_probability = self.initial_probability
-        self.active_trade_wars = {}
-        
-        # Order diversion potential
-        self.order_diversion = {
-            'rmg': 0.6,  # Potential to capture diverted orders
-            'footwear': 0.5,
-            'light_manufacturing': 0.4,
-            'electronics': 0.3,
-            'other': 0.2,
-        }
-        
-        # Export market diversification
-        self.market_diversification = 0.4  # 0-1 scale, higher means more diversified
-        
-        # Secondary sanction exposure
-        self.secondary_sanction_exposure = 0.3  # 0-1 scale
+        self.n_paths = n_paths
+        
+        # Potential conflicts
+        self.conflict_ids = [f"{country_a}_{country_b}" for country_a, country_b, _, _ in POTENTIAL_TRADE_WARS]
+        self.conflict_intensity = np.array([conflict[2] for conflict in POTENTIAL_TRADE_WARS])
+        self.probability_multiplier = np.array([conflict[3] for conflict in POTENTIAL_TRADE_WARS])
+        shape = (n_paths, len(self.conflict_ids))
+        
+        # Current trade war status by path and conflict
+        self.current_probability = np.full(n_paths, self.initial_probability)
+        self.active = np.zeros(shape, dtype=bool)
+        self.intensity = np.zeros(shape)
+        self.remaining_duration = np.zeros(shape, dtype=int)
+        self.started_year = np.zeros(shape, dtype=int)
+        self.current_year = None  # Latest simulated year
+        
+        # Order diversion potential (ability to capture diverted orders) by path and sector
+        self.diversion_sectors = list(ORDER_DIVERSION_POTENTIAL.keys())
+        self.order_diversion = np.tile(np.array(list(ORDER_DIVERSION_POTENTIAL.values())), (n_paths, 1))
+        
+        # Export market diversification (0-1 scale, higher means more diversified)
+        self.market_diversification = np.full(n_paths, 0.4)
+        
+        # Secondary sanction exposure (0-1 scale)
+        self.secondary_sanction_exposure = np.full(n_paths, 0.3)
+        
+        # Importance sampling: factor applied to trade war start probabilities, the
+        # accumulated log likelihood ratio of the draws under the untilted probabilities,
+        # and the number of starts against the summed untilted start probabilities (per path)
+        self.start_probability_tilt = 1.0
+        self.log_likelihood_ratio = np.zeros(n_paths)
+        self.start_count = np.zeros(n_paths)
+        self.start_probability_sum = np.zeros(n_paths)
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
         
         # Historical data
-        self.historical_impacts = {}
+        self.historical_impacts = ModelHistory()
     
-    def simulate_trade_wars(self,
-                          year_index: int,
-                          simulation_year: int,
-                          tension_level: float,
-                          regional_cooperation: float) -> Dict[str, Any]:
+    @property
+    def active_trade_wars(self) -> Dict[str, Dict[str, Any]]:
+        """Active trade wars of the first path by conflict id"""
+        return {
+            conflict_id: {
+                'started_year': int(self.started_year[0, pair]),
+                'intensity': float(self.intensity[0, pair]),
+                'duration_years': int(self.remaining_duration[0, pair] + self.current_year - self.started_year[0, pair]),
+            }
+            for pair, conflict_id in enumerate(self.conflict_ids) if self.active[0, pair]
+        }
+    
+    def simulate_paths(self,
+                       simulation_year: int,
+                       tension_level: Any,
+                       regional_cooperation: Any,
+                       rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
         """
-        Simulate trade war impacts for a given year
+        Advance the trade war process of all paths by one year
         
         Args:
-            year_index: Year index from simulation start
             simulation_year: Actual calendar year
-            tension_level: Level of global geopolitical tensions (0-1)
-            regional_cooperation: Level of regional cooperation (0-1)
+            tension_level: Level of global geopolitical tensions (0-1), scalar or per path
+            regional_cooperation: Level of regional cooperation (0-1), scalar or per path
+            rng: Random generator (the model's generator if None)
             
         Returns:
-            Dict with trade war impacts simulation results
+            Dict of per-path arrays; conflict arrays are (paths, pairs) in conflict_ids
+            order and sector arrays are (paths, sectors) in diversion_sectors order
         """
+        rng = self.rng if rng is None else rng
+        random, normal = rng.random, rng.normal
+        shape = self.active.shape
+        self.current_year = simulation_year
+        tension_level = np.asarray(tension_level, dtype=float)
+        regional_cooperation = np.asarray(regional_cooperation, dtype=float)
+        
         # Update trade war probability
-        base_change = self.annual_change
-        tension_effect = (tension_level - 0.5) * 0.1
-        
-        probability_change = base_change + tension_effect
-        self.current_probability = max(0.05, min(0.8, self.current_probability + probability_change))
-        
-        # Determine if new trade wars start
-        new_trade_wars = {}
-        potential_conflicts = [
-            ('us', 'china', 0.7),  # Country A, Country B, intensity if occurs
-            ('us', 'eu', 0.5),
-            ('china', 'india', 0.6),
-            ('china', 'vietnam', 0.4),
-        ]
-        
-        for country_a, country_b, intensity in potential_conflicts:
-            conflict_id = f"{country_a}_{country_b}"
-            reverse_id = f"{country_b}_{country_a}"
-            
-            # Skip if this conflict or its reverse is already active
-            if conflict_id in self.active_trade_wars or reverse_id in self.active_trade_wars:
-                continue
-            
-            # Adjust probability based on the countries involved
-            adjusted_probability = self.current_probability
-            if country_a == 'us' and country_b == 'china':
-                adjusted_probability *= 1.5  # Higher probability for US-China
-            
-            # Determine if trade war starts
-            if np.random.random() < adjusted_probability:
-                # New trade war
-                actual_intensity = intensity * (0.8 + 0.4 * np.random.random())  # Some variation in intensity
-                
-                self.active_trade_wars[conflict_id] = {
-                    'started_year': simulation_year,
-                    'intensity': actual_intensity,
-                    'duration_years': int(2 + 3 * np.random.random()),  # 2-5 years duration
-                }
-                
-                new_trade_wars[conflict_id] = self.active_trade_wars[conflict_id].copy()
-        
-        # Update existing trade wars
-        ended_trade_wars = []
-        for conflict_id, details in self.active_trade_wars.items():
-            # Check if trade war should end
-            years_active = simulation_year - details['started_year']
-            
-            if years_active >= details['duration_years']:
-                # Trade war ends
-                ended_trade_wars.append(conflict_id)
-            else:
-                # Intensity can change over time
-                intensity_change = np.random.normal(0, 0.1)
-                details['intensity'] = max(0.1, min(0.9, details['intensity'] + intensity_change))
-        
-        # Remove ended trade wars
-        for conflict_id in ended_trade_wars:
-            del self.active_trade_wars[conflict_id]
-        
-        # Update order diversion potential
-        for sector in self.order_diversion:
-            # Order diversion potential improves with experience and capacity development
-            improvement = 0.02 * np.random.random()
-            self.order_diversion[sector] = min(0.9, self.order_diversion[sector] + improvement)
+        probability_change = self.annual_change + (tension_level - 0.5) * 0.1
+        self.current_probability = np.clip(self.current_probability + probability_change, 0.05, 0.8)
+        
+        # Wars carried over from earlier years run down their remaining duration
+        self.remaining_duration -= self.active
+        
+        # Onset of conflicts that are not active (under tilted probabilities when stress testing)
+        eligible = ~self.active
+        adjusted_probability = self.current_probability[:, np.newaxis] * self.probability_multiplier
+        untilted_probability = np.minimum(1.0, adjusted_probability)
+        sampling_probability = adjusted_probability
+        if self.start_probability_tilt != 1.0:
+            sampling_probability = np.where(untilted_probability >= 1.0, 1.0,
+                                            np.minimum(0.95, untilted_probability * self.start_probability_tilt))
+        
+        starts = eligible & (random(shape) < sampling_probability)
+        if self.start_probability_tilt != 1.0:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_ratio = np.where(starts, np.log(untilted_probability / sampling_probability),
+                                     np.log((1 - untilted_probability) / (1 - sampling_probability)))
+            self.log_likelihood_ratio += np.where(eligible & (sampling_probability < 1.0), log_ratio, 0.0).sum(axis=1)
+        self.start_count += starts.sum(axis=1)
+        self.start_probability_sum += np.where(eligible, untilted_probability, 0.0).sum(axis=1)
+        
+        # New trade wars get a varied intensity and a 2-5 year duration
+        start_intensity = self.conflict_intensity * (0.8 + 0.4 * random(shape))
+        start_duration = (2 + 3 * random(shape)).astype(int)
+        self.intensity = np.where(starts, start_intensity, self.intensity)
+        self.remaining_duration = np.where(starts, start_duration, self.remaining_duration)
+        self.started_year = np.where(starts, simulation_year, self.started_year)
+        self.active = self.active | starts
+        
+        # Expiry, then intensity drift of the wars still active
+        ended = self.active & (self.remaining_duration <= 0)
+        self.active = self.active & ~ended
+        intensity_change = normal(0, 0.1, shape)
+        self.intensity = np.where(self.active, np.clip(self.intensity + intensity_change, 0.1, 0.9), 0.0)
+        
+        # Order diversion potential improves with experience and capacity development
+        self.order_diversion = np.minimum(0.9, self.order_diversion + 0.02 * random(self.order_diversion.shape))
         
         # Update market diversification
         diversification_change = 0.02 * regional_cooperation - 0.01 * tension_level
-        self.market_diversification = max(0.3, min(0.9, self.market_diversification + diversification_change))
+        self.market_diversification = np.clip(self.market_diversification + diversification_change, 0.3, 0.9)
         
         # Update secondary sanction exposure
         sanction_exposure_change = 0.01 * tension_level - 0.02 * self.market_diversification
-        self.secondary_sanction_exposure = max(0.1, min(0.7, self.secondary_sanction_exposure + sanction_exposure_change))
+        self.secondary_sanction_exposure = np.clip(self.secondary_sanction_exposure + sanction_exposure_change,
+                                                   0.1, 0.7)
         
         # Calculate trade war impacts
+        active_wars_intensity = self.intensity.sum(axis=1)
+        tariff_escalation = 0.1 * active_wars_intensity
         
-        # Tariff escalation
-        active_wars_intensity = sum(war['intensity'] for war in self.active_trade_wars.values())
-        tariff_escalation = 0.1 * active_wars_intensity if self.active_trade_wars else 0
-        
-        # Order diversion opportunity
-        # More active trade wars mean more diverted orders potential
-        order_diversion_opportunities = {}
-        for sector, potential in self.order_diversion.items():
-            opportunity = potential * active_wars_intensity * 0.5
-            order_diversion_opportunities[sector] = opportunity
-        
-        # Calculate weighted order diversion opportunity
-        weighted_opportunity = sum(opportunities for opportunities in order_diversion_opportunities.values()) / len(order_diversion_opportunities)
+        # Order diversion opportunity: more active trade wars mean more diverted orders potential
+        order_diversion_opportunities = self.order_diversion * active_wars_intensity[:, np.newaxis] * 0.5
+        weighted_opportunity = order_diversion_opportunities.mean(axis=1)
         
         # Secondary sanction risk
         sanction_risk = self.secondary_sanction_exposure * active_wars_intensity * 0.3
         
-        # Calculate overall opportunity score
+        # Calculate overall opportunity and vulnerability scores
         opportunity_score = weighted_opportunity * 0.7 - sanction_risk * 0.3
-        
-        # Calculate vulnerability score
         vulnerability_score = (
             (1 - self.market_diversification) * 0.5 +
             self.secondary_sanction_exposure * 0.3 +
             tariff_escalation * 0.2
         )
         
-        # Compile results
-        results = {
-            'year_index': year_index,
-            'simulation_year': simulation_year,
-            'trade_war_probability': self.current_probability,
-            'active_trade_wars': self.active_trade_wars.copy(),
-            'new_trade_wars': new_trade_wars,
-            'ended_trade_wars': ended_trade_wars,
+        return {
+            'trade_war_probability': self.current_probability.copy(),
+            'active': self.active.copy(),
+            'intensity': self.intensity.copy(),
+            'remaining_duration': np.where(self.active, self.remaining_duration, 0),
+            'starts': starts,
+            'start_intensity': np.where(starts, start_intensity, 0.0),
+            'ended': ended,
+            'active_count': self.active.sum(axis=1),
             'order_diversion_potential': self.order_diversion.copy(),
-            'market_diversification': self.market_diversification,
-            'secondary_sanction_exposure': self.secondary_sanction_exposure,
+            'market_diversification': self.market_diversification.copy(),
+            'secondary_sanction_exposure': self.secondary_sanction_exposure.copy(),
             'tariff_escalation': tariff_escalation,
             'order_diversion_opportunities': order_diversion_opportunities,
             'sanction_risk': sanction_risk,
             'opportunity_score': opportunity_score,
             'vulnerability_score': vulnerability_score,
         }
+    
+    def export_sector_opportunities(self,
+                                    order_diversion_opportunities: np.ndarray,
+                                    export_sectors: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Order diversion opportunity of export sectors
+        
+        Args:
+            order_diversion_opportunities: (paths, sectors) array from simulate_paths, or
+                the (sectors,) row of one path
+            export_sectors: Export sector names (mapped through EXPORT_SECTOR_DIVERSION;
+                unmapped sectors use 'other')
+            
+        Returns:
+            Dict of opportunities by export sector (per path, or scalars for one path)
+        """
+        columns = {sector: index for index, sector in enumerate(self.diversion_sectors)}
+        return {
+            sector: order_diversion_opportunities[..., columns[EXPORT_SECTOR_DIVERSION.get(sector, 'other')]]
+            for sector in export_sectors
+        }
+    
+    def simulate_trade_wars(self,
+                          year_index: int,
+                          simulation_year: int,
+                          tension_level: float,
+                          regional_cooperation: float) -> Dict[str, Any]:
+        """
+        Simulate trade war impacts for a given year
+        
+        Reports the first path in the original per-conflict format.
+        
+        Args:
+            year_index: Year index from simulation start
+            simulation_year: Actual calendar year
+            tension_level: Level of global geopolitical tensions (0-1)
+            regional_cooperation: Level of regional cooperation (0-1)
+            
+        Returns:
+            Dict with trade war impacts simulation results
+        """
+        paths = self.simulate_paths(simulation_year, tension_level, regional_cooperation)
+        
+        new_trade_wars = {
+            conflict_id: {
+                'started_year': simulation_year,
+                'intensity': float(paths['start_intensity'][0, pair]),
+                'duration_years': int(self.remaining_duration[0, pair]),
+            }
+            for pair, conflict_id in enumerate(self.conflict_ids) if paths['starts'][0, pair]
+        }
+        ended_trade_wars = [conflict_id for pair, conflict_id in enumerate(self.conflict_ids)
+                            if paths['ended'][0, pair]]
+        
+        # Compile results
+        results = {
+            'year_index': year_index,
+            'simulation_year': simulation_year,
+            'trade_war_probability': float(paths['trade_war_probability'][0]),
+            'active_trade_wars': self.active_trade_wars,
+            'new_trade_wars': new_trade_wars,
+            'ended_trade_wars': ended_trade_wars,
+            'order_diversion_potential': dict(zip(self.diversion_sectors, paths['order_diversion_potential'][0].tolist())),
+            'market_diversification': float(paths['market_diversification'][0]),
+            'secondary_sanction_exposure': float(paths['secondary_sanction_exposure'][0]),
+            'tariff_escalation': float(paths['tariff_escalation'][0]),
+            'order_diversion_opportunities': dict(zip(self.diversion_sectors,
+                                                      paths['order_diversion_opportunities'][0].tolist())),
+            'sanction_risk': float(paths['sanction_risk'][0]),
+            'opportunity_score': float(paths['opportunity_score'][0]),
+            'vulnerability_score': float(paths['vulnerability_score'][0]),
+        }
         
         # Store historical data
-        self.historical_impacts[year_index] = results
+        self.historical_impacts.record(year_index, results)
         
         return results
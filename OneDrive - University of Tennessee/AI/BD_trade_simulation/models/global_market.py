@@ -4,6 +4,18 @@ Global market model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
+from models.similarity import competitor_weights
+
+# Share of the supply chain opportunity captured by each sector's demand growth
+SUPPLY_CHAIN_SENSITIVITY = {
+    'rmg': 0.8,  # RMG benefits strongly from supply chain shifts
+    'leather': 0.6,  # Leather also benefits
+    'footwear': 0.6,
+    'electronics': 0.4,  # Some benefit
+    'light_engineering': 0.4,
+}
+DEFAULT_SUPPLY_CHAIN_SENSITIVITY = 0.2  # Limited benefit
 
 
 class GlobalMarketModel:
@@ -33,13 +45,90 @@ class GlobalMarketModel:
         # Supply chain reconfiguration parameters
         self.supply_chain_reconfiguration = config.get('supply_chain_reconfiguration', {})
         
+        # Sector demand in matrix form: base growth per sector, competitor x sector
+        # growth and presence (competitor weight where active, zero elsewhere) and
+        # supply chain weights
+        self.sectors = list(self.market_demand_growth.keys())
+        self.base_sector_growth = np.array([self.market_demand_growth[s] for s in self.sectors], dtype=float)
+        
+        # Competitor weights: explicit, derived from a competitor overlap table
+        # (see models.similarity), or equal
+        self.competitor_weights = self.load_competitor_weights(config)
+        
+        self.competitor_sector_growth = np.zeros((len(self.competitor_growth), len(self.sectors)))
+        self.competitor_presence = np.zeros_like(self.competitor_sector_growth)
+        for i, (competitor, growth_rates) in enumerate(self.competitor_growth.items()):
+            for j, sector in enumerate(self.sectors):
+                if sector in growth_rates:
+                    self.competitor_sector_growth[i, j] = growth_rates[sector]
+                    self.competitor_presence[i, j] = self.competitor_weights[competitor]
+        
+        sensitivity = {**SUPPLY_CHAIN_SENSITIVITY, **config.get('supply_chain_sensitivity', {})}
+        self.supply_chain_weights = np.array(
+            [sensitivity.get(s, DEFAULT_SUPPLY_CHAIN_SENSITIVITY) for s in self.sectors], dtype=float)
+        
         # Initialize sub-models
         self.key_markets = KeyMarketsModel(self.gdp_growth)
         self.competitors = CompetitorDynamicsModel(self.competitor_growth)
         self.supply_chain = SupplyChainModel(self.supply_chain_reconfiguration)
         
+        # Random generator of the model and its sub-models (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
+        # Whether to build per-sector demand detail in results
+        self.include_details = True
+        
+        # Optional precomputed world paths to replay instead of drawing (see models.exogenous_paths)
+        self.exogenous_paths = None
+        
         # Historical data
-        self.historical_conditions = {}
+        self.historical_conditions = ModelHistory()
+    
+    @property
+    def rng(self) -> np.random.Generator:
+        """Random generator of the model and its sub-models"""
+        return self._rng
+    
+    @rng.setter
+    def rng(self, value: np.random.Generator):
+        self._rng = value
+        self.key_markets.rng = value
+        self.competitors.rng = value
+    
+    def load_competitor_weights(self, config: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Weight of each competitor's growth in sector demand
+        
+        Args:
+            config: Global market configuration; 'competitor_weights' gives weights by
+                competitor, 'competitor_overlap' a cached overlap table ('table' path and
+                optional 'measure', 'year' and 'codes')
+            
+        Returns:
+            Weight by competitor in competitor_growth (1.0 unless configured)
+        """
+        weights = dict(config.get('competitor_weights') or {})
+        overlap_config = config.get('competitor_overlap') or {}
+        if overlap_config.get('table') and self.competitor_growth:
+            try:
+                table = pd.read_csv(overlap_config['table'])
+                derived = competitor_weights(table, list(self.competitor_growth),
+                                             measure=overlap_config.get('measure', 'overlap_share'),
+                                             year=overlap_config.get('year'),
+                                             codes=overlap_config.get('codes'))
+                weights = {**derived, **weights}
+            except Exception as e:
+                print(f"Warning: Could not derive competitor weights from {overlap_config['table']}: {e}")
+        
+        # Weights only apply to competitors with sector growth rates in competitor_growth;
+        # competitor_countries ('vietnam_growth_rate', ...) gives overall rates only
+        if (config.get('competitor_weights') or overlap_config.get('table')) and not set(weights) & set(self.competitor_growth):
+            countries = [name[:-len('_growth_rate')] for name in config.get('competitor_countries', {})
+                         if name.endswith('_growth_rate')]
+            print(f"Warning: Competitor weights match no competitor in competitor_growth "
+                  f"({', '.join(self.competitor_growth) or 'none configured'}) and are not applied"
+                  + (f"; competitor_countries ({', '.join(countries)}) has no sector growth rates" if countries else ""))
+        return {competitor: float(weights.get(competitor, 1.0)) for competitor in self.competitor_growth}
     
     def simulate_global_markets(self, 
                               year_index: int, 
@@ -73,12 +162,18 @@ class GlobalMarketModel:
             competitor_multiplier = 1.2  # Higher competitor growth is worse for Bangladesh
             supply_chain_multiplier = 0.8
         
+        # Replayed exogenous inputs for this year, if world paths are attached
+        exogenous = None
+        if self.exogenous_paths is not None:
+            exogenous = self.exogenous_paths.year_inputs(year_index, gdp_multiplier, competitor_multiplier)
+        
         # Simulate key market conditions
         markets_result = self.key_markets.simulate_markets(
             year_index=year_index,
             simulation_year=simulation_year,
             gdp_multiplier=gdp_multiplier,
-            demand_multiplier=demand_multiplier
+            demand_multiplier=demand_multiplier,
+            exogenous=exogenous
         )
         
         # Simulate competitor dynamics
@@ -86,7 +181,8 @@ class GlobalMarketModel:
             year_index=year_index,
             simulation_year=simulation_year,
             gdp_growth=markets_result['gdp_growth'],
-            competitor_multiplier=competitor_multiplier
+            competitor_multiplier=competitor_multiplier,
+            exogenous=exogenous
         )
         
         # Simulate supply chain reconfiguration
@@ -101,42 +197,25 @@ class GlobalMarketModel:
         market_opportunity = markets_result['weighted_growth'] * 0.6 - competitors_result['weighted_growth'] * 0.4
         supply_chain_opportunity = supply_chain_result['china_plus_one_benefit'] - supply_chain_result['nearshoring_impact']
         
+        # Random sector demand variation (drawn even without details so aggregate paths match)
+        if exogenous is not None:
+            random_variation = np.array([exogenous['sector_demand_variation'][s] for s in self.sectors], dtype=float)
+        else:
+            random_variation = self.rng.normal(0, 0.01, size=len(self.sectors))
+        
         # Calculate sector-specific demand conditions
         sector_demand = {}
-        for sector, base_growth in self.market_demand_growth.items():
-            # Adjust sector growth based on market and competitor conditions
-            sector_growth = base_growth * demand_multiplier
-            
-            # Competitor impact varies by sector
-            competitor_impact = 0
-            for competitor, growth_rates in self.competitor_growth.items():
-                if sector in growth_rates:
-                    competitor_impact -= (growth_rates[sector] * competitor_multiplier - base_growth) * 0.2
-            
-            # Supply chain impact varies by sector
-            if sector == 'rmg':
-                sc_impact = supply_chain_opportunity * 0.8  # RMG benefits strongly from supply chain shifts
-            elif sector in ['leather', 'footwear']:
-                sc_impact = supply_chain_opportunity * 0.6  # Leather also benefits
-            elif sector in ['electronics', 'light_engineering']:
-                sc_impact = supply_chain_opportunity * 0.4  # Some benefit
-            else:
-                sc_impact = supply_chain_opportunity * 0.2  # Limited benefit
-            
-            # Calculate effective sector growth
-            effective_growth = sector_growth + competitor_impact + sc_impact
-            
-            # Add random variation
-            random_variation = np.random.normal(0, 0.01)
-            effective_growth += random_variation
-            
-            sector_demand[sector] = {
-                'base_growth': base_growth,
-                'effective_growth': effective_growth,
-                'competitor_impact': competitor_impact,
-                'supply_chain_impact': sc_impact,
-                'random_variation': random_variation,
-            }
+        if self.include_details:
+            demand = self.sector_demand_growth(demand_multiplier, competitor_multiplier,
+                                               supply_chain_opportunity, random_variation)
+            for j, sector in enumerate(self.sectors):
+                sector_demand[sector] = {
+                    'base_growth': self.market_demand_growth[sector],
+                    'effective_growth': float(demand['effective_growth'][j]),
+                    'competitor_impact': float(demand['competitor_impact'][j]),
+                    'supply_chain_impact': float(demand['supply_chain_impact'][j]),
+                    'random_variation': float(random_variation[j]),
+                }
         
         # Compile results
         results = {
@@ -148,13 +227,53 @@ class GlobalMarketModel:
             'supply_chain': supply_chain_result,
             'market_opportunity': market_opportunity,
             'supply_chain_opportunity': supply_chain_opportunity,
-            'sector_demand': sector_demand,
         }
         
+        if self.include_details:
+            results['sector_demand'] = sector_demand
+        
         # Store historical data
-        self.historical_conditions[year_index] = results
+        self.historical_conditions.record(year_index, results)
         
         return results
+    
+    def sector_demand_growth(self,
+                             demand_multiplier: float,
+                             competitor_multiplier: float,
+                             supply_chain_opportunity: Any,
+                             random_variation: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Effective demand growth of all sectors from the sector and competitor matrices
+        
+        Computes one year, or a batch of paths when supply_chain_opportunity has
+        shape (paths,) and random_variation shape (paths, sectors).
+        
+        Args:
+            demand_multiplier: Multiplier for sector demand growth
+            competitor_multiplier: Multiplier for competitor growth rates
+            supply_chain_opportunity: Supply chain opportunity, scalar or shape (paths,)
+            random_variation: Random demand variation, shape (sectors,) or (paths, sectors)
+            
+        Returns:
+            Dict of arrays over self.sectors: 'competitor_impact', 'supply_chain_impact'
+            and 'effective_growth'
+        """
+        # Competitors growing faster than sector demand take share from Bangladesh
+        competitor_gap = competitor_multiplier * self.competitor_sector_growth - self.base_sector_growth
+        competitor_impact = -(self.competitor_presence * competitor_gap).sum(axis=0) * 0.2
+        
+        # Supply chain impact varies by sector
+        opportunity = np.asarray(supply_chain_opportunity, dtype=float)
+        supply_chain_impact = opportunity[..., np.newaxis] * self.supply_chain_weights
+        
+        effective_growth = (self.base_sector_growth * demand_multiplier + competitor_impact
+                            + supply_chain_impact + random_variation)
+        
+        return {
+            'competitor_impact': competitor_impact,
+            'supply_chain_impact': supply_chain_impact,
+            'effective_growth': effective_growth,
+        }
         
         
 class KeyMarketsModel:
@@ -242,14 +361,18 @@ class KeyMarketsModel:
             },
         }
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_markets = {}
+        self.historical_markets = ModelHistory()
     
     def simulate_markets(self,
                         year_index: int,
                         simulation_year: int,
                         gdp_multiplier: float = 1.0,
-                        demand_multiplier: float = 1.0) -> Dict[str, Any]:
+                        demand_multiplier: float = 1.0,
+                        exogenous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Simulate key market conditions for a given year
         
@@ -258,17 +381,21 @@ class KeyMarketsModel:
             simulation_year: Actual calendar year
             gdp_multiplier: Multiplier for GDP growth rates
             demand_multiplier: Multiplier for demand growth
+            exogenous: Optional replayed inputs ('gdp_growth', 'consumer_confidence') replacing random draws
             
         Returns:
             Dict with key markets simulation results
         """
         # Calculate current GDP growth rates
-        gdp_growth = {}
-        for market, base_growth in self.base_gdp_growth.items():
-            # Apply multiplier with some random variation
-            random_variation = np.random.normal(0, 0.005)
-            effective_growth = base_growth * gdp_multiplier + random_variation
-            gdp_growth[market] = effective_growth
+        if exogenous is not None:
+            gdp_growth = dict(exogenous['gdp_growth'])
+        else:
+            gdp_growth = {}
+            for market, base_growth in self.base_gdp_growth.items():
+                # Apply multiplier with some random variation
+                random_variation = self.rng.normal(0, 0.005)
+                effective_growth = base_growth * gdp_multiplier + random_variation
+                gdp_growth[market] = effective_growth
         
         # Market characteristic evolution
         for market, chars in self.market_characteristics.items():
@@ -304,7 +431,10 @@ class KeyMarketsModel:
             # Market-specific adjustments
             if market == 'usa':
                 # US retail market adjustments
-                consumer_confidence_effect = np.random.normal(0, 0.01)
+                if exogenous is not None:
+                    consumer_confidence_effect = exogenous['consumer_confidence']
+                else:
+                    consumer_confidence_effect = self.rng.normal(0, 0.01)
                 effective_demand_growth += consumer_confidence_effect
             elif market == 'eu':
                 # EU market adjustments
@@ -340,7 +470,7 @@ class KeyMarketsModel:
         }
         
         # Store historical data
-        self.historical_markets[year_index] = results
+        self.historical_markets.record(year_index, results)
         
         return results
 
@@ -359,8 +489,21 @@ class CompetitorDynamicsModel:
         """
         self.competitor_growth = competitor_growth_config
         
+        # Growth rates as a competitor x sector matrix; the (row, column) pairs of
+        # configured rates keep config order, which is the order of random draws
+        self.growth_competitors = list(competitor_growth_config.keys())
+        self.growth_sectors = list(dict.fromkeys(
+            sector for rates in competitor_growth_config.values() for sector in rates))
+        self.pairs = [(competitor, sector) for competitor, rates in competitor_growth_config.items() for sector in rates]
+        self.pair_rows = np.array([self.growth_competitors.index(c) for c, _ in self.pairs], dtype=int)
+        self.pair_cols = np.array([self.growth_sectors.index(s) for _, s in self.pairs], dtype=int)
+        self.base_pair_growth = np.array([competitor_growth_config[c][s] for c, s in self.pairs], dtype=float)
+        self.base_growth_matrix = np.zeros((len(self.growth_competitors), len(self.growth_sectors)))
+        self.base_growth_matrix[self.pair_rows, self.pair_cols] = self.base_pair_growth
+        self.sectors_per_competitor = np.bincount(self.pair_rows, minlength=len(self.growth_competitors))
+        
         # Competitor competitive factors
-        self.competitor_factors = {
+        competitor_factors = {
             'vietnam': {
                 'wage_level': 1.2,  # Relative to Bangladesh (1.0)
                 'productivity': 1.4,
@@ -403,14 +546,53 @@ class CompetitorDynamicsModel:
             },
         }
         
+        # Factors as a competitor x factor array, updated for all competitors at once
+        self.factor_names = ['wage_level', 'productivity', 'quality', 'lead_time', 'infrastructure', 'political_stability']
+        self.factor_competitors = list(competitor_factors.keys())
+        self.factors = np.array([[factors[name] for name in self.factor_names]
+                                 for factors in competitor_factors.values()], dtype=float)
+        
+        # Factor competitors with growth rates and their rows in the growth matrix
+        self.has_growth = np.array([c in competitor_growth_config for c in self.factor_competitors])
+        self.growth_rows = np.array([self.growth_competitors.index(c)
+                                     for c in self.factor_competitors if c in competitor_growth_config], dtype=int)
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_competitors = {}
+        self.historical_competitors = ModelHistory()
+    
+    @property
+    def competitor_factors(self) -> Dict[str, Dict[str, float]]:
+        """Current competitive factors by competitor"""
+        return {competitor: dict(zip(self.factor_names, row))
+                for competitor, row in zip(self.factor_competitors, self.factors.tolist())}
+    
+    def growth_matrix(self, competitor_multiplier: float, random_variation: np.ndarray) -> np.ndarray:
+        """
+        Effective competitor x sector growth rates
+        
+        Args:
+            competitor_multiplier: Multiplier for competitor growth rates
+            random_variation: Variation per configured (competitor, sector) pair, shape
+                (pairs,) or (paths, pairs) for a batch of paths
+            
+        Returns:
+            Growth matrix, shape (competitors, sectors) or (paths, competitors, sectors),
+            zero where a competitor is not active in a sector
+        """
+        random_variation = np.asarray(random_variation, dtype=float)
+        growth = np.zeros(random_variation.shape[:-1] + self.base_growth_matrix.shape)
+        growth[..., self.pair_rows, self.pair_cols] = self.base_pair_growth * competitor_multiplier + random_variation
+        return growth
     
     def simulate_competitors(self,
                            year_index: int,
                            simulation_year: int,
                            gdp_growth: Dict[str, float],
-                           competitor_multiplier: float = 1.0) -> Dict[str, Any]:
+                           competitor_multiplier: float = 1.0,
+                           exogenous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Simulate competitor dynamics for a given year
         
@@ -419,85 +601,72 @@ class CompetitorDynamicsModel:
             simulation_year: Actual calendar year
             gdp_growth: GDP growth rates for key markets
             competitor_multiplier: Multiplier for competitor growth rates
+            exogenous: Optional replayed inputs ('competitor_growth') replacing random draws
             
         Returns:
             Dict with competitor dynamics simulation results
         """
-        # Calculate current competitor growth rates
-        effective_growth = {}
-        for competitor, sectors in self.competitor_growth.items():
-            effective_growth[competitor] = {}
-            for sector, growth_rate in sectors.items():
-                # Apply multiplier with some random variation
-                random_variation = np.random.normal(0, 0.01)
-                effective_rate = growth_rate * competitor_multiplier + random_variation
-                effective_growth[competitor][sector] = effective_rate
+        # Calculate current competitor growth rates (multiplier with random variation per pair)
+        if exogenous is not None:
+            pair_growth = [exogenous['competitor_growth'][c][s] for c, s in self.pairs]
+        else:
+            random_variation = self.rng.normal(0, 0.01, size=len(self.pairs))
+            pair_growth = (self.base_pair_growth * competitor_multiplier + random_variation).tolist()
+        
+        effective_growth = {competitor: {} for competitor in self.competitor_growth}
+        for (competitor, sector), rate in zip(self.pairs, pair_growth):
+            effective_growth[competitor][sector] = rate
+        
+        # Average growth of each factor competitor across its sectors
+        has_growth = self.has_growth
+        average_growth = np.zeros(len(self.factor_competitors))
+        competitor_totals = np.bincount(self.pair_rows, weights=pair_growth, minlength=len(self.growth_competitors))
+        average_growth[has_growth] = (competitor_totals / np.maximum(self.sectors_per_competitor, 1))[self.growth_rows]
         
         # Update competitor competitiveness factors
-        for competitor, factors in self.competitor_factors.items():
-            # Wage level increases over time (faster in more successful competitors)
-            base_wage_growth = 0.03
-            if competitor in effective_growth:
-                avg_growth = sum(effective_growth[competitor].values()) / len(effective_growth[competitor])
-                wage_growth = base_wage_growth + avg_growth * 0.3
-            else:
-                wage_growth = base_wage_growth
-            
-            factors['wage_level'] *= (1 + wage_growth)
-            
-            # Productivity improves over time
-            productivity_growth = 0.02 + (factors['infrastructure'] - 1) * 0.01
-            factors['productivity'] *= (1 + productivity_growth)
-            
-            # Quality improves over time
-            quality_growth = 0.02 + (factors['productivity'] - 1) * 0.01
-            factors['quality'] = min(2.0, factors['quality'] * (1 + quality_growth))
-            
-            # Infrastructure improves based on development level
-            if factors['infrastructure'] < 1.0:
-                infra_growth = 0.03  # Faster catch-up for less developed countries
-            else:
-                infra_growth = 0.01  # Slower growth for more developed countries
-            
-            factors['infrastructure'] = min(2.0, factors['infrastructure'] * (1 + infra_growth))
+        wage, productivity, quality, lead_time, infrastructure, stability = self.factors.T
+        
+        # Wage level increases over time (faster in more successful competitors)
+        base_wage_growth = 0.03
+        wage *= 1 + (base_wage_growth + average_growth * 0.3)
+        
+        # Productivity improves over time
+        productivity *= 1 + (0.02 + (infrastructure - 1) * 0.01)
+        
+        # Quality improves over time
+        quality[:] = np.minimum(2.0, quality * (1 + (0.02 + (productivity - 1) * 0.01)))
+        
+        # Infrastructure improves based on development level: faster catch-up for less developed countries
+        infra_growth = np.where(infrastructure < 1.0, 0.03, 0.01)
+        infrastructure[:] = np.minimum(2.0, infrastructure * (1 + infra_growth))
+        
+        # Calculate competitiveness score (higher is more competitive)
+        competitiveness = (
+            (1 / wage) * 0.3 +  # Lower wage is better
+            productivity * 0.2 +
+            quality * 0.2 +
+            lead_time * 0.1 +
+            infrastructure * 0.1 +
+            stability * 0.1
+        )
         
         # Calculate overall competitive position
         competitive_position = {}
-        for competitor, factors in self.competitor_factors.items():
-            # Calculate competitiveness score (higher is more competitive)
-            competitiveness = (
-                (1 / factors['wage_level']) * 0.3 +  # Lower wage is better
-                factors['productivity'] * 0.2 +
-                factors['quality'] * 0.2 +
-                factors['lead_time'] * 0.1 +
-                factors['infrastructure'] * 0.1 +
-                factors['political_stability'] * 0.1
-            )
-            
+        for (competitor, factors), score in zip(self.competitor_factors.items(), competitiveness.tolist()):
             competitive_position[competitor] = {
-                'competitiveness_score': competitiveness,
-                'factors': factors.copy(),
+                'competitiveness_score': score,
+                'factors': factors,
             }
             
             # Add growth rates if available
             if competitor in effective_growth:
                 competitive_position[competitor]['growth_rates'] = effective_growth[competitor].copy()
         
-        # Calculate weighted average competitor growth
-        total_weight = 0
+        # Calculate weighted average competitor growth, weighted by competitiveness score
         weighted_growth = 0
-        
-        for competitor, position in competitive_position.items():
-            if competitor in effective_growth:
-                # Weight by competitiveness score
-                weight = position['competitiveness_score']
-                avg_growth = sum(effective_growth[competitor].values()) / len(effective_growth[competitor])
-                
-                weighted_growth += avg_growth * weight
-                total_weight += weight
-        
+        total_weight = competitiveness[has_growth].sum()
         if total_weight > 0:
-            weighted_growth /= total_weight
+            weighted_growth = float((average_growth[has_growth] * competitiveness[has_growth]).sum() / total_weight)
         
         # Compile results
         results = {
@@ -509,7 +678,7 @@ class CompetitorDynamicsModel:
         }
         
         # Store historical data
-        self.historical_competitors[year_index] = results
+        self.historical_competitors.record(year_index, results)
         
         return results
 
@@ -546,7 +715,7 @@ class SupplyChainModel:
         }
         
         # Historical data
-        self.historical_chains = {}
+        self.historical_chains = ModelHistory()
     
     def simulate_reconfiguration(self,
                                year_index: int,
@@ -651,6 +820,6 @@ class SupplyChainModel:
         }
         
         # Store historical data
-        self.historical_chains[year_index] = results
+        self.historical_chains.record(year_index, results)
         
         return results
@@ -0,0 +1,324 @@
+"""
+Gravity model estimation for Bangladesh trade simulation.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any, Optional
+
+# Fixed effects of the structural gravity specification
+DEFAULT_FIXED_EFFECTS = [('i', 't'), ('j', 't'), ('i', 'j')]
+
+# Gravity coefficient feeding each ExportSectorModel elasticity
+DEFAULT_PARAMETER_MAP = {
+    'tariff': 'ln_tariff',
+    'exchange_rate': 'ln_exchange_rate',
+    'logistics': 'logistics',
+    'trade_policy': 'fta',
+}
+
+# ExportSectorModel elasticities that act through competitiveness, which reaches
+# export growth scaled by 0.1 (competitiveness update) times 2 (growth effect)
+COMPETITIVENESS_CHANNELS = ('exchange_rate', 'logistics', 'trade_policy', 'digital', 'compliance')
+COMPETITIVENESS_PASS_THROUGH = 0.2
+
+
+def factorize_groups(data: pd.DataFrame, columns: Tuple[str, ...]) -> np.ndarray:
+    """
+    Integer group id of every row for a combination of columns
+
+    Args:
+        data: Data frame
+        columns: Columns defining the groups
+
+    Returns:
+        Group ids (0 .. groups - 1)
+    """
+    codes = np.zeros(len(data), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(data[column], sort=False)
+        codes = codes * len(uniques) + column_codes
+    return pd.factorize(codes, sort=False)[0]
+
+
+def demean(values: np.ndarray,
+           groups: List[np.ndarray],
+           weights: np.ndarray,
+           tol: float = 1e-10,
+           max_iter: int = 10000,
+           fitted: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Weighted within transformation over several fixed effects by alternating projections
+
+    Each sweep subtracts the weighted group means of every fixed effect in turn
+    (one bincount per fixed effect and column); sweeps repeat until the largest
+    update is below tol. Dummy matrices are never formed. Starting from the
+    fixed effect component of a previous call (values minus its result) gives
+    the same projection with far fewer sweeps when weights changed little.
+
+    Args:
+        values: Array (observations, columns)
+        groups: Group ids per fixed effect
+        weights: Observation weights
+        tol: Convergence tolerance on the largest absolute update
+        max_iter: Maximum number of sweeps
+        fitted: Optional fixed effect component to subtract before sweeping
+
+    Returns:
+        Demeaned values
+    """
+    values = np.array(values, dtype=float, copy=True)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    group_weights = [np.bincount(group, weights=weights) for group in groups]
+    scale = max(1.0, float(np.abs(values).max())) if values.size else 1.0
+    if fitted is not None:
+        values -= fitted
+
+    for _ in range(max_iter):
+        largest_update = 0.0
+        for group, group_weight in zip(groups, group_weights):
+            weighted = weights[:, np.newaxis] * values
+            means = np.column_stack([np.bincount(group, weights=weighted[:, column], minlength=len(group_weight))
+                                     for column in range(values.shape[1])]) / group_weight[:, np.newaxis]
+            update = means[group]
+            values -= update
+            largest_update = max(largest_update, float(np.abs(means).max()))
+        if largest_update <= tol * scale:
+            break
+    return values
+
+
+def drop_unidentified(y: np.ndarray, groups: List[np.ndarray]) -> np.ndarray:
+    """
+    Observations whose fixed effects are identified
+
+    Repeatedly drops observations in fixed effect groups whose outcomes are all
+    zero (their fixed effect would go to minus infinity) and singleton groups.
+
+    Args:
+        y: Dependent variable
+        groups: Group ids per fixed effect
+
+    Returns:
+        Boolean mask of kept observations
+    """
+    keep = np.ones(len(y), dtype=bool)
+    while True:
+        dropped = ~keep
+        for group in groups:
+            counts = np.bincount(group[keep], minlength=group.max() + 1)
+            totals = np.bincount(group[keep], weights=y[keep], minlength=group.max() + 1)
+            dropped |= keep & ((totals[group] <= 0) | (counts[group] <= 1))
+        if not (dropped & keep).any():
+            return keep
+        keep &= ~dropped
+
+
+def estimate_ppml(data: pd.DataFrame,
+                  regressors: List[str],
+                  dependent: str = 'v',
+                  fixed_effects: Optional[List[Tuple[str, ...]]] = None,
+                  cluster: Optional[Tuple[str, ...]] = ('i', 'j'),
+                  tol: float = 1e-8,
+                  max_iter: int = 100) -> Dict[str, Any]:
+    """
+    Poisson pseudo-maximum likelihood with high-dimensional fixed effects
+
+    Iteratively reweighted least squares: each iteration demeans the working
+    dependent variable and the regressors with weights mu by alternating
+    projections, solves the weighted least squares problem for the slopes, and
+    recovers the linear index (slopes plus fixed effects) as the working
+    variable minus the demeaned residual.
+
+    Args:
+        data: Observations with the dependent variable, regressors and fixed effect columns
+        regressors: Regressor columns
+        dependent: Dependent variable column (trade value, zeros allowed)
+        fixed_effects: Column combinations of the fixed effects (exporter-year,
+            importer-year and pair by default)
+        cluster: Columns of the clusters for robust standard errors (heteroskedasticity
+            robust if None)
+        tol: Convergence tolerance on the relative change in deviance
+        max_iter: Maximum number of IRLS iterations
+
+    Returns:
+        Dict with coefficients, standard errors, observations used and dropped,
+        iterations, convergence flag and deviance
+    """
+    fixed_effects = DEFAULT_FIXED_EFFECTS if fixed_effects is None else fixed_effects
+    y_all = data[dependent].to_numpy(dtype=float)
+    X_all = data[regressors].to_numpy(dtype=float)
+    groups_all = [factorize_groups(data, tuple(columns)) for columns in fixed_effects]
+
+    keep = drop_unidentified(y_all, groups_all) if groups_all else np.ones(len(y_all), dtype=bool)
+    y, X = y_all[keep], X_all[keep]
+    groups = [pd.factorize(group[keep])[0] for group in groups_all]
+
+    mu = (y + y.mean()) / 2
+    eta = np.log(mu)
+    deviance = np.inf
+    beta = np.zeros(len(regressors))
+    converged = False
+    fitted = None
+    inner_tol = 1e-4
+
+    for iteration in range(1, max_iter + 1):
+        z = eta + (y - mu) / mu
+        working = np.column_stack([z, X])
+        demeaned = working
+        if groups:
+            # Warm start from the previous iteration's fixed effect components
+            demeaned = demean(working, groups, mu, tol=inner_tol, fitted=fitted)
+            fitted = working - demeaned
+        z_tilde, X_tilde = demeaned[:, 0], demeaned[:, 1:]
+
+        root_weight = np.sqrt(mu)
+        if len(regressors):
+            beta = np.linalg.lstsq(X_tilde * root_weight[:, np.newaxis], z_tilde * root_weight, rcond=None)[0]
+        residual = z_tilde - X_tilde @ beta
+        eta = z - residual
+        mu = np.exp(eta)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_ratio = np.where(y > 0, y * np.log(y / mu), 0.0)
+        new_deviance = 2 * float((log_ratio - (y - mu)).sum())
+        deviance_change = abs(new_deviance - deviance) / max(abs(new_deviance), 0.1)
+        deviance = new_deviance
+        if deviance_change < tol and inner_tol <= tol * 1e-2:
+            converged = True
+            break
+
+        # Demeaning only needs to be as precise as the current IRLS step
+        inner_tol = max(min(inner_tol, deviance_change * 1e-3), tol * 1e-2)
+
+    # Sandwich variance on the demeaned regressors at the solution
+    standard_errors = np.full(len(regressors), np.nan)
+    if len(regressors):
+        X_tilde = demean(X, groups, mu, fitted=fitted[:, 1:]) if groups else X
+        bread = np.linalg.pinv((X_tilde * mu[:, np.newaxis]).T @ X_tilde)
+        scores = X_tilde * (y - mu)[:, np.newaxis]
+        if cluster is not None:
+            cluster_ids = factorize_groups(data, tuple(cluster))[keep]
+            cluster_ids = pd.factorize(cluster_ids)[0]
+            scores = np.column_stack([np.bincount(cluster_ids, weights=scores[:, k]) for k in range(len(regressors))])
+        variance = bread @ (scores.T @ scores) @ bread
+        standard_errors = np.sqrt(np.diag(variance))
+
+    return {
+        'coefficients': dict(zip(regressors, beta.tolist())),
+        'standard_errors': dict(zip(regressors, standard_errors.tolist())),
+        'observations': int(keep.sum()),
+        'dropped_observations': int((~keep).sum()),
+        'fixed_effects': [list(columns) for columns in fixed_effects],
+        'iterations': iteration,
+        'converged': converged,
+        'deviance': deviance,
+    }
+
+
+class GravityEstimator:
+    """
+    PPML gravity estimates cached by data and specification
+
+    The cache key hashes the used columns of the data together with the
+    specification, so re-estimating on unchanged data is a dictionary lookup,
+    and with a cache directory results persist across runs.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize gravity estimator
+
+        Args:
+            cache_dir: Optional directory for persisted estimates
+        """
+        self.cache_dir = cache_dir
+        self.results = {}
+
+    def cache_key(self,
+                  data: pd.DataFrame,
+                  regressors: List[str],
+                  dependent: str,
+                  fixed_effects: List[Tuple[str, ...]],
+                  cluster: Optional[Tuple[str, ...]]) -> str:
+        """Hash of the used data columns and the specification"""
+        columns = list(dict.fromkeys([dependent, *regressors, *(c for fe in fixed_effects for c in fe),
+                                      *(cluster or ())]))
+        digest = hashlib.sha1(pd.util.hash_pandas_object(data[columns], index=False).to_numpy().tobytes())
+        digest.update(json.dumps([regressors, dependent, [list(fe) for fe in fixed_effects],
+                                  list(cluster) if cluster else None]).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def fit(self,
+            data: pd.DataFrame,
+            regressors: List[str],
+            dependent: str = 'v',
+            fixed_effects: Optional[List[Tuple[str, ...]]] = None,
+            cluster: Optional[Tuple[str, ...]] = ('i', 'j'),
+            **kwargs) -> Dict[str, Any]:
+        """
+        Estimate (or load) a PPML gravity model
+
+        Args:
+            data: Observations
+            regressors: Regressor columns
+            dependent: Dependent variable column
+            fixed_effects: Fixed effect column combinations (DEFAULT_FIXED_EFFECTS if None)
+            cluster: Cluster columns for standard errors
+            **kwargs: Further arguments for estimate_ppml (tol, max_iter)
+
+        Returns:
+            Estimation results (see estimate_ppml) with their 'cache_key'
+        """
+        fixed_effects = DEFAULT_FIXED_EFFECTS if fixed_effects is None else fixed_effects
+        key = self.cache_key(data, regressors, dependent, fixed_effects, cluster)
+        if key in self.results:
+            return self.results[key]
+
+        cache_file = os.path.join(self.cache_dir, f"gravity_{key}.json") if self.cache_dir else None
+        if cache_file is not None and os.path.exists(cache_file):
+            with open(cache_file) as f:
+                results = json.load(f)
+        else:
+            results = estimate_ppml(data, regressors, dependent, fixed_effects, cluster, **kwargs)
+            results['cache_key'] = key
+            if cache_file is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(cache_file, 'w') as f:
+                    json.dump(results, f, indent=2)
+
+        self.results[key] = results
+        return results
+
+
+def sector_elasticities(results: Dict[str, Any],
+                        parameter_map: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    Sector model elasticities from gravity estimates
+
+    Gravity coefficients are elasticities of trade values. The tariff
+    coefficient (on log(1 + tariff)) multiplies the tariff change directly;
+    coefficients of competitiveness channels are divided by the pass-through
+    of competitiveness to growth so the implied growth effect matches.
+
+    Args:
+        results: Gravity estimation results
+        parameter_map: Gravity coefficient by sector model parameter (DEFAULT_PARAMETER_MAP if None)
+
+    Returns:
+        Elasticities by ExportSectorModel parameter for the coefficients that were estimated
+    """
+    parameter_map = parameter_map or DEFAULT_PARAMETER_MAP
+    coefficients = results.get('coefficients', {})
+    elasticities = {}
+    for parameter, coefficient in parameter_map.items():
+        if coefficient not in coefficients:
+            continue
+        value = float(coefficients[coefficient])
+        if parameter in COMPETITIVENESS_CHANNELS:
+            value /= COMPETITIVENESS_PASS_THROUGH
+        elasticities[parameter] = value
+    return elasticities
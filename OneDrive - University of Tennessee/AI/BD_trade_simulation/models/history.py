@@ -0,0 +1,189 @@
+"""
+Array-backed history container for Bangladesh trade simulation models.
+"""
+import numpy as np
+from typing import Dict, List, Any, Optional, Iterable
+
+# Default number of years to preallocate (2025-2050 plus the initial state)
+DEFAULT_HORIZON = 27
+
+# Bookkeeping entries that are never stored as fields when inferring them from results
+SKIPPED_FIELDS = ('year_index', 'simulation_year')
+
+
+def _is_scalar(value) -> bool:
+    """Check whether a value can be stored in a numeric history row"""
+    return isinstance(value, (int, float, bool, np.number, np.bool_))
+
+
+class ModelHistory:
+    """
+    Preallocated history of scalar model fields indexed by year_index
+
+    Each field is one row of a float array sized to the simulation horizon, so
+    recording and lookup are O(1) and models no longer retain a full result dict
+    per year. Fields can be given up front or are inferred from the numeric
+    entries of each record (new fields get a row on first appearance); nested
+    and non-numeric entries are not stored.
+    """
+
+    __slots__ = ('fields', 'length', '_field_index', '_values', '_recorded', '_infer_fields')
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, horizon: int = DEFAULT_HORIZON):
+        """
+        Initialize history storage
+
+        Args:
+            fields: Names of the scalar fields to track (inferred from records if None)
+            horizon: Number of years to preallocate; storage grows if exceeded
+        """
+        self.fields = ()
+        self.length = 0  # One past the highest recorded year_index
+        self._field_index = {}
+        self._values = np.empty((0, horizon))
+        self._recorded = np.zeros(horizon, dtype=bool)
+        self._infer_fields = fields is None
+
+        if fields is not None:
+            self._add_fields(fields)
+
+    def _add_fields(self, fields: Iterable[str]):
+        """Allocate one row per new field"""
+        new_fields = tuple(field for field in fields if field not in self._field_index)
+        if not new_fields:
+            return
+
+        self.fields = self.fields + new_fields
+        self._field_index = {field: row for row, field in enumerate(self.fields)}
+        rows = np.full((len(new_fields), self.capacity), np.nan)
+        self._values = np.vstack([self._values, rows])
+
+    @property
+    def capacity(self) -> int:
+        """Number of years currently allocated"""
+        return self._recorded.shape[0]
+
+    def reserve(self, horizon: int):
+        """
+        Grow storage to hold at least the given number of years
+
+        Args:
+            horizon: Number of years to allocate
+        """
+        if horizon <= self.capacity:
+            return
+
+        values = np.full((len(self.fields), horizon), np.nan)
+        values[:, :self.capacity] = self._values
+        recorded = np.zeros(horizon, dtype=bool)
+        recorded[:self.capacity] = self._recorded
+
+        self._values = values
+        self._recorded = recorded
+
+    def record(self, year_index: int, values: Dict[str, Any]):
+        """
+        Store the tracked fields of a result dict for a given year
+
+        Args:
+            year_index: Year index from simulation start
+            values: Dict of results; entries that are not tracked fields are ignored
+        """
+        if self._infer_fields:
+            self._add_fields(key for key, value in values.items()
+                             if key not in self._field_index and key not in SKIPPED_FIELDS and _is_scalar(value))
+
+        if year_index >= self.capacity:
+            self.reserve(max(year_index + 1, 2 * self.capacity))
+
+        column = self._values[:, year_index]
+        for field, row in self._field_index.items():
+            value = values.get(field)
+            if _is_scalar(value):
+                column[row] = value
+
+        self._recorded[year_index] = True
+        self.length = max(self.length, year_index + 1)
+
+    def append(self, values: Dict[str, Any]):
+        """
+        Store the tracked fields of a result dict after the latest recorded year
+
+        Args:
+            values: Dict of results
+        """
+        self.record(self.length, values)
+
+    def get(self, field: str, year_index: int, default: Any = None) -> Any:
+        """
+        Get a field value for a given year
+
+        Args:
+            field: Field name
+            year_index: Year index from simulation start (negative counts from the latest year)
+            default: Value returned if the year or field was not recorded
+
+        Returns:
+            Recorded value or default
+        """
+        if year_index < 0:
+            year_index += self.length
+
+        row = self._field_index.get(field)
+        if row is None or not 0 <= year_index < self.length or not self._recorded[year_index]:
+            return default
+
+        return float(self._values[row, year_index])
+
+    def latest(self, field: str, default: Any = None) -> Any:
+        """Get the most recently recorded value of a field"""
+        return self.get(field, -1, default)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """Series of a field over all recorded years (a view, not a copy)"""
+        return self._values[self._field_index[field], :self.length]
+
+    def __contains__(self, year_index: int) -> bool:
+        return 0 <= year_index < self.length and bool(self._recorded[year_index])
+
+    def __len__(self) -> int:
+        return self.length
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        """
+        Convert to plain lists for serialization
+
+        Returns:
+            Dict mapping each field to its recorded series
+        """
+        return {field: self[field].tolist() for field in self.fields}
+
+
+def reserve_histories(model: Any, horizon: int, _seen: Optional[set] = None):
+    """
+    Preallocate every ModelHistory held by a model and its sub-models
+
+    Args:
+        model: Model instance (sub-models and dicts of sub-models are visited)
+        horizon: Number of years to allocate
+    """
+    if _seen is None:
+        _seen = set()
+    if id(model) in _seen:
+        return
+    _seen.add(id(model))
+
+    if isinstance(model, ModelHistory):
+        model.reserve(horizon)
+        return
+
+    if isinstance(model, dict):
+        children = model.values()
+    elif hasattr(model, '__dict__') and type(model).__module__.startswith('models.'):
+        children = vars(model).values()
+    else:
+        return
+
+    for child in children:
+        if isinstance(child, (ModelHistory, dict)) or hasattr(child, '__dict__'):
+            reserve_histories(child, horizon, _seen)
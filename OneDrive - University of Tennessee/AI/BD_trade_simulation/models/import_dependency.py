@@ -4,6 +4,7 @@ Import dependency model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
 
 
 class ImportDependencyModel:
@@ -42,9 +43,18 @@ class ImportDependencyModel:
         self.substitution_elasticity = substitution_elasticity
         self.categories = categories or []
         
+        # Part of the base volume required by export production (set by link_to_exports)
+        self.export_linked_baseline = None
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Initialize historical data storage
-        self.historical_volumes = {0: current_volume}  # year 0 = start_year
-        self.historical_domestic_ratios = {0: domestic_production_ratio}
+        self.history = ModelHistory(('volume', 'domestic_ratio', 'export_linked_volume'))
+        self.history.record(0, {  # year 0 = start_year
+            'volume': current_volume,
+            'domestic_ratio': domestic_production_ratio,
+        })
         
         # Initialize subcategory models if applicable
         self.subcategory_models = {}
@@ -52,6 +62,23 @@ class ImportDependencyModel:
             # In a real implementation, we would initialize subcategory models here
             pass
     
+    def link_to_exports(self, baseline_volume: float):
+        """
+        Split off the part of the base import volume that export production requires
+        
+        The export-linked part is then supplied each year (e.g. by the input-output
+        model) instead of following the demand dynamics.
+        
+        Args:
+            baseline_volume: Export-linked imports at base-year exports (million USD)
+        """
+        self.export_linked_baseline = min(baseline_volume, self.current_volume)
+        self.history.record(0, {
+            'volume': self.current_volume,
+            'domestic_ratio': self.domestic_production_ratio,
+            'export_linked_volume': self.export_linked_baseline,
+        })
+    
     def simulate_import_needs(self, 
                              year_index: int,
                              domestic_production_growth: float,
@@ -60,7 +87,8 @@ class ImportDependencyModel:
                              tariff_changes: float,
                              global_price_changes: Dict[str, float],
                              logistics_cost: float,
-                             domestic_capacity_investment: float) -> Dict[str, Any]:
+                             domestic_capacity_investment: float,
+                             export_linked_imports: Optional[float] = None) -> Dict[str, Any]:
         """
         Simulate import requirements for this category for one year
         
@@ -73,13 +101,23 @@ class ImportDependencyModel:
             global_price_changes: Changes in global prices for different import categories
             logistics_cost: Import logistics cost factor
             domestic_capacity_investment: Investment in domestic production capacity
+            export_linked_imports: Optional imports required by this year's export
+                production; added to the demand-driven part of the volume
             
         Returns:
             Dict with simulation results for this year
         """
         # Get previous year's volume and domestic ratio
-        prev_volume = self.historical_volumes.get(year_index - 1, self.current_volume)
-        prev_domestic_ratio = self.historical_domestic_ratios.get(year_index - 1, self.domestic_production_ratio)
+        prev_volume = self.history.get('volume', year_index - 1, self.current_volume)
+        prev_domestic_ratio = self.history.get('domestic_ratio', year_index - 1, self.domestic_production_ratio)
+        total_prev_volume = prev_volume
+        
+        # Only the part not linked to exports follows the demand dynamics
+        if export_linked_imports is not None:
+            prev_linked = self.history.get('export_linked_volume', year_index - 1, self.export_linked_baseline or 0.0)
+            if np.isnan(prev_linked):
+                prev_linked = self.export_linked_baseline or 0.0
+            prev_volume = max(prev_volume - prev_linked, 0.0)
         
         # Calculate base import growth adjusted for consumption demand
         adjusted_growth = self.base_growth_rate * (1 + 0.7 * (consumption_demand_growth - 0.04))
@@ -130,18 +168,24 @@ class ImportDependencyModel:
         new_volume = new_volume * (1 + price_elasticity_effect)
         
         # Apply some random variation (economic shocks, etc.)
-        random_variation = np.random.normal(0, 0.02)  # 2% standard deviation
+        random_variation = self.rng.normal(0, 0.02)  # 2% standard deviation
         new_volume = new_volume * (1 + random_variation)
         
+        # Add the imports required by export production
+        if export_linked_imports is not None:
+            new_volume += export_linked_imports
+        
         # Store historical data
-        self.historical_volumes[year_index] = new_volume
-        self.historical_domestic_ratios[year_index] = new_domestic_ratio
+        self.history.record(year_index, {
+            'volume': new_volume,
+            'domestic_ratio': new_domestic_ratio,
+            'export_linked_volume': export_linked_imports,
+        })
         
         # Calculate effective growth rate
-        effective_growth_rate = (new_volume / prev_volume) - 1
+        effective_growth_rate = (new_volume / total_prev_volume) - 1
         
-        # Return results
-        return {
+        results = {
             'category_name': self.category_name,
             'year_index': year_index,
             'import_volume': new_volume,
@@ -153,6 +197,11 @@ class ImportDependencyModel:
             'substitution_effect': substitution_effect if 'substitution_effect' in locals() else 0,
             'random_variation': random_variation
         }
+        if export_linked_imports is not None:
+            results['export_linked_imports'] = export_linked_imports
+        
+        # Return results
+        return results
     
     def simulate_subcategories(self, year_index, **kwargs):
         """
@@ -435,7 +484,7 @@ class EnergyImportsModel(ImportDependencyModel):
         elif global_energy_price_change > 0.1:  # If prices are rising significantly
             # Possibility to use strategic reserves
             reserve_use_probability = min(0.7, global_energy_price_change)
-            if np.random.random() < reserve_use_probability and self.strategic_reserve_months > 1:
+            if self.rng.random() < reserve_use_probability and self.strategic_reserve_months > 1:
                 reserve_change = -min(0.5, self.strategic_reserve_months - 1)
                 self.strategic_reserve_months += reserve_change
                 strategic_impact = reserve_change * 0.1
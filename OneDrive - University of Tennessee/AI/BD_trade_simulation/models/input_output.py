@@ -0,0 +1,246 @@
+"""
+Input-output model for Bangladesh trade simulation.
+"""
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from typing import Dict, List, Tuple, Any, Optional
+
+# Input per unit of gross output of each using sector (columns). Inputs are either
+# domestic sectors or imported inputs; values are illustrative shares of output value.
+DEFAULT_COEFFICIENTS = {
+    'rmg': {'textiles': 0.20, 'fabric': 0.25, 'yarn': 0.05, 'chemicals': 0.03, 'machinery': 0.03,
+            'energy': 0.02, 'utilities': 0.03, 'transport': 0.03},
+    'pharma': {'chemicals': 0.35, 'plastics': 0.04, 'machinery': 0.04, 'energy': 0.02, 'utilities': 0.02,
+               'transport': 0.02},
+    'it_services': {'machinery': 0.06, 'energy': 0.01, 'utilities': 0.02},
+    'leather': {'agriculture': 0.15, 'chemicals': 0.10, 'plastics': 0.02, 'machinery': 0.03, 'energy': 0.02,
+                'utilities': 0.03, 'transport': 0.02},
+    'jute': {'agriculture': 0.35, 'chemicals': 0.02, 'machinery': 0.02, 'energy': 0.03, 'utilities': 0.03,
+             'transport': 0.03},
+    'agro_products': {'agriculture': 0.30, 'chemicals': 0.05, 'plastics': 0.02, 'machinery': 0.02, 'energy': 0.03,
+                      'utilities': 0.02, 'transport': 0.04},
+    'textiles': {'cotton': 0.40, 'chemicals': 0.06, 'machinery': 0.03, 'energy': 0.06, 'utilities': 0.05,
+                 'transport': 0.02},
+    'agriculture': {'chemicals': 0.06, 'machinery': 0.02, 'energy': 0.04, 'utilities': 0.02, 'transport': 0.03},
+    'utilities': {'energy': 0.45, 'machinery': 0.03, 'metals': 0.01, 'transport': 0.02},
+    'transport': {'energy': 0.20, 'machinery': 0.05, 'metals': 0.02, 'utilities': 0.02},
+}
+
+# Import dependency category of each imported input
+IMPORT_CATEGORIES = {
+    'cotton': 'industrial_inputs',
+    'yarn': 'industrial_inputs',
+    'fabric': 'industrial_inputs',
+    'machinery': 'industrial_inputs',
+    'chemicals': 'industrial_inputs',
+    'metals': 'industrial_inputs',
+    'plastics': 'industrial_inputs',
+    'energy': 'energy',
+}
+
+
+class InputOutputModel:
+    """
+    Leontief input-output model linking export output to imported inputs
+
+    Domestic sectors (export sectors and domestic supply sectors such as
+    spinning/weaving, agriculture, utilities and transport) are linked by the
+    sparse technical coefficient matrix A_dd, and imported inputs by A_md. For
+    final demand f (exports), gross output solves (I - A_dd) x = f and import
+    needs are A_md x. The LU factorization of I - A_dd is cached by a hash of the
+    coefficients, so every year and path reuses it until the coefficients change.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize input-output model
+
+        Args:
+            config: Input-output configuration ('coefficients' by using sector and input,
+                overriding DEFAULT_COEFFICIENTS; 'import_categories' by imported input)
+        """
+        config = config or {}
+
+        coefficients = {sector: dict(inputs) for sector, inputs in DEFAULT_COEFFICIENTS.items()}
+        for sector, inputs in config.get('coefficients', {}).items():
+            coefficients.setdefault(sector, {}).update(inputs)
+
+        self.import_categories = {**IMPORT_CATEGORIES, **config.get('import_categories', {})}
+        self.set_coefficients(coefficients)
+
+        # Factorizations of I - A_dd keyed by coefficient hash
+        self.max_cached_factorizations = config.get('max_cached_factorizations', 8)
+        self._factorizations = {}
+        self.factorizations_computed = 0
+
+    @classmethod
+    def from_csv(cls, path: str, config: Optional[Dict[str, Any]] = None) -> 'InputOutputModel':
+        """
+        Load technical coefficients from a CSV file
+
+        Args:
+            path: CSV with inputs as rows (first column) and using sectors as columns
+            config: Further input-output configuration
+
+        Returns:
+            InputOutputModel instance
+        """
+        table = pd.read_csv(path, index_col=0).fillna(0.0)
+        coefficients = {sector: {inp: float(value) for inp, value in table[sector].items() if value}
+                        for sector in table.columns}
+        model = cls({**(config or {}), 'coefficients': {}})
+        model.set_coefficients(coefficients)
+        return model
+
+    def set_coefficients(self, coefficients: Dict[str, Dict[str, float]]):
+        """
+        Build the coefficient matrices
+
+        Every using sector is a domestic sector; inputs that are not domestic
+        sectors must be imported inputs listed in the import categories.
+
+        Args:
+            coefficients: Input per unit of output, by using sector and input
+        """
+        self.coefficients = coefficients
+        self.sectors = list(coefficients.keys())
+        self.imported_inputs = list(dict.fromkeys(
+            inp for inputs in coefficients.values() for inp in inputs if inp not in coefficients))
+        unknown = [inp for inp in self.imported_inputs if inp not in self.import_categories]
+        if unknown:
+            raise ValueError(f"Imported inputs without an import category: {unknown}")
+
+        sector_index = {sector: i for i, sector in enumerate(self.sectors)}
+        import_index = {inp: i for i, inp in enumerate(self.imported_inputs)}
+        domestic = ([], [], [])
+        imported = ([], [], [])
+        for j, (sector, inputs) in enumerate(coefficients.items()):
+            for inp, value in inputs.items():
+                target = domestic if inp in sector_index else imported
+                target[0].append(value)
+                target[1].append(sector_index[inp] if inp in sector_index else import_index[inp])
+                target[2].append(j)
+
+        n, m = len(self.sectors), len(self.imported_inputs)
+        self.domestic_coefficients = sparse.csc_matrix((domestic[0], (domestic[1], domestic[2])), shape=(n, n))
+        self.import_coefficients = sparse.csr_matrix((imported[0], (imported[1], imported[2])), shape=(m, n))
+
+        # Aggregation of imported inputs into import dependency categories
+        self.categories = list(dict.fromkeys(self.import_categories[inp] for inp in self.imported_inputs))
+        self.category_matrix = sparse.csr_matrix((
+            np.ones(m),
+            ([self.categories.index(self.import_categories[inp]) for inp in self.imported_inputs], np.arange(m)),
+        ), shape=(len(self.categories), m))
+
+        self._coefficient_key = hashlib.sha1(
+            self.domestic_coefficients.data.tobytes() + self.domestic_coefficients.indices.tobytes()
+            + self.domestic_coefficients.indptr.tobytes()).hexdigest()
+
+    def update_coefficient(self, sector: str, inp: str, value: float):
+        """
+        Change one technical coefficient
+
+        Args:
+            sector: Using sector
+            inp: Input (domestic sector or imported input)
+            value: New input per unit of output
+        """
+        coefficients = {s: dict(inputs) for s, inputs in self.coefficients.items()}
+        coefficients[sector][inp] = value
+        self.set_coefficients(coefficients)
+
+    def substitute_imports(self, sector: str, imported_input: str, domestic_sector: str, share: float):
+        """
+        Move part of an imported input requirement to a domestic supplier (backward linkage)
+
+        Args:
+            sector: Using sector
+            imported_input: Imported input being substituted
+            domestic_sector: Domestic sector taking over the supply
+            share: Share of the imported coefficient moved (0-1)
+        """
+        coefficients = {s: dict(inputs) for s, inputs in self.coefficients.items()}
+        moved = coefficients[sector].get(imported_input, 0.0) * share
+        coefficients[sector][imported_input] = coefficients[sector].get(imported_input, 0.0) - moved
+        coefficients[sector][domestic_sector] = coefficients[sector].get(domestic_sector, 0.0) + moved
+        self.set_coefficients(coefficients)
+
+    def factorization(self):
+        """LU factorization of I - A_dd for the current coefficients (cached)"""
+        lu = self._factorizations.get(self._coefficient_key)
+        if lu is None:
+            leontief = (sparse.identity(len(self.sectors), format='csc') - self.domestic_coefficients).tocsc()
+            lu = splu(leontief)
+            self.factorizations_computed += 1
+            if len(self._factorizations) >= self.max_cached_factorizations:
+                self._factorizations.pop(next(iter(self._factorizations)))
+            self._factorizations[self._coefficient_key] = lu
+        return lu
+
+    def final_demand(self, exports: Dict[str, float]) -> np.ndarray:
+        """
+        Final demand vector from exports by sector
+
+        Args:
+            exports: Export value by sector (sectors outside the model are ignored)
+
+        Returns:
+            Final demand over self.sectors
+        """
+        return np.array([exports.get(sector, 0.0) for sector in self.sectors], dtype=float)
+
+    def solve(self, final_demand: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Gross output and import needs for final demand
+
+        Args:
+            final_demand: Final demand, shape (sectors,) or (sectors, paths)
+
+        Returns:
+            Dict with 'output' (sectors[, paths]), 'imports' by imported input and
+            'category_imports' by import category
+        """
+        output = self.factorization().solve(np.asarray(final_demand, dtype=float))
+        imports = self.import_coefficients @ output
+        return {
+            'output': output,
+            'imports': imports,
+            'category_imports': self.category_matrix @ imports,
+        }
+
+    def import_content(self) -> np.ndarray:
+        """
+        Total (direct and indirect) imported inputs per unit of final demand
+
+        Returns:
+            Array (imported inputs, sectors): A_md (I - A_dd)^-1
+        """
+        # Solve the transposed system instead of forming the inverse
+        return self.factorization().solve(self.import_coefficients.T.toarray(), trans='T').T
+
+    def import_requirements(self, exports: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Import needs generated by a year's exports
+
+        Args:
+            exports: Export value by sector
+
+        Returns:
+            Dict with gross output by sector, imports by input and by import category,
+            total imports and the import content share of exports
+        """
+        final_demand = self.final_demand(exports)
+        solution = self.solve(final_demand)
+        total_exports = float(final_demand.sum())
+        total_imports = float(solution['imports'].sum())
+
+        return {
+            'output': dict(zip(self.sectors, solution['output'].tolist())),
+            'imports': dict(zip(self.imported_inputs, solution['imports'].tolist())),
+            'category_imports': dict(zip(self.categories, solution['category_imports'].tolist())),
+            'total_imports': total_imports,
+            'import_content_share': total_imports / total_exports if total_exports > 0 else 0.0,
+        }
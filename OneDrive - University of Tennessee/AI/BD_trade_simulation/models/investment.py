@@ -1,5 +1,5 @@
-import random
 import numpy as np
+from models.history import ModelHistory
 
 class InvestmentModel:
     """
@@ -47,17 +47,27 @@ class InvestmentModel:
         self.repatriation_restrictions = config.get('initial_repatriation_restrictions', 0.40)  # 0-1 scale (0 = no restrictions)
         self.investment_incentives = config.get('initial_investment_incentives', 0.50)  # 0-1 scale (1 = highest)
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Track metrics over time
-        self.yearly_metrics = {
-            'fdi_inflow': [self.fdi_inflow],
-            'domestic_investment': [self.domestic_investment],
-            'sez_exports': [self.sez_exports],
-            'active_sezs': [self.active_sezs],
-            'investment_policy_index': [self.investment_policy_index],
-            'fdi_sectors': [self.fdi_sectors.copy()],
-            'domestic_sectors': [self.domestic_sectors.copy()],
-            'gdp': [self.gdp]
+        self.yearly_metrics = ModelHistory()
+        self.yearly_metrics.append({
+            'fdi_inflow': self.fdi_inflow,
+            'domestic_investment': self.domestic_investment,
+            'sez_exports': self.sez_exports,
+            'active_sezs': self.active_sezs,
+            'investment_policy_index': self.investment_policy_index,
+            'gdp': self.gdp,
+        })
+        
+        # Sector share histories, one field per sector
+        self.yearly_sector_shares = {
+            'fdi_sectors': ModelHistory(self.fdi_sectors.keys()),
+            'domestic_sectors': ModelHistory(self.domestic_sectors.keys()),
         }
+        for key, history in self.yearly_sector_shares.items():
+            history.append(getattr(self, key))
     
     def simulate_step(self, year, global_conditions=None):
         """
@@ -92,8 +102,9 @@ class InvestmentModel:
         }
         
         # Store metrics for this year
-        for key, value in current_metrics.items():
-            self.yearly_metrics[key].append(value)
+        self.yearly_metrics.append(current_metrics)
+        for key, history in self.yearly_sector_shares.items():
+            history.append(current_metrics[key])
             
         return current_metrics
     
@@ -118,7 +129,7 @@ class InvestmentModel:
             global_effect = 0.5 * global_conditions['global_economic_growth']
         
         # Random component (external shocks, weather, etc.)
-        random_effect = random.uniform(-0.01, 0.02)
+        random_effect = self.rng.uniform(-0.01, 0.02)
         
         # Calculate total growth
         gdp_growth = base_growth + investment_effect + global_effect + random_effect
@@ -158,7 +169,7 @@ class InvestmentModel:
         regional_effect = self.config.get('regional_investment_competitiveness', -0.02)
         
         # Random variance (significant for FDI - includes one-off large projects)
-        random_effect = random.uniform(-0.15, 0.25)
+        random_effect = self.rng.uniform(-0.15, 0.25)
         
         # Calculate total FDI growth
         fdi_growth = base_growth + policy_effect + repatriation_effect + infrastructure_effect + global_effect + regional_effect + random_effect
@@ -179,10 +190,10 @@ class InvestmentModel:
             year (int): The current simulation year
         """
         # Gradual shift towards services and high-tech manufacturing
-        services_shift = random.uniform(0.002, 0.008)
-        manufacturing_shift = random.uniform(-0.005, 0.005)
-        energy_shift = random.uniform(-0.005, 0.003)
-        infrastructure_shift = random.uniform(-0.002, 0.007)
+        services_shift = self.rng.uniform(0.002, 0.008)
+        manufacturing_shift = self.rng.uniform(-0.005, 0.005)
+        energy_shift = self.rng.uniform(-0.005, 0.003)
+        infrastructure_shift = self.rng.uniform(-0.002, 0.007)
         
         # Policy influence on sectoral shifts
         policy_emphasis = self.config.get('fdi_policy_sector_emphasis', 'balanced')
@@ -232,7 +243,7 @@ class InvestmentModel:
             monetary_effect = 0.05 * global_conditions['monetary_conditions']
         
         # Random variance
-        random_effect = random.uniform(-0.01, 0.01)
+        random_effect = self.rng.uniform(-0.01, 0.01)
         
         # Calculate total change in investment rate
         rate_change = base_change + interest_effect + confidence_effect + monetary_effect + random_effect
@@ -256,10 +267,10 @@ class InvestmentModel:
             year (int): The current simulation year
         """
         # Gradual economic transformation
-        services_shift = random.uniform(0.003, 0.007)
-        manufacturing_shift = random.uniform(-0.003, 0.005)
-        agriculture_shift = random.uniform(-0.008, -0.002)
-        infrastructure_shift = random.uniform(-0.002, 0.005)
+        services_shift = self.rng.uniform(0.003, 0.007)
+        manufacturing_shift = self.rng.uniform(-0.003, 0.005)
+        agriculture_shift = self.rng.uniform(-0.008, -0.002)
+        infrastructure_shift = self.rng.uniform(-0.002, 0.005)
         
         # Development stage influence
         development_stage = self.config.get('development_stage', 'early_industrial')
@@ -294,8 +305,8 @@ class InvestmentModel:
         # New SEZ development
         new_sez_probability = self.config.get('annual_new_sez_probability', 0.4)
         
-        if random.random() < new_sez_probability:
-            new_sezs = random.randint(1, 2)
+        if self.rng.random() < new_sez_probability:
+            new_sezs = self.rng.integers(1, 3)
             self.active_sezs += new_sezs
             print(f"Year {year}: {new_sezs} new Special Economic Zone(s) became operational")
         
@@ -304,7 +315,7 @@ class InvestmentModel:
         policy_effect = self.investment_policy_index * 0.03
         infrastructure_effect = self.config.get('infrastructure_quality', 0.4) * 0.02
         
-        utilization_improvement = base_utilization_improvement + policy_effect + infrastructure_effect + random.uniform(-0.02, 0.03)
+        utilization_improvement = base_utilization_improvement + policy_effect + infrastructure_effect + self.rng.uniform(-0.02, 0.03)
         
         # Update SEZ utilization with S-curve pattern
         current_gap = 1.0 - self.sez_utilization
@@ -340,7 +351,7 @@ class InvestmentModel:
             external_pressure = global_conditions['investment_policy_pressure'] * 0.01
         
         # Random component (political factors, bureaucratic resistance)
-        random_effect = random.uniform(-0.03, 0.03)
+        random_effect = self.rng.uniform(-0.03, 0.03)
         
         # Calculate total policy change
         policy_change = base_improvement + reform_momentum + external_pressure + random_effect
@@ -349,12 +360,12 @@ class InvestmentModel:
         self.investment_policy_index = max(0.3, min(0.95, self.investment_policy_index + policy_change))
         
         # Update repatriation restrictions (downward trend)
-        repatriation_change = -0.02 + random.uniform(-0.02, 0.04)  # Mostly decreasing with occasional reversals
+        repatriation_change = -0.02 + self.rng.uniform(-0.02, 0.04)  # Mostly decreasing with occasional reversals
         self.repatriation_restrictions = max(0.05, min(0.7, self.repatriation_restrictions + repatriation_change))
         
         # Update investment incentives (cyclical)
         incentive_cycle = 0.01 * np.sin((year - 2025) * 0.6)  # Cyclical component
-        incentive_change = 0.005 + incentive_cycle + random.uniform(-0.02, 0.02)
+        incentive_change = 0.005 + incentive_cycle + self.rng.uniform(-0.02, 0.02)
         self.investment_incentives = max(0.3, min(0.8, self.investment_incentives + incentive_change))
         
         print(f"Year {year}: Investment Policy Index: {self.investment_policy_index:.2f}")
@@ -366,7 +377,11 @@ class InvestmentModel:
         Returns:
             dict: Time series of all tracked metrics
         """
-        return self.yearly_metrics
+        metrics = self.yearly_metrics.to_dict()
+        for key, history in self.yearly_sector_shares.items():
+            series = history.to_dict()
+            metrics[key] = [{sector: values[i] for sector, values in series.items()} for i in range(len(history))]
+        return metrics
     
     def get_investment_capital_formation(self):
         """
@@ -4,6 +4,9 @@ Logistics model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.history import ModelHistory
+from models.port_queue import PortQueueSimulator, simulate_terminals
+from models.logistics_network import LogisticsNetwork, build_network_config
 
 
 class LogisticsModel:
@@ -25,10 +28,20 @@ class LogisticsModel:
         self.transport_config = config.get('transport', {})
         self.trade_facilitation_config = config.get('trade_facilitation', {})
         
+        # Optional discrete-event simulation of vessel calls per port-year
+        self.port_simulation_config = config.get('port_simulation', {})
+        self.use_port_simulation = self.port_simulation_config.get('enabled', False)
+        
+        # Split volume by normalized port shares instead of raw shares (capacity x efficiency);
+        # always on with the terminal simulation, which needs volumes comparable to capacity
+        self.normalize_port_shares = config.get('normalize_port_shares', False) or self.use_port_simulation
+        
         # Initialize port infrastructure
         self.ports = {}
         for port_name, port_data in self.ports_config.items():
             self.ports[port_name] = PortInfrastructure(port_name, port_data)
+            if self.use_port_simulation:
+                self.ports[port_name].enable_queue_simulation(self.port_simulation_config)
         
         # Initialize transport connectivity
         self.transport = TransportConnectivity(self.transport_config)
@@ -36,8 +49,38 @@ class LogisticsModel:
         # Initialize trade facilitation
         self.facilitation = TradeFacilitation(self.trade_facilitation_config)
         
+        # Optional min-cost flow routing of container volume (replaces fixed port shares),
+        # over the configured ports and the capacities of their port models
+        self.network_config = config.get('network', {})
+        self.network = None
+        if self.network_config.get('enabled', False):
+            self.network = LogisticsNetwork(build_network_config(
+                self.network_config, self.ports_config, config.get('port_infrastructure', {})))
+        self.initial_mode_state = {
+            'road': (self.transport.road_network['capacity'], self.transport.road_network['quality']),
+            'rail': (self.transport.rail_freight['current_share'], self.transport.rail_freight['quality']),
+            'waterway': (self.transport.inland_waterways['current_share'], self.transport.inland_waterways['quality']),
+        }
+        
+        # Random generator of the ports' terminal simulations (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
+        # Whether to build per-port and per-component detail in results
+        self.include_details = True
+        
         # Historical data
-        self.historical_performance = {}
+        self.historical_performance = ModelHistory()
+    
+    @property
+    def rng(self) -> np.random.Generator:
+        """Random generator of the ports' terminal simulations"""
+        return self._rng
+    
+    @rng.setter
+    def rng(self, value: np.random.Generator):
+        self._rng = value
+        for port in self.ports.values():
+            port.rng = value
     
     def simulate_logistics_performance(self, 
                                      year_index: int, 
@@ -76,22 +119,70 @@ class LogisticsModel:
         aggregate_port_capacity = 0
         aggregate_port_utilization = 0
         aggregate_port_efficiency = 0
+        weighted_port_waiting = 0
+        simulated_port_volume = 0
+        
+        # Route volume through the network, or split it by last year's port shares
+        network_result = None
+        if self.network is not None:
+            network_result = self.route_container_volume(simulation_year, container_volume)
+            port_volumes = network_result['port_volumes']
+        elif self.normalize_port_shares:
+            # Normalize raw port shares (capacity shares before any port has one)
+            port_shares = {port_name: port.get_market_share() for port_name, port in self.ports.items()}
+            total_share = sum(port_shares.values())
+            if total_share <= 0:
+                port_shares = {port_name: port.capacity for port_name, port in self.ports.items()}
+                total_share = sum(port_shares.values())
+            port_volumes = {port_name: container_volume * share / total_share if total_share > 0 else 0
+                            for port_name, share in port_shares.items()}
+        else:
+            port_volumes = {port_name: container_volume * port.get_market_share()
+                            for port_name, port in self.ports.items()}
         
+        year_port_results = {}
         for port_name, port in self.ports.items():
-            port_result = port.simulate_year(
+            year_port_results[port_name] = port.simulate_year(
                 year_index=year_index,
                 simulation_year=simulation_year,
-                container_volume=container_volume * port.get_market_share(),
+                container_volume=port_volumes.get(port_name, 0),
                 infrastructure_investment=infrastructure_investment,
                 policy_effectiveness=policy_effectiveness,
-                external_disruptions=external_disruptions
+                external_disruptions=external_disruptions,
+                simulate_queue=False
+            )
+        
+        # Discrete-event mode: the terminals of all ports are simulated in one lockstep batch
+        queued_ports = [port_name for port_name, port in self.ports.items()
+                        if port.queue_simulator is not None and port.operational and port.capacity > 0]
+        if queued_ports:
+            queue_results = simulate_terminals(
+                [self.ports[port_name].queue_simulator for port_name in queued_ports],
+                [self.ports[port_name].queue_offered_teu(port_volumes.get(port_name, 0)) for port_name in queued_ports],
+                [self.ports[port_name].efficiency for port_name in queued_ports],
+                [year_port_results[port_name]['disruption_factor'] for port_name in queued_ports],
+                rng=self.rng
             )
-            port_results[port_name] = port_result
+            for port_name, queue_result in zip(queued_ports, queue_results):
+                self.ports[port_name].apply_queue_result(year_port_results[port_name], queue_result)
+        
+        for port_name, port_result in year_port_results.items():
+            port_volume = port_volumes.get(port_name, 0)
+            if network_result is not None:
+                port_result['routed_volume'] = port_volume
+                port_result['network_utilization'] = network_result['port_utilization'].get(port_name, 0)
+            if self.include_details:
+                port_results[port_name] = port_result
             
             # Accumulate for aggregate metrics
             aggregate_port_capacity += port_result['capacity']
             aggregate_port_utilization += port_result['utilized_capacity']
             aggregate_port_efficiency += port_result['efficiency'] * port_result['market_share']
+            
+            # Volume-weighted berth waiting from the discrete-event simulation
+            if 'queue' in port_result:
+                weighted_port_waiting += port_result['waiting_time'] * port_volume
+                simulated_port_volume += port_volume
         
         # Simulate transport connectivity
         transport_result = self.transport.simulate_year(
@@ -140,11 +231,19 @@ class LogisticsModel:
         cost_reduction_factor = (overall_performance - 0.5) * 0.1
         logistics_cost = max(0.05, base_logistics_cost - cost_reduction_factor)
         
+        # Routing cost relative to the first year's network solution
+        if network_result is not None:
+            logistics_cost *= network_result['cost_index']
+        
         # Calculate time delays in days
         base_time_delay = 10  # 10 days as baseline
         time_reduction_factor = (overall_performance - 0.5) * 5
         time_delay = max(2, base_time_delay - time_reduction_factor)
         
+        # Baseline delay assumes uncongested berths; add simulated vessel waiting on top
+        port_waiting_time = weighted_port_waiting / simulated_port_volume if simulated_port_volume > 0 else 0.0
+        time_delay += port_waiting_time
+        
         # Calculate reliability (on-time delivery percentage)
         base_reliability = 0.7  # 70% on-time delivery as baseline
         reliability_improvement_factor = (overall_performance - 0.5) * 0.2
@@ -160,19 +259,65 @@ class LogisticsModel:
             'facilitation_performance': facilitation_performance_score,
             'logistics_cost': logistics_cost,
             'time_delay': time_delay,
+            'port_waiting_time': port_waiting_time,
             'reliability': reliability,
-            'port_results': port_results,
-            'transport_result': transport_result,
-            'facilitation_result': facilitation_result,
             'container_volume': container_volume,
             'aggregate_port_capacity': aggregate_port_capacity,
             'capacity_utilization': aggregate_port_utilization / aggregate_port_capacity if aggregate_port_capacity > 0 else 1,
         }
         
+        if network_result is not None:
+            results['network_cost_index'] = network_result['cost_index']
+            results['network_unserved_volume'] = network_result['unserved_volume']
+            results['max_corridor_utilization'] = network_result['max_corridor_utilization']
+        
+        if self.include_details:
+            results['port_results'] = port_results
+            results['transport_result'] = transport_result
+            results['facilitation_result'] = facilitation_result
+            if network_result is not None:
+                results['network_result'] = network_result
+        
         # Store historical performance
-        self.historical_performance[year_index] = results
+        self.historical_performance.record(year_index, results)
         
         return results
+    
+    def route_container_volume(self, simulation_year: int, container_volume: float) -> Dict[str, Any]:
+        """
+        Allocate container volume across corridors and ports by min-cost flow
+        
+        Port capacities come from the port models; corridor capacities and costs
+        scale with last year's transport network state relative to the start.
+        
+        Args:
+            simulation_year: Actual calendar year
+            container_volume: Total container volume to route
+            
+        Returns:
+            Dict with network allocation results
+        """
+        mode_state = {
+            'road': (self.transport.road_network['capacity'], self.transport.road_network['quality']),
+            'rail': (self.transport.rail_freight['current_share'], self.transport.rail_freight['quality']),
+            'waterway': (self.transport.inland_waterways['current_share'], self.transport.inland_waterways['quality']),
+        }
+        mode_capacity = {}
+        mode_cost = {}
+        for mode, (capacity, quality) in mode_state.items():
+            initial_capacity, initial_quality = self.initial_mode_state[mode]
+            mode_capacity[mode] = capacity / initial_capacity if initial_capacity > 0 else 1.0
+            mode_cost[mode] = initial_quality / quality if quality > 0 else 1.0
+        
+        return self.network.allocate(
+            simulation_year=simulation_year,
+            container_volume=container_volume,
+            port_capacities={port_name: port.projected_capacity(simulation_year) for port_name, port in self.ports.items()},
+            port_waiting={port_name: port.historical_performance.latest('waiting_time', port.waiting_time)
+                          for port_name, port in self.ports.items()},
+            mode_capacity=mode_capacity,
+            mode_cost=mode_cost
+        )
 
 
 class PortInfrastructure:
@@ -213,8 +358,44 @@ class PortInfrastructure:
         else:
             self.capacity = 0
         
+        # Discrete-event terminal model (None unless enabled)
+        self.queue_simulator = None
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
-        self.historical_performance = {}
+        self.historical_performance = ModelHistory()
+    
+    def enable_queue_simulation(self, simulation_config: Dict[str, Any]):
+        """
+        Simulate vessel calls instead of using the congestion formula for waiting time
+        
+        Args:
+            simulation_config: Default terminal parameters; the port's own 'terminal'
+                config entry overrides them
+        """
+        terminal_config = {key: value for key, value in simulation_config.items() if key != 'enabled'}
+        terminal_config.update(self.config.get('terminal', {}))
+        self.queue_simulator = PortQueueSimulator(terminal_config)
+    
+    def projected_capacity(self, simulation_year: int) -> float:
+        """
+        Capacity the port will have in a given year, before it is simulated
+        
+        Args:
+            simulation_year: Actual calendar year
+            
+        Returns:
+            float: Port capacity (0 if not yet operational)
+        """
+        if simulation_year in self.expansion_timeline:
+            return self.expansion_timeline[simulation_year]
+        if self.operational:
+            return self.capacity
+        if simulation_year >= self.start_year:
+            return self.initial_capacity
+        return 0
     
     def get_market_share(self):
         """
@@ -231,7 +412,8 @@ class PortInfrastructure:
                      container_volume: float,
                      infrastructure_investment: float,
                      policy_effectiveness: float,
-                     external_disruptions: Dict[str, float]) -> Dict[str, Any]:
+                     external_disruptions: Dict[str, float],
+                     simulate_queue: bool = True) -> Dict[str, Any]:
         """
         Simulate port performance for one year
         
@@ -242,6 +424,8 @@ class PortInfrastructure:
             infrastructure_investment: Level of investment in infrastructure (0-1)
             policy_effectiveness: Effectiveness of port policies (0-1)
             external_disruptions: Dict of external disruptions
+            simulate_queue: Whether to run the terminal simulation if enabled (LogisticsModel
+                batches the terminals of all ports instead)
             
         Returns:
             Dict with port performance simulation results
@@ -266,7 +450,7 @@ class PortInfrastructure:
                 'market_share': 0,
                 'congestion_level': 0,
             }
-            self.historical_performance[year_index] = results
+            self.historical_performance.record(year_index, results)
             return results
         
         # Check for capacity expansions
@@ -318,9 +502,46 @@ class PortInfrastructure:
         }
         
         # Store historical performance
-        self.historical_performance[year_index] = results
+        self.historical_performance.record(year_index, results)
+        
+        # Discrete-event mode: the simulated wait replaces the formula
+        if simulate_queue and self.queue_simulator is not None and self.capacity > 0:
+            queue_result = self.queue_simulator.simulate(
+                annual_teu=self.queue_offered_teu(container_volume),
+                efficiency=self.efficiency,
+                disruption_factor=disruption_factor,
+                rng=self.rng
+            )
+            self.apply_queue_result(results, queue_result)
         
         return results
+    
+    def queue_offered_teu(self, container_volume: float) -> float:
+        """
+        Offered volume of the terminal simulation
+        
+        Volume relative to capacity (not capped at 1) scales the terminal's design
+        throughput; the simulator caps and flags loads above its max_offered_load.
+        
+        Args:
+            container_volume: Expected container volume for this port in TEUs
+            
+        Returns:
+            float: Offered volume in TEU
+        """
+        return container_volume / self.capacity * self.queue_simulator.design_throughput(self.efficiency)
+    
+    def apply_queue_result(self, results: Dict[str, Any], queue_result: Dict[str, Any]):
+        """
+        Replace the formula waiting time of a year's results with the simulated one
+        
+        Args:
+            results: Port results of the year (updated in place)
+            queue_result: Terminal simulation results of the year
+        """
+        results['waiting_time'] = queue_result['mean_waiting_days']
+        results['queue'] = queue_result
+        self.historical_performance.record(results['year_index'], results)
 
 
 class TransportConnectivity:
@@ -369,7 +590,7 @@ class TransportConnectivity:
         }
         
         # Historical data
-        self.historical_performance = {}
+        self.historical_performance = ModelHistory()
     
     def simulate_year(self, 
                      year_index: int, 
@@ -485,7 +706,7 @@ class TransportConnectivity:
         }
         
         # Store historical performance
-        self.historical_performance[year_index] = results
+        self.historical_performance.record(year_index, results)
         
         return results
 
@@ -542,7 +763,7 @@ class TradeFacilitation:
         self.corruption_incidence = 0.4  # Initial corruption level (0-1)
         
         # Historical data
-        self.historical_performance = {}
+        self.historical_performance = ModelHistory()
     
     def simulate_year(self, 
                      year_index: int, 
@@ -687,6 +908,6 @@ class TradeFacilitation:
         }
         
         # Store historical performance
-        self.historical_performance[year_index] = results
+        self.historical_performance.record(year_index, results)
         
         return results
@@ -0,0 +1,421 @@
+"""
+Logistics network flow model for Bangladesh trade simulation.
+"""
+import warnings
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+from typing import Dict, List, Tuple, Any, Optional
+
+# Fallback network: container origins, inland container depots and seaports, used for
+# whatever the logistics config does not give (see build_network_config).
+# Edge costs are per unit of container volume relative to trucking Dhaka-Chittagong;
+# capacities are shares of the first simulated year's container volume.
+DEFAULT_NETWORK = {
+    'nodes': {
+        'dhaka': {'type': 'district', 'supply_share': 0.30},
+        'gazipur': {'type': 'district', 'supply_share': 0.25},
+        'narayanganj': {'type': 'district', 'supply_share': 0.15},
+        'chattogram': {'type': 'district', 'supply_share': 0.22},
+        'khulna': {'type': 'district', 'supply_share': 0.08},
+        'kamalapur_icd': {'type': 'icd'},
+        'pangaon_icd': {'type': 'icd'},
+        'chittagong': {'type': 'port', 'handling_cost': 0.30, 'capacity_share': 0.95},
+        'mongla': {'type': 'port', 'handling_cost': 0.35, 'capacity_share': 0.10},
+        'payra': {'type': 'port', 'handling_cost': 0.40, 'capacity_share': 0.05, 'start_year': 2026},
+        'matarbari': {'type': 'port', 'handling_cost': 0.25, 'capacity_share': 0.30, 'start_year': 2028},
+    },
+    'edges': [
+        # [from, to, mode, cost, capacity_share]
+        ['dhaka', 'chittagong', 'road', 1.00, 0.60],
+        ['gazipur', 'chittagong', 'road', 1.10, 0.45],
+        ['narayanganj', 'chittagong', 'road', 0.95, 0.35],
+        ['chattogram', 'chittagong', 'road', 0.20, 0.40],
+        ['chattogram', 'matarbari', 'road', 0.40, 0.20],
+        ['dhaka', 'kamalapur_icd', 'road', 0.10, 0.20],
+        ['gazipur', 'kamalapur_icd', 'road', 0.15, 0.10],
+        ['kamalapur_icd', 'chittagong', 'rail', 0.60, 0.10],
+        ['dhaka', 'pangaon_icd', 'road', 0.15, 0.10],
+        ['narayanganj', 'pangaon_icd', 'road', 0.10, 0.15],
+        ['pangaon_icd', 'chittagong', 'waterway', 0.50, 0.08],
+        ['pangaon_icd', 'mongla', 'waterway', 0.60, 0.05],
+        ['dhaka', 'mongla', 'road', 1.00, 0.15],
+        ['dhaka', 'payra', 'road', 1.10, 0.10],
+        ['khulna', 'mongla', 'road', 0.20, 0.10],
+        ['khulna', 'payra', 'road', 0.50, 0.05],
+    ],
+    'unserved_cost': 10.0,  # Penalty per unit of volume that cannot be routed
+}
+
+# Sink node receiving all volume (ports connect to it through their handling edges)
+SINK = 'world'
+
+
+def build_network_config(network_config: Optional[Dict[str, Any]] = None,
+                         ports_config: Optional[Dict[str, Any]] = None,
+                         port_infrastructure: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Network configuration from the logistics config
+
+    Port nodes are the ports of the logistics model when it configures any, so the
+    network routes to exactly the ports whose capacities the port models supply.
+    Each port entry may give 'handling_cost' and 'corridors' ([from, mode, cost,
+    capacity_share] rows); otherwise the fallback network's handling cost and
+    corridors to that port are used. Without configured ports, the fallback ports
+    are used, with start years from port_infrastructure ('<port>_start_year').
+    Districts, depots and their corridors come from network_config or the fallback.
+
+    Args:
+        network_config: logistics_config 'network' entry
+        ports_config: logistics_config 'ports' entry (port name -> port config)
+        port_infrastructure: logistics_config 'port_infrastructure' entry
+
+    Returns:
+        Dict with 'nodes', 'edges' and the remaining network settings
+    """
+    network_config = dict(network_config or {})
+    ports_config = ports_config or {}
+    port_infrastructure = port_infrastructure or {}
+
+    nodes = dict(network_config.get('nodes', DEFAULT_NETWORK['nodes']))
+    edges = [list(edge) for edge in network_config.get('edges', DEFAULT_NETWORK['edges'])]
+    fallback_ports = {name: node for name, node in DEFAULT_NETWORK['nodes'].items() if node['type'] == 'port'}
+    nodes = {name: node for name, node in nodes.items() if node.get('type') != 'port'}
+
+    if ports_config:
+        for port, port_config in ports_config.items():
+            fallback = fallback_ports.get(port, {})
+            nodes[port] = {
+                'type': 'port',
+                'handling_cost': port_config.get('handling_cost', fallback.get('handling_cost', 0.3)),
+                'start_year': port_config.get('start_year', fallback.get('start_year', 0)),
+            }
+            if 'corridors' in port_config:
+                edges = [edge for edge in edges if edge[1] != port]
+                edges.extend([tail, port, mode, cost, capacity_share]
+                             for tail, mode, cost, capacity_share in port_config['corridors'])
+    else:
+        for port, node in fallback_ports.items():
+            nodes[port] = dict(node)
+            if f'{port}_start_year' in port_infrastructure:
+                nodes[port]['start_year'] = port_infrastructure[f'{port}_start_year']
+
+    # Keep corridors between known nodes; a port nothing reaches only gets a handling edge
+    edges = [edge for edge in edges if edge[0] in nodes and edge[1] in nodes]
+    unreachable = [port for port, node in nodes.items()
+                   if node['type'] == 'port' and not any(edge[1] == port for edge in edges)]
+    if unreachable:
+        warnings.warn(f"No corridors lead to port(s) {', '.join(unreachable)}; "
+                      "give them 'corridors' in the port config")
+
+    network_config['nodes'] = nodes
+    network_config['edges'] = edges
+    return network_config
+
+
+class LogisticsNetwork:
+    """
+    Min-cost flow allocation of container volume across corridors and ports
+
+    Nodes are production districts (supply), inland container depots and ports;
+    road, rail and waterway edges carry volume to ports, and each port's handling
+    edge to the world sink is limited by its capacity. Each year's allocation is a
+    linear program over a sparse node-edge incidence matrix that is built once.
+    The previous optimal basis (a spanning tree of edges, the others at a bound)
+    is reused as a warm start: its flows and node potentials are recomputed for
+    the new volume, capacities and costs, and when they are still primal and dual
+    feasible the basis is optimal and no solve is needed.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize logistics network
+
+        Args:
+            config: Network configuration with 'nodes', 'edges' and 'unserved_cost'
+                (DEFAULT_NETWORK entries are used for anything not given; see
+                build_network_config for building it from the logistics config)
+        """
+        config = config or {}
+        nodes = config.get('nodes', DEFAULT_NETWORK['nodes'])
+        edges = config.get('edges', DEFAULT_NETWORK['edges'])
+        self.unserved_cost = config.get('unserved_cost', DEFAULT_NETWORK['unserved_cost'])
+        self.waiting_cost_per_day = config.get('waiting_cost_per_day', 0.02)
+        self.reference_cost = config.get('reference_cost')  # Cost per unit at index 1.0; first year if None
+
+        self.node_names = list(nodes.keys()) + [SINK]
+        self.node_index = {name: i for i, name in enumerate(self.node_names)}
+        self.node_config = nodes
+
+        self.districts = [name for name, node in nodes.items() if node.get('type') == 'district']
+        self.ports = [name for name, node in nodes.items() if node.get('type') == 'port']
+
+        # Edge arrays: corridors, then port handling edges, then unserved overflow per district
+        tails, heads, modes, costs, capacity_shares = [], [], [], [], []
+        for tail, head, mode, cost, capacity_share in edges:
+            tails.append(tail)
+            heads.append(head)
+            modes.append(mode)
+            costs.append(cost)
+            capacity_shares.append(capacity_share)
+
+        self.port_edges = {}
+        for port in self.ports:
+            self.port_edges[port] = len(tails)
+            tails.append(port)
+            heads.append(SINK)
+            modes.append('port')
+            costs.append(nodes[port].get('handling_cost', 0.3))
+            capacity_shares.append(nodes[port].get('capacity_share', 0.0))
+
+        self.unserved_edges = {}
+        for district in self.districts:
+            self.unserved_edges[district] = len(tails)
+            tails.append(district)
+            heads.append(SINK)
+            modes.append('unserved')
+            costs.append(self.unserved_cost)
+            capacity_shares.append(np.inf)
+
+        self.edge_tail = np.array([self.node_index[name] for name in tails])
+        self.edge_head = np.array([self.node_index[name] for name in heads])
+        self.edge_mode = np.array(modes)
+        self.base_cost = np.array(costs, dtype=float)
+        self.capacity_share = np.array(capacity_shares, dtype=float)
+        self.n_edges = len(tails)
+
+        # Node-edge incidence matrix (outflow +1, inflow -1); the sink row is
+        # dropped because it is implied by the others
+        rows = np.concatenate([self.edge_tail, self.edge_head])
+        cols = np.concatenate([np.arange(self.n_edges), np.arange(self.n_edges)])
+        data = np.concatenate([np.ones(self.n_edges), -np.ones(self.n_edges)])
+        incidence = sparse.csr_matrix((data, (rows, cols)), shape=(len(self.node_names), self.n_edges))
+        self.incidence = incidence[:-1]
+
+        supply_shares = np.zeros(len(self.node_names) - 1)
+        for district in self.districts:
+            supply_shares[self.node_index[district]] = nodes[district].get('supply_share', 0.0)
+        self.supply_shares = supply_shares / supply_shares.sum() if supply_shares.sum() > 0 else supply_shares
+
+        # Volume the capacity shares refer to (set on first allocation)
+        self.reference_volume = None
+
+        # Warm start state: last optimal basis as (basic edges, nonbasic edges at upper bound)
+        self.basis = None
+        self.solve_count = 0
+
+    def edge_capacities(self,
+                        simulation_year: int,
+                        port_capacities: Dict[str, float],
+                        mode_capacity: Dict[str, float]) -> np.ndarray:
+        """
+        Capacity of every edge for a year
+
+        Args:
+            simulation_year: Actual calendar year
+            port_capacities: Capacity per port from the port models (same units as volume)
+            mode_capacity: Capacity multiplier per transport mode
+
+        Returns:
+            Array of edge capacities
+        """
+        capacities = self.capacity_share * self.reference_volume
+        for mode, multiplier in mode_capacity.items():
+            capacities[self.edge_mode == mode] *= multiplier
+
+        for port, edge in self.port_edges.items():
+            if port in port_capacities:
+                capacities[edge] = port_capacities[port]
+            elif simulation_year < self.node_config[port].get('start_year', 0):
+                capacities[edge] = 0.0
+
+        return capacities
+
+    def edge_costs(self,
+                   mode_cost: Dict[str, float],
+                   port_waiting: Dict[str, float]) -> np.ndarray:
+        """
+        Cost per unit of volume on every edge for a year
+
+        Args:
+            mode_cost: Cost multiplier per transport mode
+            port_waiting: Vessel waiting time in days per port (adds to handling cost)
+
+        Returns:
+            Array of edge costs
+        """
+        costs = self.base_cost.copy()
+        for mode, multiplier in mode_cost.items():
+            costs[self.edge_mode == mode] *= multiplier
+
+        for port, waiting_time in port_waiting.items():
+            if port in self.port_edges:
+                costs[self.port_edges[port]] += self.waiting_cost_per_day * waiting_time
+
+        return costs
+
+    def _optimal_basis(self, flow: np.ndarray, capacities: np.ndarray,
+                       reduced_costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Spanning tree basis of an optimal flow
+
+        Edges strictly between their bounds form a forest; it is completed to a
+        spanning tree over all nodes (sink included) with edges at a bound,
+        smallest absolute reduced cost first, so degenerate solutions get a basis
+        that is still dual feasible.
+
+        Returns:
+            Tuple of basic edge indices and a boolean mask of nonbasic edges at their upper bound
+        """
+        tolerance = 1e-9 * max(1.0, float(np.abs(flow).max()))
+        interior = (flow > tolerance) & (flow < capacities - tolerance)
+        candidates = np.concatenate([np.flatnonzero(interior),
+                                     np.flatnonzero(~interior)[np.argsort(np.abs(reduced_costs[~interior]),
+                                                                          kind='stable')]])
+        parent = list(range(len(self.node_names)))
+
+        def root(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        basic = []
+        for edge in candidates:
+            tail, head = root(self.edge_tail[edge]), root(self.edge_head[edge])
+            if tail != head:
+                parent[tail] = head
+                basic.append(edge)
+        basic = np.array(basic, dtype=int)
+
+        at_upper = (flow >= capacities - tolerance) & (capacities > tolerance)
+        at_upper[basic] = False
+        return basic, at_upper
+
+    def _warm_start(self, supply: np.ndarray, costs: np.ndarray,
+                    capacities: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Flow of last year's optimal basis under this year's data, if it is still optimal
+
+        Nonbasic edges stay at their bounds (at this year's capacities), tree edge
+        flows follow from flow conservation and node potentials from this year's
+        costs on the tree. The basis is optimal when the tree flows are within
+        capacity and the reduced costs of nonbasic edges have the right signs.
+        """
+        if self.basis is None:
+            return None
+        basic, at_upper = self.basis
+        if np.any(np.isinf(capacities[at_upper])):
+            return None
+
+        flow = np.where(at_upper, capacities, 0.0)
+        tree = self.incidence[:, basic].toarray()
+        try:
+            flow[basic] = np.linalg.solve(tree, supply - self.incidence @ flow)
+            potentials = np.linalg.solve(tree.T, costs[basic])
+        except np.linalg.LinAlgError:
+            return None
+
+        tolerance = 1e-9 * max(1.0, float(supply.sum()))
+        if np.any(flow[basic] < -tolerance) or np.any(flow[basic] > capacities[basic] + tolerance):
+            return None
+        reduced_costs = costs - self.incidence.T @ potentials
+        nonbasic = np.ones(self.n_edges, dtype=bool)
+        nonbasic[basic] = False
+        if np.any(reduced_costs[nonbasic & ~at_upper] < -1e-9) or np.any(reduced_costs[at_upper] > 1e-9):
+            return None
+
+        return np.clip(flow, 0.0, capacities)
+
+    def solve(self, volume: float, costs: np.ndarray, capacities: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """
+        Solve the min-cost flow for a total volume
+
+        Args:
+            volume: Total container volume supplied by the districts
+            costs: Edge costs
+            capacities: Edge capacities
+
+        Returns:
+            Tuple of (edge flows, whether last year's basis was reused)
+        """
+        supply = self.supply_shares * volume
+
+        flow = self._warm_start(supply, costs, capacities)
+        if flow is not None:
+            return flow, True
+
+        result = linprog(
+            costs,
+            A_eq=self.incidence,
+            b_eq=supply,
+            bounds=np.column_stack([np.zeros(self.n_edges), capacities]),
+            method='highs'
+        )
+        self.solve_count += 1
+
+        if result.status != 0:
+            raise RuntimeError(f"Logistics network flow did not solve: {result.message}")
+
+        reduced_costs = costs - self.incidence.T @ result.eqlin.marginals
+        self.basis = self._optimal_basis(result.x, capacities, reduced_costs)
+        return result.x, False
+
+    def allocate(self,
+                 simulation_year: int,
+                 container_volume: float,
+                 port_capacities: Optional[Dict[str, float]] = None,
+                 port_waiting: Optional[Dict[str, float]] = None,
+                 mode_capacity: Optional[Dict[str, float]] = None,
+                 mode_cost: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Allocate a year's container volume across corridors and ports
+
+        Args:
+            simulation_year: Actual calendar year
+            container_volume: Total container volume to route
+            port_capacities: Capacity per port from the port models
+            port_waiting: Vessel waiting time in days per port
+            mode_capacity: Capacity multiplier per transport mode
+            mode_cost: Cost multiplier per transport mode
+
+        Returns:
+            Dict with port volumes, mode volumes, utilization and cost results
+        """
+        if self.reference_volume is None:
+            self.reference_volume = container_volume
+
+        capacities = self.edge_capacities(simulation_year, port_capacities or {}, mode_capacity or {})
+        costs = self.edge_costs(mode_cost or {}, port_waiting or {})
+        flow, warm_started = self.solve(container_volume, costs, capacities)
+
+        unserved = np.array([flow[edge] for edge in self.unserved_edges.values()])
+        routed_volume = container_volume - unserved.sum()
+        routed_cost = float(costs @ flow - self.unserved_cost * unserved.sum())
+        average_cost = routed_cost / routed_volume if routed_volume > 0 else 0.0
+
+        if self.reference_cost is None and average_cost > 0:
+            self.reference_cost = average_cost
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.where(capacities > 0, flow / capacities, 0.0)
+
+        corridor = ~np.isin(self.edge_mode, ('port', 'unserved'))
+        mode_volumes = {mode: float(flow[self.edge_mode == mode].sum())
+                        for mode in np.unique(self.edge_mode[corridor])}
+
+        return {
+            'port_volumes': {port: float(flow[edge]) for port, edge in self.port_edges.items()},
+            'port_utilization': {port: float(utilization[edge]) for port, edge in self.port_edges.items()},
+            'mode_volumes': mode_volumes,
+            'max_corridor_utilization': float(utilization[corridor].max()) if corridor.any() else 0.0,
+            'unserved_volume': float(unserved.sum()),
+            'average_cost': average_cost,
+            'cost_index': average_cost / self.reference_cost if self.reference_cost else 1.0,
+            'warm_started': warm_started,
+            'edge_flows': {
+                f"{self.node_names[t]}->{self.node_names[h]}:{m}": float(f)
+                for t, h, m, f in zip(self.edge_tail, self.edge_head, self.edge_mode, flow)
+                if m != 'unserved'
+            },
+        }
@@ -0,0 +1,138 @@
+"""
+Constant-market-share export growth decomposition for Bangladesh trade simulation.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any, Optional
+
+from models.armington import hs6_sectors
+
+# Components of the decomposition, in reporting order
+CMS_COMPONENTS = ('world_growth_effect', 'commodity_composition_effect',
+                  'market_distribution_effect', 'competitiveness_effect')
+
+
+def _growth(end: np.ndarray, start: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Growth rate end / start - 1, with the fallback where start is zero"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = end / start - 1
+    return np.where(start > 0, growth, fallback)
+
+
+def constant_market_share(trade_data: pd.DataFrame,
+                          exporter: int = 50,
+                          competitors: Optional[List[int]] = None,
+                          by_sector: bool = False,
+                          product_groups: Optional[Dict[int, str]] = None) -> pd.DataFrame:
+    """
+    Constant-market-share decomposition of export growth between consecutive years
+
+    For HS6 product k and destination j, with Bangladesh exports X and reference
+    exports W (the world excluding Bangladesh, or a competitor set) growing by r
+    overall, r_k in the product and r_kj in the product-destination cell:
+
+        X1 - X0 = r X0                              (world growth)
+                + sum_k (r_k - r) X_k0              (commodity composition)
+                + sum_kj (r_kj - r_k) X_kj0         (market distribution)
+                + sum_kj (X_kj1 - X_kj0 - r_kj X_kj0)  (competitiveness)
+
+    Bangladesh cells and reference totals are accumulated with bincount over
+    (year, cell) and (year, product) keys, and all year pairs are decomposed in
+    one set of array operations. Cells the reference does not supply in the
+    start year use the product growth rate.
+
+    Args:
+        trade_data: Trade flows with columns 't', 'i', 'j', 'k', 'v'
+        exporter: Country code of Bangladesh
+        competitors: Reference exporter codes (the world excluding Bangladesh if None)
+        by_sector: Also break components down by product group
+        product_groups: Group by HS6 code for by_sector (model sectors if None)
+
+    Returns:
+        DataFrame indexed by end year ('group' level added with by_sector) with start
+        year, exports at start and end, change, reference growth and the components
+    """
+    years_all = trade_data['t'].to_numpy(dtype=np.int64)
+    exporters = trade_data['i'].to_numpy(dtype=np.int64)
+    destinations = trade_data['j'].to_numpy(dtype=np.int64)
+    values = trade_data['v'].to_numpy(dtype=float)
+
+    years, year_index = np.unique(years_all, return_inverse=True)
+    products, product_index = np.unique(trade_data['k'].to_numpy(dtype=np.int64), return_inverse=True)
+    destination_codes, destination_index = np.unique(destinations, return_inverse=True)
+    n_years, n_products = len(years), len(products)
+    cell_keys = product_index.astype(np.int64) * len(destination_codes) + destination_index
+
+    own = exporters == exporter
+    if competitors is None:
+        reference = ~own
+    else:
+        reference = np.isin(exporters, competitors) & ~own
+
+    # Bangladesh exports by (year, cell)
+    cells, own_cell_index = np.unique(cell_keys[own], return_inverse=True)
+    n_cells = len(cells)
+    exports = np.bincount(year_index[own] * n_cells + own_cell_index, weights=values[own],
+                          minlength=n_years * n_cells).reshape(n_years, n_cells)
+    cell_products = cells // len(destination_codes)
+
+    # Reference exports in Bangladesh's cells, by product and in total
+    reference_keys = cell_keys[reference]
+    position = np.minimum(np.searchsorted(cells, reference_keys), max(n_cells - 1, 0))
+    in_cells = (cells[position] == reference_keys) if n_cells else np.zeros(len(reference_keys), dtype=bool)
+    reference_years = year_index[reference]
+    reference_values = values[reference]
+    reference_cells = np.bincount(reference_years[in_cells] * n_cells + position[in_cells],
+                                  weights=reference_values[in_cells],
+                                  minlength=n_years * n_cells).reshape(n_years, n_cells)
+    reference_products = np.bincount(reference_years * n_products + product_index[reference],
+                                     weights=reference_values, minlength=n_years * n_products
+                                     ).reshape(n_years, n_products)
+    reference_totals = np.bincount(reference_years, weights=reference_values, minlength=n_years)
+
+    # Growth rates for every pair of consecutive years, shape (pairs,), (pairs, products), (pairs, cells)
+    total_growth = _growth(reference_totals[1:], reference_totals[:-1], np.zeros(n_years - 1))
+    product_growth = _growth(reference_products[1:], reference_products[:-1], total_growth[:, np.newaxis])
+    cell_product_growth = product_growth[:, cell_products]
+    cell_growth = _growth(reference_cells[1:], reference_cells[:-1], cell_product_growth)
+
+    start, end = exports[:-1], exports[1:]
+    components = {
+        'world_growth_effect': total_growth[:, np.newaxis] * start,
+        'commodity_composition_effect': (cell_product_growth - total_growth[:, np.newaxis]) * start,
+        'market_distribution_effect': (cell_growth - cell_product_growth) * start,
+        'competitiveness_effect': end - start - cell_growth * start,
+    }
+
+    def _frame(group_index: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+        # Sum cell arrays within groups for all year pairs at once
+        keys = (np.arange(n_years - 1)[:, np.newaxis] * n_groups + group_index[np.newaxis, :]).ravel()
+        total = lambda array: np.bincount(keys, weights=array.ravel(),
+                                          minlength=(n_years - 1) * n_groups).reshape(n_years - 1, n_groups)
+        frame = {'exports_start': total(start), 'exports_end': total(end)}
+        frame.update({name: total(component) for name, component in components.items()})
+        return frame
+
+    columns = ['start_year', 'exports_start', 'exports_end', 'change', 'reference_growth', *CMS_COMPONENTS]
+    totals = _frame(np.zeros(n_cells, dtype=np.int64), 1)
+    result = pd.DataFrame({name: value[:, 0] for name, value in totals.items()}, index=pd.Index(years[1:], name='year'))
+    result['start_year'] = years[:-1]
+    result['change'] = result['exports_end'] - result['exports_start']
+    result['reference_growth'] = total_growth
+    result = result[columns]
+
+    if not by_sector:
+        return result
+
+    groups = hs6_sectors(products[cell_products]).astype(str)
+    if product_groups:
+        groups = np.array([product_groups.get(int(code), group)
+                           for code, group in zip(products[cell_products], groups)])
+    labels, group_index = np.unique(groups, return_inverse=True)
+    grouped = _frame(group_index, len(labels))
+    index = pd.MultiIndex.from_product([years[1:], labels], names=['year', 'group'])
+    sector_result = pd.DataFrame({name: value.ravel() for name, value in grouped.items()}, index=index)
+    sector_result['start_year'] = np.repeat(years[:-1], len(labels))
+    sector_result['change'] = sector_result['exports_end'] - sector_result['exports_start']
+    sector_result['reference_growth'] = np.repeat(total_growth, len(labels))
+    return sector_result[columns]
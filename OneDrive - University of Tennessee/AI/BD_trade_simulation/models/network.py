@@ -0,0 +1,395 @@
+"""
+Global trade network centrality model for Bangladesh trade simulation.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Any, Optional
+
+# Product group networks analysed besides single HS chapters (None is all products)
+NETWORK_GROUPS = {
+    'all': None,
+    'rmg': (61, 62),
+}
+
+CENTRALITY_MEASURES = ('out_strength', 'in_strength', 'pagerank', 'hub', 'authority', 'clustering')
+
+
+def _normalize_blocks(values: np.ndarray, n_graphs: int) -> np.ndarray:
+    """Scale each graph's block of a stacked vector to sum to one"""
+    blocks = values.reshape(n_graphs, -1)
+    totals = blocks.sum(axis=1, keepdims=True)
+    return np.divide(blocks, totals, out=np.zeros_like(blocks), where=totals > 0).ravel()
+
+
+def _block_change(new: np.ndarray, old: np.ndarray, n_graphs: int) -> np.ndarray:
+    """L1 change of each graph's block"""
+    return np.abs(new - old).reshape(n_graphs, -1).sum(axis=1)
+
+
+def pagerank(adjacency: sparse.csr_matrix,
+             active: np.ndarray,
+             damping: float = 0.85,
+             tol: float = 1e-6,
+             max_iter: int = 200) -> np.ndarray:
+    """
+    Weighted PageRank of a block-diagonal stack of graphs by power iteration
+
+    Rank teleports uniformly to the active nodes of each graph, and the rank of
+    dangling nodes is spread the same way, so every graph converges as it would
+    on its own. Iteration stops when every graph's L1 change is below
+    (active nodes x tol).
+
+    Args:
+        adjacency: Block-diagonal weighted adjacency, (graphs x nodes) square
+        active: Nodes present in each graph, shape (graphs, nodes)
+        damping: Damping factor
+        tol: Convergence tolerance per node
+        max_iter: Maximum number of iterations
+
+    Returns:
+        PageRank, shape (graphs, nodes), summing to one in each graph with edges
+    """
+    n_graphs = active.shape[0]
+    out_strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    inverse = np.divide(1.0, out_strength, out=np.zeros_like(out_strength), where=out_strength > 0)
+    transition = sparse.csr_matrix((sparse.diags(inverse) @ adjacency).T)
+
+    teleport = _normalize_blocks(active.astype(float).ravel(), n_graphs)
+    dangling = (out_strength == 0) & active.ravel()
+    thresholds = active.sum(axis=1) * tol
+
+    rank = teleport.copy()
+    for _ in range(max_iter):
+        dangling_rank = np.where(dangling, rank, 0.0).reshape(n_graphs, -1).sum(axis=1)
+        spread = np.repeat(damping * dangling_rank + 1 - damping, active.shape[1])
+        new_rank = damping * (transition @ rank) + spread * teleport
+        converged = _block_change(new_rank, rank, n_graphs) < thresholds
+        rank = new_rank
+        if converged.all():
+            break
+    return rank.reshape(active.shape)
+
+
+def hits(adjacency: sparse.csr_matrix,
+         active: np.ndarray,
+         tol: float = 1e-8,
+         max_iter: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    HITS hub and authority scores of a block-diagonal stack of graphs by power iteration
+
+    Args:
+        adjacency: Block-diagonal weighted adjacency, (graphs x nodes) square
+        active: Nodes present in each graph, shape (graphs, nodes)
+        tol: Convergence tolerance on each graph's L1 change of hub scores
+        max_iter: Maximum number of iterations
+
+    Returns:
+        Tuple of hub and authority scores, each shape (graphs, nodes) summing to one per graph
+    """
+    n_graphs = active.shape[0]
+    transposed = sparse.csr_matrix(adjacency.T)
+    hub = _normalize_blocks(active.astype(float).ravel(), n_graphs)
+    for _ in range(max_iter):
+        authority = _normalize_blocks(transposed @ hub, n_graphs)
+        new_hub = _normalize_blocks(adjacency @ authority, n_graphs)
+        converged = _block_change(new_hub, hub, n_graphs) < tol
+        hub = new_hub
+        if converged.all():
+            break
+    authority = _normalize_blocks(transposed @ hub, n_graphs)
+    return hub.reshape(active.shape), authority.reshape(active.shape)
+
+
+def weighted_clustering(adjacency: sparse.csr_matrix, n_graphs: int) -> np.ndarray:
+    """
+    Weighted clustering coefficient of a block-diagonal stack of graphs
+
+    Graphs are made undirected by summing flows in both directions. With weights
+    scaled by each graph's maximum weight, c_i = sum_jk (w_ij w_jk w_ki)^(1/3) /
+    (k_i (k_i - 1)), the diagonal of the cube of the element-wise cube root.
+
+    Args:
+        adjacency: Block-diagonal weighted adjacency, (graphs x nodes) square
+        n_graphs: Number of graphs
+
+    Returns:
+        Clustering coefficient, shape (graphs, nodes)
+    """
+    undirected = sparse.csr_matrix(adjacency + adjacency.T)
+    undirected.setdiag(0)
+    undirected.eliminate_zeros()
+
+    n_nodes = undirected.shape[0] // n_graphs
+    entry_graphs = np.repeat(np.arange(undirected.shape[0]), np.diff(undirected.indptr)) // n_nodes
+    max_weight = np.zeros(n_graphs)
+    np.maximum.at(max_weight, entry_graphs, undirected.data)
+
+    roots = undirected.copy()
+    roots.data = np.cbrt(undirected.data / max_weight[entry_graphs])
+    triangles = np.asarray((roots @ roots).multiply(roots).sum(axis=1)).ravel()
+    degree = np.diff(undirected.indptr).astype(float)
+    pairs = degree * (degree - 1)
+    clustering = np.divide(triangles, pairs, out=np.zeros_like(triangles), where=pairs > 0)
+    return clustering.reshape(n_graphs, n_nodes)
+
+
+def batched_centrality(graphs: np.ndarray,
+                       sources: np.ndarray,
+                       targets: np.ndarray,
+                       weights: np.ndarray,
+                       n_graphs: int,
+                       n_nodes: int,
+                       damping: float = 0.85) -> Dict[str, np.ndarray]:
+    """
+    Centrality measures of many weighted graphs at once
+
+    The graphs are stacked into one block-diagonal sparse matrix, so each power
+    iteration step advances all of them with one sparse product. Module-level
+    so it can be sent to worker processes.
+
+    Args:
+        graphs: Graph index of every edge
+        sources: Source node (exporter) of every edge
+        targets: Target node (importer) of every edge
+        weights: Edge weights (trade values); duplicates are summed
+        n_graphs: Number of graphs
+        n_nodes: Number of nodes per graph
+        damping: PageRank damping factor
+
+    Returns:
+        Dict of (graphs, nodes) arrays for each of CENTRALITY_MEASURES and 'active'
+    """
+    size = n_graphs * n_nodes
+    offsets = graphs.astype(np.int64) * n_nodes
+    adjacency = sparse.csr_matrix((weights, (offsets + sources, offsets + targets)), shape=(size, size))
+    adjacency.sum_duplicates()
+
+    out_strength = np.asarray(adjacency.sum(axis=1)).ravel().reshape(n_graphs, n_nodes)
+    in_strength = np.asarray(adjacency.sum(axis=0)).ravel().reshape(n_graphs, n_nodes)
+    active = (out_strength + in_strength) > 0
+
+    # Rank flows from importers to the exporters supplying them
+    rank = pagerank(sparse.csr_matrix(adjacency.T), active, damping)
+    hub, authority = hits(adjacency, active)
+    return {
+        'out_strength': out_strength,
+        'in_strength': in_strength,
+        'pagerank': rank,
+        'hub': hub,
+        'authority': authority,
+        'clustering': weighted_clustering(adjacency, n_graphs),
+        'active': active,
+    }
+
+
+class TradeNetwork:
+    """
+    Weighted country x country trade networks by year, HS chapter and product group
+
+    Every (year, network) adjacency is a sparse exporter x importer matrix of
+    trade values over a fixed country index. Centrality is computed for all
+    networks of a year together (see batched_centrality), years can run in
+    worker processes, and the resulting table is cached by data hash.
+
+    Measures per country: out- and in-strength (export and import values),
+    PageRank (rank flows from importers to their suppliers, so exporters rank
+    high by supplying central importers), HITS hub (exporter) and authority
+    (importer) scores, and the weighted clustering coefficient.
+    """
+
+    def __init__(self,
+                 trade_data: pd.DataFrame,
+                 groups: Optional[Dict[str, Optional[Tuple[int, ...]]]] = None,
+                 by_chapter: bool = True,
+                 damping: float = 0.85,
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize trade network model
+
+        Args:
+            trade_data: Trade flows with columns 't', 'i', 'j', 'k', 'v'
+            groups: Product group networks by name, as HS chapters (None for all
+                products); NETWORK_GROUPS if None
+            by_chapter: Also analyse the network of every HS chapter (named '01'..'97')
+            damping: PageRank damping factor
+            cache_dir: Optional directory for the cached centrality table
+        """
+        self.trade_data = trade_data
+        self.groups = dict(NETWORK_GROUPS if groups is None else groups)
+        self.by_chapter = by_chapter
+        self.damping = damping
+        self.cache_dir = cache_dir
+
+        exporters = trade_data['i'].to_numpy(dtype=np.int64)
+        importers = trade_data['j'].to_numpy(dtype=np.int64)
+        chapters = trade_data['k'].to_numpy(dtype=np.int64) // 10000
+        years = trade_data['t'].to_numpy(dtype=np.int64)
+
+        self.countries = np.unique(np.concatenate([exporters, importers]))
+        self.years = np.unique(years).tolist()
+        self.chapters = np.unique(chapters).tolist() if by_chapter else []
+        self.networks = list(self.groups) + [f"{chapter:02d}" for chapter in self.chapters]
+
+        # Flows sorted by year so each year is one contiguous slice
+        sources = np.searchsorted(self.countries, exporters)
+        targets = np.searchsorted(self.countries, importers)
+        values = trade_data['v'].to_numpy(dtype=float)
+        order = np.argsort(years, kind='stable')
+        bounds = np.append(np.searchsorted(years[order], self.years), len(order))
+        self._year_flows = {
+            year: tuple(array[order[start:stop]] for array in (sources, targets, chapters, values))
+            for year, start, stop in zip(self.years, bounds[:-1], bounds[1:])
+        }
+
+        self._adjacency = {}
+        self._centrality = {}
+        self._table = None
+
+    def resolve_year(self, year: Optional[int]) -> int:
+        """Resolve a year (latest if None) and check it is in the data"""
+        if year is None:
+            year = self.years[-1]
+        if year not in self._year_flows:
+            raise ValueError(f"No trade data for year {year}")
+        return year
+
+    def cache_key(self) -> str:
+        """Hash of the trade data and the network specification"""
+        digest = hashlib.sha1(pd.util.hash_pandas_object(
+            self.trade_data[['t', 'i', 'j', 'k', 'v']], index=False).to_numpy().tobytes())
+        digest.update(json.dumps([{name: list(chapters) if chapters else None for name, chapters in self.groups.items()},
+                                  self.by_chapter, self.damping]).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _network_edges(self, year: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Edges of all networks of a year as (network index, sources, targets, weights)"""
+        sources, targets, chapters, values = self._year_flows[year]
+        selections = []
+        for network, group_chapters in enumerate(self.groups.values()):
+            selected = (np.arange(len(values)) if group_chapters is None
+                        else np.flatnonzero(np.isin(chapters, group_chapters)))
+            selections.append((np.full(len(selected), network), selected))
+        if self.by_chapter:
+            chapter_networks = len(self.groups) + np.searchsorted(self.chapters, chapters)
+            selections.append((chapter_networks, np.arange(len(values))))
+
+        networks = np.concatenate([network for network, _ in selections])
+        selected = np.concatenate([rows for _, rows in selections])
+        return networks, sources[selected], targets[selected], values[selected]
+
+    def adjacency(self, year: Optional[int] = None, network: str = 'all') -> sparse.csr_matrix:
+        """
+        Weighted exporter x importer adjacency of a network (cached)
+
+        Args:
+            year: Year (latest if None)
+            network: Group name or two-digit HS chapter
+
+        Returns:
+            CSR matrix of trade values over self.countries
+        """
+        year = self.resolve_year(year)
+        if network not in self.networks:
+            raise ValueError(f"Unknown network {network}")
+        if (year, network) not in self._adjacency:
+            networks, sources, targets, values = self._network_edges(year)
+            selected = networks == self.networks.index(network)
+            adjacency = sparse.csr_matrix((values[selected], (sources[selected], targets[selected])),
+                                          shape=(len(self.countries), len(self.countries)))
+            adjacency.sum_duplicates()
+            self._adjacency[(year, network)] = adjacency
+        return self._adjacency[(year, network)]
+
+    def centrality(self, years: Optional[List[int]] = None, max_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Centrality of every country in every network and year
+
+        Args:
+            years: Years (all years in the data if None)
+            max_workers: Worker processes for years not yet computed (defaults to
+                one per year, capped at CPU count; 1 runs in-process)
+
+        Returns:
+            Long DataFrame with year, network, country and CENTRALITY_MEASURES for
+            the countries present in each network
+        """
+        years = [self.resolve_year(year) for year in (years or self.years)]
+        if self._table is None and set(years) == set(self.years):
+            cached = self._load_table()
+            if cached is not None:
+                self._table = cached
+        if self._table is not None:
+            return self._table[self._table['year'].isin(years)].reset_index(drop=True)
+
+        pending = [year for year in years if year not in self._centrality]
+        arguments = [(*self._network_edges(year), len(self.networks), len(self.countries), self.damping)
+                     for year in pending]
+        if max_workers is None:
+            max_workers = min(len(pending), os.cpu_count() or 1)
+        if max_workers <= 1 or len(pending) <= 1:
+            results = [batched_centrality(*args) for args in arguments]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(batched_centrality, *zip(*arguments)))
+        for year, result in zip(pending, results):
+            self._centrality[year] = self._year_table(year, result)
+
+        table = pd.concat([self._centrality[year] for year in years], ignore_index=True)
+        if set(years) == set(self.years):
+            self._table = table
+            self._save_table(table)
+        return table
+
+    def _year_table(self, year: int, result: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Long table of one year's centrality arrays, active countries only"""
+        network_index, country_index = np.nonzero(result['active'])
+        table = pd.DataFrame({
+            'year': year,
+            'network': np.asarray(self.networks, dtype=object)[network_index],
+            'country': self.countries[country_index],
+        })
+        for measure in CENTRALITY_MEASURES:
+            table[measure] = result[measure][network_index, country_index]
+        return table
+
+    def _cache_file(self) -> Optional[str]:
+        """Path of the cached centrality table (None without a cache directory)"""
+        return os.path.join(self.cache_dir, f"network_centrality_{self.cache_key()}.csv") if self.cache_dir else None
+
+    def _load_table(self) -> Optional[pd.DataFrame]:
+        """Cached centrality table, if there is one"""
+        cache_file = self._cache_file()
+        if cache_file is not None and os.path.exists(cache_file):
+            return pd.read_csv(cache_file, dtype={'network': str})
+        return None
+
+    def _save_table(self, table: pd.DataFrame):
+        """Write the centrality table to the cache directory"""
+        cache_file = self._cache_file()
+        if cache_file is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            table.to_csv(cache_file, index=False)
+
+    def country_centrality(self, country: int = 50, network: str = 'all') -> pd.DataFrame:
+        """
+        Centrality of a country in one network over all years, with its PageRank rank
+
+        Args:
+            country: Country code (Bangladesh by default)
+            network: Group name or two-digit HS chapter
+
+        Returns:
+            DataFrame indexed by year with CENTRALITY_MEASURES, 'pagerank_rank' and
+            'countries' (number of countries in the network)
+        """
+        table = self.centrality()
+        table = table[table['network'] == network]
+        grouped = table.groupby('year')
+        table = table.assign(pagerank_rank=grouped['pagerank'].rank(ascending=False, method='min'),
+                             countries=grouped['country'].transform('size'))
+        return table[table['country'] == country].set_index('year').drop(columns=['network', 'country'])
@@ -0,0 +1,202 @@
+"""
+Policy event scheduler for Bangladesh trade simulation.
+"""
+import numpy as np
+from typing import Dict, List, Tuple, Any, Optional
+
+
+def policy_events_from_config(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Scheduled and stochastic policy events in a trade policy configuration
+
+    Args:
+        config: Trade policy configuration ('ldc_graduation', 'fta_implementation')
+
+    Returns:
+        List of events with 'name', 'kind' ('ldc_graduation', 'fta' or
+        'rcep_accession'), 'year' (earliest eligible year) and 'probability'
+        (annual probability before enforcement quality; None if scheduled)
+    """
+    fta_config = config.get('fta_implementation', {})
+
+    events = [{
+        'name': 'ldc_graduation',
+        'kind': 'ldc_graduation',
+        'year': config.get('ldc_graduation', {}).get('year', 2026),
+        'probability': None,
+    }]
+
+    for country, proposal in fta_config.get('proposed_ftas', {}).items():
+        events.append({
+            'name': country,
+            'kind': 'fta',
+            'year': proposal.get('year', 2030),
+            'probability': proposal.get('probability', 0.5),
+        })
+
+    rcep_accession = fta_config.get('rcep_accession', {})
+    events.append({
+        'name': 'rcep',
+        'kind': 'rcep_accession',
+        'year': rcep_accession.get('year', 2032),
+        'probability': rcep_accession.get('probability', 0.4),
+    })
+
+    return events
+
+
+class PolicyEventScheduler:
+    """
+    Index of policy events by earliest eligible year
+
+    A stochastic event fires in each eligible year with probability
+    p * enforcement_quality. Instead of a draw per event per year, each event
+    gets an exponential threshold when it becomes eligible (inverse CDF of one
+    uniform draw) and fires in the first year its cumulative hazard
+    -log(1 - p * q) exceeds the threshold, which gives the same distribution of
+    firing years. Scheduled events have infinite hazard and fire in their year.
+    Events are sorted by eligible year, so a year only touches events that
+    become eligible, and pending hazards are accumulated in one array operation.
+    """
+
+    def __init__(self, events: List[Dict[str, Any]]):
+        """
+        Initialize event scheduler
+
+        Args:
+            events: Events with 'name', 'year' and 'probability' (None if scheduled),
+                e.g. from policy_events_from_config
+        """
+        # Stable sort keeps configuration order within a year
+        order = sorted(range(len(events)), key=lambda i: events[i]['year'])
+        self.events = [events[i] for i in order]
+        self.config_order = np.array(order, dtype=int)
+        self.names = [event['name'] for event in self.events]
+        self.eligible_years = np.array([event['year'] for event in self.events], dtype=int)
+        self.probabilities = np.array([1.0 if event.get('probability') is None else event['probability']
+                                       for event in self.events], dtype=float)
+        self.scheduled = np.array([event.get('probability') is None for event in self.events])
+
+        # First event not yet eligible; eligible events that have not fired
+        self.next_event = 0
+        self.pending = np.empty(0, dtype=int)
+        self.thresholds = np.empty(0)
+        self.cumulative_hazard = np.empty(0)
+
+        # Firing year by event name
+        self.fired = {}
+
+    def _annual_hazard(self, events: np.ndarray, enforcement_quality: Any) -> np.ndarray:
+        """Hazard -log(1 - p * q) of events in a year (infinite for scheduled events)"""
+        probability = np.clip(self.probabilities[events] * enforcement_quality, 0.0, 1.0)
+        probability = np.where(self.scheduled[events], 1.0, probability)
+        with np.errstate(divide='ignore'):
+            return -np.log1p(-probability)
+
+    def advance(self,
+                simulation_year: int,
+                enforcement_quality: float = 1.0,
+                rng: Optional[np.random.Generator] = None) -> List[Dict[str, Any]]:
+        """
+        Advance to a year and return the events that fire in it
+
+        Call once per simulated year, in increasing year order.
+
+        Args:
+            simulation_year: Calendar year
+            enforcement_quality: Quality of policy enforcement (0-1) scaling probabilities
+            rng: Random generator for new thresholds (the global generator if None)
+
+        Returns:
+            Fired events in configuration order
+        """
+        # Events that become eligible this year draw their thresholds
+        stop = int(np.searchsorted(self.eligible_years, simulation_year, side='right'))
+        if stop > self.next_event:
+            new_events = np.arange(self.next_event, stop)
+            uniforms = np.random.random(len(new_events)) if rng is None else rng.random(len(new_events))
+            self.pending = np.concatenate([self.pending, new_events])
+            self.thresholds = np.concatenate([self.thresholds, -np.log1p(-uniforms)])
+            self.cumulative_hazard = np.concatenate([self.cumulative_hazard, np.zeros(len(new_events))])
+            self.next_event = stop
+
+        if len(self.pending) == 0:
+            return []
+
+        self.cumulative_hazard += self._annual_hazard(self.pending, enforcement_quality)
+        fires = self.cumulative_hazard > self.thresholds
+        if not fires.any():
+            return []
+
+        fired = self.pending[fires]
+        self.pending = self.pending[~fires]
+        self.thresholds = self.thresholds[~fires]
+        self.cumulative_hazard = self.cumulative_hazard[~fires]
+
+        fired = fired[np.argsort(self.config_order[fired])]
+        for event in fired:
+            self.fired[self.names[event]] = simulation_year
+        return [self.events[event] for event in fired]
+
+    def sample_timelines(self,
+                         n_timelines: int,
+                         start_year: int,
+                         end_year: int,
+                         enforcement_quality: Any = 1.0,
+                         seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Sample firing years of all events for many hypothetical timelines
+
+        Args:
+            n_timelines: Number of timelines
+            start_year: First simulated year
+            end_year: Last simulated year
+            enforcement_quality: Enforcement quality, scalar or per-year array
+            seed: Random seed
+
+        Returns:
+            Dict with 'events' (names), 'years', 'fire_years' (timelines, events; NaN
+            if the event does not fire by end_year), 'cumulative_probability'
+            (events, years) and a per-event 'summary'
+        """
+        years = np.arange(start_year, end_year + 1)
+        quality = np.broadcast_to(np.asarray(enforcement_quality, dtype=float), years.shape)
+        all_events = np.arange(len(self.events))
+
+        # Cumulative hazard of each event by year, shape (events, years)
+        hazard = self._annual_hazard(all_events[:, np.newaxis], quality[np.newaxis, :])
+        hazard = np.where(years[np.newaxis, :] >= self.eligible_years[:, np.newaxis], hazard, 0.0)
+        cumulative_hazard = np.cumsum(hazard, axis=1)
+
+        # Inverse-CDF thresholds; an event fires in the first year its cumulative hazard exceeds its threshold
+        rng = np.random.default_rng(seed)
+        thresholds = -np.log1p(-rng.random((n_timelines, len(self.events))))
+        fire_index = np.empty(thresholds.shape, dtype=int)
+        for event in all_events:
+            fire_index[:, event] = np.searchsorted(cumulative_hazard[event], thresholds[:, event], side='right')
+
+        fired = fire_index < len(years)
+        fire_years = np.where(fired, start_year + fire_index, np.nan)
+
+        # Share of timelines in which each event has fired by each year
+        cumulative_probability = np.stack([
+            np.bincount(fire_index[:, event], minlength=len(years) + 1)[:len(years)].cumsum() / n_timelines
+            for event in all_events]) if len(self.events) else np.empty((0, len(years)))
+
+        summary = {}
+        for event, name in enumerate(self.names):
+            reached = np.flatnonzero(cumulative_probability[event] >= 0.5)
+            summary[name] = {
+                'eligible_year': int(self.eligible_years[event]),
+                'probability': float(fired[:, event].mean()),
+                'median_year': int(years[reached[0]]) if len(reached) else None,
+                'mean_year_if_fired': float(np.nanmean(fire_years[:, event])) if fired[:, event].any() else None,
+            }
+
+        return {
+            'events': list(self.names),
+            'years': years,
+            'fire_years': fire_years,
+            'cumulative_probability': cumulative_probability,
+            'summary': summary,
+        }
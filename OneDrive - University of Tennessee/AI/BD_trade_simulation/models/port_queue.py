@@ -0,0 +1,305 @@
+"""
+Discrete-event port congestion model for Bangladesh trade simulation.
+"""
+import warnings
+import numpy as np
+from typing import Dict, List, Tuple, Any, Optional, Sequence
+
+HOURS_PER_YEAR = 8760
+WARMUP_CHUNKS = 10
+
+
+class PortQueueSimulator:
+    """
+    Discrete-event simulation of vessel calls at a container terminal
+
+    Simulates one year of vessel arrivals (Poisson process), first-come-first-served
+    berth allocation, crane service and container dwell in the yard. When yard
+    occupancy passes the blocking threshold, crane productivity falls, which is
+    what produces the queueing blow-up as a port approaches capacity.
+
+    The simulator holds the terminal configuration; the simulation itself is
+    simulate_terminals, which runs every replication of every terminal in lockstep.
+    Offered volume above max_offered_load times the design throughput is capped
+    to bound the calls per simulated year; capped results carry load_capped and
+    a warning is issued.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize port queue simulator
+
+        Args:
+            config: Terminal configuration (berths, cranes, productivity, call size, yard)
+        """
+        config = config or {}
+
+        # Quay side
+        self.berths = config.get('berths', 10)
+        self.cranes_per_berth = config.get('cranes_per_berth', 2)
+        self.crane_moves_per_hour = config.get('crane_moves_per_hour', 22)
+        self.teu_per_move = config.get('teu_per_move', 1.5)
+        self.berthing_hours = config.get('berthing_hours', 4)  # Mooring, unmooring and setup per call
+
+        # Vessel calls
+        self.mean_call_size = config.get('mean_call_size', 1200)  # TEU exchanged per call
+        self.call_size_cv = config.get('call_size_cv', 0.4)
+
+        # Yard side
+        self.mean_dwell_days = config.get('mean_dwell_days', 7)
+        self.yard_capacity = config.get('yard_capacity')  # TEU; sized from design throughput if None
+        self.yard_design_utilization = config.get('yard_design_utilization', 0.7)
+        self.blocking_threshold = config.get('blocking_threshold', 0.8)
+        self.blocking_penalty = config.get('blocking_penalty', 1.0)  # Extra service time at full yard
+
+        # Offered load (relative to design throughput) above this is capped, flagged and warned
+        self.max_offered_load = config.get('max_offered_load', 1.5)
+
+        # Independent years simulated per call; statistics are pooled over them
+        self.replications = config.get('replications', 1)
+
+    def design_throughput(self, efficiency: float = 1.0) -> float:
+        """
+        Annual TEU the quay can handle with all berths working continuously
+
+        Args:
+            efficiency: Port efficiency (0-1) scaling crane productivity
+
+        Returns:
+            Design throughput in TEU per year
+        """
+        teu_per_hour = self.cranes_per_berth * self.crane_moves_per_hour * self.teu_per_move * efficiency
+        hours_per_call = self.berthing_hours + self.mean_call_size / teu_per_hour
+        return self.berths * HOURS_PER_YEAR / hours_per_call * self.mean_call_size
+
+    def yard_size(self, efficiency: float = 1.0) -> float:
+        """Yard capacity in TEU (sized for design throughput at the design utilization if not configured)"""
+        if self.yard_capacity is not None:
+            return self.yard_capacity
+        design_inflow = self.design_throughput(efficiency) / HOURS_PER_YEAR
+        return design_inflow * self.mean_dwell_days * 24 / self.yard_design_utilization
+
+    def simulate(self,
+                 annual_teu: float,
+                 efficiency: float = 1.0,
+                 disruption_factor: float = 0.0,
+                 rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+        """
+        Simulate one year of vessel calls at this terminal
+
+        Args:
+            annual_teu: Offered container volume in TEU
+            efficiency: Port efficiency (0-1) scaling crane productivity
+            disruption_factor: External disruption level (0-1) reducing productivity
+            rng: Random generator (a new unseeded generator if None)
+
+        Returns:
+            Dict with waiting time, queue and utilization statistics (see simulate_terminals)
+        """
+        return simulate_terminals([self], [annual_teu], [efficiency], [disruption_factor], rng)[0]
+
+
+def simulate_terminals(simulators: Sequence[PortQueueSimulator],
+                       annual_teu: Sequence[float],
+                       efficiency: Sequence[float],
+                       disruption_factor: Sequence[float],
+                       rng: Optional[np.random.Generator] = None) -> List[Dict[str, Any]]:
+    """
+    Simulate one year of vessel calls at several terminals in lockstep
+
+    Every replication of every terminal is a lane. Vessel attributes are
+    (lanes, calls) arrays, berth release times a (lanes, berths) array (inf for
+    the missing berths of smaller terminals) and pending yard releases an hourly
+    calendar queue of TEU per (lane, hour). Each step allocates the next vessel
+    of every lane with a few array operations, so the Python loop runs over the
+    largest number of calls of any lane rather than over all calls. Releases are
+    applied at the end of their calendar hour.
+
+    Args:
+        simulators: Terminal of each entry
+        annual_teu: Offered container volume of each terminal in TEU
+        efficiency: Port efficiency (0-1) of each terminal
+        disruption_factor: External disruption level (0-1) of each terminal
+        rng: Random generator (a new unseeded generator if None)
+
+    Returns:
+        List with a dict per terminal of waiting time, queue and utilization statistics
+        pooled over replications, the offered load relative to design throughput and
+        whether it was capped at max_offered_load
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Draw the calls of every lane, terminal by terminal
+    lane_terminal, lane_calls, lane_params = [], [], []
+    offered = []
+    for index, simulator in enumerate(simulators):
+        design = simulator.design_throughput(efficiency[index])
+        requested = max(0.0, float(annual_teu[index]))
+        offered_load = requested / design if design > 0 else 0.0
+        teu = min(requested, simulator.max_offered_load * design)
+        offered.append((requested, offered_load, offered_load > simulator.max_offered_load))
+
+        productivity = efficiency[index] * (1 - 0.5 * min(1.0, disruption_factor[index]))
+        teu_per_hour = (simulator.cranes_per_berth * simulator.crane_moves_per_hour * simulator.teu_per_move
+                        * max(productivity, 0.05))
+        shape = 1 / simulator.call_size_cv ** 2
+        for _ in range(simulator.replications):
+            n_calls = int(rng.poisson(teu / simulator.mean_call_size))
+            arrival = np.sort(rng.uniform(0, HOURS_PER_YEAR, n_calls))
+            call_teu = rng.gamma(shape, simulator.mean_call_size / shape, n_calls)
+            dwell = rng.exponential(simulator.mean_dwell_days * 24, n_calls)
+            lane_terminal.append(index)
+            lane_calls.append((arrival, call_teu, dwell, simulator.berthing_hours + call_teu / teu_per_hour))
+            # Start from steady-state yard occupancy, released over two dwell periods
+            lane_params.append((simulator.berths, simulator.yard_size(efficiency[index]),
+                                simulator.blocking_threshold, simulator.blocking_penalty,
+                                teu / HOURS_PER_YEAR * simulator.mean_dwell_days * 24, simulator.mean_dwell_days))
+
+    capped = [index for index, (_, _, is_capped) in enumerate(offered) if is_capped]
+    if capped:
+        warnings.warn(f"Offered load of {len(capped)} terminal(s) exceeds max_offered_load "
+                      f"({', '.join(f'{offered[index][1]:.2f}' for index in capped)}); "
+                      "simulated volume is capped (see 'load_capped')", RuntimeWarning)
+
+    lane_stats = _simulate_lanes(lane_calls, lane_params)
+
+    results = []
+    for index, simulator in enumerate(simulators):
+        lanes = [lane for lane, terminal in enumerate(lane_terminal) if terminal == index]
+        result = _pool_lane_stats([lane_stats[lane] for lane in lanes], simulator.berths)
+        result['offered_teu'], result['offered_load'], result['load_capped'] = offered[index]
+        results.append(result)
+    return results
+
+
+def _simulate_lanes(lane_calls: List[Tuple[np.ndarray, ...]],
+                    lane_params: List[Tuple[float, ...]]) -> List[Dict[str, np.ndarray]]:
+    """Run all lanes in lockstep and return the arrival, start, service, TEU and yard ratio of each call"""
+    n_lanes = len(lane_calls)
+    n_calls = np.array([len(calls[0]) for calls in lane_calls], dtype=np.int64)
+    max_calls = int(n_calls.max()) if n_lanes else 0
+
+    # Lanes ordered by number of calls, so the lanes still running at step i are a prefix;
+    # call attributes are stored (calls, lanes) so each step reads a contiguous row
+    order = np.argsort(-n_calls, kind='stable')
+    n_sorted = n_calls[order]
+    arrival, call_teu, dwell, base_service = (np.zeros((max_calls, n_lanes)) for _ in range(4))
+    for row, lane in enumerate(order):
+        arrival[:n_sorted[row], row], call_teu[:n_sorted[row], row], \
+            dwell[:n_sorted[row], row], base_service[:n_sorted[row], row] = lane_calls[lane]
+
+    berths, yard_capacity, threshold, penalty, occupancy, dwell_days = (
+        np.array([lane_params[lane][column] for lane in order], dtype=float) for column in range(6))
+    berth_free = np.where(np.arange(int(berths.max(initial=1)))[None, :] < berths[:, None], 0.0, np.inf)
+    blocking_slope = penalty / (1 - threshold)
+
+    # Yard calendar: TEU released at the end of each hour; the initial stock leaves in chunks
+    chunk_hours = (dwell_days[:, None] * 48 * np.arange(1, WARMUP_CHUNKS + 1) / WARMUP_CHUNKS).astype(np.int64)
+    calendar = np.zeros((n_lanes, max(2 * HOURS_PER_YEAR, int(chunk_hours.max(initial=0)) + 1)))
+    np.add.at(calendar, (np.repeat(np.arange(n_lanes), WARMUP_CHUNKS), chunk_hours.ravel()),
+              np.repeat(occupancy / WARMUP_CHUNKS, WARMUP_CHUNKS))
+    released_until = np.zeros(n_lanes, dtype=np.int64)  # Calendar hours already released
+
+    start = np.zeros((max_calls, n_lanes))
+    service = np.zeros((max_calls, n_lanes))
+    yard_ratio = np.zeros((max_calls, n_lanes))
+    rows = np.arange(n_lanes)
+    active = n_lanes
+
+    for i in range(max_calls):
+        while n_sorted[active - 1] <= i:
+            active -= 1
+        lanes = rows[:active]
+
+        # Earliest free berth serves the next vessel in arrival order
+        berth = berth_free[:active].argmin(axis=1)
+        t = np.maximum(arrival[i, :active], berth_free[lanes, berth])
+
+        # Release containers whose dwell ended in the hours elapsed since the last call
+        due = t.astype(np.int64)
+        elapsed = due - released_until[:active]
+        sweep = elapsed.max()
+        if sweep > 0:
+            offsets = np.arange(sweep)
+            pending = calendar[lanes[:, None], released_until[:active, None] + offsets]
+            occupancy[:active] -= np.where(offsets < elapsed[:, None], pending, 0.0).sum(axis=1)
+            released_until[:active] = due
+
+        # Yard blocking slows crane productivity
+        ratio = occupancy[:active] / yard_capacity[:active]
+        vessel_service = base_service[i, :active] * (1.0 + blocking_slope[:active]
+                                                     * np.maximum(ratio - threshold[:active], 0.0))
+
+        start[i, :active] = t
+        service[i, :active] = vessel_service
+        yard_ratio[i, :active] = ratio
+        berth_free[lanes, berth] = t + vessel_service
+
+        # Discharged containers enter the yard until their dwell ends
+        occupancy[:active] += call_teu[i, :active]
+        release = (t + vessel_service + dwell[i, :active]).astype(np.int64)
+        if release.max() >= calendar.shape[1]:
+            extra = max(int(release.max()) + 1, 2 * calendar.shape[1]) - calendar.shape[1]
+            calendar = np.concatenate([calendar, np.zeros((n_lanes, extra))], axis=1)
+        calendar[lanes, release] += call_teu[i, :active]
+
+    stats = [None] * n_lanes
+    for row, lane in enumerate(order):
+        calls = n_sorted[row]
+        stats[lane] = {
+            'arrival': arrival[:calls, row],
+            'start': start[:calls, row],
+            'service': service[:calls, row],
+            'call_teu': call_teu[:calls, row],
+            'yard_ratio': yard_ratio[:calls, row],
+        }
+    return stats
+
+
+def _pool_lane_stats(lanes: List[Dict[str, np.ndarray]], berths: int) -> Dict[str, Any]:
+    """Waiting, queue and utilization statistics of a terminal pooled over its replications"""
+    calls = sum(len(lane['arrival']) for lane in lanes)
+    if calls == 0:
+        return _empty_results()
+
+    waiting = np.concatenate([lane['start'] - lane['arrival'] for lane in lanes])
+    service = np.concatenate([lane['service'] for lane in lanes])
+    start = np.concatenate([lane['start'] for lane in lanes])
+    # Berth hours within the simulated year (calls finishing after it count up to its end)
+    busy = np.clip(np.minimum(start + service, HOURS_PER_YEAR) - start, 0.0, None)
+
+    # FIFO start times are non-decreasing, so the queue seen by each arrival is a count
+    max_queue = 0
+    for lane in lanes:
+        if len(lane['arrival']):
+            started_by_arrival = np.searchsorted(lane['start'], lane['arrival'], side='right')
+            max_queue = max(max_queue, int(np.maximum(0, np.arange(len(lane['arrival'])) - started_by_arrival).max()))
+
+    replications = len(lanes)
+    return {
+        'vessel_calls': calls if replications == 1 else calls / replications,
+        'throughput_teu': float(sum(lane['call_teu'].sum() for lane in lanes) / replications),
+        'mean_waiting_hours': float(waiting.mean()),
+        'p95_waiting_hours': float(np.percentile(waiting, 95)),
+        'mean_waiting_days': float(waiting.mean() / 24),
+        'mean_service_hours': float(service.mean()),
+        'berth_occupancy': float(busy.sum() / (berths * HOURS_PER_YEAR * replications)),
+        'max_queue_length': max_queue,
+        'mean_yard_utilization': float(np.concatenate([lane['yard_ratio'] for lane in lanes]).mean()),
+    }
+
+
+def _empty_results() -> Dict[str, Any]:
+    """Results for a year without vessel calls"""
+    return {
+        'vessel_calls': 0,
+        'throughput_teu': 0.0,
+        'mean_waiting_hours': 0.0,
+        'p95_waiting_hours': 0.0,
+        'mean_waiting_days': 0.0,
+        'mean_service_hours': 0.0,
+        'berth_occupancy': 0.0,
+        'max_queue_length': 0,
+        'mean_yard_utilization': 0.0,
+    }
@@ -0,0 +1,242 @@
+"""
+Revealed comparative advantage model for Bangladesh trade simulation.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, List, Tuple, Any, Optional
+
+
+class RCAEngine:
+    """
+    Balassa revealed comparative advantage for all exporters and HS6 products
+
+    Trade flows are indexed once into fixed exporter and product positions, so
+    every year's exporter x product matrix has the same shape and rows and
+    columns are comparable across years. For a year's sparse export matrix X,
+    RCA_cp = (X_cp / X_c) / (X_p / X) is computed on the nonzero entries only,
+    from the row totals X_c, column totals X_p and world total X. Export and RCA
+    matrices are cached per year in CSR form (country lookups) and CSC form
+    (product lookups), so a country's RCA vector or the top RCA countries of a
+    product are single slices.
+    """
+
+    def __init__(self,
+                 trade_data: pd.DataFrame,
+                 country_codes: Optional[pd.DataFrame] = None):
+        """
+        Initialize RCA engine
+
+        Args:
+            trade_data: Trade flows with columns 't', 'i' (exporter), 'k' (HS6) and 'v'
+            country_codes: Optional country table ('country_code', 'country_name'); all its
+                countries get a row, so countries without exports have zero rows
+        """
+        exporters = trade_data['i'].to_numpy(dtype=np.int64)
+        products = trade_data['k'].to_numpy(dtype=np.int64)
+        years = trade_data['t'].to_numpy(dtype=np.int64)
+        values = trade_data['v'].to_numpy(dtype=float)
+
+        known_countries = exporters
+        self.country_names = {}
+        if country_codes is not None:
+            known_countries = np.concatenate([exporters, country_codes['country_code'].to_numpy(dtype=np.int64)])
+            self.country_names = dict(zip(country_codes['country_code'].astype(int), country_codes['country_name']))
+
+        self.countries = np.unique(known_countries)
+        self.products = np.unique(products)
+        self.years = np.unique(years).tolist()
+        self._country_index = {int(code): row for row, code in enumerate(self.countries)}
+        self._product_index = {int(code): column for column, code in enumerate(self.products)}
+
+        # Flows sorted by year so each year is one contiguous slice
+        rows = np.searchsorted(self.countries, exporters)
+        columns = np.searchsorted(self.products, products)
+        order = np.argsort(years, kind='stable')
+        bounds = np.append(np.searchsorted(years[order], self.years), len(order))
+        self._year_flows = {
+            year: (rows[order[start:stop]], columns[order[start:stop]], values[order[start:stop]])
+            for year, start, stop in zip(self.years, bounds[:-1], bounds[1:])
+        }
+
+        # Per-year caches
+        self._exports = {}
+        self._rca = {}
+        self._rca_by_product = {}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Shape of every year's exporter x product matrix"""
+        return (len(self.countries), len(self.products))
+
+    def resolve_year(self, year: Optional[int]) -> int:
+        """Resolve a year (latest if None) and check it is in the data"""
+        if year is None:
+            year = self.years[-1]
+        if year not in self._year_flows:
+            raise ValueError(f"No trade data for year {year}")
+        return year
+
+    def country_row(self, country: int) -> int:
+        """Matrix row of a country code"""
+        return self._country_index[int(country)]
+
+    def product_column(self, product: int) -> int:
+        """Matrix column of an HS6 code"""
+        return self._product_index[int(product)]
+
+    def export_matrix(self, year: Optional[int] = None) -> sparse.csr_matrix:
+        """
+        Exporter x product export matrix of a year (duplicate flows summed)
+
+        Args:
+            year: Year (latest if None)
+
+        Returns:
+            CSR matrix of export values
+        """
+        year = self.resolve_year(year)
+        if year not in self._exports:
+            rows, columns, values = self._year_flows[year]
+            exports = sparse.csr_matrix((values, (rows, columns)), shape=self.shape)
+            exports.sum_duplicates()
+            exports.eliminate_zeros()
+            self._exports[year] = exports
+        return self._exports[year]
+
+    def rca_matrix(self, year: Optional[int] = None) -> sparse.csr_matrix:
+        """
+        Balassa RCA of all exporters and products in a year
+
+        Args:
+            year: Year (latest if None)
+
+        Returns:
+            CSR matrix of RCA values (zero where there are no exports)
+        """
+        year = self.resolve_year(year)
+        if year not in self._rca:
+            self._rca[year] = balassa_rca(self.export_matrix(year))
+        return self._rca[year]
+
+    def _rca_columns(self, year: int) -> sparse.csc_matrix:
+        """RCA matrix of a year in CSC form for product lookups (cached)"""
+        if year not in self._rca_by_product:
+            self._rca_by_product[year] = self.rca_matrix(year).tocsc()
+        return self._rca_by_product[year]
+
+    def specialization_matrix(self, year: Optional[int] = None, threshold: float = 1.0) -> sparse.csr_matrix:
+        """
+        Binary country x product matrix of revealed comparative advantage
+
+        Args:
+            year: Year (latest if None)
+            threshold: RCA level counted as an advantage
+
+        Returns:
+            CSR matrix with 1 where RCA >= threshold
+        """
+        specialization = self.rca_matrix(year) >= threshold
+        return sparse.csr_matrix(specialization, dtype=float)
+
+    def country_rca(self, country: int = 50, year: Optional[int] = None) -> pd.Series:
+        """
+        RCA vector of a country over all products
+
+        Args:
+            country: Country code (Bangladesh by default)
+            year: Year (latest if None)
+
+        Returns:
+            Series of RCA by HS6 code
+        """
+        row = self.rca_matrix(year)[self.country_row(country)]
+        values = np.zeros(len(self.products))
+        values[row.indices] = row.data
+        return pd.Series(values, index=self.products, name='rca')
+
+    def revealed_advantages(self, country: int = 50, year: Optional[int] = None, threshold: float = 1.0) -> pd.Series:
+        """
+        Products in which a country has a revealed comparative advantage
+
+        Args:
+            country: Country code (Bangladesh by default)
+            year: Year (latest if None)
+            threshold: RCA level counted as an advantage
+
+        Returns:
+            Series of RCA by HS6 code, highest first
+        """
+        row = self.rca_matrix(year)[self.country_row(country)]
+        keep = row.data >= threshold
+        advantages = pd.Series(row.data[keep], index=self.products[row.indices[keep]], name='rca')
+        return advantages.sort_values(ascending=False)
+
+    def top_countries(self, product: int, year: Optional[int] = None, n: int = 10) -> pd.DataFrame:
+        """
+        Countries with the highest RCA in a product
+
+        Args:
+            product: HS6 code
+            year: Year (latest if None)
+            n: Number of countries
+
+        Returns:
+            DataFrame with country code, name, RCA and export value, highest RCA first
+        """
+        year = self.resolve_year(year)
+        rca = self._rca_columns(year)
+        column = self.product_column(product)
+        start, stop = rca.indptr[column], rca.indptr[column + 1]
+        rows, values = rca.indices[start:stop], rca.data[start:stop]
+
+        if len(values) > n:
+            top = np.argpartition(-values, n - 1)[:n]
+            rows, values = rows[top], values[top]
+        order = np.argsort(-values, kind='stable')
+        rows, values = rows[order], values[order]
+
+        codes = self.countries[rows]
+        exports = np.asarray(self.export_matrix(year)[rows, column].todense()).ravel()
+        return pd.DataFrame({
+            'country_code': codes,
+            'country_name': [self.country_names.get(int(code), str(code)) for code in codes],
+            'rca': values,
+            'export_value': exports,
+        })
+
+    def group_rca(self, groups: np.ndarray, year: Optional[int] = None) -> Tuple[List[str], sparse.csr_matrix]:
+        """
+        RCA of all exporters in product groups (e.g. model sectors)
+
+        Args:
+            groups: Group label of every product, aligned with self.products
+            year: Year (latest if None)
+
+        Returns:
+            Tuple of group labels and the exporter x group RCA matrix
+        """
+        labels, group_index = np.unique(np.asarray(groups).astype(str), return_inverse=True)
+        aggregation = sparse.csr_matrix((np.ones(len(group_index)), (np.arange(len(group_index)), group_index)),
+                                        shape=(len(self.products), len(labels)))
+        return labels.tolist(), balassa_rca(self.export_matrix(year) @ aggregation)
+
+
+def balassa_rca(exports: sparse.spmatrix) -> sparse.csr_matrix:
+    """
+    Balassa RCA of a sparse exporter x product matrix
+
+    Args:
+        exports: Export values (exporters x products)
+
+    Returns:
+        CSR matrix of RCA values on the nonzero entries of exports
+    """
+    exports = sparse.csr_matrix(exports)
+    country_totals = np.asarray(exports.sum(axis=1)).ravel()
+    product_totals = np.asarray(exports.sum(axis=0)).ravel()
+    world_total = country_totals.sum()
+
+    rows = np.repeat(np.arange(exports.shape[0]), np.diff(exports.indptr))
+    rca_values = exports.data * world_total / (country_totals[rows] * product_totals[exports.indices])
+    return sparse.csr_matrix((rca_values, exports.indices.copy(), exports.indptr.copy()), shape=exports.shape)
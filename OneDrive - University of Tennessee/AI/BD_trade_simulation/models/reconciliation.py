@@ -0,0 +1,231 @@
+"""
+Mirror trade data reconciliation model for Bangladesh trade simulation.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any, Optional, Iterable, Union
+
+from models.unit_values import trade_chunks
+
+# Flow keys are ((t * 1000 + i) * 1000 + j) * HS6_BASE + k; country codes are below 1000
+HS6_BASE = 10 ** 6
+COUNTRY_BASE = 1000
+
+RECONCILIATION_STATUSES = ('matched', 'discrepant', 'reported_only', 'mirror_only')
+
+
+def flow_keys(years: np.ndarray, exporters: np.ndarray, importers: np.ndarray, products: np.ndarray) -> np.ndarray:
+    """Integer (year, exporter, importer, HS6) keys, ordered as the tuples"""
+    return (((years.astype(np.int64) * COUNTRY_BASE + exporters.astype(np.int64)) * COUNTRY_BASE
+             + importers.astype(np.int64)) * HS6_BASE + products.astype(np.int64))
+
+
+def decode_flow_keys(keys: np.ndarray) -> Dict[str, np.ndarray]:
+    """Columns 't', 'i', 'j', 'k' of flow keys"""
+    pairs, products = np.divmod(keys, HS6_BASE)
+    years_exporters, importers = np.divmod(pairs, COUNTRY_BASE)
+    years, exporters = np.divmod(years_exporters, COUNTRY_BASE)
+    return {'t': years, 'i': exporters, 'j': importers, 'k': products}
+
+
+def merge_sorted(keys: np.ndarray, values: np.ndarray,
+                 new_keys: np.ndarray, new_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge new keyed values into a sorted unique key array, summing values of equal keys"""
+    merged, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    return merged, np.bincount(inverse, weights=np.concatenate([values, new_values]), minlength=len(merged))
+
+
+class MirrorReconciliation:
+    """
+    Reconcile a country's reported trade with its partners' mirror records
+
+    Reported flows are the country's own declarations (exports where it is the
+    exporter i, imports where it is the importer j); mirror flows are the same
+    flows declared by partners. Both sources are streamed in chunks; only flows
+    of the country (and of the selected partners) are kept, aggregated on
+    sorted integer (year, exporter, importer, HS6) keys, so the two sides are
+    joined with a single sort-merge over the union of keys.
+
+    Import records are valued CIF and export records FOB, so the import side
+    of each pair is deflated by (1 + cif_margin) before comparison. A flow is
+    discrepant when its relative discrepancy |reported - mirror| / mean exceeds
+    the threshold and the larger side exceeds min_value. The reconciled value
+    is the reported value of matched flows, the preferred source ('mirror',
+    'reported', 'max' or 'mean') of discrepant flows, and whichever side exists
+    for one-sided flows.
+    """
+
+    def __init__(self,
+                 country: int = 50,
+                 partners: Optional[List[int]] = None,
+                 cif_margin: float = 0.05,
+                 threshold: float = 0.25,
+                 min_value: float = 10.0,
+                 prefer: str = 'mirror'):
+        """
+        Initialize mirror reconciliation
+
+        Args:
+            country: Country code of Bangladesh
+            partners: Partner codes to reconcile (all partners if None)
+            cif_margin: CIF/FOB margin of import valuations
+            threshold: Relative discrepancy flagged as discrepant
+            min_value: Discrepancies are only flagged above this flow value
+            prefer: Source of reconciled values of discrepant flows
+        """
+        if prefer not in ('mirror', 'reported', 'max', 'mean'):
+            raise ValueError(f"Unknown reconciliation preference: {prefer}")
+        self.country = country
+        self.partners = None if partners is None else np.unique(np.asarray(partners, dtype=np.int64))
+        self.cif_margin = cif_margin
+        self.threshold = threshold
+        self.min_value = min_value
+        self.prefer = prefer
+
+        self.sides = {
+            'reported': (np.zeros(0, dtype=np.int64), np.zeros(0)),
+            'mirror': (np.zeros(0, dtype=np.int64), np.zeros(0)),
+        }
+        self._flows = None
+
+    def update(self, chunk: pd.DataFrame, side: str):
+        """
+        Add a chunk of flows of one source
+
+        Args:
+            chunk: Trade flows with columns 't', 'i', 'j', 'k', 'v'
+            side: 'reported' or 'mirror'
+        """
+        exporters = chunk['i'].to_numpy(dtype=np.int64)
+        importers = chunk['j'].to_numpy(dtype=np.int64)
+        exports, imports = exporters == self.country, importers == self.country
+        if self.partners is not None:
+            exports &= np.isin(importers, self.partners)
+            imports &= np.isin(exporters, self.partners)
+        keep = np.flatnonzero(exports | imports)
+
+        keys = flow_keys(chunk['t'].to_numpy()[keep], exporters[keep], importers[keep], chunk['k'].to_numpy()[keep])
+        values = chunk['v'].to_numpy(dtype=float)[keep]
+        self.sides[side] = merge_sorted(*self.sides[side], keys, values)
+        self._flows = None
+
+    def fit(self,
+            reported: Union[pd.DataFrame, str, Iterable[pd.DataFrame]],
+            mirror: Union[pd.DataFrame, str, Iterable[pd.DataFrame]],
+            chunksize: int = 1_000_000) -> 'MirrorReconciliation':
+        """
+        Read both sources
+
+        Args:
+            reported: Country-reported flows (DataFrame, CSV path or iterable of chunks)
+            mirror: Partner-reported flows (DataFrame, CSV path or iterable of chunks)
+            chunksize: Rows per chunk when reading CSV paths
+
+        Returns:
+            The reconciliation
+        """
+        for side, source in (('reported', reported), ('mirror', mirror)):
+            for chunk in trade_chunks(source, ['t', 'i', 'j', 'k', 'v'], chunksize):
+                self.update(chunk, side)
+        return self
+
+    def flows(self) -> pd.DataFrame:
+        """
+        Reconciled flows
+
+        Returns:
+            DataFrame with t, i, j, k, direction ('export' or 'import'), partner,
+            reported and mirror values (FOB, NaN where missing), discrepancy,
+            relative_discrepancy, status and reconciled value
+        """
+        if self._flows is not None:
+            return self._flows
+
+        reported_keys, reported_values = self.sides['reported']
+        mirror_keys, mirror_values = self.sides['mirror']
+
+        # Sort-merge: both key arrays are sorted, so positions in the union are monotone
+        keys = np.union1d(reported_keys, mirror_keys)
+        reported = np.full(len(keys), np.nan)
+        mirror = np.full(len(keys), np.nan)
+        reported[np.searchsorted(keys, reported_keys)] = reported_values
+        mirror[np.searchsorted(keys, mirror_keys)] = mirror_values
+
+        columns = decode_flow_keys(keys)
+        exports = columns['i'] == self.country
+        # Deflate the CIF side: partner imports for exports, own imports for imports
+        mirror = np.where(exports, mirror / (1 + self.cif_margin), mirror)
+        reported = np.where(exports, reported, reported / (1 + self.cif_margin))
+
+        both = ~np.isnan(reported) & ~np.isnan(mirror)
+        discrepancy = reported - mirror
+        mean = (reported + mirror) / 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = np.where(both & (mean > 0), discrepancy / mean, np.nan)
+        discrepant = (both & (np.abs(np.nan_to_num(relative)) > self.threshold)
+                      & (np.fmax(reported, mirror) > self.min_value))
+
+        status = np.select([discrepant, both, np.isnan(mirror)], ['discrepant', 'matched', 'reported_only'],
+                           default='mirror_only')
+        preferred = {
+            'mirror': mirror,
+            'reported': reported,
+            'max': np.fmax(reported, mirror),
+            'mean': mean,
+        }[self.prefer]
+        reconciled = np.where(discrepant, preferred, np.where(np.isnan(reported), mirror, reported))
+
+        self._flows = pd.DataFrame({
+            **columns,
+            'direction': np.where(exports, 'export', 'import'),
+            'partner': np.where(exports, columns['j'], columns['i']),
+            'reported': reported,
+            'mirror': mirror,
+            'discrepancy': discrepancy,
+            'relative_discrepancy': relative,
+            'status': status,
+            'reconciled': reconciled,
+        })
+        return self._flows
+
+    def summary(self, by: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Totals of reported, mirror and reconciled values
+
+        Args:
+            by: Grouping columns (year, direction and partner if None)
+
+        Returns:
+            DataFrame with reported, mirror, reconciled and absolute discrepancy totals,
+            the number of flows by status and the share of value in discrepant flows
+        """
+        by = by or ['t', 'direction', 'partner']
+        flows = self.flows()
+        flows = flows.assign(absolute_discrepancy=flows['discrepancy'].abs(),
+                             discrepant_value=np.where(flows['status'] == 'discrepant', flows['reconciled'], 0.0))
+        totals = flows.groupby(by)[['reported', 'mirror', 'reconciled', 'absolute_discrepancy',
+                                    'discrepant_value']].sum()
+        counts = pd.crosstab([flows[column] for column in by], flows['status'])
+        counts = counts.reindex(columns=list(RECONCILIATION_STATUSES), fill_value=0)
+        totals = totals.join(counts)
+        totals['discrepant_share'] = totals['discrepant_value'] / totals['reconciled'].where(totals['reconciled'] > 0)
+        return totals.drop(columns='discrepant_value')
+
+    def adjusted_series(self) -> pd.DataFrame:
+        """
+        Annual export and import totals as reported and after reconciliation
+
+        Returns:
+            DataFrame indexed by year with reported and reconciled exports and imports
+            (FOB) and the adjustment factor (reconciled / reported) of each
+        """
+        totals = self.flows().groupby(['t', 'direction'])[['reported', 'reconciled']].sum()
+        totals = totals.unstack('direction', fill_value=0.0)
+        series = pd.DataFrame(index=pd.Index(totals.index, name='year'))
+        for direction in ('export', 'import'):
+            reported = totals.get(('reported', direction), pd.Series(0.0, index=totals.index))
+            reconciled = totals.get(('reconciled', direction), pd.Series(0.0, index=totals.index))
+            series[f'{direction}s_reported'] = reported
+            series[f'{direction}s_reconciled'] = reconciled
+            series[f'{direction}_adjustment'] = reconciled / reported.where(reported > 0)
+        return series
@@ -0,0 +1,361 @@
+"""
+Agent-based RMG factory population model for Bangladesh trade simulation.
+"""
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Any, Optional
+
+# Buyer markets a factory can be linked to, with the share of factories linked to
+# each and the compliance level buyers in that market require at the start
+BUYER_MARKETS = ('eu', 'us', 'uk', 'canada', 'other')
+DEFAULT_BUYER_SHARES = {'eu': 0.50, 'us': 0.20, 'uk': 0.10, 'canada': 0.05, 'other': 0.15}
+DEFAULT_BUYER_REQUIREMENTS = {'eu': 0.70, 'us': 0.65, 'uk': 0.70, 'canada': 0.65, 'other': 0.45}
+
+
+class FactoryPopulation:
+    """
+    Population of RMG factories stored as structure-of-arrays
+
+    Every factory attribute is a NumPy column of shape (replicas, slots), so one
+    object simulates many independent replicas and each yearly behavior rule is a
+    handful of array operations. Slots beyond the initial population are
+    inactive and are reused by entrants, so the arrays never grow. Each year:
+    buyer requirements tighten, factories below their buyer's requirement invest
+    in compliance, buyer market demand is allocated to linked factories by
+    productivity and compliance (capped by capacity), margins decide capacity
+    reinvestment and exit, factories falling far below requirements lose their
+    buyer link, and entrants fill free slots in proportion to sector margins.
+    """
+
+    def __init__(self,
+                 config: Optional[Dict[str, Any]] = None,
+                 total_volume: float = 35000,
+                 n_replicas: int = 1,
+                 seed: Optional[Any] = None):
+        """
+        Initialize factory population
+
+        Args:
+            config: Factory population configuration
+            total_volume: Initial sector export volume in million USD (per replica)
+            n_replicas: Number of independent replicas
+            seed: Seed, SeedSequence or Generator for the population's random generator
+        """
+        config = config or {}
+        self.n_factories = int(config.get('n_factories', 4500))
+        self.n_slots = int(self.n_factories * (1 + config.get('slot_headroom', 0.25)))
+        self.n_replicas = n_replicas
+        self.rng = np.random.default_rng(seed)
+
+        # Buyer markets
+        buyer_shares = {**DEFAULT_BUYER_SHARES, **config.get('buyer_shares', {})}
+        buyer_requirements = {**DEFAULT_BUYER_REQUIREMENTS, **config.get('buyer_requirements', {})}
+        self.markets = list(buyer_shares.keys())
+        self.buyer_shares = np.array([buyer_shares[market] for market in self.markets], dtype=float)
+        self.buyer_shares /= self.buyer_shares.sum()
+        self.requirements = np.array([buyer_requirements.get(market, 0.5) for market in self.markets], dtype=float)
+        self.fallback_buyer = int(np.argmin(self.requirements))
+
+        # Behavior parameters
+        self.initial_utilization = config.get('initial_utilization', 0.85)
+        self.requirement_growth = config.get('requirement_growth', 0.005)
+        self.upgrade_rate = config.get('upgrade_rate', 0.3)
+        self.noncompliance_penalty = config.get('noncompliance_penalty', 0.5)
+        self.delisting_gap = config.get('delisting_gap', 0.2)
+        self.base_margin = config.get('base_margin', 0.08)
+        self.compliance_premium = config.get('compliance_premium', 0.05)
+        self.compliance_cost = config.get('compliance_cost', 0.1)
+        self.fixed_cost_share = config.get('fixed_cost_share', 0.25)
+        self.reinvestment_rate = config.get('reinvestment_rate', 0.8)
+        self.exit_after_loss_years = config.get('exit_after_loss_years', 2)
+        self.base_exit_rate = config.get('base_exit_rate', 0.01)
+        self.entry_rate = config.get('entry_rate', 0.02)
+        self.entrant_size = config.get('entrant_size', 0.5)
+        self.capacity_sigma = config.get('capacity_sigma', 0.8)
+
+        # Factory columns
+        shape = (n_replicas, self.n_slots)
+        self.active = np.zeros(shape, dtype=bool)
+        self.active[:, :self.n_factories] = True
+        self.capacity = np.zeros(shape)
+        self.output = np.zeros(shape)
+        self.compliance = np.zeros(shape)
+        self.productivity = np.ones(shape)
+        self.buyer = np.zeros(shape, dtype=np.int8)
+        self.age = np.zeros(shape, dtype=np.int16)
+        self.loss_years = np.zeros(shape, dtype=np.int8)
+
+        initial = (slice(None), slice(0, self.n_factories))
+        initial_shape = (n_replicas, self.n_factories)
+        capacity = self.rng.lognormal(0.0, self.capacity_sigma, initial_shape)
+        capacity *= total_volume / (self.initial_utilization * capacity.sum(axis=1, keepdims=True))
+        self.capacity[initial] = capacity
+        self.output[initial] = capacity * self.initial_utilization
+        self.compliance[initial] = self.rng.beta(7.0, 3.0, initial_shape)
+        self.productivity[initial] = self.rng.lognormal(0.0, 0.25, initial_shape)
+        self.buyer[initial] = self.rng.choice(len(self.markets), size=initial_shape, p=self.buyer_shares)
+        self.age[initial] = self.rng.integers(0, 30, initial_shape)
+
+        # Buyer market demand per replica, calibrated to the initial output of linked factories
+        self.demand = self._market_totals(self.output)
+
+        self.year_index = 0
+
+    def _group_index(self) -> np.ndarray:
+        """Flat (replica, buyer market) group of every slot"""
+        replica_offsets = np.arange(self.n_replicas)[:, np.newaxis] * len(self.markets)
+        return replica_offsets + self.buyer
+
+    def _market_totals(self, values: np.ndarray) -> np.ndarray:
+        """Sum of active factory values by replica and buyer market, shape (replicas, markets)"""
+        totals = np.bincount(self._group_index()[self.active], weights=values[self.active],
+                             minlength=self.n_replicas * len(self.markets))
+        return totals.reshape(self.n_replicas, len(self.markets))
+
+    def _group_share(self, values: np.ndarray, group: np.ndarray) -> np.ndarray:
+        """Share of each active slot in its (replica, buyer market) group total"""
+        totals = np.bincount(group[self.active], weights=values[self.active],
+                             minlength=self.n_replicas * len(self.markets))
+        return np.where(self.active, values / np.maximum(totals[group], 1e-12), 0.0)
+
+    def _per_replica(self, value: Any) -> np.ndarray:
+        """Broadcast a scalar or per-replica input to a (replicas, 1) column"""
+        return np.broadcast_to(np.asarray(value, dtype=float), (self.n_replicas,))[:, np.newaxis]
+
+    def step(self,
+             demand_growth: Any = 0.05,
+             tariff_changes: Optional[Dict[str, float]] = None,
+             compliance_pressure: Any = 0.0,
+             cost_shock: Any = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Simulate one year for all factories and replicas
+
+        Args:
+            demand_growth: Growth of buyer demand for Bangladesh garments, scalar or per replica
+            tariff_changes: Tariff changes by buyer market (reduce that market's demand)
+            compliance_pressure: Regulatory and buyer pressure to upgrade (-1 to 1), scalar or per replica
+            cost_shock: Additional cost as a share of output value, scalar or per replica
+
+        Returns:
+            Dict of per-replica aggregates (see aggregate) plus 'exits' and 'entries'
+        """
+        self.year_index += 1
+        active = self.active
+        compliance_pressure = self._per_replica(compliance_pressure)
+
+        # Buyers tighten their requirements
+        self.requirements = np.minimum(0.98, self.requirements * (1 + self.requirement_growth))
+        requirement = self.requirements[self.buyer]
+
+        # Factories below their buyer's requirement invest in compliance, larger ones faster
+        gap = np.maximum(requirement - self.compliance, 0.0)
+        mean_capacity = (np.where(active, self.capacity, 0.0).sum(axis=1, keepdims=True)
+                         / np.maximum(active.sum(axis=1, keepdims=True), 1))
+        size = self.capacity / np.maximum(mean_capacity, 1e-12)
+        investment = self.upgrade_rate * gap * (1 + compliance_pressure) * np.minimum(1.0, np.sqrt(size))
+        noise = self.rng.normal(0.0, 0.01, self.compliance.shape)
+        self.compliance = np.where(active, np.clip(self.compliance + investment + noise, 0.0, 1.0), self.compliance)
+        compliant = self.compliance >= requirement
+
+        # Buyer market demand
+        market_growth = np.broadcast_to(self._per_replica(demand_growth), self.demand.shape).copy()
+        for market, change in (tariff_changes or {}).items():
+            if market in self.markets:
+                market_growth[:, self.markets.index(market)] -= change
+        self.demand = self.demand * (1 + market_growth)
+
+        # Orders go to linked factories by attractiveness, capped by capacity; orders a
+        # factory cannot fill are passed once to factories with spare capacity
+        group = self._group_index()
+        attractiveness = np.where(active, self.capacity * self.productivity
+                                  * np.where(compliant, 1.0, self.noncompliance_penalty), 0.0)
+        orders = self.demand.reshape(-1)[group] * self._group_share(attractiveness, group)
+        self.output = np.where(active, np.minimum(orders, self.capacity), 0.0)
+        unfilled = np.maximum(self.demand - self._market_totals(self.output), 0.0)
+        spare = np.where(active, self.capacity - self.output, 0.0) * attractiveness / np.maximum(self.capacity, 1e-12)
+        self.output += np.minimum(unfilled.reshape(-1)[group] * self._group_share(spare, group),
+                                  self.capacity - self.output)
+        utilization = self.output / np.maximum(self.capacity, 1e-12)
+
+        # Margins, reinvestment and losses
+        margin = (self.base_margin * self.productivity
+                  + self.compliance_premium * (self.compliance - requirement)
+                  - self.compliance_cost * investment
+                  - self.fixed_cost_share * (1 - utilization)
+                  - self._per_replica(cost_shock))
+        self.capacity = np.where(active, self.capacity * (1 + self.reinvestment_rate * np.maximum(margin, 0.0)
+                                                          * utilization), self.capacity)
+        self.loss_years = np.where(active & (margin < 0), self.loss_years + 1, 0).astype(np.int8)
+
+        # Factories far below requirements lose their buyer link
+        delisted = active & (self.compliance < requirement - self.delisting_gap)
+        self.buyer = np.where(delisted, self.fallback_buyer, self.buyer).astype(np.int8)
+
+        # Exit after repeated losses or by chance
+        exits = active & ((self.loss_years >= self.exit_after_loss_years)
+                          | (self.rng.random(self.active.shape) < self.base_exit_rate))
+        self.active = active & ~exits
+        self.output = np.where(self.active, self.output, 0.0)
+        self.age = np.where(self.active, self.age + 1, 0).astype(np.int16)
+
+        # Entry into free slots in proportion to the output-weighted sector margin
+        total_output = np.maximum(self.output.sum(axis=1), 1e-12)
+        sector_margin = np.where(self.active, margin * self.output, 0.0).sum(axis=1) / total_output
+        expected_entrants = (self.entry_rate * self.active.sum(axis=1)
+                             * np.maximum(sector_margin, 0.0) / self.base_margin)
+        entrants = self.rng.poisson(expected_entrants)
+        free = ~self.active
+        entries = free & (np.cumsum(free, axis=1) <= entrants[:, np.newaxis])
+        self._enter(entries)
+
+        results = self.aggregate()
+        results['exits'] = exits.sum(axis=1)
+        results['entries'] = entries.sum(axis=1)
+        results['delisted'] = delisted.sum(axis=1)
+        return results
+
+    def _enter(self, entries: np.ndarray):
+        """Initialize entrant factories in the given slots"""
+        n_entries = int(entries.sum())
+        if n_entries == 0:
+            return
+
+        median_capacity = np.median(np.where(self.active, self.capacity, np.nan), axis=1)
+        entry_rows = np.nonzero(entries)[0]
+        self.capacity[entries] = (self.entrant_size * np.nan_to_num(median_capacity[entry_rows])
+                                  * self.rng.lognormal(0.0, self.capacity_sigma / 2, n_entries))
+        self.compliance[entries] = self.rng.beta(5.0, 3.0, n_entries)
+        self.productivity[entries] = self.rng.lognormal(0.0, 0.25, n_entries)
+        self.buyer[entries] = self.rng.choice(len(self.markets), size=n_entries, p=self.buyer_shares)
+        self.age[entries] = 0
+        self.loss_years[entries] = 0
+        self.output[entries] = 0.0
+        self.active |= entries
+
+    def aggregate(self) -> Dict[str, np.ndarray]:
+        """
+        Sector aggregates of the factory population
+
+        Returns:
+            Dict of per-replica arrays: 'export_volume' (million USD), output-weighted
+            'competitiveness' (0-1), 'active_factories', 'compliant_share',
+            'average_compliance', 'capacity_utilization' and 'export_by_market'
+            (replicas, markets)
+        """
+        weights = np.where(self.active, self.output, 0.0)
+        total_output = weights.sum(axis=1)
+        denominator = np.maximum(total_output, 1e-12)
+        factory_competitiveness = 0.5 * self.compliance + 0.5 * self.productivity / (1 + self.productivity)
+        compliant = self.active & (self.compliance >= self.requirements[self.buyer])
+        n_active = self.active.sum(axis=1)
+
+        return {
+            'export_volume': total_output,
+            'competitiveness': (weights * factory_competitiveness).sum(axis=1) / denominator,
+            'active_factories': n_active,
+            'compliant_share': compliant.sum(axis=1) / np.maximum(n_active, 1),
+            'average_compliance': np.where(self.active, self.compliance, 0.0).sum(axis=1) / np.maximum(n_active, 1),
+            'capacity_utilization': total_output / np.maximum(np.where(self.active, self.capacity, 0.0).sum(axis=1),
+                                                              1e-12),
+            'export_by_market': self._market_totals(self.output),
+        }
+
+
+def _per_year(value: Any, n_years: int, n_replicas: int) -> np.ndarray:
+    """Broadcast a scalar, per-year or (years, replicas) input to (years, replicas)"""
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 1:
+        value = value[:, np.newaxis]
+    return np.broadcast_to(value, (n_years, n_replicas))
+
+
+def _simulate_shard(config: Dict[str, Any],
+                    total_volume: float,
+                    n_years: int,
+                    n_replicas: int,
+                    seed: Any,
+                    inputs: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Simulate one shard of replicas. Module-level so it can be sent to worker processes.
+
+    Returns:
+        Dict of (replicas, years) arrays
+    """
+    population = FactoryPopulation(config, total_volume, n_replicas, seed)
+    demand_growth = _per_year(inputs.get('demand_growth', 0.05), n_years, n_replicas)
+    compliance_pressure = _per_year(inputs.get('compliance_pressure', 0.0), n_years, n_replicas)
+    cost_shock = _per_year(inputs.get('cost_shock', 0.0), n_years, n_replicas)
+
+    paths = {}
+    for year in range(n_years):
+        year_results = population.step(demand_growth[year], inputs.get('tariff_changes'),
+                                       compliance_pressure[year], cost_shock[year])
+        for key, value in year_results.items():
+            if key not in paths:
+                paths[key] = np.empty((n_years,) + np.shape(value))
+            paths[key][year] = value
+
+    # (years, replicas, ...) -> (replicas, years, ...)
+    return {key: np.swapaxes(value, 0, 1) for key, value in paths.items()}
+
+
+def simulate_factory_populations(config: Optional[Dict[str, Any]] = None,
+                                 n_years: int = 30,
+                                 n_replicas: int = 1000,
+                                 total_volume: float = 35000,
+                                 seed: Optional[int] = None,
+                                 inputs: Optional[Dict[str, Any]] = None,
+                                 replicas_per_shard: int = 100,
+                                 max_workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Simulate many independent replicas of the factory population
+
+    Replicas are split into shards, which bounds memory (every column holds
+    replicas_per_shard x slots values) and lets shards run in worker processes.
+    Each shard gets an independent random stream spawned from the seed, so
+    results do not depend on the number of workers.
+
+    Args:
+        config: Factory population configuration
+        n_years: Number of years to simulate
+        n_replicas: Number of replicas
+        total_volume: Initial sector export volume in million USD
+        seed: Random seed
+        inputs: 'demand_growth', 'compliance_pressure' and 'cost_shock' (scalar,
+            per year or (years, replicas)) and 'tariff_changes' by buyer market
+        replicas_per_shard: Replicas simulated together in one set of arrays
+        max_workers: Number of worker processes (defaults to one per shard, capped at
+            CPU count; 1 runs in-process)
+
+    Returns:
+        Dict of (replicas, years) arrays of the aggregates returned by FactoryPopulation.step
+    """
+    inputs = inputs or {}
+    shard_sizes = [min(replicas_per_shard, n_replicas - start) for start in range(0, n_replicas, replicas_per_shard)]
+    shard_seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    offsets = np.cumsum([0] + shard_sizes)
+
+    def _shard_inputs(shard):
+        # Slice per-replica inputs to the shard's replicas
+        shard_inputs = dict(inputs)
+        for key in ('demand_growth', 'compliance_pressure', 'cost_shock'):
+            value = np.asarray(inputs.get(key, 0.0))
+            if value.ndim == 2:
+                shard_inputs[key] = value[:, offsets[shard]:offsets[shard + 1]]
+        return shard_inputs
+
+    if max_workers is None:
+        max_workers = min(len(shard_sizes), os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(shard_sizes) <= 1:
+        shards = [_simulate_shard(config or {}, total_volume, n_years, size, shard_seed, _shard_inputs(shard))
+                  for shard, (size, shard_seed) in enumerate(zip(shard_sizes, shard_seeds))]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_simulate_shard, config or {}, total_volume, n_years, size, shard_seed,
+                                       _shard_inputs(shard))
+                       for shard, (size, shard_seed) in enumerate(zip(shard_sizes, shard_seeds))]
+            shards = [future.result() for future in futures]
+
+    return {key: np.concatenate([shard[key] for shard in shards]) for key in shards[0]}
@@ -1,5 +1,5 @@
-import random
 import numpy as np
+from models.history import ModelHistory
 
 class ServicesTradeModel:
     """
@@ -35,16 +35,20 @@ class ServicesTradeModel:
         # Initialize Mode 3 (commercial presence)
         self.service_fdi_inflow = config.get('initial_service_fdi', 1.0)        # billion USD
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Track metrics over time
-        self.yearly_metrics = {
-            'remittance_inflow': [self.remittance_inflow],
-            'overseas_workers': [self.overseas_workers],
-            'tourism_earnings': [self.tourism_earnings],
-            'tourist_arrivals': [self.tourist_arrivals],
-            'business_process_exports': [self.business_process_exports],
-            'professional_services_exports': [self.professional_services_exports],
-            'service_fdi_inflow': [self.service_fdi_inflow]
-        }
+        self.yearly_metrics = ModelHistory()
+        self.yearly_metrics.append({
+            'remittance_inflow': self.remittance_inflow,
+            'overseas_workers': self.overseas_workers,
+            'tourism_earnings': self.tourism_earnings,
+            'tourist_arrivals': self.tourist_arrivals,
+            'business_process_exports': self.business_process_exports,
+            'professional_services_exports': self.professional_services_exports,
+            'service_fdi_inflow': self.service_fdi_inflow,
+        })
     
     def simulate_step(self, year, global_conditions=None):
         """
@@ -76,8 +80,7 @@ class ServicesTradeModel:
         }
         
         # Store metrics for this year
-        for key, value in current_metrics.items():
-            self.yearly_metrics[key].append(value)
+        self.yearly_metrics.append(current_metrics)
             
         return current_metrics
     
@@ -101,14 +104,14 @@ class ServicesTradeModel:
         skill_effect = self.config.get('worker_skill_improvement', 0.02)
         
         # Random variance component
-        random_effect = random.uniform(-0.02, 0.03)
+        random_effect = self.rng.uniform(-0.02, 0.03)
         
         # Calculate total growth in overseas workers
         worker_growth_rate = base_worker_growth + global_effect + random_effect
         self.overseas_workers *= (1 + worker_growth_rate)
         
         # Calculate changes in remittance per worker (affected by skill composition)
-        remittance_per_worker_growth = skill_effect + random.uniform(-0.01, 0.02)
+        remittance_per_worker_growth = skill_effect + self.rng.uniform(-0.01, 0.02)
         self.avg_remittance_per_worker *= (1 + remittance_per_worker_growth)
         
         # Calculate total remittance inflow
@@ -146,7 +149,7 @@ class ServicesTradeModel:
             global_effect = global_conditions['global_tourism_growth'] * 0.8  # Elasticity factor
         
         # Random variance + potential shocks (e.g., security incidents)
-        random_effect = random.uniform(-0.08, 0.05)
+        random_effect = self.rng.uniform(-0.08, 0.05)
         
         # Calculate total growth in tourist arrivals
         arrival_growth_rate = base_arrival_growth + infrastructure_effect + marketing_effect + global_effect + random_effect
@@ -154,7 +157,7 @@ class ServicesTradeModel:
         self.tourist_arrivals *= (1 + arrival_growth_rate)
         
         # Calculate average spending per tourist (gradual improvement with better facilities)
-        spending_growth = self.config.get('tourist_spending_growth', 0.03) + random.uniform(-0.01, 0.02)
+        spending_growth = self.config.get('tourist_spending_growth', 0.03) + self.rng.uniform(-0.01, 0.02)
         avg_spending = self.tourism_earnings / previous_arrivals if previous_arrivals > 0 else 0
         avg_spending *= (1 + spending_growth)
         
@@ -193,7 +196,7 @@ class ServicesTradeModel:
         competitive_effect = self.config.get('bpo_competitive_position', -0.02)  # Initially negative
         
         # Random variance
-        random_effect = random.uniform(-0.04, 0.06)
+        random_effect = self.rng.uniform(-0.04, 0.06)
         
         # Calculate total growth rate
         total_growth_rate = base_growth_rate + digital_effect + skill_effect + global_effect + competitive_effect + random_effect
@@ -229,7 +232,7 @@ class ServicesTradeModel:
             global_effect = global_conditions['global_services_demand'] * 0.06
         
         # Random variance
-        random_effect = random.uniform(-0.03, 0.05)
+        random_effect = self.rng.uniform(-0.03, 0.05)
         
         # Calculate total growth rate
         total_growth_rate = base_growth_rate + skill_effect + institutional_effect + regional_effect + global_effect + random_effect
@@ -265,7 +268,7 @@ class ServicesTradeModel:
             global_effect = global_conditions['global_fdi_flows'] * 0.1
         
         # Random variance (includes large one-off investments)
-        random_effect = random.uniform(-0.15, 0.25)
+        random_effect = self.rng.uniform(-0.15, 0.25)
         
         # Calculate total growth rate
         total_growth_rate = base_growth_rate + business_env_effect + market_size_effect + policy_effect + global_effect + random_effect
@@ -282,7 +285,7 @@ class ServicesTradeModel:
         Returns:
             dict: Time series of all tracked metrics
         """
-        return self.yearly_metrics
+        return self.yearly_metrics.to_dict()
     
     def get_total_service_exports(self, year_index=-1):
         """
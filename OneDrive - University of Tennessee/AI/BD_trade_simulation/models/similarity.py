@@ -0,0 +1,289 @@
+"""
+Export similarity and competitor overlap model for Bangladesh trade simulation.
+"""
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, List, Tuple, Any, Optional
+
+# Trade data country codes of the competitors named in the global market configuration
+COMPETITOR_CODES = {
+    'vietnam': 704,
+    'india': 699,
+    'cambodia': 116,
+    'ethiopia': 231,
+    'myanmar': 104,
+    'china': 156,
+    'pakistan': 586,
+    'sri_lanka': 144,
+}
+
+# Destination code of rows covering all destinations in the overlap table
+ALL_DESTINATIONS = 0
+
+
+def share_overlap(shares: sparse.csr_matrix, reference: np.ndarray) -> np.ndarray:
+    """
+    Sum of min(s_cp, r_p) over products for every row c of a share matrix
+
+    This is the Finger-Kreinin index of each row against the reference shares;
+    only the nonzero entries of the share matrix are visited.
+
+    Args:
+        shares: Row-normalized share matrix (rows x products)
+        reference: Reference shares over products
+
+    Returns:
+        Index (0-1) per row
+    """
+    rows = np.repeat(np.arange(shares.shape[0]), np.diff(shares.indptr))
+    overlap = np.minimum(shares.data, reference[shares.indices])
+    return np.bincount(rows, weights=overlap, minlength=shares.shape[0])
+
+
+def _row_shares(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Rows of a sparse matrix divided by their totals"""
+    totals = np.asarray(matrix.sum(axis=1)).ravel()
+    scale = np.divide(1.0, totals, out=np.zeros_like(totals), where=totals > 0)
+    return sparse.csr_matrix(sparse.diags(scale) @ matrix)
+
+
+class CompetitorOverlap:
+    """
+    Export similarity, complementarity and market overlap of Bangladesh with all exporters
+
+    For each year, with export shares s_cp of country c over HS6 products and
+    import shares m_cp:
+        - export similarity (Finger-Kreinin) FK_c = sum_p min(s_cp, s_bp)
+        - export complementarity sum_p min(s_bp, m_cp) = 1 - sum_p |s_bp - m_cp| / 2,
+          how well Bangladesh's exports match country c's imports
+        - import complementarity, the same for c's exports and Bangladesh's imports
+    and in each destination j, with shares s_cjp of c's exports to j:
+        - destination similarity sum_p min(s_cjp, s_bjp)
+        - overlap value, c's exports in the (product, destination) cells Bangladesh
+          supplies, and overlap share, c's part of all competitors' overlap value.
+    All countries are handled at once with sparse share matrices and sorted-key
+    lookups of Bangladesh's cells, and the full table is cached by data hash.
+    """
+
+    def __init__(self,
+                 trade_data: pd.DataFrame,
+                 country: int = 50,
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize competitor overlap model
+
+        Args:
+            trade_data: Trade flows with columns 't', 'i', 'j', 'k', 'v'
+            country: Country code of Bangladesh
+            cache_dir: Optional directory for the cached overlap table
+        """
+        self.trade_data = trade_data
+        self.country = country
+        self.cache_dir = cache_dir
+
+        exporters = trade_data['i'].to_numpy(dtype=np.int64)
+        importers = trade_data['j'].to_numpy(dtype=np.int64)
+        products = trade_data['k'].to_numpy(dtype=np.int64)
+        years = trade_data['t'].to_numpy(dtype=np.int64)
+
+        self.countries = np.unique(np.concatenate([exporters, importers]))
+        self.products = np.unique(products)
+        self.years = np.unique(years).tolist()
+        if country not in self.countries:
+            raise ValueError(f"Country {country} does not appear in the trade data")
+        self.country_row = int(np.searchsorted(self.countries, country))
+
+        # Flows sorted by year so each year is one contiguous slice
+        exporter_rows = np.searchsorted(self.countries, exporters)
+        importer_rows = np.searchsorted(self.countries, importers)
+        columns = np.searchsorted(self.products, products)
+        values = trade_data['v'].to_numpy(dtype=float)
+        order = np.argsort(years, kind='stable')
+        bounds = np.append(np.searchsorted(years[order], self.years), len(order))
+        self._year_flows = {
+            year: tuple(array[order[start:stop]] for array in (exporter_rows, importer_rows, columns, values))
+            for year, start, stop in zip(self.years, bounds[:-1], bounds[1:])
+        }
+
+        self._similarity = {}
+        self._destination_similarity = {}
+        self._table = None
+
+    def resolve_year(self, year: Optional[int]) -> int:
+        """Resolve a year (latest if None) and check it is in the data"""
+        if year is None:
+            year = self.years[-1]
+        if year not in self._year_flows:
+            raise ValueError(f"No trade data for year {year}")
+        return year
+
+    def cache_key(self) -> str:
+        """Hash of the trade data and the reference country"""
+        digest = hashlib.sha1(pd.util.hash_pandas_object(
+            self.trade_data[['t', 'i', 'j', 'k', 'v']], index=False).to_numpy().tobytes())
+        digest.update(str(self.country).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def similarity(self, year: Optional[int] = None) -> pd.DataFrame:
+        """
+        Similarity and complementarity of every country with Bangladesh over all destinations
+
+        Args:
+            year: Year (latest if None)
+
+        Returns:
+            DataFrame indexed by country code with exports, export_similarity,
+            export_complementarity, import_complementarity, overlap_value and overlap_share
+        """
+        year = self.resolve_year(year)
+        if year in self._similarity:
+            return self._similarity[year]
+
+        exporter_rows, importer_rows, columns, values = self._year_flows[year]
+        shape = (len(self.countries), len(self.products))
+        exports = sparse.csr_matrix((values, (exporter_rows, columns)), shape=shape)
+        imports = sparse.csr_matrix((values, (importer_rows, columns)), shape=shape)
+        export_shares, import_shares = _row_shares(exports), _row_shares(imports)
+        own_exports = export_shares[self.country_row].toarray().ravel()
+        own_imports = import_shares[self.country_row].toarray().ravel()
+
+        destinations = self.destination_similarity(year)
+        overlap_value = destinations.groupby(level='country')['overlap_value'].sum()
+        overlap_value = overlap_value.reindex(self.countries, fill_value=0.0).to_numpy()
+        overlap_total = overlap_value.sum()
+
+        similarity = pd.DataFrame({
+            'exports': np.asarray(exports.sum(axis=1)).ravel(),
+            'export_similarity': share_overlap(export_shares, own_exports),
+            'export_complementarity': share_overlap(import_shares, own_exports),
+            'import_complementarity': share_overlap(export_shares, own_imports),
+            'overlap_value': overlap_value,
+            'overlap_share': overlap_value / overlap_total if overlap_total > 0 else overlap_value,
+        }, index=pd.Index(self.countries, name='country'))
+        similarity = similarity.drop(index=self.country)
+        self._similarity[year] = similarity
+        return similarity
+
+    def destination_similarity(self, year: Optional[int] = None) -> pd.DataFrame:
+        """
+        Similarity and market overlap of every exporter with Bangladesh in each destination
+
+        Args:
+            year: Year (latest if None)
+
+        Returns:
+            DataFrame indexed by (country, destination) with export_similarity,
+            overlap_value and overlap_share, for pairs overlapping Bangladesh's cells
+        """
+        year = self.resolve_year(year)
+        if year in self._destination_similarity:
+            return self._destination_similarity[year]
+
+        exporter_rows, importer_rows, columns, values = self._year_flows[year]
+        n_countries, n_products = len(self.countries), len(self.products)
+
+        # Shares of each exporter's exports to each destination
+        pairs, pair_index = np.unique(exporter_rows * n_countries + importer_rows, return_inverse=True)
+        pair_totals = np.bincount(pair_index, weights=values, minlength=len(pairs))
+        shares = values / pair_totals[pair_index]
+
+        # Bangladesh's (destination, product) cells and shares, as a sorted key array
+        cell_keys = importer_rows * n_products + columns
+        own = exporter_rows == self.country_row
+        own_cells, own_index = np.unique(cell_keys[own], return_inverse=True)
+        own_shares = np.bincount(own_index, weights=shares[own], minlength=len(own_cells))
+
+        others = np.flatnonzero(~own)
+        if len(own_cells):
+            position = np.minimum(np.searchsorted(own_cells, cell_keys[others]), len(own_cells) - 1)
+            hit = own_cells[position] == cell_keys[others]
+            matched, matched_shares = others[hit], own_shares[position[hit]]
+        else:
+            matched, matched_shares = others[:0], shares[:0]
+
+        overlap_pairs, overlap_index = np.unique(pair_index[matched], return_inverse=True)
+        similarity = np.bincount(overlap_index, weights=np.minimum(shares[matched], matched_shares),
+                                 minlength=len(overlap_pairs))
+        overlap_value = np.bincount(overlap_index, weights=values[matched], minlength=len(overlap_pairs))
+
+        destination_rows = pairs[overlap_pairs] % n_countries
+        destination_totals = np.bincount(destination_rows, weights=overlap_value, minlength=n_countries)
+        index = pd.MultiIndex.from_arrays([self.countries[pairs[overlap_pairs] // n_countries],
+                                           self.countries[destination_rows]], names=['country', 'destination'])
+        destinations = pd.DataFrame({
+            'export_similarity': similarity,
+            'overlap_value': overlap_value,
+            'overlap_share': overlap_value / destination_totals[destination_rows],
+        }, index=index)
+        self._destination_similarity[year] = destinations
+        return destinations
+
+    def table(self) -> pd.DataFrame:
+        """
+        Competitor overlap table over all years (cached in cache_dir)
+
+        Returns:
+            Long DataFrame with year, country, destination (ALL_DESTINATIONS for the
+            all-destination rows) and the similarity and overlap measures
+        """
+        if self._table is not None:
+            return self._table
+
+        cache_file = (os.path.join(self.cache_dir, f"competitor_overlap_{self.cache_key()}.csv")
+                      if self.cache_dir else None)
+        if cache_file is not None and os.path.exists(cache_file):
+            self._table = pd.read_csv(cache_file)
+            return self._table
+
+        frames = []
+        for year in self.years:
+            overall = self.similarity(year).reset_index()
+            overall.insert(1, 'destination', ALL_DESTINATIONS)
+            by_destination = self.destination_similarity(year).reset_index()
+            for frame in (overall, by_destination):
+                frame.insert(0, 'year', year)
+                frames.append(frame)
+        self._table = pd.concat(frames, ignore_index=True)
+
+        if cache_file is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._table.to_csv(cache_file, index=False)
+        return self._table
+
+
+def competitor_weights(table: pd.DataFrame,
+                       competitors: Optional[List[str]] = None,
+                       measure: str = 'overlap_share',
+                       year: Optional[int] = None,
+                       codes: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+    """
+    Relative competitor weights from the competitor overlap table
+
+    Weights are a measure over all destinations, scaled to average one across
+    the competitors, so replacing unit weights keeps the overall scale.
+
+    Args:
+        table: Competitor overlap table (CompetitorOverlap.table or its cached CSV)
+        competitors: Competitor names (all of COMPETITOR_CODES if None)
+        measure: Column to weight by
+        year: Year (latest in the table if None)
+        codes: Country code by competitor name (COMPETITOR_CODES if None)
+
+    Returns:
+        Weight by competitor name (zero for competitors absent from the table)
+    """
+    codes = {**COMPETITOR_CODES, **(codes or {})}
+    competitors = list(competitors) if competitors is not None else list(COMPETITOR_CODES)
+    unknown = [name for name in competitors if name not in codes]
+    if unknown:
+        raise ValueError(f"No country code for competitors: {unknown}")
+
+    overall = table[table['destination'] == ALL_DESTINATIONS]
+    year = overall['year'].max() if year is None else year
+    values = overall[overall['year'] == year].set_index('country')[measure]
+    raw = np.array([float(values.get(codes[name], 0.0)) for name in competitors])
+    weights = raw / raw.mean() if raw.mean() > 0 else np.ones(len(competitors))
+    return dict(zip(competitors, weights.tolist()))
@@ -1,12 +1,14 @@
 import pandas as pd
 import numpy as np
-import random
 import os
 import sys
 
 # Add project root to path to ensure imports work
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from models.armington import hs6_sectors
+from models.diversification import DiversificationAnalysis
+
 # Now import our modules
 try:
     # Import from project root instead of data directory
@@ -63,6 +65,9 @@ class StructuralTransformationModel:
             print(f"Warning: Could not initialize sector mapper: {e}")
             print("Will rely on synthetic data")
         
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Initialize metrics storage
         self.yearly_metrics = {
             'export_diversity_hhi': [],
@@ -72,6 +77,23 @@ class StructuralTransformationModel:
             'industrial_policy_effectiveness': 0.5,  # Initial policy effectiveness (0-1)
         }
         
+        # Annual base growth of the capability index (calibrated from ECI data if available)
+        self.base_capability_development = 0.008
+        
+        # Data-driven export HHI by year (see set_diversification_path) and the sector
+        # HHI of the first simulated year beyond it, which anchors later years
+        self.diversification_path = None
+        self.diversification_anchor = None
+        diversification_config = config.get('diversification_data') or {}
+        if diversification_config.get('trade_data'):
+            try:
+                diversification = DiversificationAnalysis(cache_dir=diversification_config.get('cache_dir'))
+                diversification.fit(diversification_config['trade_data'])
+                self.set_diversification_path(diversification, diversification_config.get('level', 'hs6_partner'))
+            except Exception as e:
+                print(f"Warning: Could not load diversification data: {e}")
+                print("Using the sector HHI instead.")
+        
         # Initial sector data
         self.export_sectors = config.get('export_sectors', {
             'rmg': {'value': 38.0, 'complexity': 0.3, 'value_chain_position': 0.25},
@@ -206,7 +228,7 @@ class StructuralTransformationModel:
             vcp_effect = data['value_chain_position'] * 0.04
             
             # Random component
-            random_effect = random.uniform(-0.04, 0.08)
+            random_effect = self.rng.uniform(-0.04, 0.08)
             
             # Calculate total growth rate
             growth_rate = base_growth + capability_effect + vcp_effect + random_effect
@@ -246,6 +268,17 @@ class StructuralTransformationModel:
             sector_shares[sector] = share
             hhi += share ** 2
         
+        # With a data-driven path, use the observed HHI and scale it by the sector HHI beyond the data
+        if self.diversification_path is not None:
+            sector_hhi = hhi
+            if year in self.diversification_path.index:
+                hhi = float(self.diversification_path[year])
+            else:
+                if self.diversification_anchor is None:
+                    self.diversification_anchor = sector_hhi
+                hhi = float(self.diversification_path.iloc[-1]) * sector_hhi / self.diversification_anchor
+            self.yearly_metrics.setdefault('export_diversity_sector_hhi', []).append(sector_hhi)
+        
         # Store results
         self.yearly_metrics['export_diversity_hhi'].append(hhi)
         self.yearly_metrics['export_diversity_sectors'].append(sector_shares)
@@ -284,7 +317,7 @@ class StructuralTransformationModel:
             complexity_effect = data['complexity'] * 0.01
             
             # Random component
-            random_effect = random.uniform(-0.005, 0.015)
+            random_effect = self.rng.uniform(-0.005, 0.015)
             
             # Calculate total upgrade
             total_upgrade = base_upgrade + capability_effect + complexity_effect + random_effect
@@ -323,7 +356,7 @@ class StructuralTransformationModel:
             float: Updated capability index
         """
         # Base development rate
-        base_development = 0.008
+        base_development = self.base_capability_development
         
         # Current value chain effect (feedback loop - higher positions build capabilities)
         vcp_values = [data['value_chain_position'] for data in self.export_sectors.values()]
@@ -333,7 +366,7 @@ class StructuralTransformationModel:
         policy_effect = self.yearly_metrics['industrial_policy_effectiveness'] * 0.01
         
         # Random component
-        random_effect = random.uniform(-0.005, 0.01)
+        random_effect = self.rng.uniform(-0.005, 0.01)
         
         # Calculate total capability improvement
         total_improvement = base_development + vcp_effect + policy_effect + random_effect
@@ -366,7 +399,7 @@ class StructuralTransformationModel:
         policy_cycle = 0.02 * np.sin((year - 2025) * 0.5)
         
         # Random component (political factors, implementation challenges)
-        random_effect = random.uniform(-0.04, 0.04)
+        random_effect = self.rng.uniform(-0.04, 0.04)
         
         # Calculate total policy change
         total_change = base_improvement + policy_cycle + random_effect
@@ -387,3 +420,124 @@ class StructuralTransformationModel:
         print(f"Year {year}: Industrial Policy Effectiveness = {new_effectiveness:.4f} ({regime_type})")
         
         return new_effectiveness
+
+    def benchmark_rca(self, rca_engine, year=None, country=50):
+        """
+        Benchmark sector comparative advantage against all exporting countries.
+        
+        Sector RCA is computed from the HS6 export matrix aggregated to model sectors,
+        and Bangladesh is ranked among all countries in each sector.
+        
+        Args:
+            rca_engine (RCAEngine): RCA engine built from trade data
+            year (int, optional): Year to benchmark (latest year in the data if None)
+            country (int): Country code of Bangladesh
+            
+        Returns:
+            dict: RCA, world rank and number of exporters by sector
+        """
+        sectors, sector_rca = rca_engine.group_rca(hs6_sectors(rca_engine.products), year)
+        sector_rca = sector_rca.toarray()
+        row = rca_engine.country_row(country)
+        
+        benchmarks = {}
+        for column, sector in enumerate(sectors):
+            exporters = sector_rca[:, column] > 0
+            rca = sector_rca[row, column]
+            benchmarks[sector] = {
+                'rca': float(rca),
+                'world_rank': int((sector_rca[exporters, column] > rca).sum() + 1) if rca > 0 else None,
+                'exporters': int(exporters.sum()),
+            }
+            if sector in self.export_sectors:
+                self.export_sectors[sector]['rca'] = float(rca)
+        
+        self.yearly_metrics['rca_benchmarks'] = benchmarks
+        return benchmarks
+
+    def calibrate_capability(self, complexity_engine, country=50):
+        """
+        Seed and calibrate the capability index from economic complexity data.
+        
+        The capability index is set to Bangladesh's ECI percentile among all ranked
+        countries in the latest year, and the base development rate to the average
+        annual change of that percentile over the years in the data.
+        
+        Args:
+            complexity_engine (ComplexityEngine): Complexity engine built from trade data
+            country (int): Country code of Bangladesh
+            
+        Returns:
+            dict: ECI percentiles by year, seeded capability index and base development rate
+        """
+        percentiles = complexity_engine.capability_percentiles(country).dropna()
+        if percentiles.empty:
+            print("Warning: Country is not ranked in the complexity data; capability index unchanged")
+            return {}
+        
+        self.yearly_metrics['capability_index'] = min(0.95, max(0.05, float(percentiles.iloc[-1])))
+        if len(percentiles) > 1:
+            years = np.asarray(percentiles.index, dtype=float)
+            trend = np.polyfit(years, percentiles.to_numpy(), 1)[0]
+            self.base_capability_development = min(0.03, max(0.0, float(trend)))
+        
+        eci = complexity_engine.complexity()['eci']
+        self.yearly_metrics['eci'] = float(eci.get(country, np.nan))
+        
+        return {
+            'eci_percentiles': percentiles.to_dict(),
+            'capability_index': self.yearly_metrics['capability_index'],
+            'base_capability_development': self.base_capability_development,
+        }
+    
+    def record_export_margins(self, margins):
+        """
+        Record extensive and intensive export margins from trade data for reporting.
+        
+        Args:
+            margins (pd.DataFrame): Output of models.margins.export_margins
+            
+        Returns:
+            dict: Cumulative margins over all years and the latest year's margins
+        """
+        if margins.empty:
+            return {}
+        
+        columns = ['change', 'entry_value', 'exit_value', 'intensive_margin', 'extensive_margin',
+                   'new_product_value', 'new_market_value', 'dropped_product_value', 'lost_market_value']
+        cumulative = {column: float(margins[column].sum()) for column in columns}
+        if cumulative['change'] != 0:
+            cumulative['extensive_share'] = cumulative['extensive_margin'] / cumulative['change']
+        latest = {key: float(value) for key, value in margins.iloc[-1].items()}
+        
+        summary = {
+            'first_year': int(margins['start_year'].iloc[0]),
+            'last_year': int(margins.index[-1]),
+            'cumulative': cumulative,
+            'latest': latest,
+            'average_entry_rate': float(margins['entry_rate'].mean()),
+            'average_exit_rate': float(margins['exit_rate'].mean()),
+        }
+        self.yearly_metrics['export_margins'] = summary
+        return summary
+    
+    def set_diversification_path(self, diversification, level='hs6_partner'):
+        """
+        Use the export HHI observed in trade data instead of the ten-sector HHI.
+        
+        Years in the data take the observed HHI; later years continue from the last
+        observed value, moving in proportion to the simulated sector HHI.
+        
+        Args:
+            diversification (DiversificationAnalysis): Diversification analysis fitted to trade data
+            level (str): Product-market level of the HHI (e.g. 'hs6_partner', 'hs4')
+            
+        Returns:
+            pd.Series: Observed HHI path by year
+        """
+        path = diversification.path(level, 'hhi').sort_index()
+        self.diversification_path = path if not path.empty else None
+        self.diversification_anchor = None
+        self.yearly_metrics['diversification_indices'] = (
+            diversification.table().xs(level, level='level').to_dict(orient='index'))
+        return path
@@ -4,6 +4,7 @@ Trade policy model for Bangladesh trade simulation.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
+from models.policy_events import PolicyEventScheduler, policy_events_from_config
 
 
 class TradePolicyModel:
@@ -24,6 +25,14 @@ class TradePolicyModel:
         self.ldc_graduation = config.get('ldc_graduation', {})
         self.fta_implementation = config.get('fta_implementation', {})
         self.domestic_policy = config.get('domestic_policy', {})
+        self.config = config
+        
+        # Proposed FTAs indexed by earliest eligible year, with sampled implementation times
+        self.fta_scheduler = PolicyEventScheduler(
+            [event for event in policy_events_from_config(config) if event['kind'] == 'fta'])
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
         
         # Track policy implementation status
         self.policies = {
@@ -33,9 +42,55 @@ class TradePolicyModel:
             'economic_zones_operational': 0,
         }
         
+        # Line-level graduation tariffs by sector and market (see use_line_level_tariffs),
+        # and the effective rates each sector faced in the last simulated year
+        self.preferential_access = None
+        self.sector_tariff_rates = {}
+        
         # Initialize historical data
         self.historical_policy_impacts = {}
     
+    def use_line_level_tariffs(self, engine) -> Dict[str, Any]:
+        """
+        Price LDC graduation with line-level tariffs of the HS6 export matrix
+        
+        Args:
+            engine: ArmingtonTariffEngine holding the HS6 x destination export matrix
+            
+        Returns:
+            Armington scenario results of the 'line_level_tariffs.ldc_graduation' rates
+        """
+        self.preferential_access = PreferentialAccessModel(self.config)
+        return self.preferential_access.use_line_level_tariffs(engine)
+    
+    def sector_tariff_changes(self, year_index, simulation_year, sectors) -> Dict[str, Dict[str, float]]:
+        """
+        Change in the effective tariff each export sector faces by market since the previous year
+        
+        Rates before graduation are zero (duty-free LDC access); afterwards they are the
+        line-level rates, adjusted for GSP+ and preference utilization.
+        
+        Args:
+            year_index: Year index from simulation start
+            simulation_year: Actual calendar year
+            sectors: Export sector names
+            
+        Returns:
+            Tariff changes by sector and market (empty if line-level tariffs are not in use)
+        """
+        if self.preferential_access is None:
+            return {}
+        
+        # The access model draws GSP+ qualification from this model's stream
+        self.preferential_access.rng = self.rng
+        changes = {}
+        for sector in sectors:
+            rates = self.preferential_access.simulate_market_access(year_index, simulation_year, sector, {})['tariff_rates']
+            previous = self.sector_tariff_rates.get(sector, {})
+            changes[sector] = {market: rate - previous.get(market, 0.0) for market, rate in rates.items()}
+            self.sector_tariff_rates[sector] = rates
+        return changes
+    
     def implement_policy_change(self, 
                                year_index: int,
                                simulation_year: int,
@@ -107,31 +162,30 @@ class TradePolicyModel:
             
             # Check if this is a proposed FTA
             if fta_name == 'proposed_ftas':
-                for country, proposal in fta_config.items():
-                    if simulation_year >= proposal.get('year', 2030):
-                        # Probabilistic implementation based on stated probability
-                        implementation_probability = proposal.get('probability', 0.5) * enforcement_quality
-                        if np.random.random() < implementation_probability and country not in self.policies['active_ftas']:
-                            # Implement new FTA
-                            self.policies['active_ftas'][country] = {
-                                'implementation_level': 0.3,  # Initial implementation level
-                                'year_implemented': simulation_year,
-                            }
-                            
-                            # Calculate initial impact
-                            tariff_reduction = 0.3  # Initial tariff reduction
-                            market_access_impact = tariff_reduction * 0.5
-                            
-                            # Update policy impact
-                            policy_impact.update({
-                                'implemented': True,
-                                'implementation_level': 0.3,
-                                'fta_partner': country,
-                                'tariff_changes': {country: -tariff_reduction},
-                                'market_access_impact': market_access_impact,
-                                'trade_creation': market_access_impact * 1.2,
-                                'trade_diversion': market_access_impact * 0.3,
-                            })
+                # Probabilistic implementation based on stated probability, for the proposals that fire this year
+                for event in self.fta_scheduler.advance(simulation_year, enforcement_quality, self.rng):
+                    country = event['name']
+                    if country not in self.policies['active_ftas']:
+                        # Implement new FTA
+                        self.policies['active_ftas'][country] = {
+                            'implementation_level': 0.3,  # Initial implementation level
+                            'year_implemented': simulation_year,
+                        }
+                        
+                        # Calculate initial impact
+                        tariff_reduction = 0.3  # Initial tariff reduction
+                        market_access_impact = tariff_reduction * 0.5
+                        
+                        # Update policy impact
+                        policy_impact.update({
+                            'implemented': True,
+                            'implementation_level': 0.3,
+                            'fta_partner': country,
+                            'tariff_changes': {country: -tariff_reduction},
+                            'market_access_impact': market_access_impact,
+                            'trade_creation': market_access_impact * 1.2,
+                            'trade_diversion': market_access_impact * 0.3,
+                        })
             
             # Existing FTA implementation progress
             elif fta_name in ['safta', 'bimstec', 'rcep_accession']:
@@ -286,6 +340,29 @@ class TradePolicyModel:
             'ldc_benefits_active': not self.policies['ldc_graduation_implemented'],
             'active_ftas': list(self.policies['active_ftas'].keys()),
         }
+    
+    def sample_policy_timelines(self,
+                                n_timelines: int,
+                                start_year: int,
+                                end_year: int,
+                                enforcement_quality: Any = 1.0,
+                                seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Sample LDC graduation, FTA and RCEP accession years for many hypothetical timelines
+        
+        Args:
+            n_timelines: Number of timelines
+            start_year: First simulated year
+            end_year: Last simulated year
+            enforcement_quality: Enforcement quality (0-1), scalar or per-year array
+            seed: Random seed
+            
+        Returns:
+            Dict with event names, firing years per timeline and per-event summary
+            (see PolicyEventScheduler.sample_timelines)
+        """
+        scheduler = PolicyEventScheduler(policy_events_from_config(self.config))
+        return scheduler.sample_timelines(n_timelines, start_year, end_year, enforcement_quality, seed)
 
 
 class PreferentialAccessModel:
@@ -330,9 +407,47 @@ class PreferentialAccessModel:
             'agro_products': 0.8,
         }
         
+        # Line-level graduation scenario, and the resulting trade-weighted tariffs by
+        # sector and market once computed with use_line_level_tariffs
+        self.line_level_config = config.get('line_level_tariffs', {})
+        self.line_level_tariffs = None
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
         self.market_access_history = {}
     
+    def use_line_level_tariffs(self, engine, rates_before=None, rates_after=None) -> Dict[str, Any]:
+        """
+        Replace the uniform graduation tariff increases with line-level tariffs
+        
+        Args:
+            engine: ArmingtonTariffEngine holding the HS6 x destination export matrix
+            rates_before: Rates by market before graduation (from 'line_level_tariffs.ldc_graduation' if None)
+            rates_after: Rates by market after graduation (from 'line_level_tariffs.ldc_graduation' if None)
+            
+        Returns:
+            Armington scenario results
+        """
+        scenario_config = self.line_level_config.get('ldc_graduation', {})
+        if rates_before is None:
+            rates_before = scenario_config.get('before', {})
+        if rates_after is None:
+            rates_after = scenario_config.get('after', {})
+        
+        scenario = engine.simulate(rates_before, rates_after)
+        
+        # Only markets in the scenario override the uniform increases; the engine's sectors
+        # are renamed to the simulation's export sectors ('sector_names')
+        sector_names = self.line_level_config.get('sector_names', {'agro_processing': 'agro_products'})
+        self.line_level_tariffs = {
+            sector_names.get(sector, sector): {market: rate for market, rate in rates.items() if market in rates_after}
+            for sector, rates in scenario['tariff_rates'].items()
+        }
+        
+        return scenario
+    
     def simulate_market_access(self, year_index, simulation_year, sector, country_policies):
         """
         Simulate preferential market access for a sector in a given year
@@ -362,9 +477,11 @@ class PreferentialAccessModel:
             # LDC graduation has occurred
             results['ldc_benefits_active'] = False
             
-            # Calculate base tariffs by destination
+            # Calculate base tariffs by destination, line-level where available
             for country, increase in self.tariff_increases.items():
                 results['tariff_rates'][country] = increase
+            if self.line_level_tariffs is not None:
+                results['tariff_rates'].update(self.line_level_tariffs.get(sector, {}))
             
             # Check for GSP+ qualification
             if simulation_year >= self.gsp_plus_qualification['implementation_year']:
@@ -373,9 +490,9 @@ class PreferentialAccessModel:
                 gsp_probability = self.gsp_plus_qualification['base_probability'] * qualification_score
                 
                 # Determine if GSP+ is active
-                results['gsp_plus_active'] = np.random.random() < gsp_probability
+                results['gsp_plus_active'] = self.rng.random() < gsp_probability
                 
-                if results['gsp_plus_active']:
+                if results['gsp_plus_active'] and 'eu' in results['tariff_rates']:
                     # Adjust EU tariffs under GSP+
                     results['tariff_rates']['eu'] *= 0.3  # 70% reduction in tariffs under GSP+
         else:
@@ -432,6 +549,13 @@ class FreeTradeAgreementModel:
         # RCEP accession
         self.rcep_accession = self.fta_config.get('rcep_accession', {})
         
+        # Proposed agreements and RCEP accession indexed by earliest eligible year
+        self.event_scheduler = PolicyEventScheduler(
+            [event for event in policy_events_from_config(config) if event['kind'] in ('fta', 'rcep_accession')])
+        
+        # Random generator of the model (the simulation engine assigns its stream)
+        self.rng = np.random.default_rng(np.random.randint(2**31 - 1))
+        
         # Historical data
         self.fta_history = {}
     
@@ -480,31 +604,29 @@ class FreeTradeAgreementModel:
                 'sensitive_list_coverage': details['sensitive_list_coverage'],
             }
         
+        # Proposed agreements and RCEP accession that fire this year
+        fired = self.event_scheduler.advance(simulation_year, enforcement_quality, self.rng)
+        
         # Check for new agreement implementation
-        for country, proposal in self.proposed_agreements.items():
-            if simulation_year >= proposal.get('year', 2030) and country not in self.active_agreements:
-                # Probability of implementation
-                implementation_probability = proposal.get('probability', 0.5) * enforcement_quality
+        for event in fired:
+            country = event['name']
+            if event['kind'] == 'fta' and country not in self.active_agreements:
+                # New agreement activated
+                self.active_agreements[country] = {
+                    'implementation_level': 0.2,  # Initial implementation
+                    'sensitive_list_coverage': 0.4,  # Initial sensitive list is conservative
+                }
                 
-                if np.random.random() < implementation_probability:
-                    # New agreement activated
-                    self.active_agreements[country] = {
-                        'implementation_level': 0.2,  # Initial implementation
-                        'sensitive_list_coverage': 0.4,  # Initial sensitive list is conservative
-                    }
-                    
-                    results['new_agreements'].append(country)
-                    results['active_agreements'][country] = self.active_agreements[country]
-                    
-                    # Initial trade creation and diversion
-                    results['trade_creation'] += 0.02  # 2% trade creation from new agreement
-                    results['trade_diversion'] += 0.01  # 1% trade diversion from new agreement
+                results['new_agreements'].append(country)
+                results['active_agreements'][country] = self.active_agreements[country]
+                
+                # Initial trade creation and diversion
+                results['trade_creation'] += 0.02  # 2% trade creation from new agreement
+                results['trade_diversion'] += 0.01  # 1% trade diversion from new agreement
         
         # Check for RCEP accession
-        if simulation_year >= self.rcep_accession.get('year', 2032) and 'rcep' not in self.active_agreements:
-            accession_probability = self.rcep_accession.get('probability', 0.4) * enforcement_quality
-            
-            if np.random.random() < accession_probability:
+        for event in fired:
+            if event['kind'] == 'rcep_accession' and 'rcep' not in self.active_agreements:
                 # RCEP accession successful
                 self.active_agreements['rcep'] = {
                     'implementation_level': 0.1,  # Initial implementation
@@ -0,0 +1,346 @@
+"""
+Unit value and quality ladder model for Bangladesh trade simulation.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any, Optional, Iterable, Union
+
+from models.margins import PARTNER_BASE
+
+# Sketch keys are (year * GROUP_BASE + HS6) * BIN_BASE + bin
+GROUP_BASE = 10 ** 6
+BIN_BASE = 1000
+
+
+def trade_chunks(source: Union[pd.DataFrame, str, Iterable[pd.DataFrame]],
+                 columns: Optional[List[str]] = None,
+                 chunksize: int = 1_000_000) -> Iterable[pd.DataFrame]:
+    """
+    Trade flows as a sequence of chunks
+
+    Args:
+        source: A DataFrame, a CSV path (read in chunks) or an iterable of DataFrame chunks
+        columns: Columns to read from a CSV path (all if None)
+        chunksize: Rows per chunk when reading a CSV path
+
+    Returns:
+        Iterable of DataFrame chunks
+    """
+    if isinstance(source, pd.DataFrame):
+        return [source]
+    if isinstance(source, str):
+        return pd.read_csv(source, usecols=columns, chunksize=chunksize)
+    return source
+
+
+def _group_keys(years: np.ndarray, products: np.ndarray) -> np.ndarray:
+    """Integer (year, HS6) keys"""
+    return years.astype(np.int64) * GROUP_BASE + products.astype(np.int64)
+
+
+class UnitValueEngine:
+    """
+    Unit values (value / quantity) and Bangladesh's position on each product's quality ladder
+
+    Every exporter x destination flow with a positive quantity is one unit value
+    observation of its (year, HS6) product. The world distribution of log10 unit
+    values of each product is kept as a mergeable histogram sketch on a fixed
+    log grid (bins_per_decade bins per factor of ten), stored sparsely as
+    sorted integer keys with counts, so data can be streamed in chunks and the
+    full world dataset never has to be in memory. Quantiles and percentiles are
+    read from the sketch by interpolating within bins, which bounds their error
+    by one bin width. Flows of Bangladesh are kept in full.
+
+    Outliers are unit values outside [Q1 - k IQR, Q3 + k IQR] of log10 unit
+    values of their product and year (k = trim_iqr). The quality ladder length
+    of a product is log10(p90 / p10) of its trimmed unit values.
+    """
+
+    def __init__(self,
+                 exporter: int = 50,
+                 bins_per_decade: int = 50,
+                 log_range: Tuple[float, float] = (-4.0, 8.0),
+                 trim_iqr: float = 3.0):
+        """
+        Initialize unit value engine
+
+        Args:
+            exporter: Country code of Bangladesh
+            bins_per_decade: Sketch resolution (bins per factor of ten in unit value)
+            log_range: Range of log10 unit values covered by the sketch; values
+                outside are counted in the edge bins
+            trim_iqr: Outlier fence in interquartile ranges of log10 unit values
+        """
+        self.exporter = exporter
+        self.bins_per_decade = bins_per_decade
+        self.log_min, self.log_max = log_range
+        self.n_bins = int(round((self.log_max - self.log_min) * bins_per_decade))
+        if self.n_bins >= BIN_BASE:
+            raise ValueError(f"Sketch has {self.n_bins} bins; at most {BIN_BASE - 1} are supported")
+        self.trim_iqr = trim_iqr
+
+        self.sketch_keys = np.zeros(0, dtype=np.int64)
+        self.sketch_counts = np.zeros(0, dtype=float)
+        self._exporter_chunks = []
+        self._exporter_flows = None
+        self._statistics = None
+
+    def _bins(self, log_values: np.ndarray) -> np.ndarray:
+        """Sketch bin of log10 unit values"""
+        bins = np.floor((log_values - self.log_min) * self.bins_per_decade).astype(np.int64)
+        return np.clip(bins, 0, self.n_bins - 1)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of trade flows to the sketches
+
+        Args:
+            chunk: Trade flows with columns 't', 'i', 'j', 'k', 'v', 'q'
+        """
+        values = chunk['v'].to_numpy(dtype=float)
+        quantities = chunk['q'].to_numpy(dtype=float)
+        valid = (values > 0) & (quantities > 0)
+
+        log_values = np.log10(values[valid] / quantities[valid])
+        groups = _group_keys(chunk['t'].to_numpy()[valid], chunk['k'].to_numpy()[valid])
+        keys, counts = np.unique(groups * BIN_BASE + self._bins(log_values), return_counts=True)
+
+        # Merge with the sketch: both key arrays are sorted and unique
+        merged, inverse = np.unique(np.concatenate([self.sketch_keys, keys]), return_inverse=True)
+        self.sketch_counts = np.bincount(inverse, weights=np.concatenate([self.sketch_counts, counts]),
+                                         minlength=len(merged))
+        self.sketch_keys = merged
+
+        own = chunk['i'].to_numpy() == self.exporter
+        if own.any():
+            self._exporter_chunks.append(chunk.loc[own, ['t', 'j', 'k', 'v', 'q']])
+        self._exporter_flows = None
+        self._statistics = None
+
+    def fit(self,
+            source: Union[pd.DataFrame, str, Iterable[pd.DataFrame]],
+            chunksize: int = 1_000_000) -> 'UnitValueEngine':
+        """
+        Build the sketches from trade data
+
+        Args:
+            source: Trade flows as a DataFrame, a CSV path (read in chunks) or an
+                iterable of DataFrame chunks
+            chunksize: Rows per chunk when reading a CSV path
+
+        Returns:
+            The engine
+        """
+        for chunk in trade_chunks(source, ['t', 'i', 'j', 'k', 'v', 'q'], chunksize):
+            self.update(chunk)
+        return self
+
+    @property
+    def exporter_flows(self) -> pd.DataFrame:
+        """Flows of the exporter with unit values and outlier flags"""
+        if self._exporter_flows is None:
+            flows = (pd.concat(self._exporter_chunks, ignore_index=True) if self._exporter_chunks
+                     else pd.DataFrame(columns=['t', 'j', 'k', 'v', 'q']))
+            flows = flows.groupby(['t', 'k', 'j'], as_index=False)[['v', 'q']].sum(min_count=1)
+            self._exporter_flows = self.flag_outliers(flows)
+        return self._exporter_flows
+
+    def _interpolate(self, groups: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        """Log10 unit value at a cumulative probability for each group (NaN if not sketched)"""
+        sketch_groups = self.sketch_keys // BIN_BASE
+        cumulative = np.cumsum(self.sketch_counts)
+        starts = np.searchsorted(sketch_groups, groups, side='left')
+        stops = np.searchsorted(sketch_groups, groups, side='right')
+        found = stops > starts
+
+        before = np.where(starts > 0, cumulative[np.maximum(starts - 1, 0)], 0.0)
+        totals = np.where(found, cumulative[np.maximum(stops - 1, 0)] - before, 0.0)
+        targets = before + probabilities * totals
+
+        # First bin of the group whose cumulative count reaches the target
+        index = np.clip(np.searchsorted(cumulative, targets, side='left'), starts, np.maximum(stops - 1, starts))
+        index = np.minimum(index, len(cumulative) - 1)
+        counts = self.sketch_counts[index]
+        fraction = np.clip((targets - (cumulative[index] - counts)) / np.where(counts > 0, counts, 1), 0, 1)
+        bins = self.sketch_keys[index] % BIN_BASE
+        log_values = self.log_min + (bins + fraction) / self.bins_per_decade
+        return np.where(found, log_values, np.nan)
+
+    def _cdf(self, groups: np.ndarray, log_values: np.ndarray) -> np.ndarray:
+        """Share of each group's observations below a log10 unit value (NaN if not sketched)"""
+        sketch_groups = self.sketch_keys // BIN_BASE
+        cumulative = np.concatenate([[0.0], np.cumsum(self.sketch_counts)])
+        starts = np.searchsorted(sketch_groups, groups, side='left')
+        stops = np.searchsorted(sketch_groups, groups, side='right')
+
+        position = (np.clip(np.nan_to_num(log_values), self.log_min, self.log_max) - self.log_min) * self.bins_per_decade
+        bins = np.clip(np.floor(position).astype(np.int64), 0, self.n_bins - 1)
+        fraction = np.clip(position - bins, 0, 1)
+
+        # Counts in lower bins, plus the covered part of the value's own bin
+        index = np.searchsorted(self.sketch_keys, groups * BIN_BASE + bins, side='left')
+        in_bin = (index < len(self.sketch_keys)) & (self.sketch_keys[np.minimum(index, len(self.sketch_keys) - 1)]
+                                                    == groups * BIN_BASE + bins)
+        below = cumulative[index] - cumulative[starts]
+        partial = np.where(in_bin, self.sketch_counts[np.minimum(index, len(self.sketch_keys) - 1)] * fraction, 0.0)
+        totals = cumulative[stops] - cumulative[starts]
+        share = (below + partial) / np.where(totals > 0, totals, 1)
+        return np.where((totals > 0) & ~np.isnan(log_values), share, np.nan)
+
+    def statistics(self) -> pd.DataFrame:
+        """
+        Unit value distribution of every sketched product and year
+
+        Returns:
+            DataFrame indexed by (year, product) with observations, quartiles, outlier
+            fences, trimmed p10/median/p90 (unit values, not logs) and ladder_length
+        """
+        if self._statistics is not None:
+            return self._statistics
+
+        sketch_groups = self.sketch_keys // BIN_BASE
+        groups, starts = np.unique(sketch_groups, return_index=True)
+        observations = np.add.reduceat(self.sketch_counts, starts) if len(starts) else np.zeros(0)
+
+        q1 = self._interpolate(groups, np.full(len(groups), 0.25))
+        q3 = self._interpolate(groups, np.full(len(groups), 0.75))
+        lower = q1 - self.trim_iqr * (q3 - q1)
+        upper = q3 + self.trim_iqr * (q3 - q1)
+
+        # Trimmed quantiles are quantiles of the distribution between the fences
+        cdf_lower, cdf_upper = self._cdf(groups, lower), self._cdf(groups, upper)
+        trimmed = {p: self._interpolate(groups, cdf_lower + p * (cdf_upper - cdf_lower)) for p in (0.1, 0.5, 0.9)}
+
+        self._statistics = pd.DataFrame({
+            'observations': observations,
+            'q1': 10 ** q1,
+            'q3': 10 ** q3,
+            'lower_fence': 10 ** lower,
+            'upper_fence': 10 ** upper,
+            'p10': 10 ** trimmed[0.1],
+            'median': 10 ** trimmed[0.5],
+            'p90': 10 ** trimmed[0.9],
+            'ladder_length': trimmed[0.9] - trimmed[0.1],
+        }, index=pd.MultiIndex.from_arrays([groups // GROUP_BASE, groups % GROUP_BASE], names=['year', 'product']))
+        return self._statistics
+
+    def flag_outliers(self, flows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Unit values of flows and whether they are outliers of their product's distribution
+
+        Args:
+            flows: Trade flows with columns 't', 'k', 'v', 'q'
+
+        Returns:
+            Copy of flows with 'unit_value' (NaN without a positive quantity) and
+            'outlier' (True outside the fences or without a unit value)
+        """
+        flows = flows.copy()
+        values = flows['v'].to_numpy(dtype=float)
+        quantities = flows['q'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            unit_values = np.where(quantities > 0, values / quantities, np.nan)
+
+        statistics = self.statistics()
+        stat_groups = _group_keys(statistics.index.get_level_values('year').to_numpy(),
+                                  statistics.index.get_level_values('product').to_numpy())
+        groups = _group_keys(flows['t'].to_numpy(), flows['k'].to_numpy())
+        position = np.minimum(np.searchsorted(stat_groups, groups), max(len(stat_groups) - 1, 0))
+        matched = (stat_groups[position] == groups) if len(stat_groups) else np.zeros(len(groups), dtype=bool)
+        lower = np.where(matched, statistics['lower_fence'].to_numpy()[position] if len(stat_groups) else 0, np.nan)
+        upper = np.where(matched, statistics['upper_fence'].to_numpy()[position] if len(stat_groups) else 0, np.nan)
+
+        flows['unit_value'] = unit_values
+        flows['outlier'] = ~((unit_values >= lower) & (unit_values <= upper))
+        return flows
+
+    def position(self) -> pd.DataFrame:
+        """
+        Bangladesh's unit values and position on each product's quality ladder
+
+        The exporter's unit value of a product is its trimmed value over trimmed
+        quantity across destinations; its percentile is taken within the
+        product's distribution between the outlier fences.
+
+        Returns:
+            DataFrame indexed by (year, product) with value, quantity, unit_value,
+            world median, relative_unit_value, percentile and ladder_length
+        """
+        flows = self.exporter_flows
+        trimmed = flows[~flows['outlier']]
+        own = trimmed.groupby(['t', 'k'])[['v', 'q']].sum()
+        own.index.names = ['year', 'product']
+        own['unit_value'] = own['v'] / own['q']
+
+        statistics = self.statistics().reindex(own.index)
+        groups = _group_keys(own.index.get_level_values('year').to_numpy(),
+                             own.index.get_level_values('product').to_numpy())
+        log_own = np.log10(own['unit_value'].to_numpy())
+        cdf = self._cdf(groups, log_own)
+        cdf_lower = self._cdf(groups, np.log10(statistics['lower_fence'].to_numpy()))
+        cdf_upper = self._cdf(groups, np.log10(statistics['upper_fence'].to_numpy()))
+        span = cdf_upper - cdf_lower
+
+        return pd.DataFrame({
+            'value': own['v'],
+            'quantity': own['q'],
+            'unit_value': own['unit_value'],
+            'world_median': statistics['median'],
+            'relative_unit_value': own['unit_value'] / statistics['median'],
+            'percentile': np.clip(np.where(span > 0, (cdf - cdf_lower) / np.where(span > 0, span, 1), np.nan), 0, 1),
+            'ladder_length': statistics['ladder_length'],
+        }, index=own.index)
+
+    def price_volume(self) -> pd.DataFrame:
+        """
+        Price and volume decomposition of the exporter's export growth
+
+        For (HS6, destination) flows with trimmed unit values in consecutive years,
+        the value change splits exactly into a volume effect sum P0 (Q1 - Q0) and
+        a price effect sum Q1 (P1 - P0); the rest of the change (entries, exits,
+        flows without quantities or with outlier unit values) is 'other'. The
+        unit value index change is the Tornqvist average log change of prices.
+
+        Returns:
+            DataFrame indexed by end year with start year, change, volume_effect,
+            price_effect, other and unit_value_change (log)
+        """
+        flows = self.exporter_flows
+        totals = flows.groupby('t')['v'].sum()
+        measured = flows[~flows['outlier']]
+        keys = measured['k'].to_numpy(dtype=np.int64) * PARTNER_BASE + measured['j'].to_numpy(dtype=np.int64)
+        by_year = {year: (keys[rows], measured['v'].to_numpy()[rows], measured['q'].to_numpy()[rows])
+                   for year, rows in measured.groupby('t').indices.items()}
+
+        rows = []
+        years = sorted(totals.index)
+        for start_year, end_year in zip(years[:-1], years[1:]):
+            volume_effect = price_effect = unit_value_change = 0.0
+            if start_year in by_year and end_year in by_year:
+                start_keys, start_values, start_quantities = by_year[start_year]
+                end_keys, end_values, end_quantities = by_year[end_year]
+                _, start_index, end_index = np.intersect1d(start_keys, end_keys, assume_unique=True,
+                                                           return_indices=True)
+                v0, q0 = start_values[start_index], start_quantities[start_index]
+                v1, q1 = end_values[end_index], end_quantities[end_index]
+                p0, p1 = v0 / q0, v1 / q1
+                volume_effect = float((p0 * (q1 - q0)).sum())
+                price_effect = float((q1 * (p1 - p0)).sum())
+                if len(v0):
+                    weights = (v0 / v0.sum() + v1 / v1.sum()) / 2
+                    unit_value_change = float((weights * np.log(p1 / p0)).sum())
+
+            change = float(totals[end_year] - totals[start_year])
+            rows.append({
+                'year': end_year,
+                'start_year': start_year,
+                'change': change,
+                'volume_effect': volume_effect,
+                'price_effect': price_effect,
+                'other': change - volume_effect - price_effect,
+                'unit_value_change': unit_value_change,
+            })
+
+        if not rows:
+            return pd.DataFrame(columns=['start_year', 'change', 'volume_effect', 'price_effect', 'other'])
+        return pd.DataFrame(rows).set_index('year')
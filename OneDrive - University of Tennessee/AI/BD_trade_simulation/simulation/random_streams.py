@@ -0,0 +1,244 @@
+"""
+Common random number streams for Bangladesh trade simulation ensembles.
+"""
+import zlib
+import warnings
+import numpy as np
+from scipy import special, stats
+from typing import Dict, List, Any, Optional
+
+# Largest uniform passed to inverse CDFs (mirrored uniforms can reach 1)
+MAX_UNIFORM = 1.0 - 2.0 ** -53
+
+
+class StreamGenerator(np.random.Generator):
+    """
+    Random generator of one model stream, optionally mirrored
+
+    A numpy Generator whose draws can be mirrored into their antithetic
+    partners: continuous draws x become F^-1(1 - F(x)) (reflection about the
+    mean for normal and uniform draws), and discrete draws (poisson, integers,
+    choice) are inverse-CDF transforms of uniforms u, mirrored as 1 - u. The
+    same seed gives a plain stream and its antithetic partner, draw for draw.
+    """
+
+    def __init__(self, bit_generator: np.random.BitGenerator, antithetic: bool = False):
+        """
+        Initialize stream generator
+
+        Args:
+            bit_generator: Bit generator of the stream
+            antithetic: Whether draws are mirrored
+        """
+        super().__init__(bit_generator)
+        self.antithetic = antithetic
+
+    def __reduce__(self):
+        return (StreamGenerator, (self.bit_generator, self.antithetic))
+
+    def _uniforms(self, size=None):
+        """Uniforms on [0, 1), mirrored if antithetic"""
+        u = super().random(size)
+        return 1.0 - u if self.antithetic else u
+
+    def random(self, size=None):
+        return self._uniforms(size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        draws = super().uniform(low, high, size)
+        return np.add(low, high) - draws if self.antithetic else draws
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        draws = super().normal(loc, scale, size)
+        return 2 * np.asarray(loc) - draws if self.antithetic else draws
+
+    def lognormal(self, mean=0.0, sigma=1.0, size=None):
+        return np.exp(self.normal(mean, sigma, size))
+
+    def exponential(self, scale=1.0, size=None):
+        draws = super().exponential(scale, size)
+        if not self.antithetic:
+            return draws
+        return -scale * np.log(-np.expm1(-draws / scale))
+
+    def gamma(self, shape, scale=1.0, size=None):
+        draws = super().gamma(shape, scale, size)
+        if not self.antithetic:
+            return draws
+        return scale * special.gammainccinv(shape, special.gammainc(shape, draws / scale))
+
+    def beta(self, a, b, size=None):
+        draws = super().beta(a, b, size)
+        if not self.antithetic:
+            return draws
+        return special.betaincinv(a, b, special.betainc(b, a, 1.0 - draws))
+
+    def poisson(self, lam=1.0, size=None):
+        u = np.minimum(self._uniforms(size), MAX_UNIFORM)
+        draws = np.maximum(stats.poisson.ppf(u, lam), 0).astype(np.int64)
+        return int(draws) if np.ndim(draws) == 0 else draws
+
+    def integers(self, low, high=None, size=None):
+        if high is None:
+            low, high = 0, low
+        draws = np.minimum(np.floor(low + self._uniforms(size) * np.subtract(high, low)), np.subtract(high, 1))
+        draws = draws.astype(np.int64)
+        return int(draws) if np.ndim(draws) == 0 else draws
+
+    def choice(self, a, size=None, p=None):
+        population = np.arange(a) if np.ndim(a) == 0 else np.asarray(a)
+        if p is None:
+            index = self.integers(0, len(population), size)
+        else:
+            cumulative = np.cumsum(p)
+            index = np.minimum(np.searchsorted(cumulative / cumulative[-1], self._uniforms(size), side='right'),
+                               len(population) - 1)
+        return population[index]
+
+
+class RandomStreams:
+    """
+    Random generators of the model streams of a run
+
+    Every model draws from its own generator, seeded from (seed, replica, model)
+    for the whole run, or from (seed, replica, model, year) for each year when
+    common random numbers are used. Per-year streams give every model the same
+    draws in every scenario, however far the scenarios' paths diverge. An
+    antithetic replica uses the same seeds with every draw mirrored.
+    """
+
+    def __init__(self, base_seed: int = 42, replica: int = 0, antithetic: bool = False):
+        """
+        Initialize random streams
+
+        Args:
+            base_seed: Base random seed of the ensemble
+            replica: Replica index (each replica gets independent streams)
+            antithetic: Whether draws are mirrored (the antithetic partner of the replica)
+        """
+        self.base_seed = base_seed
+        self.replica = replica
+        self.antithetic = antithetic
+
+    def seed_sequence(self, stream_name: str, year_index: Optional[int] = None) -> np.random.SeedSequence:
+        """
+        Seed sequence of one model stream
+
+        Args:
+            stream_name: Model or component name, e.g. 'logistics' or 'export.rmg'
+            year_index: Year index from simulation start (None for the whole run)
+
+        Returns:
+            Seed sequence (stable across processes and scenarios)
+        """
+        entropy = [self.base_seed, self.replica, zlib.crc32(stream_name.encode('utf-8'))]
+        if year_index is not None:
+            entropy.append(year_index)
+        return np.random.SeedSequence(entropy)
+
+    def generator(self, stream_name: str, year_index: Optional[int] = None) -> StreamGenerator:
+        """
+        Generator of one model stream
+
+        Args:
+            stream_name: Model or component name
+            year_index: Year index from simulation start (None for the whole run)
+
+        Returns:
+            Stream generator, mirrored if this is an antithetic replica
+        """
+        return StreamGenerator(np.random.PCG64(self.seed_sequence(stream_name, year_index)), self.antithetic)
+
+
+def summarize_scenario_deltas(values: Dict[str, np.ndarray],
+                              reference: str,
+                              antithetic: bool = False,
+                              agreement_z: float = 3.0) -> Dict[str, Any]:
+    """
+    Summarize scenario differences from an ensemble and the variance reduction achieved
+
+    The reduction factor compares the variance of the delta estimator against
+    independent sampling with the same number of runs, where Var(A - B) would be
+    Var(A) + Var(B). With antithetic pairs the estimator is the mean over pairs.
+
+    Antithetic estimates are checked against the plain common random numbers
+    estimate from the unmirrored run of each pair: mirrored and unmirrored runs
+    have the same expected delta, so the z-score of their mean difference should
+    be small. When it exceeds agreement_z, the mirroring is not distribution
+    preserving (a draw escaped the streams), a warning is issued and no
+    reduction factor is reported.
+
+    Args:
+        values: Metric values per scenario, shape (replicas,) each; with antithetic
+            pairs, consecutive entries (0, 1), (2, 3), ... are partners
+        reference: Scenario the others are compared against
+        antithetic: Whether values come in antithetic pairs
+        agreement_z: Largest accepted z-score between antithetic and plain estimates
+
+    Returns:
+        Dict keyed by scenario with mean delta, standard error, 95% interval and
+        variance reduction factor; with antithetic pairs also the plain estimate
+        (crn_mean_delta, crn_standard_error), agreement_z and antithetic_consistent
+    """
+    base = np.asarray(values[reference], dtype=float)
+    summary = {}
+
+    for scenario, scenario_values in values.items():
+        if scenario == reference:
+            continue
+
+        other = np.asarray(scenario_values, dtype=float)
+        deltas = other - base
+        n_runs = len(deltas)
+
+        pairs = deltas[:n_runs - n_runs % 2].reshape(-1, 2)
+        # Average antithetic partners into one observation per pair
+        units = pairs.mean(axis=1) if antithetic else deltas
+
+        n_units = len(units)
+        mean_delta = float(units.mean()) if n_units else float('nan')
+        unit_variance = float(units.var(ddof=1)) if n_units > 1 else float('nan')
+        standard_error = float(np.sqrt(unit_variance / n_units)) if n_units > 1 else float('nan')
+
+        # Variance of the mean delta had every run used independent draws
+        independent_variance = (base.var(ddof=1) + other.var(ddof=1)) / n_runs if n_runs > 1 else float('nan')
+        achieved_variance = unit_variance / n_units if n_units > 1 else float('nan')
+
+        if achieved_variance > 0:
+            reduction = float(independent_variance / achieved_variance)
+        else:
+            reduction = float('inf') if independent_variance > 0 else float('nan')
+
+        scenario_summary = {
+            'mean_delta': mean_delta,
+            'standard_error': standard_error,
+            'ci_95': [mean_delta - 1.96 * standard_error, mean_delta + 1.96 * standard_error],
+            'runs': n_runs,
+            'variance_reduction_factor': reduction,
+        }
+
+        if antithetic and n_units > 1:
+            # Plain estimate from the unmirrored runs, and the z-score of the mirrored runs' difference
+            plain = pairs[:, 0]
+            half_differences = (pairs[:, 1] - pairs[:, 0]) / 2
+            difference_error = half_differences.std(ddof=1) / np.sqrt(n_units)
+            if difference_error > 0:
+                z_score = float(half_differences.mean() / difference_error)
+            else:
+                z_score = 0.0 if half_differences.mean() == 0 else float('inf')
+            consistent = abs(z_score) <= agreement_z
+
+            scenario_summary.update({
+                'crn_mean_delta': float(plain.mean()),
+                'crn_standard_error': float(plain.std(ddof=1) / np.sqrt(n_units)),
+                'agreement_z': z_score,
+                'antithetic_consistent': consistent,
+            })
+            if not consistent:
+                scenario_summary['variance_reduction_factor'] = float('nan')
+                warnings.warn(f"Antithetic and common random numbers estimates of {scenario} disagree "
+                              f"(z = {z_score:.1f}); variance reduction not reported")
+
+        summary[scenario] = scenario_summary
+
+    return summary
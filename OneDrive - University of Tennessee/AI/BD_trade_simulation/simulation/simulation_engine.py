@@ -1,19 +1,27 @@
 import os
 import sys
+import copy
 import json
 import pandas as pd
 import numpy as np
 import random
 import matplotlib.pyplot as plt
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import all models
-from models.export_sector import ExportSectorModel
+from models.export_sector import ExportSectorModel, RMGSectorModel
 from models.import_dependency import ImportDependencyModel
+from models.input_output import InputOutputModel
+from models.gravity import sector_elasticities
 from models.trade_policy import TradePolicyModel
+from models.armington import ArmingtonTariffEngine, market_groups_from_country_codes
+from models.rca import RCAEngine
+from models.complexity import ComplexityEngine
+from models.margins import export_margins
 from models.logistics import LogisticsModel
 from models.exchange_rate import ExchangeRateModel
 from models.global_market import GlobalMarketModel
@@ -23,6 +31,9 @@ from models.structural_transformation import StructuralTransformationModel
 from models.digital_trade import DigitalTradeModel
 from models.services_trade import ServicesTradeModel
 from models.investment import InvestmentModel
+from models.history import reserve_histories
+from models.exogenous_paths import ExogenousPathLibrary
+from simulation.random_streams import RandomStreams, summarize_scenario_deltas
 # Import from project root instead of data directory
 from data_handler import TradeDataHandler as DataHandler
 
@@ -33,7 +44,19 @@ class TradeSimulationEngine:
     Integrates all individual models and manages the overall simulation flow.
     """
     
-    def __init__(self, config, start_year=2025, end_year=2050, scenario="baseline"):
+    # Detail sections each model can skip building, as metric paths in the year results
+    DETAIL_OUTPUTS = {
+        'global_market': ['global_market.sector_demand'],
+        'logistics': ['logistics.port_results', 'logistics.transport_result', 'logistics.facilitation_result',
+                      'logistics.network_result'],
+        'compliance': ['compliance.labor_standards.standards_compliance',
+                       'compliance.environmental_compliance.compliance_areas',
+                       'compliance.product_standards.sector_standards',
+                       'compliance.product_standards.certifications'],
+    }
+    
+    def __init__(self, config, start_year=2025, end_year=2050, scenario="baseline", output_spec=None,
+                 exogenous_paths=None):
         """
         Initialize the simulation engine.
         
@@ -42,17 +65,33 @@ class TradeSimulationEngine:
             start_year (int): Starting year for the simulation
             end_year (int): Ending year for the simulation
             scenario (str): Name of the scenario to simulate
+            output_spec (list, optional): Metric paths to keep in the yearly results,
+                e.g. ['export.total_exports', 'import.total_imports', 'investment.gdp'].
+                Defaults to config['output_spec']; None keeps full detail.
+            exogenous_paths (ExogenousPaths, optional): Precomputed world paths to replay in the
+                global market model. Defaults to paths from config['exogenous_paths'] if enabled.
         """
         self.config = config
         self.start_year = start_year
         self.end_year = end_year
         self.scenario = scenario
         self.current_year = start_year
+        self.output_spec = output_spec if output_spec is not None else config.get('output_spec')
         
         # Set random seed for reproducibility
         random.seed(config.get('random_seed', 42))
         np.random.seed(config.get('random_seed', 42))
         
+        # Every model draws from its own stream; with common random numbers the streams
+        # are reseeded per model and year so scenarios share draws
+        crn_config = config.get('common_random_numbers') or {}
+        self.common_random_numbers = crn_config.get('enabled', False)
+        self.random_streams = RandomStreams(
+            base_seed=config.get('random_seed', 42),
+            replica=crn_config.get('replica', 0) if self.common_random_numbers else 0,
+            antithetic=self.common_random_numbers and crn_config.get('antithetic', False)
+        )
+        
         # Initialize data handler
         self.data_handler = DataHandler(config.get('data_config', {}))
         
@@ -63,6 +102,20 @@ class TradeSimulationEngine:
         
         # Initialize models
         self.initialize_models()
+        self.configure_output_detail()
+        self.initialize_random_streams()
+        
+        # Attach replayed exogenous world paths, if provided or enabled in config
+        if exogenous_paths is None:
+            exogenous_paths = load_exogenous_paths(config, start_year, end_year)
+        self.exogenous_paths = exogenous_paths
+        if exogenous_paths is not None and 'global_market' in self.models:
+            self.models['global_market'].exogenous_paths = exogenous_paths
+        
+        # Preallocate model histories to the simulation horizon (plus the initial state)
+        horizon = end_year - start_year + 2
+        for model in [*self.models.values(), *self.export_models.values(), *self.import_models.values()]:
+            reserve_histories(model, horizon)
         
         # Store simulation results
         self.results = {
@@ -70,10 +123,83 @@ class TradeSimulationEngine:
                 'scenario': scenario,
                 'start_year': start_year,
                 'end_year': end_year,
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'output_spec': self.output_spec
             },
             'yearly_data': {}
         }
+        if self.trade_benchmarks:
+            self.results['trade_benchmarks'] = self.trade_benchmarks
+    
+    def output_requested(self, path):
+        """
+        Check whether a metric path is covered by the output specification.
+        
+        A path is requested if it, one of its parents or one of its children is listed.
+        
+        Args:
+            path (str): Dot-separated metric path, e.g. 'logistics.port_results'
+        
+        Returns:
+            bool: True if the path should be built and retained
+        """
+        if self.output_spec is None:
+            return True
+        for spec in self.output_spec:
+            if spec == path or path.startswith(spec + '.') or spec.startswith(path + '.'):
+                return True
+        return False
+    
+    def initialize_random_streams(self):
+        """Give every model the generator of its stream for the whole run"""
+        self.stream_models = {
+            **self.models,
+            **{f'export.{name}': model for name, model in self.export_models.items()},
+            **{f'import.{name}': model for name, model in self.import_models.items()},
+        }
+        for stream_name, model in self.stream_models.items():
+            model.rng = self.random_streams.generator(stream_name)
+    
+    def use_stream(self, stream_name, year_index):
+        """Give a model the generator of its stream for a year when common random numbers are enabled"""
+        model = self.stream_models.get(stream_name)
+        if self.common_random_numbers and model is not None:
+            model.rng = self.random_streams.generator(stream_name, year_index)
+    
+    def configure_output_detail(self):
+        """Switch off detail construction in models whose detail sections are not requested"""
+        for model_name, detail_paths in self.DETAIL_OUTPUTS.items():
+            model = self.models.get(model_name)
+            if model is not None and hasattr(model, 'include_details'):
+                model.include_details = any(self.output_requested(path) for path in detail_paths)
+    
+    def select_outputs(self, year_results):
+        """
+        Reduce a year's results to the metric paths in the output specification.
+        
+        Args:
+            year_results (dict): Full results for a single year
+        
+        Returns:
+            dict: Results containing only the requested paths (missing paths are skipped)
+        """
+        if self.output_spec is None:
+            return year_results
+        
+        selected = {}
+        for spec in self.output_spec:
+            keys = spec.split('.')
+            value = year_results
+            for key in keys:
+                if not isinstance(value, dict) or key not in value:
+                    break
+                value = value[key]
+            else:
+                target = selected
+                for key in keys[:-1]:
+                    target = target.setdefault(key, {})
+                target[keys[-1]] = value
+        return selected
     
     def initialize_models(self):
         """Initialize all simulation models"""
@@ -81,6 +207,17 @@ class TradeSimulationEngine:
         # Initialize Export Sector Models (Modified Logic)
         export_config = self.config.get('export_sector_config', {})
         sectors_config = export_config.get('sectors', {})
+        
+        # Export elasticities: gravity estimates, then configured overrides
+        base_elasticities = {}
+        if export_config.get('gravity_estimates'):
+            try:
+                with open(export_config['gravity_estimates']) as f:
+                    base_elasticities = sector_elasticities(json.load(f))
+                print(f"Using gravity elasticities: {base_elasticities}")
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not load gravity estimates: {e}")
+        base_elasticities.update(export_config.get('elasticities', {}))
         if not sectors_config:
             print("Warning: No export sectors defined in the configuration.")
         else:
@@ -95,6 +232,15 @@ class TradeSimulationEngine:
                     # Let's try initializing the base model assuming it expects a dict now (needs fix in ExportSectorModel too)
                     # self.export_models[sector_name] = ExportSectorModel(sector_cfg) 
                     
+                    # Sectors with a firm-level factory population use the RMG model
+                    if sector_cfg.get('factory_population', {}).get('enabled', False):
+                        self.export_models[sector_name] = RMGSectorModel({
+                            **sector_cfg,
+                            'name': sector_name,
+                            'elasticities': {**base_elasticities, **sector_cfg.get('elasticities', {})},
+                        })
+                        continue
+                    
                     # TEMPORARY FIX: Instantiate base model using individual args extracted from dict
                     # This avoids changing ExportSectorModel.__init__ for now, but is less clean.
                     self.export_models[sector_name] = ExportSectorModel(
@@ -105,7 +251,8 @@ class TradeSimulationEngine:
                         value_chain_position=sector_cfg.get('value_chain_position', 'unknown'),
                         competitiveness_factors=sector_cfg.get('competitiveness_factors', {}),
                         tariff_exposure=sector_cfg.get('tariff_exposure', 0),
-                        subsectors=sector_cfg.get('subsectors', [])
+                        subsectors=sector_cfg.get('subsectors', []),
+                        elasticities={**base_elasticities, **sector_cfg.get('elasticities', {})}
                     )
                     
                 except Exception as e:
@@ -135,6 +282,18 @@ class TradeSimulationEngine:
                     print(f"  - ERROR initializing category {category_name}: {e}")
             print("Import categories initialized.")
 
+        # Link import categories to the import content of exports
+        self.input_output = None
+        io_config = self.config.get('input_output_config', {})
+        if io_config.get('enabled', False):
+            self.input_output = InputOutputModel(io_config)
+            base_exports = {name: cfg.get('current_volume', 0) for name, cfg in sectors_config.items()}
+            base_requirements = self.input_output.import_requirements(base_exports)
+            for category_name, volume in base_requirements['category_imports'].items():
+                if category_name in self.import_models:
+                    self.import_models[category_name].link_to_exports(volume)
+            print(f"Input-output linkage initialized (import content {base_requirements['import_content_share']:.1%}).")
+
         # Initialize other models (Remove import from model_configs)
         print("Initializing other models...")
         model_configs = {
@@ -160,6 +319,44 @@ class TradeSimulationEngine:
             except Exception as e:
                 print(f"  - ERROR initializing {model_key} model ({ModelClass.__name__}): {e}")
         
+        # Line-level LDC graduation tariffs from the HS6 export matrix of the trade data
+        line_level_config = self.config.get('trade_policy_config', {}).get('line_level_tariffs', {})
+        if line_level_config.get('trade_data') and 'trade_policy' in self.models:
+            try:
+                trade_data = pd.read_csv(line_level_config['trade_data'], usecols=['t', 'i', 'j', 'k', 'v'])
+                country_codes = pd.read_csv(self.config.get('data_config', {}).get(
+                    'country_codes_path', 'data/country_codes_V202501.csv'))
+                tariff_engine = ArmingtonTariffEngine.from_trade_data(
+                    trade_data, market_groups_from_country_codes(country_codes),
+                    exporter=line_level_config.get('exporter', 50), year=line_level_config.get('year'),
+                    elasticities=line_level_config.get('elasticities'))
+                scenario = self.models['trade_policy'].use_line_level_tariffs(tariff_engine)
+                print(f"Using line-level graduation tariffs ({scenario['lines_affected']} lines, "
+                      f"export change {scenario['change_pct']:.1f}%).")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: Could not load line-level tariffs: {e}")
+
+        # Sector RCA benchmarks, ECI-calibrated capability index and export margins from the trade data
+        self.trade_benchmarks = {}
+        benchmark_config = self.config.get('structural_transformation_config', {}).get('trade_benchmarks', {})
+        if benchmark_config.get('trade_data') and 'structural' in self.models:
+            try:
+                trade_data = pd.read_csv(benchmark_config['trade_data'], usecols=['t', 'i', 'j', 'k', 'v'])
+                country_codes = pd.read_csv(self.config.get('data_config', {}).get(
+                    'country_codes_path', 'data/country_codes_V202501.csv'))
+                exporter = benchmark_config.get('exporter', 50)
+                structural = self.models['structural']
+                rca_engine = RCAEngine(trade_data, country_codes)
+                self.trade_benchmarks = {
+                    'rca': structural.benchmark_rca(rca_engine, benchmark_config.get('year'), exporter),
+                    'capability': structural.calibrate_capability(ComplexityEngine(rca_engine), exporter),
+                    'export_margins': structural.record_export_margins(export_margins(trade_data, exporter)),
+                }
+                print(f"Benchmarked sectors against {len(rca_engine.countries)} exporters "
+                      f"(capability index {structural.yearly_metrics['capability_index']:.3f}).")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: Could not load trade benchmarks: {e}")
+
         print(f"All models initialized for {self.scenario} scenario")
     
     def run_simulation(self, verbose=True):
@@ -184,8 +381,8 @@ class TradeSimulationEngine:
                 print(f"Simulating year {year} | Scenario: {self.scenario}")
                 print(f"{'='*50}")
             
-            # Run a single year of simulation
-            year_results = self.simulate_year(year, verbose)
+            # Run a single year of simulation, keeping only the requested outputs
+            year_results = self.select_outputs(self.simulate_year(year, verbose))
             
             # Store results for this year
             self.results['yearly_data'][year] = year_results
@@ -215,6 +412,7 @@ class TradeSimulationEngine:
         year_index = year - self.start_year # Calculate year_index
         
         # Step 1: Simulate external conditions first
+        self.use_stream('global_market', year_index)
         try: 
             # Corrected arguments for simulate_global_markets
             global_conditions = self.models['global_market'].simulate_global_markets(year_index, year, self.scenario)
@@ -224,6 +422,7 @@ class TradeSimulationEngine:
              global_conditions = {} # Set default if error
              year_results['global_market'] = {'error': str(e)}
         
+        self.use_stream('geopolitical', year_index)
         try:
             # Corrected arguments for simulate_geopolitical_environment
             geopolitical_conditions = self.models['geopolitical'].simulate_geopolitical_environment(year_index, year)
@@ -234,6 +433,7 @@ class TradeSimulationEngine:
             year_results['geopolitical'] = {'error': str(e)}
         
         # Step 2: Simulate investment flows
+        self.use_stream('investment', year_index)
         try:
             # Assuming investment model needs combined external conditions
             combined_external = {**global_conditions, **geopolitical_conditions}
@@ -245,15 +445,21 @@ class TradeSimulationEngine:
             year_results['investment'] = {'error': str(e)}
         
         # Step 3: Simulate policy and business environment factors
+        self.use_stream('trade_policy', year_index)
         try:
             # Call the correct method for TradePolicyModel
             trade_policy_results = self.models['trade_policy'].get_overall_policy_environment(year_index, year)
+            sector_tariff_changes = self.models['trade_policy'].sector_tariff_changes(
+                year_index, year, list(self.export_models))
+            if sector_tariff_changes:
+                trade_policy_results['sector_tariff_changes'] = sector_tariff_changes
             year_results['trade_policy'] = trade_policy_results
         except Exception as e:
             print(f"  - ERROR simulating trade_policy model: {e}")
             trade_policy_results = {}
             year_results['trade_policy'] = {'error': str(e)}
         
+        self.use_stream('logistics', year_index)
         try:
             # Call the correct method for LogisticsModel
             # Args: year_index, simulation_year, trade_volume, infrastructure_investment, policy_effectiveness
@@ -271,6 +477,7 @@ class TradeSimulationEngine:
             logistics_results = {}
             year_results['logistics'] = {'error': str(e)}
         
+        self.use_stream('exchange_rate', year_index)
         try:
             # Call the correct method for ExchangeRateModel
             # Args: year_index, balance_of_payments, central_bank_policy, global_conditions
@@ -291,6 +498,7 @@ class TradeSimulationEngine:
             exchange_rate_results = {}
             year_results['exchange_rate'] = {'error': str(e)}
         
+        self.use_stream('compliance', year_index)
         try:
             # Call the correct method for ComplianceModel
             # Args: year_index, simulation_year, regulatory_developments, buyer_requirements
@@ -308,6 +516,7 @@ class TradeSimulationEngine:
             year_results['compliance'] = {'error': str(e)}
         
         # Step 4: Simulate structural transformation and digital/services components
+        self.use_stream('structural', year_index)
         try:
             structural_transformation_results = self.models['structural'].simulate_step(year)
             year_results['structural_transformation'] = structural_transformation_results
@@ -316,6 +525,7 @@ class TradeSimulationEngine:
             structural_transformation_results = {}
             year_results['structural_transformation'] = {'error': str(e)}
             
+        self.use_stream('digital_trade', year_index)
         try:
             digital_trade_results = self.models['digital_trade'].simulate_step(year, global_conditions)
             year_results['digital_trade'] = digital_trade_results
@@ -324,6 +534,7 @@ class TradeSimulationEngine:
             digital_trade_results = {}
             year_results['digital_trade'] = {'error': str(e)}
             
+        self.use_stream('services_trade', year_index)
         try:
             services_trade_results = self.models['services_trade'].simulate_step(year, global_conditions)
             year_results['services_trade'] = services_trade_results
@@ -346,8 +557,19 @@ class TradeSimulationEngine:
             'structural_factors': structural_transformation_results
         }
         
+        # Trade war order diversion opportunity of each export sector (reported path)
+        order_diversion = {}
+        trade_war_impacts = geopolitical_conditions.get('trade_war_impacts', {})
+        if 'order_diversion_opportunities' in trade_war_impacts:
+            order_diversion = self.models['geopolitical'].trade_wars.export_sector_opportunities(
+                np.array(list(trade_war_impacts['order_diversion_opportunities'].values())),
+                list(self.export_models)
+            )
+        
         # Simulate each export sector
+        keep_sector_details = self.output_requested('export.sector_details')
         all_export_results = {}
+        sector_exports = {}
         total_exports = 0
         print(f"  Simulating {len(self.export_models)} export sectors...")
         for sector_name, sector_model in self.export_models.items():
@@ -357,20 +579,25 @@ class TradeSimulationEngine:
             # This mapping might need refinement based on ExportSectorModel details.
             sector_inputs = {
                 'global_demand_growth': global_conditions.get('demand_growth_rate', 0.03),
-                'tariff_changes': trade_policy_results.get('effective_tariffs', {}), # Dict by market?
+                'tariff_changes': trade_policy_results.get('sector_tariff_changes', {}).get(
+                    sector_name, trade_policy_results.get('effective_tariffs', {})), # Dict by market
                 'exchange_rate_impact': exchange_rate_results.get('impact_factor', 0), # Scaled impact?
                 'logistics_performance': logistics_results.get('performance_index', 0.6),
                 'trade_policy_impact': trade_policy_results.get('net_impact', 0),
                 'compliance_impact': compliance_results.get('net_impact', 0),
                 'digital_adoption': digital_trade_results.get('overall_adoption_rate', 0.5),
-                'competitor_growth': global_conditions.get('competitor_growth', {}) # Dict by competitor?
+                'competitor_growth': global_conditions.get('competitor_growth', {}), # Dict by competitor?
+                'order_diversion_opportunity': float(order_diversion.get(sector_name, 0.0))
             }
             
             try:
                 # Use year - start_year as year_index for the model's internal tracking
                 year_index = year - self.start_year 
+                self.use_stream(f'export.{sector_name}', year_index)
                 sector_result = sector_model.simulate_year(year_index, **sector_inputs) 
-                all_export_results[sector_name] = sector_result
+                if keep_sector_details:
+                    all_export_results[sector_name] = sector_result
+                sector_exports[sector_name] = sector_result.get('export_volume', 0)
                 total_exports += sector_result.get('export_volume', 0)
                 if verbose:
                     print(f"    - {sector_name}: ${sector_result.get('export_volume', 0):.2f} billion (Growth: {sector_result.get('growth_rate', 0)*100:.2f}%)")
@@ -388,8 +615,12 @@ class TradeSimulationEngine:
         
         # Simulate imports (depends on total exports for things like intermediate goods demand)
         # Pass the aggregated export summary
+        keep_category_details = self.output_requested('import.category_details')
         all_import_results = {}
         total_imports = 0
+        io_requirements = None
+        if self.input_output is not None:
+            io_requirements = self.input_output.import_requirements(sector_exports)
         print(f"  Simulating {len(self.import_models)} import categories...")
         if self.import_models:
              for category_name, category_model in self.import_models.items():
@@ -406,10 +637,14 @@ class TradeSimulationEngine:
                     'logistics_cost': logistics_results.get('logistics_cost_factor', 0.1), # Placeholder
                     'domestic_capacity_investment': investment_results.get('domestic_investment_level', 0.5) # Placeholder
                  }
+                 if io_requirements is not None and category_model.export_linked_baseline is not None:
+                     category_inputs['export_linked_imports'] = io_requirements['category_imports'].get(category_name, 0.0)
                  try:
+                     self.use_stream(f'import.{category_name}', year_index)
                      # Call the correct method: simulate_import_needs
                      category_result = category_model.simulate_import_needs(year_index, **category_inputs)
-                     all_import_results[category_name] = category_result
+                     if keep_category_details:
+                         all_import_results[category_name] = category_result
                      total_imports += category_result.get('import_volume', 0)
                      if verbose:
                           print(f"    - {category_name}: ${category_result.get('import_volume', 0):.2f} billion")
@@ -424,6 +659,12 @@ class TradeSimulationEngine:
             'total_imports': total_imports,
             'category_details': all_import_results
         }
+        if io_requirements is not None:
+            final_import_summary['input_output'] = {
+                'import_content_share': io_requirements['import_content_share'],
+                'export_linked_imports': io_requirements['total_imports'],
+                'category_imports': io_requirements['category_imports'],
+            }
         year_results['import'] = final_import_summary
         
         # Step 6: Calculate aggregate trade metrics (using updated summaries)
@@ -574,6 +815,203 @@ class TradeSimulationEngine:
                 plt.show()
 
 
+# Exogenous path libraries shared by all engines in this process
+_exogenous_path_libraries = {}
+
+
+def load_exogenous_paths(config, start_year=2025, end_year=2050):
+    """
+    Get the exogenous world paths configured for a run.
+    
+    Enabled with config['exogenous_paths'] = {'enabled': True, 'cache_dir': ..., 'seed': ...};
+    the seed defaults to config['random_seed']. Engines in the same process share one
+    library, so runs with the same seed replay the same path arrays by reference.
+    
+    Args:
+        config (dict): Configuration dictionary
+        start_year (int): Starting year for the simulation
+        end_year (int): Ending year for the simulation
+    
+    Returns:
+        ExogenousPaths: Paths to replay, or None if not enabled
+    """
+    path_config = config.get('exogenous_paths') or {}
+    if not path_config.get('enabled', False):
+        return None
+    
+    library = ExogenousPathLibrary(
+        config.get('global_market_config', {}),
+        horizon=end_year - start_year + 1,
+        cache_dir=path_config.get('cache_dir')
+    )
+    library_key = (library.config_key, library.cache_dir)
+    library = _exogenous_path_libraries.setdefault(library_key, library)
+    
+    return library.get(path_config.get('seed', config.get('random_seed', 42)))
+
+
+def build_scenario_config(config, scenario):
+    """
+    Build the configuration for a scenario by applying its overrides.
+    
+    Args:
+        config (dict): Base configuration dictionary (left unmodified)
+        scenario (str): Name of the scenario in config['scenarios']
+    
+    Returns:
+        dict: Deep copy of the configuration with scenario overrides merged in
+    """
+    scenario_config = copy.deepcopy(config)
+    overrides = config.get('scenarios', {}).get(scenario) or {}
+    _merge_overrides(scenario_config, overrides)
+    return scenario_config
+
+
+def _merge_overrides(target, overrides):
+    """Recursively merge scenario overrides into a configuration dictionary"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_overrides(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+def _run_scenario_worker(config, scenario, start_year, end_year, verbose):
+    """
+    Run one scenario to completion. Module-level so it can be sent to worker processes.
+    
+    Returns:
+        tuple: (scenario, results)
+    """
+    simulation = TradeSimulationEngine(config, start_year, end_year, scenario)
+    return scenario, simulation.run_simulation(verbose=verbose)
+
+
+def run_scenarios_parallel(config, scenarios, start_year=2025, end_year=2050, max_workers=None, verbose=False):
+    """
+    Run several scenarios concurrently, one engine per worker process.
+    
+    Each scenario is initialized and simulated exactly once; the returned results
+    store is all that is needed for comparison plots and reports.
+    
+    Args:
+        config (dict): Base configuration dictionary
+        scenarios (list): Names of the scenarios to run
+        start_year (int): Starting year for the simulation
+        end_year (int): Ending year for the simulation
+        max_workers (int, optional): Number of worker processes (defaults to one per scenario, capped at CPU count)
+        verbose (bool): Whether to print detailed progress
+    
+    Returns:
+        dict: Simulation results keyed by scenario name, in the order given
+    """
+    scenario_configs = {scenario: build_scenario_config(config, scenario) for scenario in scenarios}
+    
+    # Generate shared exogenous paths once up front so workers load them from the cache
+    for scenario_config in scenario_configs.values():
+        load_exogenous_paths(scenario_config, start_year, end_year)
+    
+    if max_workers is None:
+        max_workers = min(len(scenarios), os.cpu_count() or 1)
+    
+    results_by_scenario = {}
+    if max_workers <= 1 or len(scenarios) <= 1:
+        # Run in-process when there is nothing to parallelize
+        for scenario in scenarios:
+            _, results = _run_scenario_worker(scenario_configs[scenario], scenario, start_year, end_year, verbose)
+            results_by_scenario[scenario] = results
+        return results_by_scenario
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            scenario: executor.submit(_run_scenario_worker, scenario_configs[scenario], scenario,
+                                      start_year, end_year, verbose)
+            for scenario in scenarios
+        }
+        for scenario, future in futures.items():
+            _, results = future.result()
+            results_by_scenario[scenario] = results
+    
+    return results_by_scenario
+
+
+def run_scenario_ensemble(config, scenarios, replicas=10, start_year=2025, end_year=2050,
+                          metric='export.total_exports', antithetic=False, max_workers=None):
+    """
+    Run scenario replicas with common random numbers and summarize scenario differences.
+    
+    Each replica gives every model the same per-year random stream in all scenarios,
+    so the differences reflect the scenarios rather than sampling noise. With
+    antithetic=True, replicas come in pairs whose streams are mirrored, and the
+    summary checks the pair estimate against the plain common random numbers one.
+    
+    Args:
+        config (dict): Base configuration dictionary
+        scenarios (list): Names of the scenarios to run; the first is the reference
+        replicas (int): Number of runs per scenario (rounded up to pairs if antithetic)
+        start_year (int): Starting year for the simulation
+        end_year (int): Ending year for the simulation
+        metric (str): Metric path compared at end_year
+        antithetic (bool): Whether to pair antithetic replicas
+        max_workers (int, optional): Number of worker processes
+    
+    Returns:
+        dict: 'values' per scenario and 'summary' with mean deltas, confidence
+            intervals and variance reduction factors
+    """
+    if antithetic:
+        replicas += replicas % 2
+    
+    # One task per scenario and replica; antithetic partners share a replica index
+    tasks = []
+    for scenario in scenarios:
+        for run in range(replicas):
+            run_config = build_scenario_config(config, scenario)
+            run_config['save_intermediate_results'] = False
+            run_config['output_spec'] = [metric]
+            run_config['common_random_numbers'] = {
+                'enabled': True,
+                'replica': run // 2 if antithetic else run,
+                'antithetic': antithetic and run % 2 == 1,
+            }
+            tasks.append((scenario, run, run_config))
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    
+    values = {scenario: np.zeros(replicas) for scenario in scenarios}
+    keys = metric.split('.')
+    
+    def _store(scenario, run, results):
+        value = results['yearly_data'][end_year]
+        for key in keys:
+            value = value.get(key, np.nan) if isinstance(value, dict) else np.nan
+        values[scenario][run] = value
+    
+    if max_workers <= 1:
+        for scenario, run, run_config in tasks:
+            _, results = _run_scenario_worker(run_config, scenario, start_year, end_year, False)
+            _store(scenario, run, results)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (scenario, run, executor.submit(_run_scenario_worker, run_config, scenario,
+                                                start_year, end_year, False))
+                for scenario, run, run_config in tasks
+            ]
+            for scenario, run, future in futures:
+                _, results = future.result()
+                _store(scenario, run, results)
+    
+    return {
+        'metric': metric,
+        'year': end_year,
+        'antithetic': antithetic,
+        'values': {scenario: scenario_values.tolist() for scenario, scenario_values in values.items()},
+        'summary': summarize_scenario_deltas(values, scenarios[0], antithetic=antithetic),
+    }
+
+
 def run_simulation_from_config(config_path, scenario="baseline", start_year=2025, end_year=2050):
     """
     Helper function to run a simulation from a configuration file.
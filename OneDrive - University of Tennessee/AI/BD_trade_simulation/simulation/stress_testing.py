@@ -0,0 +1,521 @@
+"""
+Rare-event stress testing for Bangladesh trade simulation.
+"""
+import copy
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable
+
+from models.exchange_rate import ExchangeRateModel, ExchangeRatePathEngine, ExternalBalanceFactors
+from models.geopolitical import RegionalIntegrationModel, TradeWarImpactsModel, STABILITY_WEIGHTS
+
+
+def summarize_importance_sample(event: np.ndarray,
+                                log_weight: np.ndarray,
+                                values: Optional[Dict[str, np.ndarray]] = None,
+                                min_effective_sample_size: float = 50.0) -> Dict[str, Any]:
+    """
+    Estimate a tail probability and conditional expectations from weighted runs
+
+    Each run was drawn under tilted shock distributions; its weight is the
+    likelihood ratio of its draws under the original distributions, so weighted
+    averages are unbiased for the untilted model. With all weights equal to one
+    this is plain Monte Carlo.
+
+    The effective sample size (ESS) of the event runs, (sum w)^2 / sum w^2, is
+    always reported. Below min_effective_sample_size a few runs dominate the
+    estimate and its standard error is itself unreliable, so the estimate is
+    flagged and no equivalent Monte Carlo run count is given.
+
+    Args:
+        event: Boolean indicator of the rare event per run
+        log_weight: Log likelihood ratio per run
+        values: Optional outcome arrays per run; their expectations given the
+            event are estimated with ratio estimators
+        min_effective_sample_size: ESS of the event runs below which the estimate
+            is flagged as unreliable
+
+    Returns:
+        Dict with method, probability, standard error, 95% interval, effective
+        sample size of the event runs, the largest weight share among them,
+        reliability flag, the number of plain Monte Carlo runs giving the same
+        standard error (reliable estimates only), and conditional expectations
+    """
+    event = np.asarray(event, dtype=bool)
+    log_weight = np.asarray(log_weight, dtype=float)
+    weight = np.exp(log_weight)
+    n_runs = len(event)
+
+    contribution = weight * event
+    probability = float(contribution.mean())
+    standard_error = float(contribution.std(ddof=1) / np.sqrt(n_runs)) if n_runs > 1 else float('nan')
+
+    event_weight = contribution.sum()
+    effective_sample_size = float(event_weight ** 2 / (contribution ** 2).sum()) if event_weight > 0 else 0.0
+    reliable = effective_sample_size >= min_effective_sample_size
+
+    # Plain Monte Carlo needs p(1-p)/se^2 runs for the same standard error
+    if reliable and standard_error > 0:
+        equivalent_runs = float(probability * (1 - probability) / standard_error ** 2)
+    else:
+        equivalent_runs = float('nan')
+
+    summary = {
+        'method': 'importance_sampling' if log_weight.any() else 'monte_carlo',
+        'runs': n_runs,
+        'events_sampled': int(event.sum()),
+        'probability': probability,
+        'standard_error': standard_error,
+        'ci_95': [max(0.0, probability - 1.96 * standard_error), probability + 1.96 * standard_error],
+        'effective_sample_size': effective_sample_size,
+        'max_weight_share': float(contribution.max() / event_weight) if event_weight > 0 else float('nan'),
+        'reliable': bool(reliable),
+        'equivalent_monte_carlo_runs': equivalent_runs,
+        'conditional_expectations': {},
+    }
+    if not reliable:
+        summary['warning'] = (f"effective sample size {effective_sample_size:.1f} of the event runs is below "
+                              f"{min_effective_sample_size:g}; the estimate and its standard error are unreliable")
+
+    for name, value in (values or {}).items():
+        value = np.asarray(value, dtype=float)
+        if event_weight <= 0:
+            summary['conditional_expectations'][name] = {'mean': float('nan'), 'standard_error': float('nan')}
+            continue
+
+        # Ratio estimator with delta-method standard error
+        mean = float((contribution * value).sum() / event_weight)
+        residual = contribution * (value - mean)
+        mean_error = float(np.sqrt((residual ** 2).sum()) / event_weight)
+        summary['conditional_expectations'][name] = {
+            'mean': mean,
+            'standard_error': mean_error,
+            'ci_95': [mean - 1.96 * mean_error, mean + 1.96 * mean_error],
+        }
+
+    return summary
+
+
+def cross_entropy_tilt(sampler: Callable[[int, Any, Optional[int]], Dict[str, Any]],
+                       update: Callable[[Dict[str, Any], np.ndarray], Any],
+                       initial_tilt: Any,
+                       level: float,
+                       pilot_runs: int = 500,
+                       elite_fraction: float = 0.1,
+                       max_iterations: int = 8,
+                       smoothing: float = 0.7,
+                       seed: Optional[int] = None,
+                       initial_batch: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Choose a tilt with the cross-entropy method
+
+    Each iteration samples pilot runs under the current tilt, takes the runs
+    whose score reaches the elite quantile (or the event level once it is
+    reached) and refits the tilt to them, weighted by their likelihood ratios.
+
+    Args:
+        sampler: Function (n_runs, tilt, seed) returning a batch with 'score'
+            (higher is more extreme) and 'log_weight' per run, plus the
+            statistics the update needs
+        update: Function (batch, elite_weight, previous_tilt, smoothing) returning
+            the refitted tilt blended with the previous one
+        initial_tilt: Starting tilt (usually the untilted model)
+        level: Score at which the rare event occurs
+        pilot_runs: Runs per iteration
+        elite_fraction: Share of runs used as elite before the level is reached
+        max_iterations: Maximum number of iterations
+        smoothing: Weight of the refitted tilt against the previous one
+        seed: Random seed of the first iteration
+        initial_batch: Batch already sampled under initial_tilt, used as the first
+            iteration
+
+    Returns:
+        Dict with the chosen 'tilt', 'iterations' and the intermediate 'levels'
+    """
+    tilt = initial_tilt
+    levels = []
+
+    for iteration in range(max_iterations):
+        if iteration == 0 and initial_batch is not None:
+            batch = initial_batch
+        else:
+            batch = sampler(pilot_runs, tilt, None if seed is None else seed + iteration)
+        score = batch['score']
+        elite_level = min(level, float(np.quantile(score, 1 - elite_fraction)))
+        levels.append(elite_level)
+
+        elite = score >= elite_level
+        log_weight = batch['log_weight']
+        elite_weight = np.where(elite, np.exp(log_weight - log_weight[elite].max()), 0.0)
+        tilt = update(batch, elite_weight, tilt, smoothing)
+
+        if elite_level >= level:
+            break
+
+    return {'tilt': tilt, 'iterations': len(levels), 'levels': levels}
+
+
+def _mean_shift_update(shock_sums: np.ndarray, years: np.ndarray, elite_weight: np.ndarray,
+                       previous: Any, smoothing: float, per_year: bool = False) -> Any:
+    """
+    Cross-entropy mean shift of standardized shocks along the tilt direction
+    
+    A single shift applies to every year, but a run's extreme is driven by the
+    years leading up to it, so only those years are fitted: the refitted shift
+    is the weighted mean projection over the leading years of the elite runs.
+    Per-year shifts are the weighted mean projection of each year over all
+    elite runs, up to the latest leading year (no shift after it). The refit is
+    blended with the previous shift.
+    
+    Args:
+        shock_sums: Projections of the standardized shocks on the tilt direction
+            (unit variance per year untilted), shape (runs, years)
+        years: Number of leading years fitted per run
+        elite_weight: Likelihood ratio weight of each elite run (0 for the rest)
+        previous: Previous shift (scalar or per year)
+        smoothing: Weight of the refitted shift
+        per_year: Fit one shift per year instead of a single shift
+    
+    Returns:
+        Shift in standard deviations (float, or (years,) array if per_year)
+    """
+    leading = np.arange(shock_sums.shape[1]) < years[:, np.newaxis]
+    if not per_year:
+        fitted = (elite_weight * (shock_sums * leading).sum(axis=1)).sum() / (elite_weight * years).sum()
+        return float(smoothing * fitted + (1 - smoothing) * previous)
+    
+    window = np.arange(shock_sums.shape[1]) < years[elite_weight > 0].max()
+    fitted = elite_weight @ shock_sums / elite_weight.sum()
+    return np.where(window, smoothing * fitted + (1 - smoothing) * np.asarray(previous, dtype=float), 0.0)
+
+
+def _tilt_window(shift: Any, years: int, horizon: int) -> np.ndarray:
+    """Per-year tilt applying a shift (scalar or per year) in the leading years only"""
+    return np.where(np.arange(horizon) < years, shift, 0.0)
+
+
+def _window_update(crisis_years: np.ndarray, elite_weight: np.ndarray) -> int:
+    """Tilted leading years: up to the latest extreme among the elite runs"""
+    return int(crisis_years[elite_weight > 0].max())
+
+
+def _adaptive_config(config: Dict[str, Any], stress_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Cross-entropy settings shared by all tests, overridden per test"""
+    return {**config.get('stress_testing', {}).get('adaptive', {}), **stress_config.get('adaptive', {})}
+
+
+def _adaptive_summary(sampler, update, tilt, initial_tilt, level, n_runs, adaptive_config, seed):
+    """
+    Sample and summarize the final batch, choosing the tilt first if none is given
+
+    An untilted pilot estimates the event probability; events that are not rare
+    (at least 'rare_probability') are estimated by plain Monte Carlo, the others
+    under a cross-entropy tilt started from the pilot.
+    """
+    adaptation = None
+    pilot_probability = None
+    if tilt is None:
+        pilot_runs = adaptive_config.get('pilot_runs', max(100, n_runs))
+        pilot_seed = None if seed is None else seed + 1000
+        pilot = sampler(pilot_runs, initial_tilt, pilot_seed)
+        pilot_probability = float(np.mean(pilot['score'] >= level))
+        tilt = initial_tilt
+        if pilot_probability < adaptive_config.get('rare_probability', 0.02):
+            adaptation = cross_entropy_tilt(
+                sampler, update, initial_tilt, level,
+                pilot_runs=pilot_runs,
+                elite_fraction=adaptive_config.get('elite_fraction', 0.1),
+                max_iterations=adaptive_config.get('max_iterations', 8),
+                smoothing=adaptive_config.get('smoothing', 0.7),
+                seed=pilot_seed,
+                initial_batch=pilot
+            )
+            tilt = adaptation['tilt']
+
+    batch = sampler(n_runs, tilt, seed)
+    summary = summarize_importance_sample(batch['score'] >= level, batch['log_weight'], batch['values'],
+                                          adaptive_config.get('min_effective_sample_size', 50))
+    if 'warning' in summary:
+        print(f"Warning: {summary['warning']}")
+    summary['tilt'] = tilt.tolist() if isinstance(tilt, np.ndarray) else tilt
+    if pilot_probability is not None:
+        summary['pilot_probability'] = pilot_probability
+    if adaptation is not None:
+        summary['adaptive_iterations'] = adaptation['iterations']
+        summary['adaptive_levels'] = adaptation['levels']
+    return summary
+
+
+def stress_test_reserve_crisis(config: Dict[str, Any],
+                               n_paths: int = 2000,
+                               horizon: int = 26,
+                               threshold_months: float = 3.0,
+                               shock_tilt: Optional[Dict[str, float]] = None,
+                               seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Probability that reserves fall below a months-of-imports threshold
+
+    Paths come from the vectorized exchange-rate path engine. A rare crisis is
+    sampled with the depreciation ('market') and external flow ('flows') shocks
+    mean-shifted toward the crisis region: one shift per shock and year, in the
+    leading 'years' of the horizon in which crises occur.
+
+    Args:
+        config: Full simulation configuration ('exchange_rate_config' and
+            'stress_testing.reserve_crisis' are used)
+        n_paths: Number of simulated paths
+        horizon: Number of years
+        threshold_months: Reserve adequacy threshold in months of imports
+        shock_tilt: Mean shifts of the 'market' and 'flows' shocks in standard
+            deviations (scalars or per year) with the optional number of tilted
+            leading 'years' (plain Monte Carlo or a cross-entropy tilt if None and
+            not configured)
+        seed: Random seed
+
+    Returns:
+        Importance sampling summary with conditional expectations of the final
+        exchange rate, lowest reserve cover and mean depreciation
+    """
+    stress_config = config.get('stress_testing', {}).get('reserve_crisis', {})
+    if shock_tilt is None:
+        shock_tilt = stress_config.get('shock_tilt')
+
+    balance_factors = ExternalBalanceFactors()
+    balance_factors.capital_outflow_propensity = stress_config.get(
+        'capital_outflow_propensity', balance_factors.capital_outflow_propensity)
+    engine = ExchangeRatePathEngine(ExchangeRateModel(config.get('exchange_rate_config', {})), balance_factors)
+
+    years = np.arange(horizon)
+    inputs = {
+        'gdp': stress_config.get('gdp', 460000) * (1 + stress_config.get('gdp_growth', 0.06)) ** years,
+        'exports': stress_config.get('exports', 55000) * (1 + stress_config.get('export_growth', 0.07)) ** years,
+        'imports': stress_config.get('imports', 65000) * (1 + stress_config.get('import_growth', 0.07)) ** years,
+    }
+
+    def sampler(n_runs, tilt, batch_seed):
+        window = tilt.get('years', horizon)
+        shifts = {name: _tilt_window(tilt.get(name, 0.0), window, horizon) for name in ('market', 'flows')}
+        paths = engine.simulate(n_paths=n_runs, horizon=horizon, shock_tilt=shifts, seed=batch_seed, **inputs)
+        return {
+            'score': -paths['reserve_months'].min(axis=1),
+            'log_weight': paths['log_weight'],
+            'shock_sums': paths['shock_sums'],
+            'crisis_years': paths['reserve_months'].argmin(axis=1) + 1,
+            'values': {
+                'final_exchange_rate': paths['exchange_rate'][:, -1],
+                'min_reserve_months': paths['reserve_months'].min(axis=1),
+                'mean_depreciation': paths['depreciation_rate'].mean(axis=1),
+            },
+        }
+
+    def update(batch, elite_weight, previous, smoothing):
+        tilt = {name: _mean_shift_update(batch['shock_sums'][name], batch['crisis_years'], elite_weight,
+                                         previous[name], smoothing, per_year=True)
+                for name in ('market', 'flows')}
+        tilt['years'] = _window_update(batch['crisis_years'], elite_weight)
+        return tilt
+
+    # Score is -min(reserve_months); the event is reserves below the threshold
+    summary = _adaptive_summary(sampler, update, shock_tilt, {'market': 0.0, 'flows': 0.0, 'years': horizon},
+                                np.nextafter(-threshold_months, np.inf), n_paths,
+                                _adaptive_config(config, stress_config), seed)
+    if isinstance(summary['tilt'], dict):
+        summary['tilt'] = {name: np.asarray(value).tolist() for name, value in summary['tilt'].items()}
+    summary['event'] = f'reserve_months < {threshold_months}'
+    return summary
+
+
+def stress_test_trade_wars(config: Dict[str, Any],
+                           n_runs: int = 1000,
+                           start_year: int = 2025,
+                           end_year: int = 2050,
+                           min_concurrent: int = 4,
+                           start_probability_tilt: Optional[float] = None,
+                           tension_level: float = 0.5,
+                           regional_cooperation: float = 0.5,
+                           seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Probability of several trade wars being active at the same time
+
+    All runs of a batch are paths of one vectorized trade war process. When the
+    event is rare, trade war start probabilities are scaled by the tilt factor
+    and each run is reweighted by the likelihood ratio of its start draws.
+
+    Args:
+        config: Full simulation configuration ('geopolitical_config' and
+            'stress_testing.trade_wars' are used)
+        n_runs: Number of simulated runs
+        start_year: First simulated year
+        end_year: Last simulated year
+        min_concurrent: Number of concurrently active trade wars defining the event
+        start_probability_tilt: Factor applied to start probabilities (plain Monte
+            Carlo or a cross-entropy factor if None and not configured)
+        tension_level: Global tension level (0-1)
+        regional_cooperation: Regional cooperation level (0-1)
+        seed: Random seed
+
+    Returns:
+        Importance sampling summary with conditional expectations of the peak
+        tariff escalation and mean vulnerability score
+    """
+    stress_config = config.get('stress_testing', {}).get('trade_wars', {})
+    if start_probability_tilt is None:
+        start_probability_tilt = stress_config.get('start_probability_tilt')
+    trade_war_config = config.get('geopolitical_config', {}).get('trade_war_probability', {})
+
+    def sampler(batch_runs, tilt, batch_seed):
+        # All runs of a batch are paths of one vectorized trade war process
+        rng = np.random.default_rng(batch_seed)
+        model = TradeWarImpactsModel(copy.deepcopy(trade_war_config), n_paths=batch_runs)
+        model.start_probability_tilt = tilt
+
+        max_concurrent = np.zeros(batch_runs, dtype=int)
+        peak_tariff_escalation = np.zeros(batch_runs)
+        total_vulnerability = np.zeros(batch_runs)
+        years = range(start_year, end_year + 1)
+        for year in years:
+            result = model.simulate_paths(year, tension_level, regional_cooperation, rng)
+            max_concurrent = np.maximum(max_concurrent, result['active_count'])
+            peak_tariff_escalation = np.maximum(peak_tariff_escalation, result['tariff_escalation'])
+            total_vulnerability += result['vulnerability_score']
+
+        return {
+            'score': max_concurrent.astype(float),
+            'log_weight': model.log_likelihood_ratio,
+            'start_count': model.start_count,
+            'start_probability_sum': model.start_probability_sum,
+            'values': {
+                'peak_tariff_escalation': peak_tariff_escalation,
+                'mean_vulnerability_score': total_vulnerability / len(years),
+            },
+        }
+
+    def update(batch, elite_weight, previous, smoothing):
+        # Factor on start probabilities: elite starts per unit of untilted start probability
+        factor = (elite_weight * batch['start_count']).sum() / (elite_weight * batch['start_probability_sum']).sum()
+        return float(max(smoothing * factor + (1 - smoothing) * previous, 1.0))
+
+    summary = _adaptive_summary(sampler, update, start_probability_tilt, 1.0, min_concurrent, n_runs,
+                                _adaptive_config(config, stress_config), seed)
+    summary['event'] = f'{min_concurrent}+ concurrent trade wars'
+    return summary
+
+
+def stress_test_regional_breakdown(config: Dict[str, Any],
+                                   n_runs: int = 1000,
+                                   start_year: int = 2025,
+                                   end_year: int = 2050,
+                                   stability_threshold: float = 0.3,
+                                   relations_shock_tilt: Optional[float] = None,
+                                   cooperation_level: float = 0.5,
+                                   seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Probability of a regional breakdown (SAARC-collapse style shock)
+
+    The event is the regional stability score falling below the threshold in
+    some year. All runs of a batch are paths of one vectorized relations
+    process. Bilateral relation shocks are mean-shifted toward deterioration
+    along the direction of their effect on the stability score, by one shift
+    in the leading 'years' of the horizon until a path reaches the event; each
+    run is reweighted by the likelihood ratio of its tilted years.
+
+    Args:
+        config: Full simulation configuration ('geopolitical_config' and
+            'stress_testing.regional_breakdown' are used)
+        n_runs: Number of simulated runs
+        start_year: First simulated year
+        end_year: Last simulated year
+        stability_threshold: Stability score defining the breakdown
+        relations_shock_tilt: Mean shift of relation shocks in standard deviations,
+            a scalar, per year, or a dict with the 'shift' and the number of tilted
+            leading 'years' (plain Monte Carlo or a cross-entropy tilt if None and
+            not configured)
+        cooperation_level: Regional cooperation level (0-1)
+        seed: Random seed
+
+    Returns:
+        Importance sampling summary with conditional expectations of the lowest
+        stability score and the lowest India relationship score
+    """
+    stress_config = config.get('stress_testing', {}).get('regional_breakdown', {})
+    if relations_shock_tilt is None:
+        relations_shock_tilt = stress_config.get('relations_shock_tilt')
+    regional_config = config.get('geopolitical_config', {}).get('regional_integration', {})
+    horizon = end_year - start_year + 1
+
+    # Tilt relation shocks in proportion to their effect on the stability score
+    model = RegionalIntegrationModel(regional_config)
+    direction = {country: STABILITY_WEIGHTS.get(country, 0.0) * relations['volatility']
+                 for country, relations in model.bilateral_relations.items()}
+    norm = np.sqrt(sum(value ** 2 for value in direction.values()))
+    model.relations_shock_direction = {country: value / norm for country, value in direction.items()}
+    india = list(model.bilateral_relations).index('india')
+
+    def sampler(batch_runs, tilt, batch_seed):
+        if isinstance(tilt, dict):
+            tilt = _tilt_window(tilt['shift'], tilt.get('years', horizon), horizon)
+        paths = model.simulate_relation_paths(batch_runs, horizon, cooperation_level, shock_tilt=tilt,
+                                              stop_level=stability_threshold,
+                                              rng=np.random.default_rng(batch_seed))
+        min_stability = paths['stability_score'].min(axis=1)
+        return {
+            'score': -min_stability,
+            'log_weight': paths['log_weight'],
+            'shock_sums': paths['shock_sums'],
+            # Years up to the lowest stability, or to the breakdown once reached
+            'crisis_years': np.minimum(paths['stability_score'].argmin(axis=1) + 1, paths['tilted_years']),
+            'values': {
+                'min_stability_score': min_stability,
+                'min_india_relationship_score': paths['relationship_score'][:, :, india].min(axis=1),
+            },
+        }
+
+    def update(batch, elite_weight, previous, smoothing):
+        return {
+            'shift': _mean_shift_update(batch['shock_sums'], batch['crisis_years'], elite_weight,
+                                        previous['shift'], smoothing),
+            'years': _window_update(batch['crisis_years'], elite_weight),
+        }
+
+    summary = _adaptive_summary(sampler, update, relations_shock_tilt, {'shift': 0.0, 'years': horizon},
+                                np.nextafter(-stability_threshold, np.inf), n_runs,
+                                _adaptive_config(config, stress_config), seed)
+    summary['event'] = f'stability_score < {stability_threshold}'
+    return summary
+
+
+def run_stress_tests(config: Dict[str, Any],
+                     start_year: int = 2025,
+                     end_year: int = 2050,
+                     n_runs: Optional[int] = None,
+                     seed: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run all rare-event stress tests
+
+    Args:
+        config: Full simulation configuration
+        start_year: First simulated year
+        end_year: Last simulated year
+        n_runs: Runs per test (from 'stress_testing.runs' if None)
+        seed: Random seed
+
+    Returns:
+        Dict of importance sampling summaries keyed by test
+    """
+    stress_config = config.get('stress_testing', {})
+    if n_runs is None:
+        n_runs = stress_config.get('runs', 1000)
+
+    return {
+        'reserve_crisis': stress_test_reserve_crisis(
+            config, n_paths=n_runs, horizon=end_year - start_year + 1,
+            threshold_months=stress_config.get('reserve_crisis', {}).get('threshold_months', 3.0),
+            seed=seed),
+        'trade_wars': stress_test_trade_wars(
+            config, n_runs=n_runs, start_year=start_year, end_year=end_year,
+            min_concurrent=stress_config.get('trade_wars', {}).get('min_concurrent', 4),
+            seed=seed),
+        'regional_breakdown': stress_test_regional_breakdown(
+            config, n_runs=n_runs, start_year=start_year, end_year=end_year,
+            stability_threshold=stress_config.get('regional_breakdown', {}).get('stability_threshold', 0.3),
+            seed=seed),
+    }
@@ -0,0 +1,7 @@
+"""
+Shared test setup: tests import the models and simulation packages from the project root.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
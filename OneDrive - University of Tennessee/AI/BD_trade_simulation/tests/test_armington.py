@@ -0,0 +1,90 @@
+"""
+Tests for the line-level Armington tariff engine.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.armington import ArmingtonTariffEngine, hs6_sectors
+
+MARKETS = {'eu': [276, 250], 'us': [842]}
+
+
+@pytest.fixture(scope='module')
+def trade():
+    # Bangladesh (50) exports and one competitor's flows into two of the same lines
+    return pd.DataFrame([
+        (2022, 50, 276, 610910, 100.0),
+        (2022, 50, 250, 610990, 80.0),
+        (2022, 50, 842, 611020, 60.0),
+        (2022, 50, 842, 620342, 40.0),
+        (2022, 50, 276, 30617, 20.0),
+        (2022, 50, 842, 531010, 50.0),
+        (2022, 50, 392, 610910, 10.0),
+        (2022, 152, 842, 531010, 50.0),
+        (2022, 152, 276, 30617, 60.0),
+        (2021, 50, 276, 610910, 999.0),
+    ], columns=['t', 'i', 'j', 'k', 'v'])
+
+
+@pytest.fixture(scope='module')
+def engine(trade):
+    return ArmingtonTariffEngine.from_trade_data(trade, MARKETS)
+
+
+def flow_index(engine, product, destination):
+    codes = engine.products[engine.flow_products]
+    destinations = engine.destinations[engine.flow_destinations]
+    return int(np.flatnonzero((codes == product) & (destinations == destination))[0])
+
+
+def test_latest_year_flows_and_import_shares(engine):
+    assert engine.exports.sum() == pytest.approx(360.0)
+    assert engine.flow_import_shares[flow_index(engine, 531010, 842)] == pytest.approx(0.5)
+    assert engine.flow_import_shares[flow_index(engine, 30617, 276)] == pytest.approx(0.25)
+    assert engine.flow_import_shares[flow_index(engine, 610910, 276)] == pytest.approx(1.0)
+    assert list(hs6_sectors([610910, 30617, 531010])) == ['rmg', 'frozen_food', 'jute']
+
+
+def test_ces_response_matches_hand_computation():
+    # Small supplier: value changes by ratio^-sigma, e.g. rmg (sigma 4.5) facing a 12% tariff
+    engine = ArmingtonTariffEngine([610910, 30617], [276, 842], [100.0, 20.0], MARKETS)
+    result = engine.simulate({'eu': 0.12, 'us': 0.02}, {'eu': 0.0, 'us': 0.05})
+    # 100 * 1.12^4.5 (tariff removed) and 20 * (1.05 / 1.02)^-3.5 (frozen food, sigma 3.5)
+    assert result['by_market']['eu']['scenario'] == pytest.approx(100.0 * 1.6652564, rel=1e-6)
+    assert result['by_market']['us']['scenario'] == pytest.approx(20.0 * 0.9035206, rel=1e-6)
+    assert result['by_sector']['rmg']['change_pct'] == pytest.approx(66.52564, rel=1e-6)
+    assert result['lines_affected'] == 2
+
+    # Supplier with half the market (jute, sigma 3): ratio^-3 / (0.5 * ratio^-2 + 0.5) for a 10% tariff
+    engine = ArmingtonTariffEngine([531010], [842], [50.0], MARKETS, import_shares=[0.5])
+    result = engine.simulate({'us': 0.0}, {'us': 0.1})
+    assert result['scenario'] == pytest.approx(50.0 * 0.8227067, rel=1e-6)
+    assert result['tariff_changes']['jute']['us'] == pytest.approx(0.1)
+
+    # Configured elasticities override the sector defaults
+    engine = ArmingtonTariffEngine([610910], [276], [100.0], MARKETS, elasticities={'rmg': 2.0})
+    assert engine.simulate({'eu': 0.0}, {'eu': 0.12})['scenario'] == pytest.approx(100.0 / 1.12 ** 2)
+
+
+def test_line_rates_use_the_most_specific_hs_prefix(engine):
+    spec = {'default': 0.05, '61': 0.10, '6109': 0.20, '610910': 0.30, 62: 0.12, '0306': 0.07}
+    rates = engine.line_rates({'eu': spec, 'us': spec, 'other': 0.01, 'unknown': 0.5})
+    expected = {
+        (610910, 276): 0.30,  # HS6 over HS4 and HS2
+        (610990, 250): 0.20,  # HS4 over HS2
+        (611020, 842): 0.10,  # HS2 over the default
+        (620342, 842): 0.12,  # integer chapter key
+        (30617, 276): 0.07,   # heading key with a leading zero
+        (531010, 842): 0.05,  # default
+        (610910, 392): 0.01,  # scalar rate of the 'other' market
+    }
+    for (product, destination), rate in expected.items():
+        assert rates[flow_index(engine, product, destination)] == pytest.approx(rate), (product, destination)
+
+    # Integer keys that lost a leading zero keep their level
+    assert engine.line_rates({'eu': {303: 0.4, 306: 0.09}})[flow_index(engine, 30617, 276)] == pytest.approx(0.09)
+    assert engine.line_rates({'us': 0.2})[flow_index(engine, 610910, 276)] == 0.0
+
+    with pytest.raises(ValueError):
+        engine.line_rates({'eu': {'6109101': 0.1}})
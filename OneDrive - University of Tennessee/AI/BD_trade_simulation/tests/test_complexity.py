@@ -0,0 +1,95 @@
+"""
+Tests for economic complexity indices and the product space.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.rca import RCAEngine
+from models.complexity import ComplexityEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    # Nested exports: diversified countries export both ubiquitous and rare products
+    rng = np.random.default_rng(7)
+    n_countries, n_products = 25, 60
+    capability = np.linspace(0.15, 0.9, n_countries)
+    difficulty = np.linspace(0.05, 0.95, n_products)
+    rows = []
+    for row, country in enumerate(range(1, n_countries + 1)):
+        exported = rng.random(n_products) < np.clip(capability[row] + 0.3 - difficulty, 0.02, 0.98)
+        for product in np.flatnonzero(exported):
+            rows.append((2021, country, 100000 + product, rng.lognormal(2.0, 1.0)))
+    trade = pd.DataFrame(rows, columns=['t', 'i', 'k', 'v'])
+    country_codes = pd.DataFrame({'country_code': [999], 'country_name': ['No exports']})
+    return ComplexityEngine(RCAEngine(trade, country_codes))
+
+
+def dense_specialization(engine):
+    return (engine.rca_engine.rca_matrix(2021).toarray() >= engine.threshold).astype(float)
+
+
+def standardize(values):
+    return (values - values.mean()) / values.std()
+
+
+def test_eci_is_the_second_eigenvector_of_the_country_matrix(engine):
+    M = dense_specialization(engine)
+    active = M.sum(axis=1) > 0
+    M = M[active][:, M.sum(axis=0) > 0]
+    k_c, k_p = M.sum(axis=1), M.sum(axis=0)
+    M_cc = (M / k_c[:, None]) @ (M / k_p).T
+
+    eigenvalues, eigenvectors = np.linalg.eig(M_cc)
+    order = np.argsort(-eigenvalues.real)
+    assert eigenvalues[order[0]].real == pytest.approx(1.0)
+    expected = standardize(eigenvectors[:, order[1]].real)
+    if np.corrcoef(expected, k_c)[0, 1] < 0:
+        expected = -expected
+
+    indices = engine.complexity(2021)
+    eci = indices['eci'].to_numpy()
+    np.testing.assert_allclose(eci[active], expected, atol=1e-8)
+    assert np.isnan(eci[~active]).all()
+    assert np.nanmean(eci) == pytest.approx(0.0, abs=1e-12)
+    assert np.nanstd(eci) == pytest.approx(1.0)
+
+    pci = indices['pci'].dropna().to_numpy()
+    np.testing.assert_allclose(pci, standardize(M.T @ expected / k_p), atol=1e-8)
+    np.testing.assert_array_equal(indices['diversity'].to_numpy()[active], k_c)
+
+
+def test_reflections_agree_with_the_eigenvector_method(engine):
+    eigen = engine.complexity(2021)
+    reflected = engine.reflections(2021)
+    for index in ('eci', 'pci'):
+        assert np.corrcoef(eigen[index].dropna(), reflected[index].dropna())[0, 1] > 0.99
+
+
+def test_proximity_is_the_minimum_conditional_probability(engine):
+    M = dense_specialization(engine)
+    ubiquity = M.sum(axis=0)
+    co_occurrence = M.T @ M
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.nan_to_num(co_occurrence / np.maximum.outer(ubiquity, ubiquity))
+    np.fill_diagonal(expected, 0.0)
+
+    proximity = engine.proximity(2021).toarray()
+    np.testing.assert_allclose(proximity, expected, rtol=1e-12)
+    np.testing.assert_array_equal(proximity, proximity.T)
+    assert proximity.min() >= 0.0 and proximity.max() <= 1.0
+
+
+def test_density_is_the_proximity_weighted_share_of_advantages(engine):
+    M = dense_specialization(engine)
+    proximity = engine.proximity(2021).toarray()
+    totals = proximity.sum(axis=0)
+    country = engine.rca_engine.countries[10]
+
+    expected = np.divide(M[10] @ proximity, totals, out=np.zeros(len(totals)), where=totals > 0)
+    np.testing.assert_allclose(engine.density(country, 2021).to_numpy(), expected, rtol=1e-12)
+
+    opportunities = engine.diversification_opportunities(country, 2021, n=5)
+    assert (opportunities['rca'] < engine.threshold).all()
+    assert opportunities['density'].is_monotonic_decreasing
@@ -0,0 +1,94 @@
+"""
+Tests for export concentration indices.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.diversification import DiversificationAnalysis, DIVERSIFICATION_LEVELS
+
+
+@pytest.fixture(scope='module')
+def trade():
+    # Bangladesh (50) and other exporters over three years; the potential cells include
+    # HS codes and partners that only other exporters trade
+    rng = np.random.default_rng(9)
+    products = [610910, 610990, 620342, 620462, 30617, 30499, 420221, 530310, 300490]
+    rows = []
+    for year in (2019, 2020, 2021):
+        for exporter in (50, 356, 156):
+            for importer in (842, 276, 826, 392, 50, 356):
+                if importer == exporter:
+                    continue
+                for product in products:
+                    own_product = product not in (300490, 530310)
+                    if rng.random() < (0.7 if exporter == 50 and own_product else 0.5 * (exporter != 50)):
+                        rows.append((year, exporter, importer, product, rng.lognormal(3.0, 2.0)))
+    return pd.DataFrame(rows, columns=['t', 'i', 'j', 'k', 'v'])
+
+
+def direct_indices(trade, year, digits, by_partner):
+    """HHI and Theil of one year and level from grouped shares"""
+    own = trade[(trade['i'] == 50) & (trade['t'] == year)]
+    partners = np.setdiff1d(trade['j'].unique(), [50])
+    keys = []
+    if digits is not None:
+        keys.append(own['k'] // 10 ** (6 - digits))
+    if by_partner:
+        keys.append(own['j'])
+    shares = own.groupby(keys)['v'].sum()
+    shares = shares / shares.sum()
+
+    potential = len(partners) if digits is None else len(np.unique(trade['k'] // 10 ** (6 - digits)))
+    if digits is not None and by_partner:
+        potential *= len(partners)
+    return {
+        'hhi': (shares ** 2).sum(),
+        'theil': (shares * np.log(shares * potential)).sum(),
+        'active': len(shares),
+        'potential': potential,
+    }
+
+
+@pytest.fixture(scope='module')
+def table(trade):
+    return DiversificationAnalysis(exporter=50).fit(trade)
+
+
+def test_indices_match_direct_computation(trade, table):
+    for year in (2019, 2020, 2021):
+        for level, (digits, by_partner) in DIVERSIFICATION_LEVELS.items():
+            row = table.loc[(year, level)]
+            expected = direct_indices(trade, year, digits, by_partner)
+            assert row['active'] == expected['active']
+            assert row['potential'] == expected['potential']
+            assert row['hhi'] == pytest.approx(expected['hhi'], rel=1e-12)
+            assert row['theil'] == pytest.approx(expected['theil'], rel=1e-10)
+
+
+def test_theil_splits_into_within_and_between(table):
+    np.testing.assert_allclose(table['theil'], table['theil_within'] + table['theil_between'], rtol=1e-12)
+    np.testing.assert_allclose(table['theil_between'], np.log(table['potential'] / table['active']), rtol=1e-12)
+    assert (table['theil_within'] >= -1e-12).all() and (table['theil_between'] >= 0).all()
+
+
+def test_normalized_hhi_is_bounded_and_consistent(table):
+    active = table['active']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.where(active > 1, (table['hhi'] - 1 / active) / (1 - 1 / active), 1.0)
+    np.testing.assert_allclose(table['normalized_hhi'], expected, rtol=1e-12)
+    assert ((table['hhi'] >= 1 / active - 1e-12) & (table['hhi'] <= 1)).all()
+    assert ((table['normalized_hhi'] >= -1e-12) & (table['normalized_hhi'] <= 1)).all()
+    # Finer levels are never more concentrated than the levels they refine
+    for coarse, fine in (('hs2', 'hs4'), ('hs4', 'hs6'), ('hs6', 'hs6_partner'), ('partner', 'hs2_partner')):
+        assert (table.xs(fine, level='level')['hhi'] <= table.xs(coarse, level='level')['hhi'] + 1e-12).all()
+
+
+def test_chunks_and_cache_give_the_same_table(trade, table, tmp_path):
+    chunks = [trade.iloc[start:start + 50] for start in range(0, len(trade), 50)]
+    pd.testing.assert_frame_equal(DiversificationAnalysis(exporter=50).fit(chunks), table)
+
+    first = DiversificationAnalysis(exporter=50, cache_dir=str(tmp_path)).fit(trade)
+    cached = DiversificationAnalysis(exporter=50, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(cached.fit(trade), first, check_dtype=False)
+    assert cached.path('hs6', 'theil').index.tolist() == [2019, 2020, 2021]
@@ -0,0 +1,108 @@
+"""
+Tests for the vectorized exchange-rate path engine and reserve-crisis probabilities.
+"""
+import numpy as np
+import pytest
+
+from models.exchange_rate import (ExchangeRateModel, ExternalBalanceFactors, ExchangeRatePathEngine,
+                                  reserve_crisis_probability)
+
+HORIZON = 5
+GDP, EXPORTS, IMPORTS = 450000.0, 90000.0, 75000.0
+POLICY = {'intervention_stance': 0.5}
+
+
+def scalar_paths(n_paths, global_conditions, seed):
+    """Scalar models stepped year by year with the coupling of the path engine"""
+    outputs = {name: np.empty((n_paths, HORIZON)) for name in (
+        'depreciation_rate', 'reserve_months', 'remittances', 'intervened')}
+    for path in range(n_paths):
+        model, factors = ExchangeRateModel({}), ExternalBalanceFactors()
+        model.rng = factors.rng = np.random.default_rng([seed, path])
+        previous_depreciation, trade_level = 0.0, [1.0, 1.0]
+        for t in range(HORIZON):
+            flows = factors.simulate_flows(t, GDP, EXPORTS, previous_depreciation, 0.5, 0.5)
+            result = model.simulate_exchange_rate(t, {
+                'exports': EXPORTS * trade_level[0],
+                'imports': IMPORTS * trade_level[1],
+                'remittances': flows['remittances']['total'],
+                'fdi': flows['fdi']['total'],
+                'aid_loans': flows['aid_loans']['total'],
+                'profit_repatriation': flows['profit_repatriation'],
+                'other_outflows': flows['other_outflows'],
+            }, POLICY, global_conditions)
+            previous_depreciation = result['depreciation_rate']
+            trade_level[0] *= 1 + model.export_elasticity * previous_depreciation
+            trade_level[1] *= 1 - model.import_elasticity * previous_depreciation
+            outputs['depreciation_rate'][path, t] = previous_depreciation
+            outputs['reserve_months'][path, t] = result['reserve_months']
+            outputs['remittances'][path, t] = flows['remittances']['total']
+            outputs['intervened'][path, t] = result['intervention_cost'] > 0
+    return outputs
+
+
+def simulate(n_paths, global_conditions=None, shock_tilt=None, seed=0):
+    engine = ExchangeRatePathEngine(ExchangeRateModel({}))
+    return engine.simulate(n_paths, HORIZON, GDP, EXPORTS, IMPORTS, central_bank_policy=POLICY,
+                           global_conditions=global_conditions, shock_tilt=shock_tilt, seed=seed)
+
+
+@pytest.mark.parametrize('global_conditions', [{}, {'dollar_index': 2.6}], ids=['calm', 'intervention'])
+def test_paths_match_scalar_model_in_distribution(global_conditions):
+    scalar = scalar_paths(2000, global_conditions, seed=1)
+    paths = simulate(20000, global_conditions, seed=2)
+
+    # Shares are renormalized once per year rather than after each corridor, which
+    # lowers remittances by about 0.3% and compounds in reserves over the horizon
+    allowance = {'depreciation_rate': 0.0, 'reserve_months': 0.1, 'remittances': 0.005 * 37500, 'intervened': 0.0}
+    for name, extra in allowance.items():
+        expected, actual = scalar[name], paths[name].astype(float)
+        standard_error = np.hypot(expected.std(axis=0) / np.sqrt(len(expected)),
+                                  actual.std(axis=0) / np.sqrt(len(actual)))
+        assert np.all(np.abs(actual.mean(axis=0) - expected.mean(axis=0)) <= 4 * standard_error + extra + 1e-12), name
+        if name != 'intervened':
+            np.testing.assert_allclose(actual.std(axis=0), expected.std(axis=0), rtol=0.1, err_msg=name)
+    if global_conditions:
+        assert paths['intervened'].mean() > 0.5
+
+
+def test_paths_are_reproducible_under_a_seed():
+    first, second = simulate(500, seed=11), simulate(500, seed=11)
+    for name in ('exchange_rate', 'reserve_months', 'remittances', 'intervened', 'log_weight'):
+        np.testing.assert_array_equal(first[name], second[name])
+    assert not np.array_equal(first['exchange_rate'], simulate(500, seed=12)['exchange_rate'])
+
+
+def test_importance_weights_average_to_one():
+    n_paths = 40000
+    tilted = simulate(n_paths, shock_tilt={'market': 0.6, 'flows': np.linspace(0.2, 0.6, HORIZON)}, seed=5)
+    weights = np.exp(tilted['log_weight'])
+    assert weights.mean() == pytest.approx(1.0, abs=4 * weights.std() / np.sqrt(n_paths))
+    assert np.all(simulate(100, seed=5)['log_weight'] == 0.0)
+
+    # The reweighted tilted paths recover untilted expectations
+    plain = simulate(n_paths, seed=6)
+    for name in ('depreciation_rate', 'reserve_months'):
+        reweighted = weights @ tilted[name][:, -1] / n_paths
+        estimate_error = (weights * tilted[name][:, -1]).std() / np.sqrt(n_paths)
+        plain_error = plain[name][:, -1].std() / np.sqrt(n_paths)
+        assert reweighted == pytest.approx(plain[name][:, -1].mean(), abs=4 * np.hypot(estimate_error, plain_error))
+
+
+def test_reserve_crisis_probability_counts_paths_below_threshold():
+    reserve_months = np.array([
+        [5.0, 4.0, 2.5, 3.5],
+        [2.9, 3.2, 3.1, 3.0],
+        [6.0, 6.0, 6.0, 6.0],
+        [4.0, 3.5, 3.0, 2.0],
+    ])
+    crisis = reserve_crisis_probability({'reserve_months': reserve_months}, threshold_months=3.0)
+    np.testing.assert_allclose(crisis['annual_probability'], [0.25, 0.0, 0.25, 0.25])
+    np.testing.assert_allclose(crisis['cumulative_probability'], [0.25, 0.25, 0.5, 0.75])
+    assert crisis['probability'] == pytest.approx(0.75)
+    assert crisis['standard_error'] == pytest.approx(np.sqrt(0.75 * 0.25 / 4))
+
+    paths = simulate(4000, {'dollar_index': 2.6}, seed=9)
+    crisis = reserve_crisis_probability(paths, threshold_months=2.0)
+    assert crisis['probability'] == pytest.approx(float((paths['reserve_months'] < 2.0).any(axis=1).mean()))
+    assert np.all(np.diff(crisis['cumulative_probability']) >= 0)
@@ -0,0 +1,43 @@
+"""
+Tests for the export sector response to trade war order diversion.
+"""
+import copy
+import os
+
+import pytest
+import yaml
+
+from models.geopolitical import TradeWarImpactsModel
+from simulation.simulation_engine import TradeSimulationEngine
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'config', 'default_config.yaml')
+
+
+@pytest.fixture(scope='module')
+def config():
+    with open(CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+    config['save_intermediate_results'] = False
+    return config
+
+
+def total_exports(config):
+    engine = TradeSimulationEngine(copy.deepcopy(config), 2025, 2050, 'baseline')
+    results = engine.run_simulation(verbose=False)
+    return {year: data['export']['total_exports'] for year, data in results['yearly_data'].items()}
+
+
+def test_default_baseline_ignores_order_diversion(config, monkeypatch):
+    default = total_exports(config)
+    with monkeypatch.context() as patch:
+        patch.setattr(TradeWarImpactsModel, 'export_sector_opportunities', lambda self, *args, **kwargs: {})
+        without_diversion = total_exports(config)
+    assert default == without_diversion
+
+
+def test_configured_order_diversion_raises_exports(config):
+    configured = copy.deepcopy(config)
+    configured['export_sector_config']['elasticities'] = {'order_diversion': 0.1}
+    default, diverted = total_exports(config), total_exports(configured)
+    assert diverted[2050] > default[2050]
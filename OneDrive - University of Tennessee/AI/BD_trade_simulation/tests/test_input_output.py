@@ -0,0 +1,76 @@
+"""
+Tests for the Leontief input-output model.
+"""
+import numpy as np
+import pytest
+
+from models.input_output import InputOutputModel
+
+EXPORTS = {'rmg': 40000.0, 'pharma': 200.0, 'it_services': 1300.0, 'leather': 1800.0, 'jute': 1200.0,
+           'agro_products': 800.0}
+
+
+def dense_system(model):
+    A = model.domestic_coefficients.toarray()
+    return np.eye(len(model.sectors)) - A, model.import_coefficients.toarray()
+
+
+def test_cached_solve_matches_dense_leontief_inverse():
+    model = InputOutputModel()
+    leontief, A_md = dense_system(model)
+    final_demand = model.final_demand(EXPORTS)
+
+    solution = model.solve(final_demand)
+    expected = np.linalg.solve(leontief, final_demand)
+    np.testing.assert_allclose(solution['output'], expected, rtol=1e-12)
+    np.testing.assert_allclose(solution['imports'], A_md @ expected, rtol=1e-12)
+    np.testing.assert_allclose(solution['category_imports'].sum(), (A_md @ expected).sum(), rtol=1e-12)
+    assert np.all(solution['output'] >= final_demand)
+
+    # Many paths at once, and the total import content per unit of final demand
+    demands = np.random.default_rng(0).uniform(0, 1000, size=(len(model.sectors), 50))
+    np.testing.assert_allclose(model.solve(demands)['output'], np.linalg.solve(leontief, demands), rtol=1e-12)
+    np.testing.assert_allclose(model.import_content(), A_md @ np.linalg.inv(leontief), rtol=1e-12, atol=1e-15)
+
+    requirements = model.import_requirements(EXPORTS)
+    assert requirements['total_imports'] == pytest.approx((A_md @ expected).sum())
+    assert requirements['import_content_share'] == pytest.approx((A_md @ expected).sum() / sum(EXPORTS.values()))
+
+
+def test_factorization_is_reused_until_coefficients_change():
+    model = InputOutputModel()
+    for _ in range(5):
+        model.import_requirements(EXPORTS)
+        model.import_content()
+    assert model.factorizations_computed == 1
+
+    # A changed domestic coefficient rebuilds the factorization and the solution follows the new A
+    model.substitute_imports('rmg', 'fabric', 'textiles', 0.5)
+    leontief, A_md = dense_system(model)
+    final_demand = model.final_demand(EXPORTS)
+    np.testing.assert_allclose(model.solve(final_demand)['output'], np.linalg.solve(leontief, final_demand),
+                               rtol=1e-12)
+    model.solve(final_demand)
+    assert model.factorizations_computed == 2
+
+    # Returning to earlier coefficients reuses their cached factorization
+    model.update_coefficient('rmg', 'textiles', 0.20)
+    model.update_coefficient('rmg', 'fabric', 0.25)
+    baseline = InputOutputModel()
+    np.testing.assert_allclose(model.solve(final_demand)['output'], baseline.solve(final_demand)['output'],
+                               rtol=1e-12)
+    assert model.factorizations_computed == 2
+
+    # Imported-input coefficients do not enter I - A_dd, so they keep the factorization
+    model.update_coefficient('rmg', 'machinery', 0.05)
+    model.solve(final_demand)
+    assert model.factorizations_computed == 2
+
+
+def test_factorization_cache_is_bounded():
+    model = InputOutputModel({'max_cached_factorizations': 2})
+    for value in (0.10, 0.12, 0.14, 0.10):
+        model.update_coefficient('rmg', 'textiles', value)
+        model.factorization()
+    assert len(model._factorizations) == 2
+    assert model.factorizations_computed == 4
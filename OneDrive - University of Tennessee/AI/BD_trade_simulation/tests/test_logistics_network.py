@@ -0,0 +1,75 @@
+"""
+Tests for min-cost flow routing of container volume.
+"""
+import copy
+import os
+
+import numpy as np
+import pytest
+import yaml
+from scipy.optimize import linprog
+
+from models.logistics_network import LogisticsNetwork
+from simulation.simulation_engine import TradeSimulationEngine
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'config', 'default_config.yaml')
+
+
+@pytest.fixture(scope='module')
+def config():
+    with open(CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+    config['save_intermediate_results'] = False
+    config['logistics_config']['network']['enabled'] = True
+    return config
+
+
+def cold_solve(network, volume, costs, capacities):
+    result = linprog(costs, A_eq=network.incidence, b_eq=network.supply_shares * volume,
+                     bounds=np.column_stack([np.zeros(network.n_edges), capacities]), method='highs')
+    return result.fun
+
+
+def test_reused_basis_is_optimal_under_drifting_data():
+    # Volume, capacities, costs and waiting times drift every year, as in an engine run
+    rng = np.random.default_rng(2)
+    network = LogisticsNetwork()
+    accepted = 0
+    for year in range(2025, 2051):
+        volume = 3000 * 1.07 ** (year - 2025)
+        if network.reference_volume is None:
+            network.reference_volume = volume
+        capacity_growth = 1.05 ** (year - 2025)
+        capacities = network.edge_capacities(year, {'chittagong': 3300 * 1.06 ** (year - 2025)},
+                                             {'road': capacity_growth, 'rail': capacity_growth,
+                                              'waterway': capacity_growth})
+        costs = network.edge_costs({mode: rng.uniform(0.9, 1.0) for mode in ('road', 'rail', 'waterway')},
+                                   {port: rng.uniform(1, 4) for port in network.ports})
+
+        flow, warm_started = network.solve(volume, costs, capacities)
+        accepted += warm_started
+        np.testing.assert_allclose(network.incidence @ flow, network.supply_shares * volume, atol=1e-6 * volume)
+        assert np.all(flow >= -1e-9) and np.all(flow <= capacities + 1e-6)
+        assert costs @ flow == pytest.approx(cold_solve(network, volume, costs, capacities), rel=1e-9)
+
+    assert network.solve_count + accepted == 26
+    assert accepted >= 13
+
+
+def test_engine_run_reuses_the_basis_with_unchanged_results(config, monkeypatch):
+    engine = TradeSimulationEngine(copy.deepcopy(config), 2025, 2050, 'baseline')
+    warm = engine.run_simulation(verbose=False)['yearly_data']
+    network = engine.models['logistics'].network
+    # Over the 26-year horizon only the first year and basis changes are solved
+    assert network.solve_count <= 4
+
+    with monkeypatch.context() as patch:
+        patch.setattr(LogisticsNetwork, '_warm_start', lambda self, *args: None)
+        engine = TradeSimulationEngine(copy.deepcopy(config), 2025, 2050, 'baseline')
+        cold = engine.run_simulation(verbose=False)['yearly_data']
+        assert engine.models['logistics'].network.solve_count == 26
+
+    for year in warm:
+        for key in ('network_cost_index', 'network_unserved_volume', 'logistics_cost'):
+            assert warm[year]['logistics'][key] == pytest.approx(cold[year]['logistics'][key], rel=1e-9, abs=1e-9)
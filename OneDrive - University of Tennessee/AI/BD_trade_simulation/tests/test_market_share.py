@@ -0,0 +1,84 @@
+"""
+Tests for the constant-market-share decomposition.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.market_share import constant_market_share, CMS_COMPONENTS
+
+PRODUCTS = [610910, 620342, 30617, 300490, 420221, 530310]
+
+
+@pytest.fixture(scope='module')
+def trade():
+    # Bangladesh (50) and four competitors over four years; some cells appear and vanish
+    rng = np.random.default_rng(5)
+    rows = []
+    for year in range(2018, 2022):
+        for exporter in (50, 356, 156, 704, 144):
+            for destination in (842, 276, 826, 392):
+                for product in PRODUCTS:
+                    if rng.random() < 0.75:
+                        rows.append((year, exporter, destination, product, rng.lognormal(4.0, 1.0)))
+    return pd.DataFrame(rows, columns=['t', 'i', 'j', 'k', 'v'])
+
+
+def loop_decomposition(trade, start_year, end_year, competitors=None):
+    """Textbook CMS decomposition with dictionaries over (product, destination) cells"""
+    own = trade[trade['i'] == 50]
+    reference = trade[trade['i'] != 50]
+    if competitors is not None:
+        reference = reference[reference['i'].isin(competitors)]
+
+    def totals(frame, year, keys):
+        return frame[frame['t'] == year].groupby(keys)['v'].sum().to_dict()
+
+    X0, X1 = totals(own, start_year, ['k', 'j']), totals(own, end_year, ['k', 'j'])
+    W0, W1 = totals(reference, start_year, ['k', 'j']), totals(reference, end_year, ['k', 'j'])
+    P0, P1 = totals(reference, start_year, 'k'), totals(reference, end_year, 'k')
+    T0 = reference.loc[reference['t'] == start_year, 'v'].sum()
+    T1 = reference.loc[reference['t'] == end_year, 'v'].sum()
+
+    r = T1 / T0 - 1
+    effects = dict.fromkeys(CMS_COMPONENTS, 0.0)
+    for cell in set(X0) | set(X1):
+        product = cell[0]
+        x0, x1 = X0.get(cell, 0.0), X1.get(cell, 0.0)
+        r_k = P1.get(product, 0.0) / P0[product] - 1 if P0.get(product, 0.0) > 0 else r
+        r_kj = W1.get(cell, 0.0) / W0[cell] - 1 if W0.get(cell, 0.0) > 0 else r_k
+        effects['world_growth_effect'] += r * x0
+        effects['commodity_composition_effect'] += (r_k - r) * x0
+        effects['market_distribution_effect'] += (r_kj - r_k) * x0
+        effects['competitiveness_effect'] += x1 - x0 - r_kj * x0
+    return effects
+
+
+def test_components_sum_to_the_export_change(trade):
+    result = constant_market_share(trade)
+    np.testing.assert_allclose(result[list(CMS_COMPONENTS)].sum(axis=1), result['change'], rtol=1e-10)
+
+    own = trade[trade['i'] == 50].groupby('t')['v'].sum()
+    np.testing.assert_allclose(result['exports_end'], own.loc[result.index].to_numpy())
+    np.testing.assert_array_equal(result['start_year'], result.index - 1)
+
+
+@pytest.mark.parametrize('competitors', [None, [356, 704]])
+def test_components_match_the_cell_by_cell_decomposition(trade, competitors):
+    result = constant_market_share(trade, competitors=competitors)
+    for year, row in result.iterrows():
+        expected = loop_decomposition(trade, row['start_year'], year, competitors)
+        for component in CMS_COMPONENTS:
+            assert row[component] == pytest.approx(expected[component], rel=1e-9, abs=1e-6)
+
+
+def test_sector_breakdown_adds_up_to_the_totals(trade):
+    totals = constant_market_share(trade)
+    sectors = constant_market_share(trade, by_sector=True)
+
+    summed = sectors.groupby(level='year')[['exports_start', 'exports_end', 'change', *CMS_COMPONENTS]].sum()
+    np.testing.assert_allclose(summed.to_numpy(), totals[summed.columns].to_numpy(), rtol=1e-10)
+    np.testing.assert_allclose(sectors[list(CMS_COMPONENTS)].sum(axis=1), sectors['change'], rtol=1e-9, atol=1e-6)
+
+    regrouped = constant_market_share(trade, by_sector=True, product_groups={610910: 'tshirts'})
+    assert 'tshirts' in regrouped.index.get_level_values('group')
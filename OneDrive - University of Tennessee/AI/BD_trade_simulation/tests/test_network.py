@@ -0,0 +1,81 @@
+"""
+Tests for trade network centrality against networkx.
+"""
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.network import TradeNetwork
+
+
+@pytest.fixture(scope='module')
+def network():
+    # Random flows among 15 countries in three chapters, two years; some exporters only sell chapter 03
+    rng = np.random.default_rng(21)
+    rows = []
+    for year in (2020, 2021):
+        for exporter in range(1, 16):
+            for importer in range(1, 16):
+                if exporter == importer:
+                    continue
+                for product in (610910, 620342, 30617):
+                    if rng.random() < (0.2 if exporter > 12 and product != 30617 else 0.5):
+                        rows.append((year, exporter, importer, product, rng.lognormal(3.0, 1.5)))
+    return TradeNetwork(pd.DataFrame(rows, columns=['t', 'i', 'j', 'k', 'v']))
+
+
+def networkx_graph(adjacency, countries, directed=True):
+    graph = nx.DiGraph() if directed else nx.Graph()
+    sources, targets = adjacency.nonzero()
+    for source, target in zip(sources, targets):
+        weight = adjacency[source, target]
+        if not directed and graph.has_edge(countries[source], countries[target]):
+            weight += graph[countries[source]][countries[target]]['weight']
+        graph.add_edge(countries[source], countries[target], weight=weight)
+    return graph
+
+
+@pytest.fixture(scope='module')
+def table(network):
+    return network.centrality(max_workers=1)
+
+
+def test_centrality_matches_networkx(network, table):
+    for year in network.years:
+        for name in ('all', 'rmg', '03'):
+            adjacency = network.adjacency(year, name)
+            rows = table[(table['year'] == year) & (table['network'] == name)].set_index('country')
+            graph = networkx_graph(adjacency, network.countries)
+            assert set(rows.index) == set(graph.nodes)
+
+            # Rank flows from importers to the exporters supplying them
+            expected_rank = pd.Series(nx.pagerank(graph.reverse(), alpha=network.damping, tol=1e-12))
+            np.testing.assert_allclose(rows['pagerank'], expected_rank[rows.index], atol=1e-5)
+            assert rows['pagerank'].sum() == pytest.approx(1.0)
+
+            hubs, authorities = nx.hits(graph, max_iter=1000, tol=1e-12)
+            np.testing.assert_allclose(rows['hub'], pd.Series(hubs)[rows.index], atol=1e-6)
+            np.testing.assert_allclose(rows['authority'], pd.Series(authorities)[rows.index], atol=1e-6)
+
+            clustering = nx.clustering(networkx_graph(adjacency, network.countries, directed=False), weight='weight')
+            np.testing.assert_allclose(rows['clustering'], pd.Series(clustering)[rows.index], atol=1e-10)
+
+            np.testing.assert_allclose(rows['out_strength'],
+                                       pd.Series(dict(graph.out_degree(weight='weight')))[rows.index])
+            np.testing.assert_allclose(rows['in_strength'],
+                                       pd.Series(dict(graph.in_degree(weight='weight')))[rows.index])
+
+
+def test_worker_processes_give_the_same_table(network, table):
+    parallel = TradeNetwork(network.trade_data).centrality(max_workers=2)
+    pd.testing.assert_frame_equal(parallel, table)
+
+
+def test_country_centrality_ranks_within_each_year(network, table):
+    country = network.country_centrality(country=1, network='all')
+    assert list(country.index) == network.years
+    for year, row in country.iterrows():
+        ranks = table[(table['year'] == year) & (table['network'] == 'all')]['pagerank']
+        assert row['pagerank_rank'] == 1 + (ranks > row['pagerank']).sum()
+        assert row['countries'] == len(ranks)
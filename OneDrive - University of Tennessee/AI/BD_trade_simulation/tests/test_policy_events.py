@@ -0,0 +1,114 @@
+"""
+Tests for the policy event scheduler.
+"""
+import numpy as np
+import pytest
+
+from models.policy_events import PolicyEventScheduler, policy_events_from_config
+
+START_YEAR, END_YEAR = 2025, 2036
+YEARS = np.arange(START_YEAR, END_YEAR + 1)
+QUALITY = np.linspace(0.5, 0.9, len(YEARS))
+
+EVENTS = [
+    {'name': 'eu', 'year': 2028, 'probability': 0.3},
+    {'name': 'ldc_graduation', 'year': 2026, 'probability': None},
+    {'name': 'japan', 'year': 2025, 'probability': 0.15},
+    {'name': 'rcep', 'year': 2028, 'probability': 0.6},
+]
+
+
+def bernoulli_fire_probabilities(event, quality):
+    """Probability of firing in each year, and of not firing, with a Bernoulli draw per eligible year"""
+    annual = np.where(YEARS >= event['year'], 1.0 if event['probability'] is None else event['probability'] * quality, 0.0)
+    survival = np.concatenate([[1.0], np.cumprod(1 - annual)])
+    return np.append(survival[:-1] * annual, survival[-1])
+
+
+def fire_histogram(fire_years):
+    """Share of timelines firing in each year, and not firing, per event"""
+    index = np.where(np.isnan(fire_years), len(YEARS), fire_years - START_YEAR).astype(int)
+    return np.stack([np.bincount(index[:, event], minlength=len(YEARS) + 1) / len(index)
+                     for event in range(index.shape[1])])
+
+
+def assert_matches_bernoulli(frequencies, n_timelines, quality):
+    for event, observed in zip(EVENTS, frequencies):
+        expected = bernoulli_fire_probabilities(event, quality)
+        standard_error = np.sqrt(expected * (1 - expected) / n_timelines)
+        assert np.all(np.abs(observed - expected) <= 4 * standard_error + 1e-12), event['name']
+
+
+def test_advance_fires_with_the_bernoulli_hazard():
+    n_timelines = 4000
+    fire_years = np.full((n_timelines, len(EVENTS)), np.nan)
+    names = [event['name'] for event in EVENTS]
+    rng = np.random.default_rng(1)
+    for timeline in range(n_timelines):
+        scheduler = PolicyEventScheduler(EVENTS)
+        for year, quality in zip(YEARS, QUALITY):
+            for event in scheduler.advance(int(year), quality, rng):
+                assert year >= event['year']
+                fire_years[timeline, names.index(event['name'])] = year
+    assert_matches_bernoulli(fire_histogram(fire_years), n_timelines, QUALITY)
+
+    # A literal Bernoulli draw per event and eligible year gives the same histogram
+    draws = np.random.default_rng(2).random((n_timelines, len(EVENTS), len(YEARS)))
+    annual = np.stack([bernoulli_fire_probabilities(event, QUALITY)[:-1] for event in EVENTS])
+    hazard = np.stack([np.where(YEARS >= event['year'], 1.0 if event['probability'] is None
+                                else event['probability'] * QUALITY, 0.0) for event in EVENTS])
+    fires = draws < hazard
+    first = np.where(fires.any(axis=2), START_YEAR + fires.argmax(axis=2), np.nan)
+    assert_matches_bernoulli(fire_histogram(first), n_timelines, QUALITY)
+    assert annual.sum(axis=1) == pytest.approx(fires.any(axis=2).mean(axis=0), abs=0.03)
+
+
+def test_scheduled_events_fire_in_their_year_in_configuration_order():
+    scheduler = PolicyEventScheduler(EVENTS + [{'name': 'second', 'year': 2026, 'probability': None}])
+    rng = np.random.default_rng(0)
+    assert [event['name'] for event in scheduler.advance(2025, 0.0, rng)] == []
+    assert [event['name'] for event in scheduler.advance(2026, 0.0, rng)] == ['ldc_graduation', 'second']
+    assert scheduler.fired == {'ldc_graduation': 2026, 'second': 2026}
+    assert all(scheduler.advance(int(year), 0.0, rng) == [] for year in YEARS[2:])
+
+
+@pytest.mark.parametrize('quality', [0.8, QUALITY], ids=['scalar', 'per_year'])
+def test_sampled_timelines_match_the_bernoulli_hazard(quality):
+    n_timelines = 50000
+    timelines = PolicyEventScheduler(EVENTS).sample_timelines(n_timelines, START_YEAR, END_YEAR, quality, seed=3)
+    quality = np.broadcast_to(quality, YEARS.shape)
+
+    assert timelines['events'] == ['japan', 'ldc_graduation', 'eu', 'rcep']
+    sorted_events = [EVENTS[2], EVENTS[1], EVENTS[0], EVENTS[3]]
+    for event, observed, cumulative in zip(sorted_events, fire_histogram(timelines['fire_years']),
+                                           timelines['cumulative_probability']):
+        expected = bernoulli_fire_probabilities(event, quality)
+        standard_error = np.sqrt(expected * (1 - expected) / n_timelines)
+        assert np.all(np.abs(observed - expected) <= 4 * standard_error + 1e-12), event['name']
+        np.testing.assert_allclose(cumulative, observed[:-1].cumsum())
+    assert timelines['summary']['ldc_graduation']['probability'] == 1.0
+    assert timelines['summary']['ldc_graduation']['median_year'] == 2026
+
+
+def test_sampled_timelines_are_deterministic_under_a_seed():
+    scheduler = PolicyEventScheduler(EVENTS)
+    first = scheduler.sample_timelines(2000, START_YEAR, END_YEAR, QUALITY, seed=7)
+    second = scheduler.sample_timelines(2000, START_YEAR, END_YEAR, QUALITY, seed=7)
+    np.testing.assert_array_equal(first['fire_years'], second['fire_years'])
+    np.testing.assert_array_equal(first['cumulative_probability'], second['cumulative_probability'])
+    assert first['summary'] == second['summary']
+
+    other = scheduler.sample_timelines(2000, START_YEAR, END_YEAR, QUALITY, seed=8)
+    assert not np.array_equal(np.nan_to_num(first['fire_years']), np.nan_to_num(other['fire_years']))
+
+
+def test_events_from_config():
+    events = policy_events_from_config({
+        'ldc_graduation': {'year': 2026},
+        'fta_implementation': {'proposed_ftas': {'japan': {'year': 2029, 'probability': 0.4}}},
+    })
+    assert [(event['name'], event['kind'], event['year'], event['probability']) for event in events] == [
+        ('ldc_graduation', 'ldc_graduation', 2026, None),
+        ('japan', 'fta', 2029, 0.4),
+        ('rcep', 'rcep_accession', 2032, 0.4),
+    ]
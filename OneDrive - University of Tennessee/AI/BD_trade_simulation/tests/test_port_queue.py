@@ -0,0 +1,53 @@
+"""
+Tests for the discrete-event port congestion model.
+"""
+import numpy as np
+import pytest
+
+from models.port_queue import HOURS_PER_YEAR, PortQueueSimulator, _pool_lane_stats
+
+
+def lane(arrival, start, service, call_teu=None, yard_ratio=None):
+    n_calls = len(arrival)
+    return {
+        'arrival': np.asarray(arrival, dtype=float),
+        'start': np.asarray(start, dtype=float),
+        'service': np.asarray(service, dtype=float),
+        'call_teu': np.full(n_calls, 1000.0) if call_teu is None else np.asarray(call_teu, dtype=float),
+        'yard_ratio': np.full(n_calls, 0.5) if yard_ratio is None else np.asarray(yard_ratio, dtype=float),
+    }
+
+
+def test_pooled_stats_of_constructed_lanes():
+    # One berth: the second and third vessels queue behind the first
+    first = lane([0, 5, 6], [0, 100, 200], [100, 100, 100], yard_ratio=[0.2, 0.4, 0.6])
+    second = lane([10], [10], [50], call_teu=[2000])
+    stats = _pool_lane_stats([first, second], berths=1)
+
+    assert stats['vessel_calls'] == 2
+    assert stats['throughput_teu'] == pytest.approx(2500.0)
+    assert stats['mean_waiting_hours'] == pytest.approx((0 + 95 + 194 + 0) / 4)
+    assert stats['mean_service_hours'] == pytest.approx(350 / 4)
+    assert stats['max_queue_length'] == 1  # The third vessel finds the second waiting
+    assert stats['berth_occupancy'] == pytest.approx(350 / (2 * HOURS_PER_YEAR))
+    assert stats['mean_yard_utilization'] == pytest.approx((0.2 + 0.4 + 0.6 + 0.5) / 4)
+
+
+def test_occupancy_counts_berth_hours_within_the_year():
+    # A call starting 10 hours before the year ends counts 10 hours; one starting after it none
+    late = lane([HOURS_PER_YEAR - 50, HOURS_PER_YEAR - 20],
+                [HOURS_PER_YEAR - 10, HOURS_PER_YEAR + 30], [100, 100])
+    stats = _pool_lane_stats([late], berths=1)
+    assert stats['berth_occupancy'] == pytest.approx(10 / HOURS_PER_YEAR)
+    assert stats['mean_service_hours'] == pytest.approx(100)
+
+
+@pytest.mark.parametrize('load', [0.5, 0.95, 1.2])
+def test_simulated_occupancy_tracks_load_and_stays_below_one(load):
+    simulator = PortQueueSimulator({'replications': 4})
+    stats = simulator.simulate(load * simulator.design_throughput(), rng=np.random.default_rng(1))
+
+    assert 0 < stats['berth_occupancy'] <= 1
+    assert stats['berth_occupancy'] == pytest.approx(min(load, 1.0), abs=0.05)
+    assert stats['offered_load'] == pytest.approx(load)
+    assert not stats['load_capped']
@@ -0,0 +1,108 @@
+"""
+Tests for the Balassa RCA engine.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.rca import RCAEngine
+
+
+def synthetic_trade(seed: int = 0, n_countries: int = 12, n_products: int = 40) -> pd.DataFrame:
+    """Random sparse exporter x HS6 flows over two years, with duplicate rows"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for year in (2020, 2021):
+        for country in range(1, n_countries + 1):
+            products = rng.choice(n_products, size=rng.integers(3, n_products // 2), replace=False)
+            for product in products:
+                rows.append((year, country * 10, 610000 + product, rng.lognormal(3.0, 1.5)))
+    trade = pd.DataFrame(rows, columns=['t', 'i', 'k', 'v'])
+    # Split some flows into two rows, as partners are aggregated away
+    return pd.concat([trade, trade.iloc[::5].assign(v=lambda frame: frame['v'] / 3)], ignore_index=True)
+
+
+def dense_exports(trade: pd.DataFrame, engine: RCAEngine, year: int) -> np.ndarray:
+    table = trade[trade['t'] == year].pivot_table(index='i', columns='k', values='v', aggfunc='sum', fill_value=0.0)
+    return table.reindex(index=engine.countries, columns=engine.products, fill_value=0.0).to_numpy()
+
+
+@pytest.fixture(scope='module')
+def trade():
+    return synthetic_trade()
+
+
+@pytest.fixture(scope='module')
+def engine(trade):
+    country_codes = pd.DataFrame({'country_code': [10, 50, 999], 'country_name': ['A', 'Bangladesh', 'Z']})
+    return RCAEngine(trade, country_codes)
+
+
+def test_export_matrix_matches_pivot(trade, engine):
+    for year in engine.years:
+        np.testing.assert_allclose(engine.export_matrix(year).toarray(), dense_exports(trade, engine, year))
+    # Countries from the code table without exports get zero rows
+    assert engine.export_matrix(2021)[engine.country_row(999)].nnz == 0
+
+
+def test_rca_matches_dense_balassa(trade, engine):
+    for year in engine.years:
+        exports = dense_exports(trade, engine, year)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected = (exports / exports.sum(axis=1, keepdims=True)) / (exports.sum(axis=0) / exports.sum())
+        expected = np.nan_to_num(expected)
+        np.testing.assert_allclose(engine.rca_matrix(year).toarray(), expected, rtol=1e-12)
+
+
+def test_weighted_mean_rca_is_one(engine):
+    # sum_p RCA_cp X_p / X = 1 for every exporter, and sum_c RCA_cp X_c / X = 1 for every product
+    exports = engine.export_matrix(2021).toarray()
+    rca = engine.rca_matrix(2021).toarray()
+    country_totals = exports.sum(axis=1)
+    product_totals = exports.sum(axis=0)
+    world = exports.sum()
+
+    exporting, traded = country_totals > 0, product_totals > 0
+    np.testing.assert_allclose((rca @ product_totals / world)[exporting], 1.0, rtol=1e-12)
+    np.testing.assert_allclose((rca.T @ country_totals / world)[traded], 1.0, rtol=1e-12)
+
+
+def test_specialization_and_country_lookups(engine):
+    rca = engine.rca_matrix(2020).toarray()
+    specialization = engine.specialization_matrix(2020, threshold=1.0).toarray()
+    np.testing.assert_array_equal(specialization, (rca >= 1.0).astype(float))
+
+    country = engine.countries[3]
+    np.testing.assert_allclose(engine.country_rca(country, 2020).to_numpy(), rca[3])
+    advantages = engine.revealed_advantages(country, 2020)
+    assert (advantages >= 1.0).all()
+    assert len(advantages) == int(specialization[3].sum())
+    assert advantages.is_monotonic_decreasing
+
+
+def test_top_countries_are_the_highest_rca(engine):
+    product = engine.products[7]
+    rca = engine.rca_matrix(2021).toarray()[:, 7]
+    top = engine.top_countries(product, 2021, n=3)
+
+    expected = np.sort(rca[rca > 0])[::-1][:3]
+    np.testing.assert_allclose(top['rca'].to_numpy(), expected)
+    names = dict(zip(top['country_code'], top['country_name']))
+    assert all(name == ('A' if code == 10 else str(code)) for code, name in names.items())
+
+
+def test_group_rca_aggregates_exports_before_balassa(engine):
+    groups = np.where(engine.products % 2 == 0, 'even', 'odd')
+    labels, rca = engine.group_rca(groups, 2021)
+    exports = engine.export_matrix(2021).toarray()
+    grouped = np.column_stack([exports[:, groups == label].sum(axis=1) for label in labels])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.nan_to_num((grouped / grouped.sum(axis=1, keepdims=True)) / (grouped.sum(axis=0) / grouped.sum()))
+    assert labels == ['even', 'odd']
+    np.testing.assert_allclose(rca.toarray(), expected, rtol=1e-12)
+
+
+def test_unknown_year_raises(engine):
+    with pytest.raises(ValueError):
+        engine.rca_matrix(1999)
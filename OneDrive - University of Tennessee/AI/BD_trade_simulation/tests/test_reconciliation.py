@@ -0,0 +1,121 @@
+"""
+Tests for mirror trade data reconciliation.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.reconciliation import MirrorReconciliation, RECONCILIATION_STATUSES
+
+CIF_MARGIN = 0.05
+COUNTS = {'matched': 30, 'discrepant': 12, 'reported_only': 7, 'mirror_only': 9}
+
+
+def synthetic_sources(seed: int = 0):
+    """Reported and mirror flows of Bangladesh with a known number of flows of each status"""
+    rng = np.random.default_rng(seed)
+    reported, mirror, statuses = [], [], []
+    flow = 0
+    for status, count in COUNTS.items():
+        for _ in range(count):
+            flow += 1
+            export = flow % 2 == 0
+            partner = (842, 356, 156)[flow % 3]
+            year = 2019 + flow % 3
+            i, j = (50, partner) if export else (partner, 50)
+            t, k = year, 610000 + flow
+            fob = rng.uniform(100, 1000)
+            # The import side is valued CIF
+            own, other = (fob, fob * (1 + CIF_MARGIN)) if export else (fob * (1 + CIF_MARGIN), fob)
+            if status == 'matched':
+                other *= rng.uniform(0.9, 1.1)
+            elif status == 'discrepant':
+                other *= rng.choice([0.4, 2.0])
+            if status != 'mirror_only':
+                reported.append((t, i, j, k, own))
+            if status != 'reported_only':
+                mirror.append((t, i, j, k, other))
+            statuses.append(status)
+
+    # A large relative gap on a tiny flow is not flagged; third-country flows are ignored
+    reported.append((2020, 50, 842, 999999, 2.0))
+    mirror.append((2020, 50, 842, 999999, 6.0))
+    statuses.append('matched')
+    mirror.append((2020, 356, 842, 610000, 500.0))
+
+    columns = ['t', 'i', 'j', 'k', 'v']
+    reported = pd.DataFrame(reported, columns=columns)
+    # Split one reported flow into two rows; they are summed
+    reported = pd.concat([reported, reported.iloc[[0]].assign(v=1.0)], ignore_index=True)
+    return reported, pd.DataFrame(mirror, columns=columns), statuses
+
+
+@pytest.fixture(scope='module')
+def sources():
+    return synthetic_sources()
+
+
+@pytest.fixture(scope='module')
+def reconciliation(sources):
+    reported, mirror, _ = sources
+    return MirrorReconciliation(cif_margin=CIF_MARGIN).fit(reported, mirror)
+
+
+def test_rows_are_the_union_of_flows_with_known_statuses(sources, reconciliation):
+    reported, mirror, statuses = sources
+    flows = reconciliation.flows()
+    own = mirror[(mirror['i'] == 50) | (mirror['j'] == 50)]
+    union = pd.concat([reported, own])[['t', 'i', 'j', 'k']].drop_duplicates()
+
+    assert len(flows) == len(union) == len(statuses)
+    assert flows['status'].value_counts().to_dict() == pd.Series(statuses).value_counts().to_dict()
+    assert flows[['t', 'i', 'j', 'k']].duplicated().sum() == 0
+    assert (flows['direction'] == np.where(flows['i'] == 50, 'export', 'import')).all()
+
+
+def test_values_are_fob_and_reconciled_by_status(reconciliation):
+    flows = reconciliation.flows()
+    matched = flows[flows['status'] == 'matched']
+    assert (matched['reconciled'] == matched['reported']).all()
+    assert ((matched['relative_discrepancy'].abs() <= 0.25) | (matched[['reported', 'mirror']].max(axis=1) <= 10)).all()
+
+    discrepant = flows[flows['status'] == 'discrepant']
+    assert (discrepant['reconciled'] == discrepant['mirror']).all()
+    assert (discrepant['relative_discrepancy'].abs() > 0.25).all()
+
+    one_sided = flows[flows['status'].isin(['reported_only', 'mirror_only'])]
+    np.testing.assert_array_equal(one_sided['reconciled'], one_sided['reported'].fillna(one_sided['mirror']))
+
+
+def test_summary_counts_and_totals_add_up(reconciliation):
+    flows = reconciliation.flows()
+    summary = reconciliation.summary()
+    counts = summary[list(RECONCILIATION_STATUSES)].sum()
+    assert counts.to_dict() == {status: COUNTS[status] + (status == 'matched') for status in RECONCILIATION_STATUSES}
+    assert summary[list(RECONCILIATION_STATUSES)].to_numpy().sum() == len(flows)
+    assert summary['reconciled'].sum() == pytest.approx(flows['reconciled'].sum())
+
+    series = reconciliation.adjusted_series()
+    for direction in ('export', 'import'):
+        totals = flows[flows['direction'] == direction].groupby('t')['reconciled'].sum()
+        np.testing.assert_allclose(series[f'{direction}s_reconciled'], totals.reindex(series.index, fill_value=0.0))
+
+
+def test_chunked_csv_input_matches_dataframes(sources, reconciliation, tmp_path):
+    reported, mirror, _ = sources
+    reported_path, mirror_path = tmp_path / 'reported.csv', tmp_path / 'mirror.csv'
+    reported.to_csv(reported_path, index=False)
+    mirror.to_csv(mirror_path, index=False)
+
+    chunked = MirrorReconciliation(cif_margin=CIF_MARGIN).fit(str(reported_path), str(mirror_path), chunksize=7)
+    pd.testing.assert_frame_equal(chunked.flows(), reconciliation.flows())
+
+
+def test_partner_selection_keeps_only_their_flows(sources, reconciliation):
+    reported, mirror, _ = sources
+    flows = MirrorReconciliation(partners=[842], cif_margin=CIF_MARGIN).fit(reported, mirror).flows()
+    expected = reconciliation.flows()
+    expected = expected[expected['partner'] == 842].reset_index(drop=True)
+
+    assert set(flows['partner']) == {842}
+    pd.testing.assert_frame_equal(flows, expected)
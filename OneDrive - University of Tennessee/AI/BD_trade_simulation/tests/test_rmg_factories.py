@@ -0,0 +1,48 @@
+"""
+Tests for the sharded RMG factory population simulation.
+"""
+import numpy as np
+import pytest
+
+from models.rmg_factories import simulate_factory_populations, _simulate_shard
+
+CONFIG = {'n_factories': 300}
+N_YEARS, N_REPLICAS = 5, 10
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    # Per-replica demand growth, so shards must receive their own slice of replicas
+    rng = np.random.default_rng(0)
+    return {
+        'demand_growth': rng.normal(0.05, 0.03, size=(N_YEARS, N_REPLICAS)),
+        'compliance_pressure': np.linspace(0.0, 0.04, N_YEARS),
+        'tariff_changes': {'eu': 0.05},
+    }
+
+
+def simulate(inputs, max_workers, seed=42, replicas_per_shard=3):
+    return simulate_factory_populations(CONFIG, N_YEARS, N_REPLICAS, seed=seed, inputs=inputs,
+                                        replicas_per_shard=replicas_per_shard, max_workers=max_workers)
+
+
+def test_results_do_not_depend_on_the_number_of_workers(inputs):
+    serial = simulate(inputs, max_workers=1)
+    parallel = simulate(inputs, max_workers=2)
+    assert set(serial) == set(parallel)
+    for key in serial:
+        assert serial[key].shape[:2] == (N_REPLICAS, N_YEARS), key
+        np.testing.assert_array_equal(serial[key], parallel[key], err_msg=key)
+
+    # Replicas differ from each other, and another seed gives other paths
+    assert np.unique(serial['export_volume'][:, -1]).size == N_REPLICAS
+    assert not np.array_equal(serial['export_volume'], simulate(inputs, max_workers=1, seed=43)['export_volume'])
+
+
+def test_shards_are_independent_spawned_streams(inputs):
+    results = simulate(inputs, max_workers=1)
+    shard_seed = np.random.SeedSequence(42).spawn(4)[2]
+    shard_inputs = {**inputs, 'demand_growth': inputs['demand_growth'][:, 6:9]}
+    shard = _simulate_shard(CONFIG, 35000, N_YEARS, 3, shard_seed, shard_inputs)
+    for key, value in shard.items():
+        np.testing.assert_array_equal(results[key][6:9], value, err_msg=key)
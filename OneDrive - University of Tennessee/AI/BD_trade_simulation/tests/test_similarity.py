@@ -0,0 +1,96 @@
+"""
+Tests for export similarity and competitor overlap.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from models.similarity import CompetitorOverlap, share_overlap, competitor_weights, ALL_DESTINATIONS
+
+
+def test_share_overlap_matches_direct_sum_of_minimums():
+    # Rows miss products the reference exports, export products it does not, or export nothing
+    shares = np.array([
+        [0.5, 0.5, 0.0, 0.0],
+        [0.0, 0.2, 0.3, 0.5],
+        [0.0, 0.0, 0.0, 1.0],
+        [0.0, 0.0, 0.0, 0.0],
+        [0.4, 0.3, 0.3, 0.0],
+    ])
+    reference = np.array([0.4, 0.3, 0.3, 0.0])
+    overlap = share_overlap(sparse.csr_matrix(shares), reference)
+    np.testing.assert_allclose(overlap, np.minimum(shares, reference).sum(axis=1))
+    np.testing.assert_allclose(overlap, [0.7, 0.5, 0.0, 0.0, 1.0])
+
+
+@pytest.fixture(scope='module')
+def trade():
+    # Bangladesh (50) and partners with sparse, partly disjoint product baskets
+    rng = np.random.default_rng(3)
+    rows = []
+    for exporter in (50, 104, 116, 156, 699, 704):
+        for importer in (276, 826, 842, 50, 156):
+            if importer == exporter:
+                continue
+            for product in (610910, 610990, 620342, 30617, 531010, 847130):
+                if rng.random() < 0.45:
+                    rows.append((2022, exporter, importer, product, rng.lognormal(2.0, 1.0)))
+    rows.append((2022, 999, 276, 999999, 5.0))  # exports only a product Bangladesh does not
+    return pd.DataFrame(rows, columns=['t', 'i', 'j', 'k', 'v'])
+
+
+def direct_shares(flows, index, columns):
+    table = flows.pivot_table(index=index, columns='k', values='v', aggfunc='sum', fill_value=0.0)
+    table = table.reindex(columns=columns, fill_value=0.0)
+    return table.div(table.sum(axis=1), axis=0)
+
+
+def test_export_similarity_matches_direct_finger_kreinin(trade):
+    overlap = CompetitorOverlap(trade)
+    similarity = overlap.similarity(2022)
+    products = np.unique(trade['k'])
+    export_shares = direct_shares(trade, 'i', products)
+    import_shares = direct_shares(trade, 'j', products)
+    own = export_shares.loc[50]
+
+    for country, row in similarity.iterrows():
+        s = export_shares.loc[country] if country in export_shares.index else pd.Series(0.0, index=products)
+        m = import_shares.loc[country] if country in import_shares.index else pd.Series(0.0, index=products)
+        assert row['export_similarity'] == pytest.approx(np.minimum(s, own).sum()), country
+        assert row['export_complementarity'] == pytest.approx(np.minimum(m, own).sum()), country
+        if m.sum() > 0:
+            assert row['export_complementarity'] == pytest.approx(1 - np.abs(own - m).sum() / 2)
+    assert similarity.loc[999, 'export_similarity'] == 0.0
+    assert 50 not in similarity.index
+
+
+def test_destination_similarity_matches_direct_computation(trade):
+    overlap = CompetitorOverlap(trade)
+    destinations = overlap.destination_similarity(2022)
+    products = np.unique(trade['k'])
+    assert len(destinations) > 10
+
+    for (country, destination), row in destinations.iterrows():
+        flows = trade[trade['j'] == destination]
+        shares = direct_shares(flows, 'i', products)
+        own = shares.loc[50]
+        assert row['export_similarity'] == pytest.approx(np.minimum(shares.loc[country], own).sum())
+        own_products = flows.loc[flows['i'] == 50, 'k'].unique()
+        competitor = flows[(flows['i'] == country) & flows['k'].isin(own_products)]
+        assert row['overlap_value'] == pytest.approx(competitor['v'].sum())
+    np.testing.assert_allclose(destinations.groupby(level='destination')['overlap_share'].sum(), 1.0)
+
+    # Competitors in a destination without any of Bangladesh's products have no row
+    for (country, destination) in destinations.index:
+        assert destination in trade.loc[trade['i'] == 50, 'j'].values
+
+
+def test_competitor_weights_average_to_one(trade, tmp_path):
+    table = CompetitorOverlap(trade, cache_dir=str(tmp_path)).table()
+    assert set(table['destination']) >= {ALL_DESTINATIONS}
+    weights = competitor_weights(table, ['myanmar', 'cambodia', 'vietnam', 'ethiopia'])
+    assert np.mean(list(weights.values())) == pytest.approx(1.0)
+    assert weights['ethiopia'] == 0.0
+    pd.testing.assert_frame_equal(CompetitorOverlap(trade, cache_dir=str(tmp_path)).table(), table,
+                                  check_dtype=False)
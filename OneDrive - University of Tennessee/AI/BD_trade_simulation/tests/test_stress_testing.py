@@ -0,0 +1,91 @@
+"""
+Tests for the rare-event stress tests.
+"""
+import os
+
+import numpy as np
+import pytest
+import yaml
+from scipy import stats
+
+from simulation.stress_testing import (summarize_importance_sample, stress_test_regional_breakdown,
+                                       stress_test_reserve_crisis, stress_test_trade_wars)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'config', 'default_config.yaml')
+
+
+@pytest.fixture(scope='module')
+def config():
+    with open(CONFIG_PATH) as f:
+        return yaml.safe_load(f)
+
+
+def test_unit_weights_give_the_monte_carlo_estimate():
+    event = np.random.default_rng(0).random(1000) < 0.2
+    summary = summarize_importance_sample(event, np.zeros(1000))
+
+    assert summary['method'] == 'monte_carlo'
+    assert summary['probability'] == pytest.approx(event.mean())
+    assert summary['effective_sample_size'] == pytest.approx(event.sum())
+    assert summary['equivalent_monte_carlo_runs'] == pytest.approx(999.0)
+
+
+def test_shifted_gaussian_tail_matches_exact_probability():
+    # P(Z > 3) sampled from N(3, 1), weighted by the N(0, 1) / N(3, 1) likelihood ratio
+    draws = np.random.default_rng(1).normal(3.0, 1.0, 2000)
+    summary = summarize_importance_sample(draws > 3.0, -3.0 * draws + 4.5)
+
+    exact = stats.norm.sf(3.0)
+    assert summary['method'] == 'importance_sampling'
+    assert summary['reliable']
+    assert abs(summary['probability'] - exact) < 3 * summary['standard_error']
+    assert summary['equivalent_monte_carlo_runs'] > 20 * 2000
+
+
+def test_low_effective_sample_size_is_flagged():
+    event = np.ones(1000, dtype=bool)
+    log_weight = np.full(1000, -20.0)
+    log_weight[0] = 0.0
+    summary = summarize_importance_sample(event, log_weight)
+
+    assert summary['effective_sample_size'] < 2
+    assert not summary['reliable']
+    assert np.isnan(summary['equivalent_monte_carlo_runs'])
+    assert 'warning' in summary
+
+
+def test_regional_breakdown_agrees_with_plain_monte_carlo(config):
+    tilted = stress_test_regional_breakdown(config, n_runs=2000, seed=3)
+    plain = stress_test_regional_breakdown(config, n_runs=100000, seed=4,
+                                           relations_shock_tilt={'shift': 0.0})
+
+    assert tilted['method'] == 'importance_sampling'
+    assert tilted['reliable']
+    assert plain['method'] == 'monte_carlo'
+    difference = tilted['probability'] - plain['probability']
+    assert abs(difference) < 3 * np.hypot(tilted['standard_error'], plain['standard_error'])
+    # The tilt must beat plain Monte Carlo with the same number of runs
+    assert tilted['standard_error'] < plain['standard_error'] * np.sqrt(100000 / 2000) / 3
+
+
+def test_rare_reserve_crisis_agrees_with_plain_monte_carlo(config):
+    tilted = stress_test_reserve_crisis(config, n_paths=2000, threshold_months=2.0, seed=3)
+    plain = stress_test_reserve_crisis(config, n_paths=400000, threshold_months=2.0, seed=4,
+                                       shock_tilt={'market': 0.0, 'flows': 0.0})
+
+    assert tilted['method'] == 'importance_sampling'
+    assert tilted['adaptive_levels'][-1] == pytest.approx(-2.0)
+    assert tilted['reliable'] and tilted['effective_sample_size'] >= 50
+    assert plain['method'] == 'monte_carlo'
+    difference = tilted['probability'] - plain['probability']
+    assert abs(difference) < 3 * np.hypot(tilted['standard_error'], plain['standard_error'])
+    assert tilted['standard_error'] < plain['standard_error'] * np.sqrt(400000 / 2000) / 3
+
+
+def test_common_events_use_plain_monte_carlo(config):
+    summary = stress_test_trade_wars(config, n_runs=500, start_year=2025, end_year=2035, seed=5)
+
+    assert summary['method'] == 'monte_carlo'
+    assert summary['tilt'] == 1.0
+    assert summary['events_sampled'] > 0.02 * 500
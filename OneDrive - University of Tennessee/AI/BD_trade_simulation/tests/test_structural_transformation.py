@@ -0,0 +1,104 @@
+"""
+Tests for the trade data benchmarks of the structural transformation model.
+"""
+import os
+import copy
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from models.armington import hs6_sectors
+from simulation.simulation_engine import TradeSimulationEngine
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'default_config.yaml')
+
+
+@pytest.fixture(scope='module')
+def config():
+    with open(CONFIG_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    config['save_intermediate_results'] = False
+    return config
+
+
+@pytest.fixture(scope='module')
+def trade():
+    # Bangladesh (50) and 20 other exporters over chapters of several model sectors
+    rng = np.random.default_rng(5)
+    exporters = [50, *range(4, 84, 4)]
+    chapters = [3, 30, 42, 53, 61, 62, 63, 84, 85, 89, 27, 72]
+    products = [chapter * 10000 + 1000 + line for chapter in chapters for line in range(1, 5)]
+    partners = [276, 826, 842]
+    rows = []
+    for year in (2019, 2020, 2021, 2022):
+        for exporter in exporters:
+            for product in products:
+                for partner in partners:
+                    if rng.random() < (0.6 if exporter == 50 and product // 10000 in (61, 62) else 0.25):
+                        rows.append((year, exporter, partner, product, rng.lognormal(3.0, 1.0)))
+    return pd.DataFrame(rows, columns=['t', 'i', 'j', 'k', 'v'])
+
+
+@pytest.fixture(scope='module')
+def engine(config, trade, tmp_path_factory):
+    trade_path = str(tmp_path_factory.mktemp('trade') / 'trade.csv')
+    trade.to_csv(trade_path, index=False)
+    config = copy.deepcopy(config)
+    config['structural_transformation_config']['trade_benchmarks'] = {'trade_data': trade_path, 'year': 2021}
+    return TradeSimulationEngine(config, 2025, 2027, 'baseline')
+
+
+def test_sector_rca_matches_direct_balassa(trade, engine):
+    year = trade[trade['t'] == 2021]
+    exports = year.assign(sector=hs6_sectors(year['k'].to_numpy())).pivot_table(
+        index='i', columns='sector', values='v', aggfunc='sum', fill_value=0.0)
+    rca = (exports.div(exports.sum(axis=1), axis=0)) / (exports.sum(axis=0) / exports.to_numpy().sum())
+
+    benchmarks = engine.results['trade_benchmarks']['rca']
+    assert set(benchmarks) == set(exports.columns)
+    for sector, benchmark in benchmarks.items():
+        assert benchmark['rca'] == pytest.approx(rca.loc[50, sector])
+        assert benchmark['exporters'] == int((exports[sector] > 0).sum())
+        if rca.loc[50, sector] > 0:
+            assert benchmark['world_rank'] == int((rca[sector] > rca.loc[50, sector]).sum() + 1)
+        else:
+            assert benchmark['world_rank'] is None
+    assert benchmarks['rmg']['rca'] > 1.0
+    assert engine.models['structural'].export_sectors['rmg']['rca'] == benchmarks['rmg']['rca']
+
+
+def test_capability_index_is_seeded_from_eci_percentile(engine):
+    capability = engine.results['trade_benchmarks']['capability']
+    percentiles = capability['eci_percentiles']
+    assert sorted(percentiles) == [2019, 2020, 2021, 2022]
+    assert capability['capability_index'] == pytest.approx(min(0.95, max(0.05, percentiles[2022])))
+    assert 0.0 <= capability['base_capability_development'] <= 0.03
+
+
+def test_export_margins_add_up_to_the_change_in_exports(trade, engine):
+    margins = engine.results['trade_benchmarks']['export_margins']
+    totals = trade[trade['i'] == 50].groupby('t')['v'].sum()
+    assert (margins['first_year'], margins['last_year']) == (2019, 2022)
+    cumulative = margins['cumulative']
+    assert cumulative['change'] == pytest.approx(totals[2022] - totals[2019])
+    assert cumulative['change'] == pytest.approx(
+        cumulative['entry_value'] - cumulative['exit_value'] + cumulative['intensive_margin'])
+
+
+def test_benchmarks_seed_the_simulated_capability_path(config, engine):
+    seeded = engine.results['trade_benchmarks']['capability']['capability_index']
+    first_year = engine.run_simulation(verbose=False)['yearly_data'][2025]['structural_transformation']
+    default = TradeSimulationEngine(copy.deepcopy(config), 2025, 2025, 'baseline').run_simulation(verbose=False)
+    default_first_year = default['yearly_data'][2025]['structural_transformation']
+
+    # One year of development moves the index by at most a few points from its seed
+    assert -0.005 <= first_year['capability_index'] - seeded <= 0.05
+    assert -0.005 <= default_first_year['capability_index'] - 0.35 <= 0.05
+    assert first_year['capability_index'] != pytest.approx(default_first_year['capability_index'])
+
+
+def test_default_config_has_no_trade_benchmarks(config):
+    engine = TradeSimulationEngine(copy.deepcopy(config), 2025, 2025, 'baseline')
+    assert 'trade_benchmarks' not in engine.results
+    assert engine.trade_benchmarks == {}
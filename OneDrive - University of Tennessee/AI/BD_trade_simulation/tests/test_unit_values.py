@@ -0,0 +1,106 @@
+"""
+Tests for unit value sketches, quality ladder positions and the price-volume decomposition.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.unit_values import UnitValueEngine
+
+
+@pytest.fixture(scope='module')
+def trade():
+    # Log-normal world unit values per product, a few gross outliers and Bangladesh's (50) flows
+    rng = np.random.default_rng(11)
+    rows = []
+    for year in (2021, 2022):
+        for product, log_center in ((610910, 0.8), (620342, 1.3), (30617, 0.4)):
+            for exporter in range(100, 160):
+                for importer in range(200, 250):
+                    quantity = rng.lognormal(3.0, 1.0)
+                    unit_value = 10 ** rng.normal(log_center, 0.25)
+                    rows.append((year, exporter, importer, product, unit_value * quantity, quantity))
+            rows.append((year, 999, 200, product, 1e6, 1.0))  # gross outlier
+    trade = pd.DataFrame(rows, columns=['t', 'i', 'j', 'k', 'v', 'q'])
+    own = pd.DataFrame([
+        (2021, 50, 276, 610910, 600.0, 100.0),
+        (2021, 50, 842, 610910, 300.0, 60.0),
+        (2021, 50, 276, 620342, 400.0, 20.0),
+        (2021, 50, 826, 30617, 50.0, 0.0),       # no quantity
+        (2022, 50, 276, 610910, 770.0, 110.0),
+        (2022, 50, 842, 610910, 240.0, 40.0),
+        (2022, 50, 826, 620342, 250.0, 10.0),    # new market
+        (2022, 50, 276, 30617, 9e5, 1.0),        # outlier unit value
+    ], columns=['t', 'i', 'j', 'k', 'v', 'q'])
+    return pd.concat([trade, own], ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def engine(trade):
+    return UnitValueEngine().fit(trade)
+
+
+def exact_statistics(trade, trim_iqr=3.0):
+    valid = trade[(trade['v'] > 0) & (trade['q'] > 0)]
+    rows = {}
+    for (year, product), group in valid.groupby(['t', 'k']):
+        logs = np.log10(group['v'] / group['q']).to_numpy()
+        q1, q3 = np.quantile(logs, [0.25, 0.75])
+        lower, upper = q1 - trim_iqr * (q3 - q1), q3 + trim_iqr * (q3 - q1)
+        trimmed = logs[(logs >= lower) & (logs <= upper)]
+        rows[(year, product)] = dict(zip(['q1', 'q3', 'p10', 'median', 'p90'],
+                                         [q1, q3, *np.quantile(trimmed, [0.1, 0.5, 0.9])]))
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def test_sketch_quantiles_are_close_to_exact_quantiles(trade, engine):
+    statistics = engine.statistics()
+    exact = exact_statistics(trade)
+    assert statistics['observations'].min() >= 3000
+    # Interpolation within bins bounds the error by one bin (0.02); with thousands of flows the
+    # quartiles are far closer, and trimmed quantiles add the error of the fences' CDF lookups
+    tolerances = {'q1': 0.002, 'q3': 0.002, 'median': 0.005, 'p10': 0.005, 'p90': 0.005}
+    for column, tolerance in tolerances.items():
+        error = np.abs(np.log10(statistics[column].to_numpy()) - exact.loc[statistics.index, column].to_numpy())
+        assert error.max() <= 1 / engine.bins_per_decade, column
+        assert error.max() <= tolerance, column
+    np.testing.assert_allclose(statistics['ladder_length'],
+                               np.log10(statistics['p90'] / statistics['p10']), rtol=1e-12)
+
+
+def test_chunked_fit_gives_the_same_sketch(trade, engine, tmp_path):
+    shuffled = trade.sample(frac=1.0, random_state=0)
+    chunked = UnitValueEngine().fit(shuffled.iloc[start:start + 3000] for start in range(0, len(shuffled), 3000))
+    pd.testing.assert_frame_equal(chunked.statistics(), engine.statistics())
+
+    path = str(tmp_path / 'trade.csv')
+    trade.to_csv(path, index=False)
+    from_csv = UnitValueEngine().fit(path, chunksize=20000)
+    pd.testing.assert_frame_equal(from_csv.statistics(), engine.statistics(), rtol=1e-9)
+
+
+def test_outliers_are_flagged_and_excluded(engine):
+    flows = engine.exporter_flows.set_index(['t', 'k', 'j'])
+    assert flows.loc[(2022, 30617, 276), 'outlier']
+    assert flows.loc[(2021, 30617, 826), 'outlier']  # no unit value without a quantity
+    assert not flows.loc[(2021, 610910, 276), 'outlier']
+
+    position = engine.position()
+    assert (2022, 30617) not in position.index
+    assert position.loc[(2021, 610910), 'unit_value'] == pytest.approx(900.0 / 160.0)
+    assert position['percentile'].between(0, 1).all()
+
+
+def test_price_and_volume_effects_recombine_to_the_value_change(engine):
+    decomposition = engine.price_volume()
+    row = decomposition.loc[2022]
+    assert row['start_year'] == 2021
+    assert row['change'] == pytest.approx((770 + 240 + 250 + 9e5) - (600 + 300 + 400 + 50))
+    assert row['volume_effect'] + row['price_effect'] + row['other'] == pytest.approx(row['change'])
+
+    # Continuing flows: 610910 to 276 (P 6 -> 7, Q 100 -> 110) and to 842 (P 5 -> 6, Q 60 -> 40)
+    assert row['volume_effect'] == pytest.approx(6 * (110 - 100) + 5 * (40 - 60))
+    assert row['price_effect'] == pytest.approx(110 * (7 - 6) + 40 * (6 - 5))
+    assert row['volume_effect'] + row['price_effect'] == pytest.approx((770 + 240) - (600 + 300))
+    weights = (np.array([600, 300]) / 900 + np.array([770, 240]) / 1010) / 2
+    assert row['unit_value_change'] == pytest.approx((weights * np.log([7 / 6, 6 / 5])).sum())